@@ -0,0 +1,320 @@
+"""
+端到端延迟基准测试
+
+离线驱动完整的 Assistant 流水线：虚拟麦克风按实时节奏播放WAV夹具（或合成的录音），
+按夹具标注触发唤醒，STT、LLM、TTS 请求发往本地的 OpenAI 兼容替身服务（延迟和抖动可配置），
+音频写入不出声的虚拟输出。统计每个阶段的 p50/p95/p99：
+
+- wake_to_stt: 唤醒到得到识别结果（包含用户说命令的时间）
+- eos_to_first_token: 用户说完到第一个LLM文本块
+- first_token_to_first_audio: 第一个文本块到第一段音频写入输出
+- eos_to_first_audio: 用户说完到开始播放，即用户感受到的响应延迟
+
+结果保存为JSON，可以用 --compare 与另一次运行（如上一个提交）的结果对比。
+替身TTS返回PCM，基准中不包含MP3解码的耗时。
+
+用法:
+    python examples/benchmark/run_benchmark.py --iterations 10 --output results.json
+    python examples/benchmark/run_benchmark.py --speculation --compare results.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import datetime
+import subprocess
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import numpy as np
+
+# Assistant 与 main.py 一样以 src 为根导入其他模块，基准入口（包括 virtual_audio）
+# 也以 src 为根导入，避免同一模块以两个名字加载
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from core.assistant import Assistant
+from core.config import load_config
+
+from stand_ins import Latency, StandInConfig, StandInServer, TTS_SAMPLE_RATE
+from virtual_audio import Fixture, VirtualMicrophone, VirtualSink, VirtualWakeDetector, load_scenarios
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("wake_to_stt", "eos_to_first_token", "first_token_to_first_audio", "eos_to_first_audio")
+PERCENTILES = (50, 95, 99)
+
+
+class BenchmarkAssistant(Assistant):
+    """使用虚拟音频设备并记录各阶段时刻的助手"""
+
+    def __init__(self,
+                 config: Dict[str, Any],
+                 microphone: VirtualMicrophone,
+                 playback_speed: float = 1.0,
+                 wake_delay_ms: float = 0.0):
+        super().__init__(config)
+        self.microphone = microphone
+        self.playback_speed = playback_speed
+        self.wake_delay_ms = wake_delay_ms
+        self.marks: Dict[str, float] = {}
+        self.interaction_done = asyncio.Event()
+
+    def _create_recorder(self, sample_rate: int, frame_size: int) -> VirtualMicrophone:
+        return self.microphone
+
+    def _create_wake_detector(self) -> VirtualWakeDetector:
+        return VirtualWakeDetector(self.audio_bus, self.wake_delay_ms)
+
+    def _create_audio_sink(self) -> VirtualSink:
+        audio_config = self.config.get('audio', {})
+        return VirtualSink(
+            sample_rate=TTS_SAMPLE_RATE,
+            buffer_seconds=audio_config.get('output_buffer_seconds', 2.0),
+            speed=self.playback_speed
+        )
+
+    async def initialize(self) -> None:
+        await super().initialize()
+        transcribe = self.stt.transcribe_stream
+        record_stream = self.conversation.record_stream
+
+        async def timed_transcribe(frames, **kwargs) -> str:
+            text = await transcribe(frames, **kwargs)
+            self.marks["transcript"] = time.monotonic()
+            return text
+
+        async def timed_record_stream(text_stream) -> AsyncIterator[str]:
+            async for chunk in record_stream(text_stream):
+                self.marks.setdefault("first_token", time.monotonic())
+                yield chunk
+
+        self.stt.transcribe_stream = timed_transcribe
+        self.conversation.record_stream = timed_record_stream
+
+    async def on_wake_word(self, event=None) -> None:
+        self.marks["wake"] = time.monotonic()
+        await super().on_wake_word(event)
+
+    async def _run_interaction(self, event=None, after=None, trace=None) -> None:
+        try:
+            await super()._run_interaction(event, after, trace)
+        finally:
+            self.interaction_done.set()
+
+    def _decode_stream(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[np.ndarray]:
+        return decode_pcm(chunks)
+
+
+async def decode_pcm(chunks: AsyncIterator[bytes]) -> AsyncIterator[np.ndarray]:
+    """把替身TTS返回的16位PCM转换为float32"""
+    remainder = b''
+    async for chunk in chunks:
+        data = remainder + chunk
+        usable = len(data) - len(data) % 2
+        remainder = data[usable:]
+        if usable:
+            yield (np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32) / 32767).reshape(-1, 1)
+
+
+def benchmark_config(base: Dict[str, Any], api_base: str, speculation: bool) -> Dict[str, Any]:
+    """把配置中的服务地址指向替身服务，关闭会让结果失真的缓存"""
+    config = json.loads(json.dumps(base))
+    config['tts'] = {"type": "openai", "openai": {"api_key": "benchmark", "api_base": api_base}}
+    config['stt'].setdefault('whisper', {}).update(api_key="benchmark", api_base=api_base)
+    config['stt']['type'] = "whisper"
+    config['llm'].update(type="openai", api_key="benchmark", api_base=api_base, cache={"enabled": False})
+    config.setdefault('conversation', {})['summarize'] = False
+    config['barge_in'] = {"enabled": False}
+    config['speculation'] = {"enabled": speculation}
+    # 固定语句会在测量期间后台合成并写入工作目录，且替身TTS返回的是PCM
+    config['phrases'] = {"enabled": False}
+    config.get('audio', {}).pop('archive_path', None)
+    config.get('tracing', {}).pop('metrics_port', None)
+    return config
+
+
+def stage_durations(marks: Dict[str, float],
+                    speech_end_at: Optional[float],
+                    first_audio_at: Optional[float]) -> Optional[Dict[str, float]]:
+    """由各时刻计算一次交互的阶段耗时(ms)，缺少时刻时返回None"""
+    times = dict(marks, eos=speech_end_at, first_audio=first_audio_at)
+    pairs = {
+        "wake_to_stt": ("wake", "transcript"),
+        "eos_to_first_token": ("eos", "first_token"),
+        "first_token_to_first_audio": ("first_token", "first_audio"),
+        "eos_to_first_audio": ("eos", "first_audio"),
+    }
+    if any(times.get(name) is None for pair in pairs.values() for name in pair):
+        return None
+    return {stage: (times[end] - times[start]) * 1000 for stage, (start, end) in pairs.items()}
+
+
+async def run_turn(assistant: BenchmarkAssistant,
+                   microphone: VirtualMicrophone,
+                   server: StandInServer,
+                   fixture: Fixture,
+                   timeout: float) -> Optional[Dict[str, float]]:
+    """播放一个夹具并等待交互结束"""
+    assistant.marks = {}
+    assistant.interaction_done.clear()
+    assistant.audio_sink.first_audio_at = None
+    server.set_scenario(fixture.transcript, fixture.reply)
+
+    start = microphone.play(fixture)
+    assistant.wake_detector.expect(start + fixture.keyword_end)
+    try:
+        await asyncio.wait_for(assistant.interaction_done.wait(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"{fixture.name}: 交互超时")
+        return None
+    return stage_durations(assistant.marks, microphone.speech_end_at, assistant.audio_sink.first_audio_at)
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    """计算每个阶段的分位数"""
+    summary = {}
+    for stage, values in samples.items():
+        if not values:
+            continue
+        array = np.asarray(values)
+        summary[stage] = {f"p{p}": float(np.percentile(array, p)) for p in PERCENTILES}
+        summary[stage].update(mean=float(array.mean()), min=float(array.min()),
+                              max=float(array.max()), count=len(values))
+    return summary
+
+
+def git_commit() -> Optional[str]:
+    """当前提交，不在git仓库中时返回None"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(summary: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Any]] = None) -> None:
+    """打印分位数表格，给出基线时附上差值"""
+    header = f"{'阶段':<28}" + "".join(f"{f'p{p}(ms)':>12}" for p in PERCENTILES)
+    print(header)
+    print("-" * len(header))
+    for stage in STAGES:
+        if stage not in summary:
+            continue
+        cells = []
+        for p in PERCENTILES:
+            value = summary[stage][f"p{p}"]
+            cell = f"{value:.0f}"
+            if baseline and stage in baseline.get("stages", {}):
+                cell += f"({value - baseline['stages'][stage][f'p{p}']:+.0f})"
+            cells.append(f"{cell:>12}")
+        print(f"{stage:<28}" + "".join(cells))
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """运行基准测试并返回结果"""
+    stand_in_config = StandInConfig(
+        stt=Latency(args.stt_latency, args.stt_jitter),
+        llm_first_token=Latency(args.llm_latency, args.llm_jitter),
+        llm_token=Latency(args.llm_token_interval, args.llm_token_interval / 4),
+        tts_first_byte=Latency(args.tts_latency, args.tts_jitter),
+        seed=args.seed
+    )
+    server = StandInServer(stand_in_config)
+    api_base = await server.start()
+
+    config = benchmark_config(load_config(Path(args.config)), api_base, args.speculation)
+    vad_config = config['wake_word']['vad']
+    sample_rate = vad_config.get('sample_rate', 16000)
+    frame_size = int(sample_rate * vad_config.get('frame_duration_ms', 30) / 1000)
+    fixtures = load_scenarios(Path(args.scenarios), sample_rate)
+
+    microphone = VirtualMicrophone(sample_rate, frame_size)
+    assistant = BenchmarkAssistant(config, microphone, args.playback_speed, args.wake_delay)
+    assistant_task = asyncio.create_task(assistant.start())
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    failures = 0
+    try:
+        # 等待初始化完成（唤醒检测开始运行），初始化失败时抛出异常
+        while assistant.wake_detector is None or assistant.audio_bus.position == 0:
+            if assistant_task.done():
+                assistant_task.result()
+            await asyncio.sleep(0.01)
+        for iteration in range(args.warmup + args.iterations):
+            for fixture in fixtures:
+                durations = await run_turn(assistant, microphone, server, fixture, args.timeout)
+                if iteration < args.warmup:
+                    continue
+                if durations is None:
+                    failures += 1
+                    continue
+                for stage, value in durations.items():
+                    samples[stage].append(value)
+                # 两次交互之间留出静音，避免上一次的尾音影响端点检测
+                await asyncio.sleep(0.3)
+    finally:
+        await assistant.stop()
+        assistant_task.cancel()
+        await asyncio.gather(assistant_task, return_exceptions=True)
+        await server.close()
+
+    stats = {"requests": server.requests, "failures": failures}
+    stats["tracing"] = assistant.tracer.get_stats()
+    if assistant.speculation is not None:
+        stats["speculation"] = assistant.speculation.get_stats()
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "stages": summarize(samples),
+        "samples": samples,
+        "stats": stats,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    here = Path(__file__).parent
+    parser = argparse.ArgumentParser(description="端到端延迟基准测试")
+    parser.add_argument("--config", default=os.path.join(project_root, "config", "config.example.yaml"))
+    parser.add_argument("--scenarios", default=str(here / "scenarios.json"), help="场景文件")
+    parser.add_argument("--iterations", type=int, default=5, help="每个场景的测量次数")
+    parser.add_argument("--warmup", type=int, default=1, help="不计入统计的预热轮数")
+    parser.add_argument("--stt-latency", type=float, default=300, help="STT上传结束到结果的延迟(ms)")
+    parser.add_argument("--stt-jitter", type=float, default=50)
+    parser.add_argument("--llm-latency", type=float, default=400, help="LLM首个文本块的延迟(ms)")
+    parser.add_argument("--llm-jitter", type=float, default=80)
+    parser.add_argument("--llm-token-interval", type=float, default=30, help="LLM文本块间隔(ms)")
+    parser.add_argument("--tts-latency", type=float, default=200, help="TTS首个音频块的延迟(ms)")
+    parser.add_argument("--tts-jitter", type=float, default=40)
+    parser.add_argument("--wake-delay", type=float, default=0, help="唤醒词结束到触发的延迟(ms)")
+    parser.add_argument("--speculation", action="store_true", help="启用投机执行")
+    parser.add_argument("--playback-speed", type=float, default=4.0, help="虚拟输出的播放倍速")
+    parser.add_argument("--timeout", type=float, default=30.0, help="单次交互的超时(秒)")
+    parser.add_argument("--seed", type=int, default=0, help="延迟抖动的随机数种子")
+    parser.add_argument("--output", help="结果JSON的保存路径")
+    parser.add_argument("--compare", help="作为基线对比的结果JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    results = asyncio.run(run_benchmark(args))
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print(f"基线: {baseline.get('commit')} ({baseline.get('timestamp')})，括号中为差值")
+    print_report(results["stages"], baseline)
+    print(f"统计: {json.dumps(results['stats'], ensure_ascii=False)}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
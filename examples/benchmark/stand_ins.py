@@ -0,0 +1,137 @@
+"""
+本地替身服务：OpenAI 兼容的 TTS、STT 和 LLM 接口
+
+三个接口由同一个 aiohttp 服务提供，每个接口的延迟按配置的均值和抖动随机生成，
+随机数种子固定，同样的配置每次运行得到同样的延迟序列。
+"""
+
+import json
+import random
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+TTS_SAMPLE_RATE = 24000  # OpenAI "pcm" 格式：24kHz、16位、单声道
+
+
+@dataclass
+class Latency:
+    """延迟分布：均值加正态抖动，不小于0"""
+    mean_ms: float = 0.0
+    jitter_ms: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        """随机取一个延迟(秒)"""
+        return max(0.0, rng.gauss(self.mean_ms, self.jitter_ms)) / 1000
+
+
+@dataclass
+class StandInConfig:
+    """替身服务的延迟配置"""
+    stt: Latency  # 上传结束到返回识别结果
+    llm_first_token: Latency  # 请求到第一个文本块
+    llm_token: Latency  # 相邻文本块的间隔
+    tts_first_byte: Latency  # 请求到第一个音频块
+    chars_per_token: int = 2
+    tts_ms_per_char: float = 200.0  # 合成音频的时长
+    tts_chunk_ms: float = 100.0  # 每个音频块的时长
+    seed: int = 0
+
+
+class StandInServer:
+    """
+    OpenAI 兼容的本地替身服务
+
+    - POST /v1/audio/transcriptions：读完上传的音频后返回当前场景的识别结果
+    - POST /v1/chat/completions：以SSE流式返回当前场景的回复
+    - POST /v1/audio/speech：返回时长与文本长度成正比的PCM音频
+    """
+
+    def __init__(self, config: StandInConfig):
+        """
+        初始化
+
+        Args:
+            config: 延迟配置
+        """
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.transcript = ""
+        self.reply = ""
+        self.requests: Dict[str, int] = {"stt": 0, "llm": 0, "tts": 0}
+        self._server: Optional[TestServer] = None
+
+    def set_scenario(self, transcript: str, reply: str) -> None:
+        """
+        设置当前场景的识别结果和回复
+
+        Args:
+            transcript: STT返回的文本
+            reply: LLM返回的文本
+        """
+        self.transcript = transcript
+        self.reply = reply
+
+    async def start(self) -> str:
+        """
+        启动服务
+
+        Returns:
+            API基础URL
+        """
+        app = web.Application()
+        app.router.add_post("/v1/audio/transcriptions", self._transcriptions)
+        app.router.add_post("/v1/chat/completions", self._chat_completions)
+        app.router.add_post("/v1/audio/speech", self._speech)
+        self._server = TestServer(app)
+        await self._server.start_server()
+        return str(self._server.make_url("/v1"))
+
+    async def close(self) -> None:
+        """停止服务"""
+        if self._server is not None:
+            await self._server.close()
+            self._server = None
+
+    async def _transcriptions(self, request: web.Request) -> web.Response:
+        self.requests["stt"] += 1
+        async for _ in request.content.iter_any():
+            pass
+        await asyncio.sleep(self.config.stt.sample(self.rng))
+        return web.json_response({"text": self.transcript})
+
+    async def _chat_completions(self, request: web.Request) -> web.StreamResponse:
+        self.requests["llm"] += 1
+        await request.read()
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await asyncio.sleep(self.config.llm_first_token.sample(self.rng))
+        step = self.config.chars_per_token
+        for start in range(0, len(self.reply), step):
+            if start:
+                await asyncio.sleep(self.config.llm_token.sample(self.rng))
+            event = {"choices": [{"index": 0, "delta": {"content": self.reply[start:start + step]}}]}
+            await response.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def _speech(self, request: web.Request) -> web.StreamResponse:
+        self.requests["tts"] += 1
+        text = (await request.json()).get("input", "")
+        response = web.StreamResponse(headers={"Content-Type": "audio/pcm"})
+        await response.prepare(request)
+        await asyncio.sleep(self.config.tts_first_byte.sample(self.rng))
+
+        samples = int(TTS_SAMPLE_RATE * len(text) * self.config.tts_ms_per_char / 1000)
+        t = np.arange(samples) / TTS_SAMPLE_RATE
+        audio = (np.sin(2 * np.pi * 220 * t) * 3000).astype(np.int16).tobytes()
+        chunk = int(TTS_SAMPLE_RATE * self.config.tts_chunk_ms / 1000) * 2
+        for offset in range(0, len(audio), chunk):
+            await response.write(audio[offset:offset + chunk])
+            # 合成速度按实时的10倍计
+            await asyncio.sleep(self.config.tts_chunk_ms / 10000)
+        return response
@@ -0,0 +1,338 @@
+"""
+虚拟音频设备：播放WAV夹具的麦克风、按夹具标注触发的唤醒检测和不出声的音频输出
+"""
+
+import json
+import time
+import wave
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, List, Optional
+
+import numpy as np
+
+from audio.bus import AudioBus
+from audio.wake_word.detector import WakeWordEvent
+from audio.wake_word.frame_queue import CapturedFrame
+
+
+@dataclass
+class Fixture:
+    """一次交互的录音及其标注"""
+    name: str
+    samples: np.ndarray  # int16 PCM
+    keyword_end: int  # 唤醒词结束处的采样序号
+    speech_end: int  # 命令说完处的采样序号
+    transcript: str  # 替身STT返回的文本
+    reply: str  # 替身LLM返回的回复
+
+
+def _voiced(samples: int, sample_rate: int, offset: int = 0) -> np.ndarray:
+    """生成带谐波和音节起伏的类语音信号，VAD会判定为语音"""
+    t = (np.arange(samples) + offset) / sample_rate
+    signal = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 20))
+    signal *= 0.7 + 0.3 * np.sin(2 * np.pi * 4 * t)
+    return (signal * 6000).astype(np.int16)
+
+
+def synthesize_fixture(name: str,
+                       transcript: str,
+                       reply: str,
+                       sample_rate: int = 16000,
+                       keyword_ms: int = 600,
+                       gap_ms: int = 150,
+                       command_ms: int = 1500,
+                       lead_ms: int = 300) -> Fixture:
+    """
+    合成一段“唤醒词 + 停顿 + 命令”的录音
+
+    Args:
+        name: 名称
+        transcript: 识别结果
+        reply: 回复
+        sample_rate: 采样率
+        keyword_ms: 唤醒词时长(ms)
+        gap_ms: 唤醒词和命令之间的停顿(ms)
+        command_ms: 命令时长(ms)
+        lead_ms: 开头的静音(ms)
+
+    Returns:
+        夹具
+    """
+    ms = sample_rate // 1000
+    lead, keyword, gap, command = lead_ms * ms, keyword_ms * ms, gap_ms * ms, command_ms * ms
+    samples = np.concatenate([
+        np.zeros(lead, dtype=np.int16),
+        _voiced(keyword, sample_rate),
+        np.zeros(gap, dtype=np.int16),
+        _voiced(command, sample_rate, offset=keyword),
+    ])
+    return Fixture(name, samples, lead + keyword, len(samples), transcript, reply)
+
+
+def load_fixture(path: Path,
+                 name: str,
+                 transcript: str,
+                 reply: str,
+                 keyword_end_ms: float,
+                 speech_end_ms: float,
+                 sample_rate: int = 16000) -> Fixture:
+    """
+    读取WAV夹具（16位单声道，采样率与总线一致）
+
+    Args:
+        path: WAV文件路径
+        name: 名称
+        transcript: 识别结果
+        reply: 回复
+        keyword_end_ms: 唤醒词结束的时刻(ms)
+        speech_end_ms: 命令说完的时刻(ms)
+        sample_rate: 总线采样率
+
+    Returns:
+        夹具
+    """
+    with wave.open(str(path), "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1 or wav.getframerate() != sample_rate:
+            raise ValueError(f"夹具需要 {sample_rate}Hz 16位单声道WAV: {path}")
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    ms = sample_rate / 1000
+    return Fixture(name, samples, int(keyword_end_ms * ms), int(speech_end_ms * ms), transcript, reply)
+
+
+def load_scenarios(path: Path, sample_rate: int = 16000) -> List[Fixture]:
+    """
+    按场景文件加载夹具
+
+    每个场景包含 name、transcript、reply；给出 wav（相对场景文件的路径）时还需要
+    keyword_end_ms 和 speech_end_ms，否则按 keyword_ms、command_ms 等参数合成。
+
+    Args:
+        path: 场景JSON文件
+        sample_rate: 总线采样率
+
+    Returns:
+        夹具列表
+    """
+    fixtures = []
+    for scenario in json.loads(path.read_text(encoding="utf-8")):
+        scenario = dict(scenario)
+        wav = scenario.pop("wav", None)
+        if wav:
+            fixtures.append(load_fixture(path.parent / wav, sample_rate=sample_rate, **scenario))
+        else:
+            fixtures.append(synthesize_fixture(sample_rate=sample_rate, **scenario))
+    return fixtures
+
+
+class VirtualMicrophone:
+    """
+    按实时节奏播放夹具的麦克风
+
+    与 AudioRecorder 接口一致，作为音频总线的录音器。没有夹具在播放时输出静音，
+    与真实麦克风一样持续产生帧。
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_size: int = 480):
+        """
+        初始化
+
+        Args:
+            sample_rate: 采样率
+            frame_size: 每帧采样数
+        """
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.position = 0  # 已输出的采样数，与总线位置一致
+        self.speech_end_at: Optional[float] = None  # 当前夹具命令说完的时刻
+        self._samples: Optional[np.ndarray] = None
+        self._offset = 0
+        self._speech_end = 0
+        self._running = False
+
+    def play(self, fixture: Fixture) -> int:
+        """
+        从下一帧开始播放夹具
+
+        Args:
+            fixture: 夹具
+
+        Returns:
+            夹具开头在音频流中的绝对位置
+        """
+        self._samples = fixture.samples
+        self._offset = 0
+        self._speech_end = self.position + fixture.speech_end
+        self.speech_end_at = None
+        return self.position
+
+    async def iter_frames(self) -> AsyncIterator[CapturedFrame]:
+        """
+        按帧时长的节奏输出音频帧
+
+        Yields:
+            音频帧
+        """
+        self._running = True
+        frame_seconds = self.frame_size / self.sample_rate
+        start = time.monotonic()
+        sequence = 0
+        silence = bytes(self.frame_size * 2)
+        while self._running:
+            await asyncio.sleep(max(0.0, start + (sequence + 1) * frame_seconds - time.monotonic()))
+            data = silence
+            if self._samples is not None:
+                chunk = self._samples[self._offset:self._offset + self.frame_size]
+                self._offset += self.frame_size
+                if len(chunk) < self.frame_size:
+                    chunk = np.concatenate([chunk, np.zeros(self.frame_size - len(chunk), dtype=np.int16)])
+                    self._samples = None
+                data = chunk.tobytes()
+
+            now = time.monotonic()
+            self.position += self.frame_size
+            if self.speech_end_at is None and self._speech_end and self.position >= self._speech_end:
+                # 帧的采集时刻是最后一个采样到达的时刻，换算到说完的那个采样
+                self.speech_end_at = now - (self.position - self._speech_end) / self.sample_rate
+            yield CapturedFrame(data, now, sequence)
+            sequence += 1
+
+    async def stop_recording(self) -> None:
+        """停止输出"""
+        self._running = False
+
+
+class VirtualWakeDetector:
+    """
+    按夹具标注触发的唤醒检测
+
+    与 WakeWordDetector 一样订阅音频总线，总线读到唤醒词结束处之后，
+    再经过 detection_delay_ms（模拟检测本身的耗时）触发唤醒事件。
+    """
+
+    def __init__(self, bus: AudioBus, detection_delay_ms: float = 0.0):
+        """
+        初始化
+
+        Args:
+            bus: 音频总线
+            detection_delay_ms: 唤醒词结束到触发的延迟(ms)
+        """
+        self.bus = bus
+        self.source = bus.subscribe("wake_word")
+        self.delay_samples = int(bus.sample_rate * detection_delay_ms / 1000)
+        self._keyword_end: Optional[int] = None
+
+    def expect(self, keyword_end: int) -> None:
+        """
+        设置下一个唤醒词结束的位置
+
+        Args:
+            keyword_end: 绝对采样序号
+        """
+        self._keyword_end = keyword_end
+
+    async def start_detection(self, on_wake_word: Callable[[WakeWordEvent], Awaitable[None]]) -> None:
+        """
+        运行检测，直到停止
+
+        Args:
+            on_wake_word: 唤醒回调
+        """
+        async for _ in self.source:
+            keyword_end = self._keyword_end
+            if keyword_end is None or self.source.cursor < keyword_end + self.delay_samples:
+                continue
+            self._keyword_end = None
+            await on_wake_word(WakeWordEvent(source_position=keyword_end))
+
+    async def stop_detection(self) -> None:
+        """停止检测"""
+        self.source.close()
+
+
+class VirtualSink:
+    """
+    不出声的音频输出
+
+    与 AudioSink 接口一致，按 speed 倍速模拟播放进度（缓冲区满时写入等待、
+    wait_drained 等到模拟播放结束），并记录第一次写入音频的时刻。
+    """
+
+    def __init__(self,
+                 sample_rate: int = 24000,
+                 channels: int = 1,
+                 buffer_seconds: float = 2.0,
+                 speed: float = 1.0):
+        """
+        初始化
+
+        Args:
+            sample_rate: 采样率
+            channels: 通道数
+            buffer_seconds: 缓冲区时长(秒)
+            speed: 模拟播放的倍速
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.buffer_seconds = buffer_seconds
+        self.speed = speed
+        self.first_audio_at: Optional[float] = None
+        self.frames_played = 0
+        self.frames_flushed = 0
+        self._play_until = 0.0
+
+    def start(self) -> None:
+        """兼容 AudioSink，无需打开设备"""
+
+    def close(self) -> None:
+        """兼容 AudioSink"""
+        self.flush()
+
+    @property
+    def is_active(self) -> bool:
+        """是否有尚未播放完的音频"""
+        return self._play_until > time.monotonic()
+
+    async def write(self, samples: np.ndarray, final: bool = False) -> None:
+        """
+        写入PCM数据
+
+        Args:
+            samples: float32采样
+            final: 之后没有更多数据（虚拟输出按时长推算播放进度，不区分）
+        """
+        if len(samples) == 0:
+            return
+        now = time.monotonic()
+        if self.first_audio_at is None:
+            self.first_audio_at = now
+        backlog = self._play_until - now - self.buffer_seconds / self.speed
+        if backlog > 0:
+            await asyncio.sleep(backlog)
+            now = time.monotonic()
+        frames = len(samples) if samples.ndim == 1 else samples.shape[0]
+        self._play_until = max(self._play_until, now) + frames / self.sample_rate / self.speed
+        self.frames_played += frames
+
+    async def wait_drained(self) -> None:
+        """等待模拟播放结束"""
+        await asyncio.sleep(max(0.0, self._play_until - time.monotonic()))
+
+    def flush(self) -> int:
+        """丢弃尚未播放的音频"""
+        remaining = max(0.0, self._play_until - time.monotonic())
+        dropped = int(remaining * self.speed * self.sample_rate)
+        self.frames_flushed += dropped
+        self._play_until = 0.0
+        return dropped
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取输出统计信息
+
+        Returns:
+            包含已播放和被丢弃帧数的字典
+        """
+        return {"frames_played": self.frames_played, "frames_flushed": self.frames_flushed}
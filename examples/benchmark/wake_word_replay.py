@@ -0,0 +1,338 @@
+"""
+唤醒词检测回放基准
+
+把WAV/裸PCM文件（或包含它们的目录）以CPU允许的最快速度送入 WakeWordDetector，
+不需要麦克风，可以在CI中运行。报告：
+
+- 实时因子(RTF)：处理耗时 / 音频时长，越小越好
+- 每秒处理的帧数、每小时音频消耗的CPU秒数
+- 每帧的内存分配：用 tracemalloc 单独跑一遍，统计检测器处理每一帧期间
+  已分配内存的峰值增量（瞬时分配），以及整个回放期间的净增长按帧平均（泄漏）
+- 每次唤醒在哪个文件的什么时刻，以及每小时的唤醒次数（对不含唤醒词的录音即误唤醒率）
+
+时刻均按虚拟时钟（已回放的音频时长）计算，与回放速度无关。
+需要 Picovoice 访问密钥（--access-key 或环境变量 PICOVOICE_ACCESS_KEY）；
+在CI等没有密钥的环境中用 --stand-in 以按音量触发的替身代替 Porcupine，
+此时唤醒结果没有意义，但VAD、能量预筛等其余部分的开销照常测量。
+--noise 生成指定时长和能量的白噪声代替录音，用于测量待机开销。
+
+用法:
+    python examples/benchmark/wake_word_replay.py recordings/ --output replay.json
+    python examples/benchmark/wake_word_replay.py negatives/ --compare replay.json
+    python examples/benchmark/wake_word_replay.py --stand-in --noise 360 --energy-gate
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import datetime
+import tempfile
+import subprocess
+import tracemalloc
+import wave
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.wake_word import detector as detector_module
+from src.audio.wake_word.detector import WakeWordDetector
+from src.audio.wake_word.file_source import FileFrameSource
+
+# 报告中与基线对比的指标：名称 -> 是否越大越好
+METRICS = {
+    "rtf": False,
+    "frames_per_second": True,
+    "cpu_seconds_per_audio_hour": False,
+    "alloc_bytes_per_frame": False,
+    "retained_bytes_per_frame": False,
+    "detections_per_hour": False,
+}
+
+
+class StandInPorcupine:
+    """
+    不需要访问密钥的 Porcupine 替身
+
+    持续 trigger_frames 帧的大音量之后回落时视为一次唤醒；
+    每帧只做一次取最大值，开销远小于真实的 Porcupine。
+    """
+
+    frame_length = 512
+    threshold = 4000
+    trigger_frames = 10
+
+    def __init__(self, access_key=None, keywords=None):
+        self.loud_frames = 0
+
+    def process(self, pcm) -> int:
+        pcm = np.asarray(pcm)
+        if pcm.max() > self.threshold or pcm.min() < -self.threshold:
+            self.loud_frames += 1
+            return -1
+        detected = self.loud_frames >= self.trigger_frames
+        self.loud_frames = 0
+        return 0 if detected else -1
+
+    def delete(self) -> None:
+        pass
+
+
+def write_noise(path: Path, seconds: float, level_db: float, sample_rate: int, seed: int = 0) -> None:
+    """生成指定能量(dBFS)的白噪声WAV，模拟安静房间的底噪"""
+    rms = 32768 * 10 ** (level_db / 20)
+    rng = np.random.default_rng(seed)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        # 按分钟分段生成，避免长时长时占用大量内存
+        remaining = int(seconds * sample_rate)
+        while remaining > 0:
+            count = min(remaining, 60 * sample_rate)
+            samples = np.clip(rng.normal(0, rms, count), -32768, 32767).astype(np.int16)
+            wav.writeframes(samples.tobytes())
+            remaining -= count
+
+
+class AllocationProbe:
+    """
+    包装文件音频源，用 tracemalloc 统计检测器处理每一帧期间的内存分配
+
+    只统计从交出一帧到检测器请求下一帧之间的分配，不含读取文件本身。
+    """
+
+    def __init__(self, source: FileFrameSource, max_frames: Optional[int] = None):
+        """
+        初始化
+
+        Args:
+            source: 文件音频源
+            max_frames: 最多统计的帧数，为None时回放全部文件
+        """
+        self.source = source
+        self.max_frames = max_frames
+        self.frames = 0
+        self.peak_bytes = 0  # 各帧峰值增量之和
+        self.retained_bytes = 0  # 回放期间已分配且仍未释放的内存
+
+    @property
+    def cursor(self) -> int:
+        return self.source.cursor
+
+    async def start_recording(self) -> AsyncIterator[bytes]:
+        tracemalloc.start()
+        try:
+            async for data in self.source.start_recording():
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                yield data
+                _, peak = tracemalloc.get_traced_memory()
+                self.peak_bytes += peak - before
+                self.frames += 1
+                if self.max_frames is not None and self.frames >= self.max_frames:
+                    return
+        finally:
+            # 单帧内的释放可能来自上一帧的对象，保留量按整个回放期间的净增长计
+            self.retained_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+    async def stop_recording(self) -> None:
+        await self.source.stop_recording()
+
+
+def create_detector(args: argparse.Namespace, source) -> WakeWordDetector:
+    """创建以文件回放为音频源的检测器"""
+    return WakeWordDetector(
+        porcupine_access_key=args.access_key,
+        keywords=args.keywords,
+        vad_aggressiveness=args.vad_aggressiveness,
+        sample_rate=args.sample_rate,
+        frame_duration_ms=args.frame_duration_ms,
+        audio_source=source,
+        energy_gate={"batch_frames": args.gate_batch_frames} if args.energy_gate else None,
+    )
+
+
+async def replay(detector: WakeWordDetector, source: FileFrameSource) -> Dict[str, Any]:
+    """
+    回放全部文件并计时
+
+    Args:
+        detector: 检测器
+        source: 检测器使用的文件音频源
+
+    Returns:
+        吞吐指标和唤醒列表
+    """
+    detections: List[Dict[str, Any]] = []
+
+    async def on_wake_word(event) -> None:
+        path, offset = source.locate(event.source_position)
+        detections.append({
+            "file": str(path),
+            "keyword_end": round(offset, 3),  # 唤醒词结束处在文件中的秒数
+            "stream_time": round(event.source_position / source.sample_rate, 3),
+            "fired_at": round(source.clock.now(), 3),  # 触发时已回放的音频时长
+        })
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        await detector.start_detection(on_wake_word)
+    finally:
+        await detector.stop_detection()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    stats = source.get_stats()
+    gate = detector.energy_gate.get_stats() if detector.energy_gate is not None else None
+    audio_seconds = stats["audio_seconds"]
+    audio_hours = audio_seconds / 3600
+    return {
+        "files": stats["files"],
+        "frames": stats["frames_captured"],
+        "audio_seconds": audio_seconds,
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        "rtf": wall / audio_seconds if audio_seconds else 0.0,
+        "frames_per_second": stats["frames_captured"] / wall if wall else 0.0,
+        "cpu_seconds_per_audio_hour": cpu / audio_hours if audio_hours else 0.0,
+        "detections_per_hour": len(detections) / audio_hours if audio_hours else 0.0,
+        "energy_gate": gate,
+        "detections": detections,
+    }
+
+
+async def measure_allocations(args: argparse.Namespace) -> Dict[str, Any]:
+    """用 tracemalloc 单独回放一遍，统计每帧的内存分配"""
+    probe = AllocationProbe(FileFrameSource(args.paths, args.sample_rate, frame_size(args)),
+                            args.alloc_frames)
+    detector = create_detector(args, probe)
+    try:
+        await detector.start_detection(_ignore_wake_word)
+    finally:
+        await detector.stop_detection()
+    frames = max(probe.frames, 1)
+    return {
+        "alloc_frames": probe.frames,
+        "alloc_bytes_per_frame": probe.peak_bytes / frames,
+        "retained_bytes_per_frame": probe.retained_bytes / frames,
+    }
+
+
+async def _ignore_wake_word(event) -> None:
+    pass
+
+
+def frame_size(args: argparse.Namespace) -> int:
+    return int(args.sample_rate * args.frame_duration_ms / 1000)
+
+
+def git_commit() -> Optional[str]:
+    """当前提交的短哈希"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_replay(args: argparse.Namespace) -> Dict[str, Any]:
+    """运行回放基准并返回结果"""
+    source = FileFrameSource(args.paths, args.sample_rate, frame_size(args))
+    results = await replay(create_detector(args, source), source)
+    if args.alloc_frames:
+        results.update(await measure_allocations(args))
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "settings": {key: value for key, value in vars(args).items()
+                     if key not in ("access_key", "output", "compare")},
+        "results": results,
+    }
+
+
+def print_report(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    """打印指标和唤醒列表，给出基线时附上变化百分比"""
+    print(f"回放 {results['files']} 个文件，{results['audio_seconds']:.1f}s 音频，"
+          f"{results['frames']} 帧，耗时 {results['wall_seconds']:.2f}s")
+    for name, higher_is_better in METRICS.items():
+        if name not in results:
+            continue
+        value = results[name]
+        line = f"{name:<28}{value:>14.4g}"
+        previous = (baseline or {}).get(name)
+        if previous:
+            change = (value - previous) / previous * 100
+            better = change > 0 if higher_is_better else change < 0
+            line += f"  ({change:+.1f}%{'' if abs(change) < 1 else (' 改善' if better else ' 变差')})"
+        print(line)
+    if results.get("energy_gate"):
+        print(f"能量预筛: {json.dumps(results['energy_gate'], ensure_ascii=False)}")
+    for detection in results["detections"]:
+        print(f"唤醒: {detection['file']} @ {detection['keyword_end']:.2f}s"
+              f"（回放流 {detection['stream_time']:.2f}s，触发于 {detection['fired_at']:.2f}s）")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="唤醒词检测回放基准")
+    parser.add_argument("paths", nargs="*", help="WAV/裸PCM文件或目录")
+    parser.add_argument("--access-key", default=os.environ.get("PICOVOICE_ACCESS_KEY"),
+                        help="Picovoice访问密钥，默认读取环境变量 PICOVOICE_ACCESS_KEY")
+    parser.add_argument("--stand-in", action="store_true",
+                        help="用按音量触发的替身代替Porcupine，不需要访问密钥")
+    parser.add_argument("--noise", type=float, metavar="SECONDS",
+                        help="追加一段生成的白噪声（秒），用于测量待机开销")
+    parser.add_argument("--noise-db", type=float, default=-55.0, help="生成噪声的能量(dBFS)")
+    parser.add_argument("--keywords", nargs="+", default=["hey computer"], help="唤醒词")
+    parser.add_argument("--vad-aggressiveness", type=int, default=3)
+    parser.add_argument("--sample-rate", type=int, default=16000, help="采样率，裸PCM按此解释")
+    parser.add_argument("--frame-duration-ms", type=int, default=30)
+    parser.add_argument("--energy-gate", action="store_true", help="启用VAD之前的能量预筛")
+    parser.add_argument("--gate-batch-frames", type=int, default=4, help="能量预筛的批量帧数")
+    parser.add_argument("--alloc-frames", type=int, default=3000,
+                        help="统计内存分配的帧数，0表示不统计")
+    parser.add_argument("--output", help="结果JSON的保存路径")
+    parser.add_argument("--compare", help="作为基线对比的结果JSON")
+    args = parser.parse_args()
+    if not args.access_key and not args.stand_in:
+        parser.error("需要 Picovoice 访问密钥，或使用 --stand-in")
+    if not args.paths and not args.noise:
+        parser.error("需要音频文件，或使用 --noise")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    if args.stand_in:
+        detector_module.Porcupine = StandInPorcupine
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.noise:
+            noise_path = Path(tmp_dir) / "noise.wav"
+            write_noise(noise_path, args.noise, args.noise_db, args.sample_rate)
+            args.paths = list(args.paths) + [str(noise_path)]
+        results = asyncio.run(run_replay(args))
+
+    baseline = None
+    if args.compare:
+        baseline_results = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print(f"基线: {baseline_results.get('commit')} ({baseline_results.get('timestamp')})")
+        baseline = baseline_results["results"]
+    print_report(results["results"], baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
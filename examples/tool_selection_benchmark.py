@@ -0,0 +1,127 @@
+"""
+工具筛选性能测试示例
+
+注册几百个模拟的智能家居工具，比较提供全部工具与按相关性筛选时的
+请求体大小，以及schema获取和筛选的耗时。
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import statistics
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from src.skills.base import BaseTool
+from src.skills.registry import ToolRegistry
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+ROOMS = ["客厅", "卧室", "厨房", "书房", "浴室", "阳台", "儿童房", "车库", "餐厅", "走廊"]
+DEVICES = [
+    ("light", "灯", "打开、关闭或调节{room}的灯", {"brightness": "亮度百分比"}),
+    ("curtain", "窗帘", "打开或关闭{room}的窗帘", {"position": "打开的位置百分比"}),
+    ("ac", "空调", "设置{room}空调的温度和模式", {"temperature": "目标温度", "mode": "制冷或制热"}),
+    ("speaker", "音箱", "在{room}的音箱上播放音乐或调节音量", {"song": "歌曲名称", "volume": "音量"}),
+    ("sensor", "传感器", "查询{room}的温度、湿度和空气质量", {"metric": "指标名称"}),
+    ("fan", "风扇", "控制{room}风扇的开关和风速", {"speed": "风速档位"}),
+    ("tv", "电视", "控制{room}电视的开关、频道和音量", {"channel": "频道"}),
+    ("lock", "门锁", "查询或控制{room}的门锁", {"action": "上锁或开锁"}),
+    ("camera", "摄像头", "查看{room}摄像头的画面或录像", {"time": "录像时间"}),
+    ("purifier", "净化器", "控制{room}空气净化器", {"level": "净化档位"}),
+]
+COMMON = [
+    ("get_time", "查询当前的日期和时间", {}),
+    ("weather", "查询城市的天气预报", {"city": "城市名称"}),
+    ("timer", "设置倒计时提醒", {"minutes": "分钟数"}),
+]
+QUERIES = [
+    "把客厅的灯调暗一点",
+    "卧室空调设置成二十六度制冷",
+    "明天上海的天气怎么样",
+    "在厨房的音箱上播放周杰伦的歌",
+    "书房现在的湿度是多少",
+    "打开阳台的窗帘",
+    "十分钟后提醒我关火",
+    "车库的门锁锁上了吗",
+]
+
+
+def make_tool(name: str, description: str, params: dict, pinned: bool = False):
+    """生成一个模拟工具类"""
+    async def execute(self, **kwargs):
+        return None
+
+    return type(name, (BaseTool,), {
+        "name": name,
+        "description": description,
+        "parameters": {key: {"type": "string", "description": desc} for key, desc in params.items()},
+        "pinned": pinned,
+        "execute": execute,
+    })
+
+
+def register_tools(count: int) -> None:
+    """注册约 count 个工具"""
+    for name, description, params in COMMON:
+        ToolRegistry.register(make_tool(name, description, params, pinned=name == "get_time"))
+    index = 0
+    while len(ToolRegistry.get_schemas()) < count:
+        key, _, template, params = DEVICES[index % len(DEVICES)]
+        room = ROOMS[(index // len(DEVICES)) % len(ROOMS)]
+        variant = index // (len(DEVICES) * len(ROOMS))
+        name = f"{key}_{ROOMS.index(room)}_{variant}"
+        ToolRegistry.register(make_tool(name, template.format(room=room), params))
+        index += 1
+
+
+def measure(func, repeat: int = 200) -> float:
+    """返回单次调用的中位耗时（微秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def tools_bytes(schemas) -> int:
+    """请求体中 tools 数组的字节数"""
+    tools = [{"type": "function", "function": schema} for schema in schemas]
+    return len(json.dumps(tools, ensure_ascii=False).encode("utf-8"))
+
+
+def run_benchmark(tool_count: int = 300, top_k: int = 8) -> None:
+    """运行测试并输出结果"""
+    logging.getLogger("src.skills.registry").setLevel(logging.WARNING)
+    register_tools(tool_count)
+    ToolRegistry.configure(top_k=top_k)
+    total = len(ToolRegistry.get_schemas())
+
+    rebuild_us = measure(lambda: [tool.get_schema() for tool in ToolRegistry._tools.values()])
+    cached_us = measure(ToolRegistry.get_schemas)
+    all_bytes = tools_bytes(ToolRegistry.get_schemas())
+
+    print(f"注册工具数: {total}, top_k: {top_k}")
+    print(f"每次重建schema: {rebuild_us:.1f}us, 注册时生成后获取: {cached_us:.1f}us")
+    print(f"全部工具的 tools 字节数: {all_bytes}")
+    print("-" * 60)
+
+    random.seed(0)
+    for query in QUERIES:
+        selected = ToolRegistry.select_schemas(query)
+        select_us = measure(lambda: ToolRegistry.select_schemas(query))
+        names = ", ".join(schema["name"] for schema in selected[:4])
+        print(f"{query}")
+        print(f"  筛选耗时: {select_us:.1f}us, 字节数: {tools_bytes(selected)} "
+              f"({tools_bytes(selected) / all_bytes:.1%}), 前几个: {names}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
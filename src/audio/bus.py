@@ -0,0 +1,283 @@
+"""
+音频总线：单一采集源，多订阅者共享
+"""
+
+import asyncio
+import logging
+import wave
+from typing import AsyncIterator, Dict, Any, Optional
+import numpy as np
+
+from .ring_buffer import AudioRingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class AudioSubscription:
+    """
+    音频总线的一个订阅者
+
+    每个订阅者有独立的读取位置，读取到的是共享环形缓冲区的零拷贝
+    memoryview（字节格式），在对应数据被覆盖前有效；需要长期保存时应自行复制。
+    订阅者落后超过缓冲区容量时跳到最早的可用数据，并记录丢失的帧数。
+
+    提供与 AudioRecorder 相同的 start_recording/stop_recording 接口，
+    可以直接作为唤醒词检测器等组件的音频源。
+    """
+
+    def __init__(self, bus: "AudioBus", name: str, cursor: int):
+        """
+        初始化订阅者
+
+        Args:
+            bus: 所属的音频总线
+            name: 订阅者名称
+            cursor: 起始读取位置（绝对采样序号）
+        """
+        self.bus = bus
+        self.name = name
+        self.cursor = cursor
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.timestamp = 0.0  # 最近读取的帧的采集时刻
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    @property
+    def lag(self) -> int:
+        """落后于最新采集位置的采样数"""
+        return self.bus.position - self.cursor
+
+    @property
+    def closed(self) -> bool:
+        """订阅是否已关闭"""
+        return self._closed
+
+    def __aiter__(self) -> "AudioSubscription":
+        return self
+
+    async def __anext__(self) -> memoryview:
+        frame = await self.read_frame()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+    async def read_frame(self) -> Optional[memoryview]:
+        """
+        读取下一帧，没有新数据时等待
+
+        Returns:
+            一帧PCM数据的memoryview，订阅关闭且数据已读完时返回None
+        """
+        bus = self.bus
+        frame_size = bus.frame_size
+        while self.cursor + frame_size > bus.position:
+            # 关闭后仍可读完已到达的数据
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+
+        oldest = bus.buffer.oldest
+        if self.cursor < oldest:
+            dropped = (oldest - self.cursor) // frame_size
+            self.frames_dropped += dropped
+            self.cursor = oldest
+            logger.warning(f"音频订阅 {self.name} 落后过多，丢弃 {dropped} 帧")
+
+        view = bus.buffer.view(self.cursor, self.cursor + frame_size)
+        self.timestamp = bus.frame_timestamp(self.cursor)
+        self.cursor += frame_size
+        self.frames_read += 1
+        return memoryview(view).cast('B')
+
+    def read_available(self) -> memoryview:
+        """
+        一次性读取所有已到达但未读取的数据，不等待
+
+        Returns:
+            PCM数据的memoryview，可能为空
+        """
+        bus = self.bus
+        start = max(self.cursor, bus.buffer.oldest)
+        if start > self.cursor:
+            self.frames_dropped += (start - self.cursor) // bus.frame_size
+        view = bus.buffer.view(start)
+        self.frames_read += len(view) // bus.frame_size
+        self.cursor = bus.position
+        return memoryview(view).cast('B')
+
+    async def start_recording(self) -> AsyncIterator[memoryview]:
+        """
+        兼容 AudioRecorder 的读取接口
+
+        Yields:
+            音频数据块
+        """
+        async for frame in self:
+            yield frame
+
+    async def stop_recording(self) -> None:
+        """兼容 AudioRecorder 的停止接口，取消订阅"""
+        self.close()
+
+    def close(self) -> None:
+        """取消订阅"""
+        if not self._closed:
+            self._closed = True
+            self._ready.set()
+            self.bus._remove(self)
+
+    def _notify(self) -> None:
+        self._ready.set()
+
+
+class AudioBus:
+    """
+    音频总线
+
+    持有唯一的录音器，将采集到的帧写入共享的环形缓冲区并通知所有订阅者。
+    唤醒词检测、STT、打断检测、录音存档等组件各自订阅，
+    无需重复打开设备或复制数据。
+    """
+
+    def __init__(self,
+                 recorder,
+                 sample_rate: int = 16000,
+                 frame_size: int = 480,
+                 buffer_ms: int = 10000):
+        """
+        初始化音频总线
+
+        Args:
+            recorder: 录音器，需提供 iter_frames() 和 stop_recording()
+            sample_rate: 采样率
+            frame_size: 每帧采样数
+            buffer_ms: 共享缓冲区时长(ms)，决定订阅者最多可以落后多少
+        """
+        self.recorder = recorder
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        # 容量取帧长的整数倍，保证帧不会跨越被覆盖的边界
+        capacity_frames = max(1, int(sample_rate * buffer_ms / 1000) // frame_size)
+        self.buffer = AudioRingBuffer(capacity_frames * frame_size)
+        self._timestamps = np.zeros(capacity_frames, dtype=np.float64)
+        self._subscribers: Dict[int, AudioSubscription] = {}
+        self._running = False
+
+    @property
+    def position(self) -> int:
+        """最新采集位置（绝对采样序号）"""
+        return self.buffer.total_written
+
+    def subscribe(self, name: str, start: Optional[int] = None) -> AudioSubscription:
+        """
+        新建订阅
+
+        Args:
+            name: 订阅者名称（用于统计和日志）
+            start: 起始位置，默认从最新位置开始；可以指定过去的位置以读取已缓存的音频
+
+        Returns:
+            订阅者
+        """
+        cursor = self.position if start is None else max(start, self.buffer.oldest)
+        # 对齐到帧边界
+        cursor -= cursor % self.frame_size
+        subscription = AudioSubscription(self, name, cursor)
+        self._subscribers[id(subscription)] = subscription
+        logger.debug(f"新增音频订阅: {name}")
+        return subscription
+
+    def frame_timestamp(self, position: int) -> float:
+        """
+        获取某位置所在帧的采集时刻
+
+        Args:
+            position: 绝对采样序号
+
+        Returns:
+            time.monotonic 时间戳
+        """
+        index = (position // self.frame_size) % len(self._timestamps)
+        return float(self._timestamps[index])
+
+    def publish(self, data, timestamp: float) -> None:
+        """
+        写入一帧并通知订阅者
+
+        Args:
+            data: 一帧int16 PCM数据
+            timestamp: 采集时刻
+        """
+        index = (self.position // self.frame_size) % len(self._timestamps)
+        self._timestamps[index] = timestamp
+        self.buffer.write(data)
+        for subscription in self._subscribers.values():
+            subscription._notify()
+
+    async def run(self) -> None:
+        """从录音器读取音频并分发，直到停止"""
+        logger.info("音频总线已启动")
+        self._running = True
+        try:
+            async for frame in self.recorder.iter_frames():
+                if not self._running:
+                    break
+                self.publish(frame.data, frame.timestamp)
+        finally:
+            for subscription in list(self._subscribers.values()):
+                subscription.close()
+            logger.info("音频总线已停止")
+
+    async def stop(self) -> None:
+        """停止采集"""
+        self._running = False
+        await self.recorder.stop_recording()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取总线统计信息
+
+        Returns:
+            包含采集位置和每个订阅者落后/丢帧情况的字典
+        """
+        return {
+            "position": self.position,
+            "buffer_frames": len(self._timestamps),
+            "subscribers": {
+                subscription.name: {
+                    "lag_frames": subscription.lag // self.frame_size,
+                    "frames_read": subscription.frames_read,
+                    "frames_dropped": subscription.frames_dropped,
+                }
+                for subscription in self._subscribers.values()
+            },
+        }
+
+    def _remove(self, subscription: AudioSubscription) -> None:
+        self._subscribers.pop(id(subscription), None)
+
+
+async def archive_to_wav(subscription: AudioSubscription, path: str, sample_rate: int = 16000) -> None:
+    """
+    将订阅到的音频写入WAV文件，直到订阅关闭
+
+    Args:
+        subscription: 音频订阅
+        path: WAV文件路径
+        sample_rate: 采样率
+    """
+    loop = asyncio.get_running_loop()
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        while True:
+            frame = await subscription.read_frame()
+            if frame is None:
+                break
+            # 尽量一次写入所有积压的数据，文件写入放到线程池中
+            pending = subscription.read_available()
+            data = bytes(frame) + bytes(pending)
+            await loop.run_in_executor(None, wav.writeframes, data)
@@ -0,0 +1,105 @@
+"""
+线程安全的PCM环形缓冲区
+"""
+
+import threading
+import numpy as np
+
+
+class PCMRingBuffer:
+    """
+    固定容量的PCM环形缓冲区
+
+    由事件循环线程写入、音频回调线程读取，内部用一把短锁保护读写指针。
+    存储空间在初始化时一次性分配，读写过程中不再分配内存。
+    """
+
+    def __init__(self, capacity: int, channels: int = 1, dtype=np.float32):
+        """
+        初始化缓冲区
+
+        Args:
+            capacity: 容量（采样帧数）
+            channels: 通道数
+            dtype: 采样数据类型
+        """
+        if capacity <= 0:
+            raise ValueError("缓冲区容量必须大于0")
+
+        self.capacity = capacity
+        self.channels = channels
+        self._data = np.zeros((capacity, channels), dtype=dtype)
+        self._read_pos = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> int:
+        """可读取的帧数"""
+        return self._size
+
+    @property
+    def free(self) -> int:
+        """可写入的帧数"""
+        return self.capacity - self._size
+
+    def write(self, samples: np.ndarray) -> int:
+        """
+        写入采样，空间不足时只写入能容纳的部分
+
+        Args:
+            samples: 形状为 (frames,) 或 (frames, channels) 的采样
+
+        Returns:
+            实际写入的帧数
+        """
+        if samples.ndim == 1:
+            samples = samples.reshape(-1, 1)
+
+        with self._lock:
+            count = min(len(samples), self.capacity - self._size)
+            if count == 0:
+                return 0
+            start = (self._read_pos + self._size) % self.capacity
+            first = min(count, self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            if count > first:
+                self._data[:count - first] = samples[first:count]
+            self._size += count
+            return count
+
+    def read_into(self, out: np.ndarray) -> int:
+        """
+        读取采样到给定数组，不足部分保持原样由调用方处理
+
+        Args:
+            out: 形状为 (frames, channels) 的输出数组
+
+        Returns:
+            实际读取的帧数
+        """
+        with self._lock:
+            count = min(len(out), self._size)
+            if count == 0:
+                return 0
+            start = self._read_pos
+            first = min(count, self.capacity - start)
+            out[:first] = self._data[start:start + first]
+            if count > first:
+                out[first:count] = self._data[:count - first]
+            self._read_pos = (start + count) % self.capacity
+            self._size -= count
+            return count
+
+    def clear(self) -> int:
+        """
+        清空缓冲区
+
+        Returns:
+            被丢弃的帧数
+        """
+        with self._lock:
+            dropped = self._size
+            self._read_pos = 0
+            self._size = 0
+            return dropped
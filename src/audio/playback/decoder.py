@@ -0,0 +1,125 @@
+"""
+音频解码工具
+"""
+
+import io
+import asyncio
+from typing import AsyncIterator
+import numpy as np
+from pydub import AudioSegment
+
+
+def decode_audio(audio_data: bytes, sample_rate: int, channels: int = 1) -> np.ndarray:
+    """
+    将压缩音频解码为指定采样率的float32 PCM
+
+    该函数是阻塞调用，在事件循环中应通过 run_in_executor 执行。
+
+    Args:
+        audio_data: 音频数据（MP3等ffmpeg支持的格式）
+        sample_rate: 目标采样率
+        channels: 目标通道数
+
+    Returns:
+        形状为 (frames, channels) 的float32数组，取值范围[-1, 1]
+    """
+    audio_segment = AudioSegment.from_file(io.BytesIO(audio_data))
+    audio_segment = (audio_segment
+                     .set_frame_rate(sample_rate)
+                     .set_channels(channels)
+                     .set_sample_width(2))
+
+    samples = np.frombuffer(audio_segment.raw_data, dtype=np.int16)
+    samples = samples.astype(np.float32)
+    samples /= np.iinfo(np.int16).max
+    return samples.reshape(-1, channels)
+
+
+async def decode_stream(chunks: AsyncIterator[bytes],
+                        sample_rate: int,
+                        channels: int = 1,
+                        input_format: str = "mp3",
+                        read_size: int = 4096) -> AsyncIterator[np.ndarray]:
+    """
+    增量解码压缩音频流
+
+    通过ffmpeg子进程（与pydub使用同一个可执行文件）边输入边解码，
+    收到第一个音频帧即可输出PCM，无需等待完整的音频数据。
+
+    Args:
+        chunks: 压缩音频数据块
+        sample_rate: 目标采样率
+        channels: 目标通道数
+        input_format: 输入格式
+        read_size: 每次读取的最大字节数
+
+    Yields:
+        形状为 (frames, channels) 的float32数组，取值范围[-1, 1]
+
+    Raises:
+        RuntimeError: ffmpeg解码失败（如音频数据损坏）
+    """
+    process = await asyncio.create_subprocess_exec(
+        AudioSegment.converter,
+        "-hide_banner", "-loglevel", "error",
+        # 关闭格式探测缓冲，第一帧到达即开始解码
+        "-probesize", "32", "-analyzeduration", "0", "-fflags", "nobuffer",
+        "-f", input_format, "-i", "pipe:0",
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ac", str(channels), "-ar", str(sample_rate),
+        "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+
+    async def feed() -> None:
+        try:
+            async for chunk in chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        finally:
+            process.stdin.close()
+
+    async def read_errors(limit: int = 1000) -> bytes:
+        # 持续读取，避免错误输出填满管道阻塞ffmpeg，只保留末尾部分
+        tail = b''
+        while True:
+            data = await process.stderr.read(4096)
+            if not data:
+                return tail
+            tail = (tail + data)[-limit:]
+
+    feeder = asyncio.create_task(feed())
+    errors = asyncio.create_task(read_errors())
+    frame_bytes = 2 * channels
+    remainder = b''
+    try:
+        while True:
+            data = await process.stdout.read(read_size)
+            if not data:
+                break
+            if remainder:
+                data = remainder + data
+            usable = len(data) - len(data) % frame_bytes
+            remainder = data[usable:]
+            if usable == 0:
+                continue
+            samples = np.frombuffer(memoryview(data)[:usable], dtype=np.int16).astype(np.float32)
+            samples /= np.iinfo(np.int16).max
+            yield samples.reshape(-1, channels)
+
+        # 输入端的异常（如TTS请求失败）在这里抛出
+        await feeder
+        await process.wait()
+        if process.returncode != 0:
+            message = (await errors).decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"音频解码失败 (ffmpeg退出码 {process.returncode}): {message}")
+    finally:
+        for task in (feeder, errors):
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
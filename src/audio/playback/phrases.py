@@ -0,0 +1,169 @@
+"""
+预合成的固定语句
+"""
+
+import os
+import asyncio
+import logging
+from typing import Callable, Dict, Any, Optional
+import numpy as np
+
+from .decoder import decode_audio
+from ..tts.base import BaseTTSEngine
+from ..tts.cache import speech_key
+
+logger = logging.getLogger(__name__)
+
+
+class PhraseBank:
+    """
+    固定语句的PCM音频库
+
+    唤醒应答、“没听清”、错误提示等事先知道内容的语句在启动后由后台任务
+    通过配置的TTS引擎合成（限制并发数），解码一次后以输出流格式的PCM数组
+    常驻内存，并保存到磁盘，下次启动直接读取，不需要网络。
+    播放时直接写入音频输出，不经过合成和解码。
+    """
+
+    SUFFIX = ".npy"
+
+    def __init__(self,
+                 phrases: Dict[str, str],
+                 sample_rate: int,
+                 channels: int = 1,
+                 cache_dir: Optional[str] = None,
+                 concurrency: int = 2,
+                 decode: Callable[[bytes, int, int], np.ndarray] = decode_audio):
+        """
+        初始化
+
+        Args:
+            phrases: 语句名称到文本的映射
+            sample_rate: 输出采样率
+            channels: 输出通道数
+            cache_dir: 保存PCM的目录，为None时每次启动都重新合成
+            concurrency: 同时进行的合成请求数
+            decode: 阻塞的解码函数，参数为 (音频数据, 采样率, 通道数)
+        """
+        self.phrases = dict(phrases)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.cache_dir = cache_dir
+        self.concurrency = max(1, concurrency)
+        self.decode = decode
+        self._samples: Dict[str, np.ndarray] = {}
+
+        # 统计信息
+        self.loaded = 0
+        self.synthesized = 0
+        self.failed = 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._samples
+
+    def get(self, name: str) -> Optional[np.ndarray]:
+        """
+        获取已准备好的语句
+
+        Args:
+            name: 语句名称
+
+        Returns:
+            形状为 (frames, channels) 的float32数组，尚未准备好时返回None
+        """
+        return self._samples.get(name)
+
+    async def prepare(self, tts: BaseTTSEngine) -> None:
+        """
+        准备全部语句：先读取磁盘上已有的，其余通过TTS引擎合成
+
+        单个语句合成失败只记录日志，不影响其他语句。
+
+        Args:
+            tts: TTS引擎
+        """
+        # 缓存包装不影响合成结果，按被包装的引擎计算键
+        engine = getattr(tts, "engine", tts)
+        keys = {name: speech_key(engine, text, sample_rate=self.sample_rate, channels=self.channels)
+                for name, text in self.phrases.items()}
+
+        loop = asyncio.get_running_loop()
+        if self.cache_dir:
+            await loop.run_in_executor(None, self._load, keys)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def synthesize(name: str) -> None:
+            async with semaphore:
+                try:
+                    audio_data = await tts.text_to_speech(self.phrases[name])
+                    samples = await loop.run_in_executor(
+                        None, self.decode, audio_data, self.sample_rate, self.channels)
+                except Exception as e:
+                    self.failed += 1
+                    logger.warning(f"预合成语句 {name} 失败: {e}")
+                    return
+            self._samples[name] = samples
+            self.synthesized += 1
+            if self.cache_dir:
+                try:
+                    await loop.run_in_executor(None, self._save, keys[name], samples)
+                except OSError as e:
+                    logger.warning(f"保存预合成语句 {name} 失败: {e}")
+
+        missing = [name for name in self.phrases if name not in self._samples]
+        await asyncio.gather(*(synthesize(name) for name in missing))
+        logger.info(f"固定语句已准备: 读取 {self.loaded} 条，合成 {self.synthesized} 条，"
+                    f"失败 {self.failed} 条")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def _load(self, keys: Dict[str, str]) -> None:
+        """读取磁盘上已有的语句，并删除不再使用的文件"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for name, key in keys.items():
+            try:
+                samples = np.load(self._path(key))
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取预合成语句 {name} 失败: {e}")
+                continue
+            if samples.dtype != np.float32 or samples.ndim != 2 or samples.shape[1] != self.channels:
+                continue
+            self._samples[name] = samples
+            self.loaded += 1
+
+        # 文本、语音参数或输出格式变化后，旧文件不会再被使用
+        used = {key + self.SUFFIX for key in keys.values()}
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(self.SUFFIX) and filename not in used:
+                try:
+                    os.remove(os.path.join(self.cache_dir, filename))
+                except OSError:
+                    pass
+
+    def _save(self, key: str, samples: np.ndarray) -> None:
+        """保存语句，先写临时文件再原子替换"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, samples)
+        os.replace(tmp_path, path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            包含已准备、从磁盘读取、合成和失败条数的字典
+        """
+        return {
+            "phrases": len(self.phrases),
+            "ready": len(self._samples),
+            "loaded": self.loaded,
+            "synthesized": self.synthesized,
+            "failed": self.failed,
+            "memory_bytes": sum(samples.nbytes for samples in self._samples.values()),
+        }
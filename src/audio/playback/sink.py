@@ -0,0 +1,195 @@
+"""
+常驻音频输出
+"""
+
+import asyncio
+import logging
+from typing import Optional, Dict, Any
+import numpy as np
+import sounddevice as sd
+
+from .buffer import PCMRingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class AudioSink:
+    """
+    常驻的非阻塞音频输出
+
+    持有唯一一个回调模式的 sounddevice.OutputStream，音频回调线程从
+    PCMRingBuffer 中取数据。缓冲区起到抖动缓冲的作用：从空闲状态开始播放前
+    先积累 prefill_ms 的数据，播放中途数据不足时计为一次欠载并重新积累。
+    连续写入的多段音频之间没有间隙，写入和等待都不会阻塞事件循环。
+    """
+
+    def __init__(self,
+                 sample_rate: int = 24000,
+                 channels: int = 1,
+                 device: Optional[int] = None,
+                 buffer_seconds: float = 2.0,
+                 prefill_ms: int = 60,
+                 blocksize: int = 0,
+                 latency: str = "low"):
+        """
+        初始化音频输出
+
+        Args:
+            sample_rate: 输出采样率
+            channels: 输出通道数
+            device: 输出设备编号，None或-1为默认设备
+            buffer_seconds: 环形缓冲区时长(秒)
+            prefill_ms: 开始播放前需要积累的音频时长(ms)
+            blocksize: 每次回调的帧数，0表示由设备决定
+            latency: sounddevice延迟设置
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.device = None if device is None or device < 0 else device
+        self.blocksize = blocksize
+        self.latency = latency
+        self.prefill_frames = int(sample_rate * prefill_ms / 1000)
+        self.buffer = PCMRingBuffer(int(sample_rate * buffer_seconds), channels)
+
+        self.stream = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._space = asyncio.Event()
+
+        # 以下状态在音频回调线程中读写
+        self._playing = False
+        self._draining = False
+        self._waiting_for_space = False
+
+        # 统计信息
+        self.underruns = 0
+        self.frames_played = 0
+        self.frames_flushed = 0
+
+    def start(self) -> None:
+        """打开并启动输出流"""
+        if self.stream is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self.stream = sd.OutputStream(
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            dtype="float32",
+            device=self.device,
+            blocksize=self.blocksize,
+            latency=self.latency,
+            callback=self._callback
+        )
+        self.stream.start()
+        logger.info(f"音频输出已启动: {self.sample_rate}Hz, {self.channels}声道")
+
+    def close(self) -> None:
+        """关闭输出流"""
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+        self.flush()
+        logger.info("音频输出已关闭")
+
+    @property
+    def is_active(self) -> bool:
+        """是否有尚未播放完的音频"""
+        return not self._drained.is_set()
+
+    async def write(self, samples: np.ndarray, final: bool = False) -> None:
+        """
+        写入PCM数据，缓冲区满时异步等待空间
+
+        Args:
+            samples: float32采样，形状为 (frames,) 或 (frames, channels)
+            final: 之后没有更多数据（如一段完整的提示音）。播放完即回到空闲状态，
+                不计为欠载，调用方不必等待 wait_drained
+        """
+        if samples.ndim == 1:
+            samples = samples.reshape(-1, self.channels)
+
+        self._draining = False
+        self._drained.clear()
+        offset = 0
+        while offset < len(samples):
+            self._space.clear()
+            self._waiting_for_space = True
+            written = self.buffer.write(samples[offset:])
+            offset += written
+            if offset < len(samples):
+                await self._space.wait()
+        self._waiting_for_space = False
+        if final:
+            self._draining = True
+
+    async def wait_drained(self) -> None:
+        """等待缓冲区中的音频全部播放完毕"""
+        self._draining = True
+        if self.buffer.available == 0:
+            self._playing = False
+            self._drained.set()
+        await self._drained.wait()
+
+    def flush(self) -> int:
+        """
+        丢弃所有尚未播放的音频，立即停止输出
+
+        Returns:
+            被丢弃的帧数
+        """
+        dropped = self.buffer.clear()
+        self.frames_flushed += dropped
+        self._playing = False
+        self._draining = False
+        self._drained.set()
+        self._space.set()
+        return dropped
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取输出统计信息
+
+        Returns:
+            包含欠载次数、已播放帧数、缓冲水位等信息的字典
+        """
+        return {
+            "underruns": self.underruns,
+            "frames_played": self.frames_played,
+            "frames_flushed": self.frames_flushed,
+            "buffered_frames": self.buffer.available,
+            "buffer_capacity": self.buffer.capacity,
+        }
+
+    def _callback(self, outdata: np.ndarray, frames: int, time_info, status) -> None:
+        """音频回调（在PortAudio线程中执行）"""
+        if status.output_underflow:
+            self.underruns += 1
+
+        if not self._playing:
+            if self.buffer.available >= self.prefill_frames or (
+                    self._draining and self.buffer.available > 0):
+                self._playing = True
+            else:
+                outdata.fill(0)
+                return
+
+        count = self.buffer.read_into(outdata)
+        self.frames_played += count
+        if count < frames:
+            outdata[count:].fill(0)
+            self._playing = False
+            if self._draining:
+                self._notify(self._drained)
+            else:
+                # 播放中途数据不足
+                self.underruns += 1
+
+        if self._waiting_for_space:
+            self._notify(self._space)
+
+    def _notify(self, event: asyncio.Event) -> None:
+        """从音频线程唤醒事件循环中的等待者"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(event.set)
@@ -0,0 +1,122 @@
+"""
+固定容量的音频环形缓冲区
+"""
+
+from typing import Union
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    保存最近一段音频的环形缓冲区
+
+    存储空间在初始化时一次性分配，之后的写入不再分配内存。缓冲区使用
+    镜像布局（每个采样同时写在 i 和 i + capacity 两处），因此任意不超过
+    容量的区间都是一段连续内存，可以直接返回零拷贝的numpy视图。
+
+    位置均为自创建以来的绝对采样序号，读取已被覆盖的区间会抛出 ValueError。
+    返回的视图在对应数据被覆盖前有效。
+    """
+
+    def __init__(self, capacity: int, dtype=np.int16):
+        """
+        初始化缓冲区
+
+        Args:
+            capacity: 容量（采样数）
+            dtype: 采样数据类型
+        """
+        if capacity <= 0:
+            raise ValueError("缓冲区容量必须大于0")
+
+        self.capacity = capacity
+        self._data = np.zeros(capacity * 2, dtype=dtype)
+        self.total_written = 0
+
+    @classmethod
+    def from_duration(cls, duration_ms: int, sample_rate: int, dtype=np.int16) -> "AudioRingBuffer":
+        """
+        按时长创建缓冲区
+
+        Args:
+            duration_ms: 缓冲时长(ms)
+            sample_rate: 采样率
+            dtype: 采样数据类型
+
+        Returns:
+            缓冲区实例
+        """
+        return cls(int(sample_rate * duration_ms / 1000), dtype)
+
+    @property
+    def oldest(self) -> int:
+        """仍保留在缓冲区中的最早采样位置"""
+        return max(0, self.total_written - self.capacity)
+
+    def write(self, samples: Union[bytes, bytearray, memoryview, np.ndarray]) -> int:
+        """
+        写入采样
+
+        Args:
+            samples: int16 PCM字节或numpy数组
+
+        Returns:
+            写入后最新采样之后的位置
+        """
+        if not isinstance(samples, np.ndarray):
+            samples = np.frombuffer(samples, dtype=self._data.dtype)
+        if len(samples) > self.capacity:
+            # 只保留最后 capacity 个采样
+            self.total_written += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+
+        count = len(samples)
+        capacity = self.capacity
+        index = self.total_written % capacity
+        self._data[index:index + count] = samples
+        if index + count <= capacity:
+            self._data[index + capacity:index + capacity + count] = samples
+        else:
+            first = capacity - index
+            self._data[index + capacity:] = samples[:first]
+            self._data[:count - first] = samples[first:]
+
+        self.total_written += count
+        return self.total_written
+
+    def view(self, start: int, end: int = None) -> np.ndarray:
+        """
+        获取 [start, end) 区间的零拷贝视图
+
+        Args:
+            start: 起始位置（绝对采样序号）
+            end: 结束位置，默认为最新位置
+
+        Returns:
+            只读numpy视图
+
+        Raises:
+            ValueError: 区间已被覆盖或超出已写入范围
+        """
+        if end is None:
+            end = self.total_written
+        if start < self.oldest or end > self.total_written or start > end:
+            raise ValueError(f"区间 [{start}, {end}) 不在缓冲区范围内")
+
+        index = start % self.capacity
+        view = self._data[index:index + (end - start)]
+        view.flags.writeable = False
+        return view
+
+    def latest(self, count: int) -> np.ndarray:
+        """
+        获取最近 count 个采样的零拷贝视图
+
+        Args:
+            count: 采样数，超过已保留的数量时返回全部
+
+        Returns:
+            只读numpy视图
+        """
+        start = max(self.oldest, self.total_written - count)
+        return self.view(start)
@@ -0,0 +1,10 @@
+"""
+STT 模块
+"""
+
+from .base import BaseSTTEngine
+from .endpoint import VADEndpointer
+from .whisper_stt import WhisperSTTEngine
+from .factory import STTFactory
+
+__all__ = ['BaseSTTEngine', 'VADEndpointer', 'WhisperSTTEngine', 'STTFactory']
@@ -3,11 +3,15 @@ STT基础接口定义
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import AsyncIterator, Callable, Optional
+from .endpoint import VADEndpointer
+from .wav import wav_header
 
 class BaseSTTEngine(ABC):
     """STT引擎基础接口"""
     
+    sample_rate: int = 16000
+    
     @abstractmethod
     async def speech_to_text(self, audio_data: Optional[bytes] = None) -> str:
         """
@@ -20,3 +24,41 @@ class BaseSTTEngine(ABC):
             识别出的文本
         """
         pass
+        
+    async def transcribe_stream(self,
+                                frames: AsyncIterator[bytes],
+                                on_partial: Optional[Callable[[str], None]] = None,
+                                on_provisional: Optional[Callable[[Optional[str]], None]] = None) -> str:
+        """
+        识别实时音频流，检测到语音端点后返回
+        
+        默认实现收集到端点为止的音频后一次性识别，不产生临时结果；
+        支持流式上传或提前识别的引擎应覆盖此方法。
+        
+        Args:
+            frames: int16 PCM音频帧流（如音频总线的订阅）
+            on_partial: 收到中间识别结果时的回调
+            on_provisional: 提前端点得到临时结果时以该结果调用；之后用户继续说话时以None调用
+            
+        Returns:
+            识别出的文本，没有检测到语音时返回空字符串
+        """
+        endpointer = self.create_endpointer()
+        chunks = []
+        async for frame in frames:
+            chunks.append(bytes(frame))
+            if endpointer.process(frame):
+                break
+        if not endpointer.speech_detected:
+            return ""
+        pcm = b''.join(chunks)
+        return await self.speech_to_text(wav_header(self.sample_rate, len(pcm)) + pcm)
+        
+    def create_endpointer(self) -> VADEndpointer:
+        """
+        创建端点检测器
+        
+        Returns:
+            端点检测器
+        """
+        return VADEndpointer(sample_rate=self.sample_rate)
@@ -0,0 +1,120 @@
+"""
+基于VAD的语音端点检测
+"""
+
+import logging
+from typing import Dict, Any, Optional
+import webrtcvad
+
+logger = logging.getLogger(__name__)
+
+
+class VADEndpointer:
+    """
+    判断用户何时说完
+
+    逐帧运行VAD：检测到足够长的语音后，连续静音达到 end_silence_ms 即为端点；
+    一直没有语音（no_speech_timeout_ms）或语音过长（max_speech_ms）时也会结束。
+    配置了 early_silence_ms 时，较短的静音先产生一个提前端点（paused），
+    之后再次出现足够长的语音则取消提前端点，用于提前开始识别和后续处理。
+    """
+
+    def __init__(self,
+                 sample_rate: int = 16000,
+                 vad_aggressiveness: int = 2,
+                 end_silence_ms: int = 600,
+                 early_silence_ms: int = 0,
+                 min_speech_ms: int = 90,
+                 no_speech_timeout_ms: int = 5000,
+                 max_speech_ms: int = 15000):
+        """
+        初始化端点检测
+
+        Args:
+            sample_rate: 采样率
+            vad_aggressiveness: VAD灵敏度(0-3)
+            end_silence_ms: 语音之后判定为说完所需的静音时长(ms)
+            early_silence_ms: 产生提前端点所需的静音时长(ms)，0表示不使用提前端点
+            min_speech_ms: 判定为开始说话所需的语音时长(ms)
+            no_speech_timeout_ms: 一直没有语音时的等待时长(ms)
+            max_speech_ms: 从开始到强制结束的最长时长(ms)
+        """
+        self.vad = webrtcvad.Vad(vad_aggressiveness)
+        self.sample_rate = sample_rate
+        self.end_silence_ms = end_silence_ms
+        self.early_silence_ms = early_silence_ms
+        self.min_speech_ms = min_speech_ms
+        self.no_speech_timeout_ms = no_speech_timeout_ms
+        self.max_speech_ms = max_speech_ms
+        self.reset()
+
+    def reset(self) -> None:
+        """重置状态，开始新的一段"""
+        self.elapsed_ms = 0.0
+        self.speech_ms = 0.0  # 当前连续语音时长
+        self.silence_ms = 0.0  # 当前连续静音时长
+        self.speech_detected = False
+        self.paused = False  # 处于提前端点之后、尚未恢复说话
+        self.early_endpoints = 0
+        self.resumes = 0  # 提前端点之后又继续说话的次数
+        self.reason: Optional[str] = None  # 结束原因："silence"、"no_speech"、"max_duration"
+
+    @property
+    def done(self) -> bool:
+        """是否已到达端点"""
+        return self.reason is not None
+
+    def process(self, frame) -> bool:
+        """
+        处理一帧音频
+
+        Args:
+            frame: 一帧int16 PCM数据（10/20/30ms）
+
+        Returns:
+            是否已到达端点
+        """
+        if self.done:
+            return True
+        frame_ms = len(frame) / 2 * 1000 / self.sample_rate
+        self.elapsed_ms += frame_ms
+
+        if self.vad.is_speech(frame, self.sample_rate):
+            self.speech_ms += frame_ms
+            self.silence_ms = 0.0
+            if self.speech_ms >= self.min_speech_ms:
+                self.speech_detected = True
+                if self.paused:
+                    self.paused = False
+                    self.resumes += 1
+        else:
+            self.speech_ms = 0.0
+            self.silence_ms += frame_ms
+            if (self.early_silence_ms and self.speech_detected and not self.paused
+                    and self.silence_ms >= self.early_silence_ms):
+                self.paused = True
+                self.early_endpoints += 1
+
+        if self.speech_detected and self.silence_ms >= self.end_silence_ms:
+            self.reason = "silence"
+        elif not self.speech_detected and self.elapsed_ms >= self.no_speech_timeout_ms:
+            self.reason = "no_speech"
+        elif self.elapsed_ms >= self.max_speech_ms:
+            self.reason = "max_duration"
+        if self.reason:
+            logger.debug(f"语音端点: {self.reason}, 时长 {self.elapsed_ms:.0f}ms")
+        return self.done
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], sample_rate: int = 16000) -> "VADEndpointer":
+        """
+        按配置字典创建
+
+        Args:
+            config: 端点检测配置
+            sample_rate: 采样率
+
+        Returns:
+            端点检测实例
+        """
+        return cls(sample_rate=sample_rate, **config)
@@ -0,0 +1,87 @@
+"""
+STT 引擎工厂
+"""
+
+import logging
+from typing import Dict, Any, Type
+from .base import BaseSTTEngine
+from .whisper_stt import WhisperSTTEngine
+
+logger = logging.getLogger(__name__)
+
+class STTFactory:
+    """STT 引擎工厂"""
+    
+    # 注册可用的引擎
+    _engines: Dict[str, Type[BaseSTTEngine]] = {
+        "whisper": WhisperSTTEngine
+    }
+    
+    @classmethod
+    def create_engine(cls, config: Dict[str, Any], pool=None, sample_rate: int = 16000) -> BaseSTTEngine:
+        """
+        创建 STT 引擎实例
+        
+        Args:
+            config: STT配置字典
+            pool: 共享连接池（可选）
+            sample_rate: 输入音频的采样率
+        
+        Returns:
+            STT引擎实例
+        
+        Raises:
+            ValueError: 引擎类型不支持或配置无效
+        """
+        engine_type = config.get("type")
+        if not engine_type:
+            raise ValueError("未指定STT引擎类型")
+        
+        if engine_type not in cls._engines:
+            raise ValueError(f"不支持的STT引擎类型: {engine_type}")
+        
+        engine_class = cls._engines[engine_type]
+        engine_config = config.get(engine_type, {})
+        
+        try:
+            if engine_type == "whisper":
+                if not engine_config.get("api_key"):
+                    raise ValueError("Whisper STT引擎需要提供api_key")
+                engine = engine_class(
+                    api_key=engine_config["api_key"],
+                    api_base=engine_config.get("api_base") or "https://api.openai.com/v1",
+                    model=engine_config.get("model", "whisper-1"),
+                    language=engine_config.get("language"),
+                    stream=engine_config.get("stream", False),
+                    encoding=engine_config.get("encoding", "wav"),
+                    sample_rate=sample_rate,
+                    endpointing=config.get("endpointing"),
+                    timeout=engine_config.get("timeout", 30.0),
+                    pool=pool
+                )
+                if pool:
+                    pool.add_warm_target(engine.api_base)
+            else:
+                # 对于自定义引擎，使用配置字典作为参数
+                engine = engine_class(**engine_config)
+        
+        except Exception as e:
+            logger.error(f"创建STT引擎失败: {e}", exc_info=True)
+            raise
+        
+        return engine
+    
+    @classmethod
+    def register_engine(cls, engine_type: str, engine_class: Type[BaseSTTEngine]) -> None:
+        """
+        注册新的引擎类型
+        
+        Args:
+            engine_type: 引擎类型名称
+            engine_class: 引擎类
+        """
+        if not issubclass(engine_class, BaseSTTEngine):
+            raise ValueError(f"引擎类 {engine_class.__name__} 必须继承 BaseSTTEngine")
+        
+        cls._engines[engine_type] = engine_class
+        logger.info(f"注册STT引擎: {engine_type} -> {engine_class.__name__}")
@@ -0,0 +1,224 @@
+"""
+流式 FLAC 编码
+"""
+
+from typing import List
+import numpy as np
+
+# 定长预测器的系数（FLAC规范中的 FIXED 子帧，阶数0-4）
+FIXED_COEFFICIENTS = (
+    (),
+    (1,),
+    (2, -1),
+    (3, -3, 1),
+    (4, -6, 4, -1),
+)
+MAX_RICE_PARAMETER = 14  # 4位Rice参数，15为转义码
+
+
+def _crc8(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+def _make_crc16_table() -> List[int]:
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x8005) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+        table.append(crc)
+    return table
+
+
+_CRC16_TABLE = _make_crc16_table()
+
+
+def _crc16(data: bytes) -> int:
+    crc = 0
+    table = _CRC16_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ byte]
+    return crc
+
+
+def _utf8_number(value: int) -> bytes:
+    """按FLAC帧头的扩展UTF-8格式编码帧号"""
+    if value < 0x80:
+        return bytes([value])
+    bits = value.bit_length()
+    length = 2
+    while bits > 5 * length + 1:
+        length += 1
+    out = []
+    for _ in range(length - 1):
+        out.append(0x80 | (value & 0x3F))
+        value >>= 6
+    lead = (0xFF << (8 - length)) & 0xFF
+    out.append(lead | value)
+    return bytes(reversed(out))
+
+
+class _BitWriter:
+    """把若干位段拼接为字节，Rice编码部分用numpy批量生成"""
+
+    def __init__(self):
+        self._parts: List[np.ndarray] = []
+
+    def write(self, value: int, width: int) -> None:
+        shifts = np.arange(width - 1, -1, -1, dtype=np.int64)
+        self._parts.append(((value >> shifts) & 1).astype(np.uint8))
+
+    def write_signed_array(self, values: np.ndarray, width: int) -> None:
+        shifts = np.arange(width - 1, -1, -1, dtype=np.int64)
+        unsigned = values.astype(np.int64) & ((1 << width) - 1)
+        self._parts.append(((unsigned[:, None] >> shifts) & 1).astype(np.uint8).ravel())
+
+    def write_rice(self, values: np.ndarray, parameter: int) -> None:
+        """写入Rice编码：商为一元码（若干0后接1），余数为 parameter 位"""
+        quotients = values >> parameter
+        lengths = quotients + 1 + parameter
+        starts = np.concatenate(([0], np.cumsum(lengths[:-1])))
+        bits = np.zeros(int(lengths.sum()), dtype=np.uint8)
+        stops = starts + quotients
+        bits[stops] = 1
+        for bit in range(parameter):
+            bits[stops + 1 + bit] = (values >> (parameter - 1 - bit)) & 1
+        self._parts.append(bits)
+
+    def to_bytes(self) -> bytes:
+        """补齐到整字节后输出"""
+        bits = np.concatenate(self._parts) if self._parts else np.zeros(0, dtype=np.uint8)
+        return np.packbits(bits).tobytes()
+
+
+class StreamingFlacEncoder:
+    """
+    单声道16位PCM的流式FLAC编码器
+
+    采样写入预分配的块缓冲区，每凑满一块就编码为一个FLAC帧；每帧在定长预测器（0-4阶）
+    中选择残差编码最短的一个，残差用Rice编码，静音块编码为常量子帧。
+    总采样数和MD5在流开始时未知，按规范置0。语音通常压缩到PCM的一半左右。
+    """
+
+    content_type = "audio/flac"
+    filename = "speech.flac"
+
+    def __init__(self, sample_rate: int = 16000, block_size: int = 4096):
+        """
+        初始化编码器
+
+        Args:
+            sample_rate: 采样率
+            block_size: 每帧的采样数
+        """
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self._block = np.zeros(block_size, dtype=np.int16)
+        self._filled = 0
+        self._frame_number = 0
+
+    def header(self) -> bytes:
+        """
+        流头部：fLaC 标记和 STREAMINFO 元数据块
+
+        Returns:
+            头部字节
+        """
+        info = _BitWriter()
+        info.write(self.block_size, 16)  # 最小块长（最后一块可以更短）
+        info.write(self.block_size, 16)  # 最大块长
+        info.write(0, 24)  # 最小帧长，未知
+        info.write(0, 24)  # 最大帧长，未知
+        info.write(self.sample_rate, 20)
+        info.write(0, 3)  # 声道数-1
+        info.write(15, 5)  # 位深-1
+        info.write(0, 36)  # 总采样数，未知
+        body = info.to_bytes() + bytes(16)  # MD5，未知
+        return b"fLaC" + bytes([0x80]) + len(body).to_bytes(3, "big") + body
+
+    def encode(self, pcm) -> List[bytes]:
+        """
+        输入PCM数据
+
+        Args:
+            pcm: int16 PCM字节或数组
+
+        Returns:
+            本次凑满的块编码得到的FLAC帧
+        """
+        samples = pcm if isinstance(pcm, np.ndarray) else np.frombuffer(pcm, dtype=np.int16)
+        frames = []
+        offset = 0
+        while offset < len(samples):
+            take = min(self.block_size - self._filled, len(samples) - offset)
+            self._block[self._filled:self._filled + take] = samples[offset:offset + take]
+            self._filled += take
+            offset += take
+            if self._filled == self.block_size:
+                frames.append(self._encode_frame(self._block))
+                self._filled = 0
+        return frames
+
+    def finish(self) -> List[bytes]:
+        """
+        编码剩余的不完整块
+
+        Returns:
+            最后的FLAC帧
+        """
+        if not self._filled:
+            return []
+        frame = self._encode_frame(self._block[:self._filled])
+        self._filled = 0
+        return [frame]
+
+    def _encode_frame(self, block: np.ndarray) -> bytes:
+        header = bytearray(b"\xff\xf8")
+        header.append(0x70)  # 块长用16位显式给出；采样率取自STREAMINFO
+        header.append(0x08)  # 单声道，16位
+        header += _utf8_number(self._frame_number)
+        header += (len(block) - 1).to_bytes(2, "big")
+        header.append(_crc8(header))
+        self._frame_number += 1
+
+        writer = _BitWriter()
+        self._write_subframe(writer, block.astype(np.int32))
+        frame = bytes(header) + writer.to_bytes()
+        return frame + _crc16(frame).to_bytes(2, "big")
+
+    @staticmethod
+    def _write_subframe(writer: _BitWriter, samples: np.ndarray) -> None:
+        if np.all(samples == samples[0]):
+            writer.write(0b00000000, 8)  # 常量子帧
+            writer.write(int(samples[0]) & 0xFFFF, 16)
+            return
+
+        best = None
+        for order in range(min(4, len(samples) - 1) + 1):
+            residual = samples[order:].copy()
+            for lag, coefficient in enumerate(FIXED_COEFFICIENTS[order], start=1):
+                residual -= coefficient * samples[order - lag:len(samples) - lag]
+            folded = np.where(residual >= 0, residual * 2, -residual * 2 - 1).astype(np.int64)
+            for parameter in range(MAX_RICE_PARAMETER + 1):
+                bits = int((folded >> parameter).sum()) + len(folded) * (parameter + 1) + 16 * order
+                if best is None or bits < best[0]:
+                    best = (bits, order, parameter, folded)
+
+        verbatim_bits = 16 * len(samples)
+        _, order, parameter, folded = best
+        if best[0] >= verbatim_bits:
+            writer.write(0b00000010, 8)  # 原样子帧
+            writer.write_signed_array(samples, 16)
+            return
+
+        writer.write(0b00010000 | (order << 1), 8)  # 定长预测子帧
+        writer.write_signed_array(samples[:order], 16)
+        writer.write(0, 2)  # Rice编码，4位参数
+        writer.write(0, 4)  # 分区阶数0
+        writer.write(parameter, 4)
+        writer.write_rice(folded, parameter)
@@ -0,0 +1,77 @@
+"""
+WAV 编码
+"""
+
+import struct
+from typing import List
+
+# 流式写出时长度未知，RIFF和data块的长度使用最大值，解码器会读到数据结束为止
+STREAMING_SIZE = 0xFFFFFFFF
+
+
+def wav_header(sample_rate: int,
+               data_size: int = STREAMING_SIZE,
+               channels: int = 1,
+               sample_width: int = 2) -> bytes:
+    """
+    生成PCM WAV文件头
+
+    Args:
+        sample_rate: 采样率
+        data_size: PCM数据字节数，未知时使用 STREAMING_SIZE
+        channels: 声道数
+        sample_width: 每个采样的字节数
+
+    Returns:
+        44字节的文件头
+    """
+    riff_size = STREAMING_SIZE if data_size == STREAMING_SIZE else 36 + data_size
+    byte_rate = sample_rate * channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", riff_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, byte_rate, channels * sample_width, sample_width * 8,
+        b"data", data_size
+    )
+
+
+class StreamingWavEncoder:
+    """
+    流式WAV编码器
+
+    先写出长度未知的文件头，之后的PCM数据原样输出（不复制），
+    与 StreamingFlacEncoder 接口一致。
+    """
+
+    content_type = "audio/wav"
+    filename = "speech.wav"
+
+    def __init__(self, sample_rate: int = 16000):
+        """
+        初始化编码器
+
+        Args:
+            sample_rate: 采样率
+        """
+        self.sample_rate = sample_rate
+
+    def header(self) -> bytes:
+        """长度未知的WAV文件头"""
+        return wav_header(self.sample_rate)
+
+    def encode(self, pcm) -> List[memoryview]:
+        """
+        输入PCM数据
+
+        Args:
+            pcm: int16 PCM字节、memoryview或数组
+
+        Returns:
+            指向输入数据的字节视图
+        """
+        view = memoryview(pcm)
+        return [view.cast('B') if view.format != 'B' else view]
+
+    def finish(self) -> List[bytes]:
+        """WAV没有尾部"""
+        return []
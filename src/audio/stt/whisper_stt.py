@@ -0,0 +1,342 @@
+"""
+Whisper 兼容接口的 STT 引擎实现
+"""
+
+import json
+import time
+import uuid
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+import aiohttp
+import numpy as np
+
+from .base import BaseSTTEngine
+from .endpoint import VADEndpointer
+from .flac import StreamingFlacEncoder
+from .wav import StreamingWavEncoder
+
+logger = logging.getLogger(__name__)
+
+# 上传音频的编码格式
+ENCODERS = {
+    "wav": StreamingWavEncoder,
+    "flac": StreamingFlacEncoder,
+}
+
+
+class WhisperSTTEngine(BaseSTTEngine):
+    """
+    流式上传的 Whisper STT 引擎
+
+    调用兼容 OpenAI 的 /audio/transcriptions 接口。实时识别时，请求在第一帧到达时
+    就发出，multipart 请求体以分块传输编码边说边上传；VAD检测到端点时只需再发送
+    结束边界，服务端随即开始识别，因此端点到结果的延迟基本只剩识别本身的耗时。
+    音频边到达边编码（WAV直接引用输入的缓冲区，FLAC按块压缩），不落盘也不反复拼接，
+    端点时刻请求体只差最后一块。启用 stream 时以SSE读取增量结果（服务端支持时）。
+    端点检测配置了提前端点时，短暂停顿后另发一个请求识别已有的音频，得到临时结果，
+    供调用方提前开始后续处理；主请求不受影响，继续上传直到真正的端点。
+    """
+
+    def __init__(self,
+                 api_key: str,
+                 api_base: str = "https://api.openai.com/v1",
+                 model: str = "whisper-1",
+                 language: Optional[str] = None,
+                 stream: bool = False,
+                 encoding: str = "wav",
+                 sample_rate: int = 16000,
+                 endpointing: Optional[Dict[str, Any]] = None,
+                 timeout: float = 30.0,
+                 pool=None):
+        """
+        初始化 Whisper STT 引擎
+
+        Args:
+            api_key: API密钥
+            api_base: API基础URL
+            model: 模型名称
+            language: 语言代码（如 "zh"），为None时由服务端自动识别
+            stream: 是否请求流式返回识别结果
+            encoding: 上传音频的编码格式，"wav" 或 "flac"（体积约为一半）
+            sample_rate: 输入音频的采样率
+            endpointing: 端点检测参数（见 VADEndpointer）
+            timeout: 上传结束后等待识别结果的超时时间(秒)
+            pool: 共享连接池（可选）
+        """
+        self.api_key = api_key
+        self.api_base = (api_base or "https://api.openai.com/v1").rstrip("/")
+        self.model = model
+        self.language = language
+        if encoding not in ENCODERS:
+            raise ValueError(f"不支持的音频编码: {encoding}")
+        self.stream = stream
+        self.encoding = encoding
+        self.sample_rate = sample_rate
+        self.endpointing = endpointing or {}
+        self.timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=timeout)
+        self.pool = pool
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # 统计信息
+        self.requests = 0
+        self.provisional_requests = 0
+        self.no_speech = 0
+        self.upload_bytes = 0
+        self.bytes_before_endpoint = 0  # 端点之前已经上传的字节数
+        self.last_endpoint_latency: Optional[float] = None  # 端点到最终结果的延迟(秒)
+        self.last_partial_latency: Optional[float] = None  # 端点到第一个中间结果的延迟(秒)
+        self._endpoint_latency_total = 0.0
+        self._endpoint_count = 0
+
+    def create_endpointer(self) -> VADEndpointer:
+        """按配置创建端点检测器"""
+        return VADEndpointer.from_config(self.endpointing, self.sample_rate)
+
+    async def speech_to_text(self, audio_data: Optional[bytes] = None) -> str:
+        """
+        识别一段完整的音频
+
+        Args:
+            audio_data: WAV音频，或不带文件头的int16 PCM数据
+
+        Returns:
+            识别出的文本
+        """
+        if audio_data is None:
+            raise ValueError("WhisperSTTEngine 需要音频数据，实时音频请使用 transcribe_stream")
+        if audio_data.startswith(b"RIFF"):
+            return await self._transcribe_chunks(StreamingWavEncoder(self.sample_rate), [audio_data])
+        return await self._transcribe_samples(audio_data)
+
+    async def transcribe_stream(self,
+                                frames: AsyncIterator[bytes],
+                                on_partial: Optional[Callable[[str], None]] = None,
+                                on_provisional: Optional[Callable[[Optional[str]], None]] = None) -> str:
+        """
+        边说边上传，检测到语音端点后返回最终结果
+
+        Args:
+            frames: int16 PCM音频帧流
+            on_partial: 收到中间识别结果时的回调
+            on_provisional: 提前端点得到临时结果时以该结果调用；之后用户继续说话时以None调用
+
+        Returns:
+            识别出的文本，没有检测到语音时返回空字符串
+        """
+        endpointer = self.create_endpointer()
+        encoder = ENCODERS[self.encoding](self.sample_rate)
+        # 提前识别需要已说过的全部音频，按最长时长预分配一次
+        history = None
+        recorded = 0
+        provisional: Optional[asyncio.Task] = None
+        if on_provisional is not None and endpointer.early_silence_ms:
+            history = np.zeros(int(endpointer.max_speech_ms * self.sample_rate / 1000), dtype=np.int16)
+        # 上传可能因网络停顿落后任意长的时间，入队的帧复制一份，不引用会被覆盖的总线缓冲区
+        queue: asyncio.Queue = asyncio.Queue()
+        marks: Dict[str, float] = {}
+        request: Optional[asyncio.Task] = None
+
+        async def encoded_chunks() -> AsyncIterator[bytes]:
+            yield encoder.header()
+            while True:
+                frame = await queue.get()
+                if frame is None:
+                    break
+                for chunk in encoder.encode(frame):
+                    if "endpoint" not in marks:
+                        self.bytes_before_endpoint += len(chunk)
+                    yield chunk
+            for chunk in encoder.finish():
+                yield chunk
+
+        try:
+            async for frame in frames:
+                if request is None:
+                    request = asyncio.create_task(
+                        self._transcribe(encoder, encoded_chunks(), on_partial, marks))
+                queue.put_nowait(bytes(frame))
+                if history is not None:
+                    samples = np.frombuffer(frame, dtype=np.int16)[:len(history) - recorded]
+                    history[recorded:recorded + len(samples)] = samples
+                    recorded += len(samples)
+
+                was_paused = endpointer.paused
+                done = endpointer.process(frame)
+                if history is not None and endpointer.paused != was_paused:
+                    if provisional is not None:
+                        provisional.cancel()
+                        provisional = None
+                    if endpointer.paused:
+                        # 之后的写入都在 recorded 之后，这段切片的内容不会再变
+                        provisional = asyncio.create_task(
+                            self._transcribe_provisional(history[:recorded], on_provisional))
+                    else:
+                        on_provisional(None)
+                if done:
+                    break
+
+            if request is None or not endpointer.speech_detected:
+                self.no_speech += 1
+                logger.info("未检测到语音")
+                return ""
+
+            marks["endpoint"] = time.monotonic()
+            queue.put_nowait(None)
+            text = await request
+            latency = time.monotonic() - marks["endpoint"]
+            self.last_endpoint_latency = latency
+            self._endpoint_latency_total += latency
+            self._endpoint_count += 1
+            logger.info(f"语音识别完成，端点到结果 {latency * 1000:.0f}ms: {text}")
+            return text
+        finally:
+            for task in (request, provisional):
+                if task is not None and not task.done():
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            包含请求数、上传字节数、端点到结果的延迟和首个中间结果延迟的字典
+        """
+        return {
+            "requests": self.requests,
+            "provisional_requests": self.provisional_requests,
+            "no_speech": self.no_speech,
+            "upload_bytes": self.upload_bytes,
+            "bytes_before_endpoint": self.bytes_before_endpoint,
+            "last_endpoint_latency": self.last_endpoint_latency,
+            "avg_endpoint_latency": (self._endpoint_latency_total / self._endpoint_count
+                                     if self._endpoint_count else None),
+            "last_partial_latency": self.last_partial_latency,
+        }
+
+    async def close(self) -> None:
+        """关闭自有的HTTP会话（使用连接池时由连接池负责）"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self.pool is not None:
+            return self.pool.session(self.api_base)
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def _transcribe_samples(self, samples) -> str:
+        """按配置的编码格式识别一段完整的PCM"""
+        encoder = ENCODERS[self.encoding](self.sample_rate)
+        return await self._transcribe_chunks(
+            encoder, [encoder.header(), *encoder.encode(samples), *encoder.finish()])
+
+    async def _transcribe_chunks(self, encoder, chunks) -> str:
+        async def encoded():
+            for chunk in chunks:
+                yield chunk
+
+        return await self._transcribe(encoder, encoded())
+
+    async def _transcribe_provisional(self,
+                                      samples: np.ndarray,
+                                      on_provisional: Callable[[Optional[str]], None]) -> None:
+        """识别提前端点之前的音频，得到临时结果"""
+        self.provisional_requests += 1
+        try:
+            text = await self._transcribe_samples(samples)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"临时识别失败: {e}")
+            return
+        logger.debug(f"临时识别结果: {text}")
+        if text:
+            on_provisional(text)
+
+    def _form_fields(self) -> Dict[str, str]:
+        fields = {"model": self.model, "response_format": "json"}
+        if self.language:
+            fields["language"] = self.language
+        if self.stream:
+            fields["stream"] = "true"
+        return fields
+
+    async def _multipart_body(self,
+                              boundary: str,
+                              encoder,
+                              audio: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """逐块生成 multipart/form-data 请求体，音频部分随输入流逐步写出"""
+        head = []
+        for name, value in self._form_fields().items():
+            head.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n')
+        head.append(f'--{boundary}\r\nContent-Disposition: form-data; name="file"; '
+                    f'filename="{encoder.filename}"\r\nContent-Type: {encoder.content_type}\r\n\r\n')
+        data = ''.join(head).encode("utf-8")
+        self.upload_bytes += len(data)
+        yield data
+        async for chunk in audio:
+            self.upload_bytes += len(chunk)
+            yield chunk
+        tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        self.upload_bytes += len(tail)
+        yield tail
+
+    async def _transcribe(self,
+                          encoder,
+                          audio: AsyncIterator[bytes],
+                          on_partial: Optional[Callable[[str], None]] = None,
+                          marks: Optional[Dict[str, float]] = None) -> str:
+        """
+        发送一次识别请求
+
+        Args:
+            encoder: 音频编码器，决定文件名和内容类型
+            audio: 编码后的音频数据块流，请求体随之分块上传
+            on_partial: 收到中间识别结果时的回调
+            marks: 记录时间点的字典，包含 "endpoint" 时用于计算中间结果的延迟
+
+        Returns:
+            识别出的文本
+        """
+        marks = marks if marks is not None else {}
+        boundary = uuid.uuid4().hex
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+        }
+        self.requests += 1
+        async with self._get_session().post(
+            f"{self.api_base}/audio/transcriptions",
+            data=self._multipart_body(boundary, encoder, audio),
+            headers=headers,
+            timeout=self.timeout
+        ) as response:
+            if response.status != 200:
+                body = await response.text()
+                raise RuntimeError(f"语音识别请求失败 ({response.status}): {body[:200]}")
+            if not response.content_type.startswith("text/event-stream"):
+                return (await response.json(content_type=None)).get("text", "").strip()
+
+            partial = []
+            async for line in response.content:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                event = json.loads(data)
+                if event.get("type") == "transcript.text.delta":
+                    if not partial and "endpoint" in marks:
+                        self.last_partial_latency = time.monotonic() - marks["endpoint"]
+                    partial.append(event.get("delta", ""))
+                    if on_partial is not None:
+                        on_partial(''.join(partial))
+                elif event.get("type") == "transcript.text.done":
+                    return event.get("text", "").strip()
+            return ''.join(partial).strip()
@@ -5,6 +5,8 @@ TTS 模块
 from .base import BaseTTSEngine
 from .edge_tts import EdgeTTSEngine
 from .openai_tts import OpenAITTSEngine
+from .cache import CachedTTSEngine
+from .failover import FailoverTTSEngine
 from .factory import TTSFactory
 
-__all__ = ['BaseTTSEngine', 'EdgeTTSEngine', 'OpenAITTSEngine', 'TTSFactory']
+__all__ = ['BaseTTSEngine', 'EdgeTTSEngine', 'OpenAITTSEngine', 'CachedTTSEngine', 'FailoverTTSEngine', 'TTSFactory']
@@ -3,7 +3,7 @@ TTS 引擎基类
 """
 
 import logging
-from typing import Optional
+from typing import AsyncIterator
 
 logger = logging.getLogger(__name__)
 
@@ -21,3 +21,17 @@ class BaseTTSEngine:
             音频数据（MP3格式）
         """
         raise NotImplementedError
+        
+    async def stream_speech(self, text: str) -> AsyncIterator[bytes]:
+        """
+        将文本转换为语音流，音频数据到达即返回
+        
+        默认实现等待完整结果后一次性返回，支持流式合成的引擎应覆盖此方法。
+        
+        Args:
+            text: 要转换的文本
+            
+        Yields:
+            音频数据块（MP3格式）
+        """
+        yield await self.text_to_speech(text)
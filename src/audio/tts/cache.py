@@ -0,0 +1,419 @@
+"""
+TTS 音频缓存
+"""
+
+import os
+import time
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Any, Optional
+
+from .base import BaseTTSEngine
+
+logger = logging.getLogger(__name__)
+
+# 参与缓存键计算的引擎属性
+KEY_ATTRIBUTES = ("voice", "rate", "volume", "pitch", "model")
+
+
+def normalize_text(text: str) -> str:
+    """
+    规范化文本，使仅有空白或全半角差异的文本命中同一缓存
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        规范化后的文本
+    """
+    return ' '.join(unicodedata.normalize("NFKC", text).split())
+
+
+def speech_key(engine: BaseTTSEngine, text: str, **extra: Any) -> str:
+    """
+    计算合成结果的键，引擎类型、语音参数或文本不同时键不同
+
+    Args:
+        engine: TTS引擎
+        text: 要转换的文本
+        **extra: 其他参与计算的参数
+
+    Returns:
+        十六进制摘要字符串
+    """
+    params = {attr: getattr(engine, attr, None) for attr in KEY_ATTRIBUTES}
+    params["engine"] = type(engine).__name__
+    params["text"] = normalize_text(text)
+    params.update(extra)
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryAudioCache:
+    """按字节数限制大小的内存LRU缓存"""
+
+    def __init__(self, max_bytes: int):
+        """
+        初始化内存缓存
+
+        Args:
+            max_bytes: 最大字节数
+        """
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """读取并标记为最近使用"""
+        audio_data = self._entries.get(key)
+        if audio_data is not None:
+            self._entries.move_to_end(key)
+        return audio_data
+
+    def put(self, key: str, audio_data: bytes) -> None:
+        """写入，超出容量时淘汰最久未使用的条目"""
+        if len(audio_data) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size_bytes -= len(old)
+        self._entries[key] = audio_data
+        self.size_bytes += len(audio_data)
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= len(evicted)
+
+
+class DiskAudioCache:
+    """
+    按字节数限制大小的磁盘缓存
+
+    每个条目存为一个文件，修改时间用作LRU顺序。
+    条目不大（一句话的压缩音频），读取时直接整体读入，命中后提升到内存缓存。
+    读写在线程池中执行，索引由锁保护。
+    """
+
+    SUFFIX = ".audio"
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        初始化磁盘缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 最大字节数
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def _load_index(self) -> None:
+        """扫描目录，按修改时间重建LRU索引"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.SUFFIX):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            entries.append((stat.st_mtime, name[:-len(self.SUFFIX)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.size_bytes += size
+        self._evict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """读取条目，不存在时返回None"""
+        with self._lock:
+            if key not in self._index:
+                return None
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    audio_data = f.read()
+                os.utime(path)
+            except OSError:
+                self._remove(key)
+                return None
+            self._index.move_to_end(key)
+            return audio_data
+
+    def put(self, key: str, audio_data: bytes) -> None:
+        """写入条目，先写临时文件再原子替换"""
+        if not audio_data or len(audio_data) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio_data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.size_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(audio_data)
+            self.size_bytes += len(audio_data)
+            self._evict()
+
+    def _evict(self) -> None:
+        """淘汰最久未使用的条目直到满足容量限制"""
+        while self.size_bytes > self.max_bytes and self._index:
+            key = next(iter(self._index))
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        self.size_bytes -= self._index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+class CachedTTSEngine(BaseTTSEngine):
+    """
+    带缓存的TTS引擎
+
+    包装任意TTS引擎，内存LRU在前、磁盘缓存在后。缓存键由引擎类型、
+    语音参数和规范化后的文本计算得到，同一文本的并发请求只会合成一次。
+    """
+
+    def __init__(self,
+                 engine: BaseTTSEngine,
+                 memory_bytes: int = 8 * 1024 * 1024,
+                 disk_bytes: int = 100 * 1024 * 1024,
+                 cache_dir: Optional[str] = None):
+        """
+        初始化缓存引擎
+
+        Args:
+            engine: 被包装的TTS引擎
+            memory_bytes: 内存缓存最大字节数
+            disk_bytes: 磁盘缓存最大字节数
+            cache_dir: 磁盘缓存目录，为None时只使用内存缓存
+        """
+        self.engine = engine
+        self.memory = MemoryAudioCache(memory_bytes)
+        self.disk = DiskAudioCache(cache_dir, disk_bytes) if cache_dir else None
+        self._pending: Dict[str, asyncio.Future] = {}
+
+        # 统计信息
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_from_cache = 0
+        self.bytes_synthesized = 0
+        self._synthesis_seconds = 0.0
+
+    def cache_key(self, text: str) -> str:
+        """
+        计算缓存键
+
+        Args:
+            text: 要转换的文本
+
+        Returns:
+            十六进制摘要字符串
+        """
+        return speech_key(self.engine, text)
+
+    async def text_to_speech(self, text: str) -> bytes:
+        """
+        将文本转换为语音，优先使用缓存
+
+        Args:
+            text: 要转换的文本
+
+        Returns:
+            音频数据（MP3格式）
+        """
+        key = self.cache_key(text)
+
+        audio_data = self.memory.get(key)
+        if audio_data is not None:
+            self.memory_hits += 1
+            self.bytes_from_cache += len(audio_data)
+            return audio_data
+
+        # 同一文本正在合成时等待其结果
+        audio_data = await self._wait_pending(key)
+        if audio_data is not None:
+            return audio_data
+
+        future = self._start_pending(key)
+        try:
+            audio_data = await self._load_or_synthesize(key, text)
+            future.set_result(audio_data)
+            return audio_data
+        except BaseException as e:
+            self._fail_pending(future, e)
+            raise
+        finally:
+            self._end_pending(key, future)
+
+    async def stream_speech(self, text: str) -> AsyncIterator[bytes]:
+        """
+        将文本转换为语音流，命中缓存时一次性返回
+
+        未命中时边转发底层引擎的音频块边收集，完整结束后写入缓存。
+
+        Args:
+            text: 要转换的文本
+
+        Yields:
+            音频数据块（MP3格式）
+        """
+        key = self.cache_key(text)
+
+        audio_data = self.memory.get(key)
+        if audio_data is not None:
+            self.memory_hits += 1
+            self.bytes_from_cache += len(audio_data)
+            yield audio_data
+            return
+
+        # 同一文本正在合成时等待其完整结果，不重复请求
+        audio_data = await self._wait_pending(key)
+        if audio_data is not None:
+            yield audio_data
+            return
+
+        future = self._start_pending(key)
+        try:
+            audio_data = await self._load_from_disk(key)
+            if audio_data is None:
+                self.misses += 1
+                start_time = time.monotonic()
+                parts = []
+                async for chunk in self.engine.stream_speech(text):
+                    parts.append(chunk)
+                    yield chunk
+                self._synthesis_seconds += time.monotonic() - start_time
+                audio_data = b''.join(parts)
+                await self._store(key, audio_data)
+                future.set_result(audio_data)
+                return
+            future.set_result(audio_data)
+            yield audio_data
+        except BaseException as e:
+            self._fail_pending(future, e)
+            raise
+        finally:
+            self._end_pending(key, future)
+
+    async def _wait_pending(self, key: str) -> Optional[bytes]:
+        """
+        等待同一文本正在进行的合成
+
+        Returns:
+            合成结果；没有正在进行的合成，或其被取消（如调用方提前结束读取）时返回None
+
+        Raises:
+            Exception: 正在进行的合成失败时抛出其错误
+        """
+        pending = self._pending.get(key)
+        if pending is None:
+            return None
+        # 不使用 shield：本任务被取消时不影响 pending，pending 被取消时本任务自行合成
+        await asyncio.wait([pending])
+        if pending.cancelled():
+            return None
+        return pending.result()
+
+    def _start_pending(self, key: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        return future
+
+    @staticmethod
+    def _fail_pending(future: asyncio.Future, error: BaseException) -> None:
+        if future.done():
+            return
+        if isinstance(error, Exception):
+            future.set_exception(error)
+            # 没有其他等待者时避免“异常未读取”警告
+            future.exception()
+        else:
+            future.cancel()
+
+    def _end_pending(self, key: str, future: asyncio.Future) -> None:
+        if not future.done():
+            # 生成器未读完就被丢弃
+            future.cancel()
+        if self._pending.get(key) is future:
+            del self._pending[key]
+
+    async def _load_or_synthesize(self, key: str, text: str) -> bytes:
+        """从磁盘读取，未命中时调用底层引擎合成"""
+        audio_data = await self._load_from_disk(key)
+        if audio_data is not None:
+            return audio_data
+
+        self.misses += 1
+        start_time = time.monotonic()
+        audio_data = await self.engine.text_to_speech(text)
+        self._synthesis_seconds += time.monotonic() - start_time
+        await self._store(key, audio_data)
+        return audio_data
+
+    async def _load_from_disk(self, key: str) -> Optional[bytes]:
+        """从磁盘缓存读取，命中时提升到内存缓存"""
+        if self.disk is None:
+            return None
+        loop = asyncio.get_running_loop()
+        audio_data = await loop.run_in_executor(None, self.disk.get, key)
+        if audio_data is not None:
+            self.disk_hits += 1
+            self.bytes_from_cache += len(audio_data)
+            self.memory.put(key, audio_data)
+        return audio_data
+
+    async def _store(self, key: str, audio_data: bytes) -> None:
+        """写入内存和磁盘缓存"""
+        self.bytes_synthesized += len(audio_data)
+        self.memory.put(key, audio_data)
+        if self.disk is not None:
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self.disk.put, key, audio_data)
+            except OSError as e:
+                logger.warning(f"写入TTS磁盘缓存失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            包含命中/未命中次数、字节数和估算节省时间的字典
+        """
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        avg_synthesis = self._synthesis_seconds / self.misses if self.misses else 0.0
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+            "bytes_from_cache": self.bytes_from_cache,
+            "bytes_synthesized": self.bytes_synthesized,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.size_bytes,
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+            "disk_bytes": self.disk.size_bytes if self.disk is not None else 0,
+            "avg_synthesis_seconds": avg_synthesis,
+            "estimated_seconds_saved": hits * avg_synthesis,
+        }
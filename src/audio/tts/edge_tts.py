@@ -3,6 +3,7 @@ Edge TTS 引擎实现
 """
 
 import logging
+from typing import AsyncIterator
 import edge_tts
 from .base import BaseTTSEngine
 
@@ -11,7 +12,11 @@ logger = logging.getLogger(__name__)
 class EdgeTTSEngine(BaseTTSEngine):
     """Edge TTS 引擎"""
     
-    def __init__(self, voice: str = "zh-CN-XiaoxiaoNeural", rate: str = "+0%", volume: str = "+0%", pitch: str = "+0Hz"):
+    # 合成服务地址，用于连接预热
+    SERVICE_URL = "https://speech.platform.bing.com/"
+    
+    def __init__(self, voice: str = "zh-CN-XiaoxiaoNeural", rate: str = "+0%", volume: str = "+0%", pitch: str = "+0Hz",
+                 connector=None):
         """
         初始化 Edge TTS 引擎
         
@@ -20,11 +25,14 @@ class EdgeTTSEngine(BaseTTSEngine):
             rate: 语速，如 "+50%"、"-20%"
             volume: 音量，如 "+50%"、"-20%"
             pitch: 音调，如 "+10Hz"、"-10Hz"
+            connector: 共享的aiohttp连接器（可选）。Edge TTS协议每句话使用一个新的websocket，
+                共享连接器可以复用DNS缓存
         """
         self.voice = voice
         self.rate = rate
         self.volume = volume
         self.pitch = pitch
+        self.connector = connector
         
     async def text_to_speech(self, text: str) -> bytes:
         """
@@ -36,23 +44,40 @@ class EdgeTTSEngine(BaseTTSEngine):
         Returns:
             音频数据（MP3格式）
         """
+        audio_data = bytearray()
+        async for chunk in self.stream_speech(text):
+            audio_data.extend(chunk)
+        return bytes(audio_data)
+        
+    async def stream_speech(self, text: str) -> AsyncIterator[bytes]:
+        """
+        将文本转换为语音流，websocket收到音频块即返回
+        
+        Args:
+            text: 要转换的文本
+            
+        Yields:
+            音频数据块（MP3格式）
+        """
         try:
             communicate = edge_tts.Communicate(
                 text, 
                 self.voice,
                 rate=self.rate,
                 volume=self.volume,
-                pitch=self.pitch
+                pitch=self.pitch,
+                connector=self.connector
             )
-            audio_data = bytearray()
-            
-            async for chunk in communicate.stream():
-                # 只处理音频数据
-                if isinstance(chunk, dict) and chunk.get("type") == "audio":
-                    audio_data.extend(chunk["data"])
+            stream = communicate.stream()
+            try:
+                async for chunk in stream:
+                    # 只处理音频数据
+                    if isinstance(chunk, dict) and chunk.get("type") == "audio":
+                        yield chunk["data"]
+            finally:
+                # 提前结束时关闭websocket
+                await stream.aclose()
                 
-            return bytes(audio_data)
-            
         except Exception as e:
             logger.error(f"Edge TTS 转换错误: {e}", exc_info=True)
             raise
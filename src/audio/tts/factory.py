@@ -7,6 +7,8 @@ from typing import Dict, Any, Type
 from .base import BaseTTSEngine
 from .edge_tts import EdgeTTSEngine
 from .openai_tts import OpenAITTSEngine
+from .cache import CachedTTSEngine
+from .failover import FailoverTTSEngine
 
 logger = logging.getLogger(__name__)
 
@@ -16,16 +18,18 @@ class TTSFactory:
     # 注册可用的引擎
     _engines: Dict[str, Type[BaseTTSEngine]] = {
         "edge": EdgeTTSEngine,
-        "openai": OpenAITTSEngine
+        "openai": OpenAITTSEngine,
+        "failover": FailoverTTSEngine
     }
     
     @classmethod
-    def create_engine(cls, config: Dict[str, Any]) -> BaseTTSEngine:
+    def create_engine(cls, config: Dict[str, Any], pool=None) -> BaseTTSEngine:
         """
         创建 TTS 引擎实例
         
         Args:
             config: TTS配置字典
+            pool: 共享连接池（可选）
             
         Returns:
             TTS引擎实例
@@ -37,6 +41,57 @@ class TTSFactory:
         if not engine_type:
             raise ValueError("未指定TTS引擎类型")
             
+        if engine_type == "failover":
+            engine = cls._create_failover(config, pool)
+        else:
+            engine = cls._create_single(engine_type, config, pool)
+            
+        return cls._wrap_cache(engine, config.get("cache", {}))
+        
+    @classmethod
+    def _create_failover(cls, config: Dict[str, Any], pool=None) -> BaseTTSEngine:
+        """
+        按 failover.backends 列出的顺序创建各后端，组合为带对冲和熔断的引擎
+        
+        各后端的参数仍取自同名的配置段（如 edge、openai）。
+        
+        Args:
+            config: TTS配置字典
+            pool: 共享连接池（可选）
+            
+        Returns:
+            组合引擎
+            
+        Raises:
+            ValueError: 未提供后端列表或后端类型无效
+        """
+        failover_config = dict(config.get("failover", {}))
+        names = failover_config.pop("backends", None)
+        if not names:
+            raise ValueError("failover引擎需要提供backends列表")
+        if "failover" in names:
+            raise ValueError("failover引擎的后端不能是failover")
+            
+        backends = [(name, cls._create_single(name, config, pool)) for name in names]
+        logger.info(f"启用TTS故障转移: {' -> '.join(names)}")
+        return FailoverTTSEngine(backends, **failover_config)
+        
+    @classmethod
+    def _create_single(cls, engine_type: str, config: Dict[str, Any], pool=None) -> BaseTTSEngine:
+        """
+        创建单个TTS引擎（不含缓存）
+        
+        Args:
+            engine_type: 引擎类型
+            config: TTS配置字典
+            pool: 共享连接池（可选）
+            
+        Returns:
+            TTS引擎实例
+            
+        Raises:
+            ValueError: 引擎类型不支持或配置无效
+        """
         if engine_type not in cls._engines:
             raise ValueError(f"不支持的TTS引擎类型: {engine_type}")
             
@@ -46,26 +101,59 @@ class TTSFactory:
         try:
             # 根据引擎类型创建实例
             if engine_type == "edge":
-                return engine_class(
-                    voice=engine_config.get("voice", "zh-CN-XiaoxiaoNeural")
+                engine = engine_class(
+                    voice=engine_config.get("voice", "zh-CN-XiaoxiaoNeural"),
+                    rate=engine_config.get("rate", "+0%"),
+                    volume=engine_config.get("volume", "+0%"),
+                    pitch=engine_config.get("pitch", "+0Hz"),
+                    connector=pool.connector() if pool else None
                 )
+                if pool:
+                    pool.add_warm_target(engine_class.SERVICE_URL)
             elif engine_type == "openai":
                 if "api_key" not in engine_config:
                     raise ValueError("OpenAI TTS引擎需要提供api_key")
-                return engine_class(
+                engine = engine_class(
                     api_key=engine_config["api_key"],
                     api_base=engine_config.get("api_base"),
                     voice=engine_config.get("voice", "alloy"),
-                    model=engine_config.get("model", "tts-1")
+                    model=engine_config.get("model", "tts-1"),
+                    pool=pool
                 )
             else:
                 # 对于自定义引擎，使用配置字典作为参数
-                return engine_class(**engine_config)
+                engine = engine_class(**engine_config)
                 
         except Exception as e:
             logger.error(f"创建TTS引擎失败: {e}", exc_info=True)
             raise
             
+        return engine
+        
+    @classmethod
+    def _wrap_cache(cls, engine: BaseTTSEngine, cache_config: Dict[str, Any]) -> BaseTTSEngine:
+        """
+        根据缓存配置包装引擎
+        
+        Args:
+            engine: TTS引擎实例
+            cache_config: 缓存配置字典
+            
+        Returns:
+            未启用缓存时返回原引擎，否则返回带缓存的引擎
+        """
+        if not cache_config.get("enabled", False):
+            return engine
+            
+        cached = CachedTTSEngine(
+            engine,
+            memory_bytes=cache_config.get("memory_bytes", 8 * 1024 * 1024),
+            disk_bytes=cache_config.get("disk_bytes", 100 * 1024 * 1024),
+            cache_dir=cache_config.get("dir")
+        )
+        logger.info(f"启用TTS缓存: {type(engine).__name__}")
+        return cached
+            
     @classmethod
     def register_engine(cls, engine_type: str, engine_class: Type[BaseTTSEngine]) -> None:
         """
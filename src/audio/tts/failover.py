@@ -0,0 +1,476 @@
+"""
+多后端TTS：对冲请求与熔断
+
+按顺序配置多个TTS引擎，每句话先请求当前最快的后端；超过该后端首字节
+延迟的p95仍未收到音频时，向下一个后端发出对冲请求，先返回音频的一方胜出，
+另一方立即取消。连续失败的后端由熔断器暂时跳过。
+"""
+
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Dict, Any, List, Optional, Sequence, Tuple
+
+from .base import BaseTTSEngine
+
+logger = logging.getLogger(__name__)
+
+# 熔断器状态
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LatencyStats:
+    """
+    滚动的延迟统计
+
+    保留最近 max_samples 个样本，超过 max_age 秒的样本过期，
+    后端长时间没有被请求时统计回到未知状态。
+    """
+
+    def __init__(self,
+                 max_samples: int = 50,
+                 max_age: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化
+
+        Args:
+            max_samples: 最多保留的样本数
+            max_age: 样本有效期(秒)
+            clock: 时钟函数
+        """
+        self.max_age = max_age
+        self.clock = clock
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=max_samples)
+
+    def add(self, value: float) -> None:
+        """记录一个样本(秒)"""
+        self._samples.append((self.clock(), value))
+
+    def values(self) -> List[float]:
+        """有效期内的样本"""
+        expire = self.clock() - self.max_age
+        while self._samples and self._samples[0][0] < expire:
+            self._samples.popleft()
+        return [value for _, value in self._samples]
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        计算分位数（最近秩法）
+
+        Args:
+            p: 百分位，0-100
+
+        Returns:
+            分位数，没有样本时返回None
+        """
+        values = sorted(self.values())
+        if not values:
+            return None
+        index = min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))
+        return values[index]
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    连续失败 failure_threshold 次后打开，reset_timeout 秒内不再请求；
+    之后进入半开状态放行一次试探请求，成功则关闭，失败则重新打开。
+    """
+
+    def __init__(self,
+                 failure_threshold: int = 3,
+                 reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化
+
+        Args:
+            failure_threshold: 打开熔断器的连续失败次数
+            reset_timeout: 打开后到允许试探的时间(秒)
+            clock: 时钟函数
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def available(self) -> bool:
+        """是否可以发出请求，半开状态下只放行一次试探"""
+        if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == HALF_OPEN:
+            return not self._trial_in_flight
+        return self.state == CLOSED
+
+    def acquire(self) -> None:
+        """发出请求，半开状态下占用试探名额"""
+        if self.state == HALF_OPEN:
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        """记录一次成功"""
+        self.state = CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """记录一次失败"""
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = self.clock()
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """试探请求被取消（未得出结果）时，允许下一次试探"""
+        self._trial_in_flight = False
+
+
+class _Backend:
+    """一个后端及其统计信息"""
+
+    def __init__(self, name: str, engine: BaseTTSEngine, index: int,
+                 stats: LatencyStats, breaker: CircuitBreaker):
+        self.name = name
+        self.engine = engine
+        self.index = index
+        self.stats = stats
+        self.breaker = breaker
+        self.requests = 0
+        self.wins = 0
+        self.failures = 0
+
+
+class _Attempt:
+    """
+    对一个后端的一次合成请求
+
+    在独立的任务中读取音频流（websocket/HTTP的超时上下文绑定在该任务上），
+    音频块放入队列；收到第一个事件（音频、结束或错误）时 ready 完成。
+    """
+
+    def __init__(self, backend: _Backend, text: str, clock: Callable[[], float]):
+        self.backend = backend
+        self.clock = clock
+        self.started_at = clock()
+        self.first_byte_at: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        self.settled = False  # 结果已计入统计和熔断器
+        self.ready = asyncio.get_running_loop().create_future()
+        self._events: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run(text))
+
+    async def _run(self, text: str) -> None:
+        try:
+            async for chunk in self.backend.engine.stream_speech(text):
+                if chunk:
+                    self._put("chunk", chunk)
+            self._put("end", None)
+        except Exception as e:
+            self._put("error", e)
+
+    def _put(self, kind: str, value: Any) -> None:
+        if kind == "error":
+            self.error = value
+        if not self.ready.done():
+            self.first_byte_at = self.clock()
+            self.ready.set_result(kind)
+        self._events.put_nowait((kind, value))
+
+    async def events(self) -> AsyncIterator[Tuple[str, Any]]:
+        """按顺序读取事件，直到结束或错误"""
+        while True:
+            kind, value = await self._events.get()
+            yield kind, value
+            if kind != "chunk":
+                return
+
+    def cancel(self) -> None:
+        self.task.cancel()
+
+
+class FailoverTTSEngine(BaseTTSEngine):
+    """
+    按延迟统计选择后端、带对冲请求和熔断的组合TTS引擎
+
+    - 后端顺序：有足够样本的后端按首字节延迟中位数排序，其余保持配置顺序排在后面；
+      熔断器打开的后端跳过
+    - 对冲：当前请求超过其后端首字节延迟的p95（乘以 hedge_factor，限制在
+      min/max_hedge_delay 之间；样本不足时为 default_hedge_delay）仍未收到音频时，
+      向下一个后端发出请求，先收到音频的请求胜出，其余取消
+    - 失败：请求在收到音频前失败或超过 first_byte_timeout 时立即换下一个后端，并计入熔断器；
+      已经开始输出音频后失败则直接抛出，不拼接不同后端的音频
+    """
+
+    def __init__(self,
+                 backends: Sequence[Tuple[str, BaseTTSEngine]],
+                 hedge_factor: float = 1.0,
+                 min_hedge_delay: float = 0.3,
+                 max_hedge_delay: float = 3.0,
+                 default_hedge_delay: float = 1.5,
+                 first_byte_timeout: float = 10.0,
+                 min_samples: int = 5,
+                 max_samples: int = 50,
+                 stats_max_age: float = 300.0,
+                 failure_threshold: int = 3,
+                 reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化
+
+        Args:
+            backends: 按优先级排列的 (名称, 引擎) 列表
+            hedge_factor: 对冲等待时间相对首字节延迟p95的倍数
+            min_hedge_delay: 对冲等待时间下限(秒)
+            max_hedge_delay: 对冲等待时间上限(秒)
+            default_hedge_delay: 样本不足时的对冲等待时间(秒)
+            first_byte_timeout: 首字节超时(秒)，超时视为失败
+            min_samples: 按统计排序和推算对冲时间所需的最少样本数
+            max_samples: 每个后端保留的延迟样本数
+            stats_max_age: 延迟样本有效期(秒)
+            failure_threshold: 熔断的连续失败次数
+            reset_timeout: 熔断后到允许试探的时间(秒)
+            clock: 时钟函数
+        """
+        if not backends:
+            raise ValueError("至少需要一个TTS后端")
+        self.backends = [
+            _Backend(name, engine, index,
+                     LatencyStats(max_samples, stats_max_age, clock),
+                     CircuitBreaker(failure_threshold, reset_timeout, clock))
+            for index, (name, engine) in enumerate(backends)
+        ]
+        self.hedge_factor = hedge_factor
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.first_byte_timeout = first_byte_timeout
+        self.min_samples = min_samples
+        self.clock = clock
+
+        # 统计信息
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def ordered_backends(self) -> List[_Backend]:
+        """
+        本次请求的后端顺序
+
+        Returns:
+            熔断器允许的后端，全部熔断时按配置顺序返回全部后端
+        """
+        def key(backend: _Backend):
+            samples = backend.stats.values()
+            if len(samples) >= self.min_samples:
+                return (0, backend.stats.percentile(50), backend.index)
+            return (1, 0.0, backend.index)
+
+        ordered = sorted(self.backends, key=key)
+        allowed = [backend for backend in ordered if backend.breaker.available()]
+        return allowed or sorted(self.backends, key=lambda backend: backend.index)
+
+    def hedge_delay(self, backend: _Backend) -> float:
+        """
+        对冲等待时间
+
+        Args:
+            backend: 当前请求的后端
+
+        Returns:
+            发出对冲请求前等待首字节的秒数
+        """
+        if len(backend.stats.values()) < self.min_samples:
+            return self.default_hedge_delay
+        p95 = backend.stats.percentile(95) * self.hedge_factor
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, p95))
+
+    async def text_to_speech(self, text: str) -> bytes:
+        """
+        将文本转换为语音
+
+        Args:
+            text: 要转换的文本
+
+        Returns:
+            音频数据（MP3格式）
+        """
+        audio_data = bytearray()
+        async for chunk in self.stream_speech(text):
+            audio_data.extend(chunk)
+        return bytes(audio_data)
+
+    async def stream_speech(self, text: str) -> AsyncIterator[bytes]:
+        """
+        将文本转换为语音流，由最先返回音频的后端提供
+
+        Args:
+            text: 要转换的文本
+
+        Yields:
+            音频数据块（MP3格式）
+        """
+        candidates = self.ordered_backends()
+        attempts: List[_Attempt] = []
+        winner: Optional[_Attempt] = None
+        finished = False
+        try:
+            winner = await self._race(text, candidates, attempts)
+            # 胜出后立即取消其余请求，不等这句话播完
+            for attempt in attempts:
+                if attempt is not winner:
+                    self._abandon(attempt)
+            async for kind, value in winner.events():
+                if kind == "chunk":
+                    yield value
+                elif kind == "error":
+                    # 已经输出过音频，不能换后端
+                    finished = True
+                    self._record_failure(winner, value)
+                    raise value
+            finished = True
+            winner.backend.breaker.record_success()
+        finally:
+            if winner is not None and not finished:
+                # 调用方提前结束读取，未得出结果
+                winner.backend.breaker.release()
+            for attempt in attempts:
+                self._abandon(attempt)
+
+    def _abandon(self, attempt: _Attempt) -> None:
+        """
+        取消一个请求，并把已经得出的结果计入统计和熔断器
+
+        已经计入的请求（胜出或失败）只取消任务。
+        """
+        if not attempt.task.done():
+            attempt.cancel()
+        if attempt.settled:
+            return
+        attempt.settled = True
+        backend = attempt.backend
+        if not attempt.ready.done():
+            backend.breaker.release()
+            elapsed = self.clock() - attempt.started_at
+            if elapsed >= self.hedge_delay(backend):
+                # 落败的请求至少用了这么久，明显偏慢时计入统计，使排序反映它的慢
+                backend.stats.add(elapsed)
+        elif attempt.error is not None:
+            self._record_failure(attempt, attempt.error)
+        else:
+            # 与胜出者几乎同时返回了音频，后端是正常的
+            backend.stats.add(attempt.first_byte_at - attempt.started_at)
+            backend.breaker.record_success()
+
+    async def _race(self, text: str, candidates: List[_Backend], attempts: List[_Attempt]) -> _Attempt:
+        """
+        发出请求并在需要时对冲，返回第一个收到音频的请求
+
+        Raises:
+            Exception: 所有后端都失败时抛出最后一个错误
+        """
+        remaining = list(candidates)
+        active: List[_Attempt] = []
+        last_error: Optional[BaseException] = None
+
+        def launch() -> _Attempt:
+            backend = remaining.pop(0)
+            backend.requests += 1
+            backend.breaker.acquire()
+            attempt = _Attempt(backend, text, self.clock)
+            attempts.append(attempt)
+            active.append(attempt)
+            return attempt
+
+        latest = launch()
+        hedge_at = latest.started_at + self.hedge_delay(latest.backend)
+        while True:
+            now = self.clock()
+            deadlines = [attempt.started_at + self.first_byte_timeout for attempt in active]
+            if remaining:
+                deadlines.append(hedge_at)
+            timeout = max(0.0, min(deadlines) - now)
+            await asyncio.wait([attempt.ready for attempt in active], timeout=timeout,
+                               return_when=asyncio.FIRST_COMPLETED)
+
+            for attempt in [attempt for attempt in active if attempt.ready.done()]:
+                active.remove(attempt)
+                if attempt.ready.result() != "error":
+                    self._record_win(attempt, hedged=attempt is not attempts[0])
+                    return attempt
+                last_error = attempt.error
+                self._record_failure(attempt, last_error)
+
+            now = self.clock()
+            for attempt in [attempt for attempt in active
+                            if now - attempt.started_at >= self.first_byte_timeout]:
+                active.remove(attempt)
+                attempt.cancel()
+                last_error = asyncio.TimeoutError(f"TTS后端 {attempt.backend.name} 首字节超时")
+                self._record_failure(attempt, last_error)
+
+            if not remaining:
+                if not active:
+                    raise last_error
+                continue
+            if not active:
+                # 全部失败，立即换下一个后端
+                self.failovers += 1
+                latest = launch()
+                hedge_at = latest.started_at + self.hedge_delay(latest.backend)
+            elif now >= hedge_at:
+                self.hedges += 1
+                logger.info(f"TTS后端 {latest.backend.name} 超过 {hedge_at - latest.started_at:.2f}s "
+                            f"未返回音频，对冲请求 {remaining[0].name}")
+                latest = launch()
+                hedge_at = latest.started_at + self.hedge_delay(latest.backend)
+
+    def _record_win(self, attempt: _Attempt, hedged: bool) -> None:
+        attempt.settled = True
+        backend = attempt.backend
+        backend.wins += 1
+        backend.stats.add(attempt.first_byte_at - attempt.started_at)
+        if hedged:
+            self.hedge_wins += 1
+
+    def _record_failure(self, attempt: _Attempt, error: BaseException) -> None:
+        attempt.settled = True
+        backend = attempt.backend
+        backend.failures += 1
+        backend.breaker.record_failure()
+        logger.warning(f"TTS后端 {backend.name} 失败: {error}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            包含对冲次数、换后端次数和各后端延迟、熔断状态的字典
+        """
+        backends = {}
+        for backend in self.backends:
+            backends[backend.name] = {
+                "requests": backend.requests,
+                "wins": backend.wins,
+                "failures": backend.failures,
+                "state": backend.breaker.state,
+                "p50": backend.stats.percentile(50),
+                "p95": backend.stats.percentile(95),
+                "samples": len(backend.stats.values()),
+            }
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "backends": backends,
+        }
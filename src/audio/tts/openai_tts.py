@@ -3,8 +3,7 @@ OpenAI TTS 引擎实现
 """
 
 import logging
-import asyncio
-from typing import AsyncIterator, Union
+from typing import AsyncIterator
 from openai import AsyncOpenAI
 from .base import BaseTTSEngine
 
@@ -17,7 +16,8 @@ class OpenAITTSEngine(BaseTTSEngine):
                  api_key: str,
                  api_base: str = None,
                  voice: str = "alloy",
-                 model: str = "tts-1"):
+                 model: str = "tts-1",
+                 pool=None):
         """
         初始化 OpenAI TTS 引擎
         
@@ -26,24 +26,29 @@ class OpenAITTSEngine(BaseTTSEngine):
             api_base: API基础URL（可选，用于兼容接口）
             voice: 语音名称
             model: 模型名称
+            pool: 共享连接池（可选），提供时复用池中的客户端及其长连接
         """
-        self.client = AsyncOpenAI(
-            api_key=api_key,
-            base_url=api_base
-        )
+        if pool is not None:
+            self.client = pool.openai_client(api_key, api_base)
+        else:
+            self.client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=api_base
+            )
         self.voice = voice
         self.model = model
         
     @property
     def supports_streaming(self) -> bool:
         """是否支持流式处理"""
-        return False
+        return True
         
     async def text_to_speech_stream(self, text_iterator: AsyncIterator[str]) -> AsyncIterator[bytes]:
         """
         将文本流转换为语音流
         
-        由于OpenAI TTS不支持真正的流式处理，这里我们会等待收集完整的文本后再处理
+        OpenAI TTS接口需要完整的输入文本，因此先收集文本；
+        响应则以流式方式读取，音频块到达即返回。
         
         Args:
             text_iterator: 文本流迭代器
@@ -57,15 +62,30 @@ class OpenAITTSEngine(BaseTTSEngine):
             text_chunks.append(chunk)
         text = ''.join(text_chunks)
         
-        # 转换为语音
-        try:
-            audio_data = await self.text_to_speech(text)
+        async for audio_chunk in self.stream_speech(text):
+            yield audio_chunk
+            
+    async def stream_speech(self, text: str) -> AsyncIterator[bytes]:
+        """
+        将文本转换为语音流，HTTP响应体到达即返回
+        
+        Args:
+            text: 要转换的文本
             
-            # 分块返回
-            chunk_size = 1024 * 16  # 16KB chunks
-            for i in range(0, len(audio_data), chunk_size):
-                yield audio_data[i:i + chunk_size]
-                
+        Yields:
+            音频数据块（MP3格式）
+        """
+        try:
+            async with self.client.audio.speech.with_streaming_response.create(
+                model=self.model,
+                voice=self.voice,
+                input=text,
+                response_format="mp3"
+            ) as response:
+                async for chunk in response.iter_bytes():
+                    if chunk:
+                        yield chunk
+                        
         except Exception as e:
             logger.error(f"OpenAI TTS 转换错误: {e}", exc_info=True)
             raise
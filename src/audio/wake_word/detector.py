@@ -3,13 +3,25 @@
 """
 
 import logging
-from typing import Callable, Optional, List
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, List, Dict, Any
+import numpy as np
 import webrtcvad
 from pvporcupine import Porcupine
-from .recorder import AudioRecorder
+from .energy_gate import EnergyGate
+from .reframer import FrameReframer
+from ..ring_buffer import AudioRingBuffer
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class WakeWordEvent:
+    """唤醒事件"""
+    audio: Optional[np.ndarray] = None  # 唤醒词之后已经采集到的音频（int16副本），有 source_position 时不复制
+    source_position: Optional[int] = None  # 唤醒词结束处在音频源中的绝对位置，音频源为总线订阅时可用
+
+
 class WakeWordDetector:
     """
     基于VAD和Porcupine的双重检测唤醒系统
@@ -22,7 +34,12 @@ class WakeWordDetector:
                  sample_rate: int = 16000,
                  frame_duration_ms: int = 30,
                  speech_pad_ms: int = 300,
-                 min_speech_duration_ms: int = 250):
+                 min_speech_duration_ms: int = 250,
+                 max_buffer_ms: int = 3000,
+                 pre_roll_ms: int = 300,
+                 recorder_options: Optional[Dict[str, Any]] = None,
+                 audio_source=None,
+                 energy_gate: Optional[Dict[str, Any]] = None):
         """
         初始化唤醒词检测器
         
@@ -34,6 +51,13 @@ class WakeWordDetector:
             frame_duration_ms: 帧持续时间(ms)
             speech_pad_ms: 语音填充时间(ms)
             min_speech_duration_ms: 最小语音持续时间(ms)
+            max_buffer_ms: 单段语音的最大缓冲时长(ms)
+            pre_roll_ms: 语音起点之前保留的音频时长(ms)
+            recorder_options: 传给 AudioRecorder 的额外参数（采集模式、队列长度、丢弃策略）
+            audio_source: 外部音频源（如音频总线的订阅、文件回放），需提供 start_recording/stop_recording；
+                为None时创建独立的录音器
+            energy_gate: 能量预筛配置（enabled 及 EnergyGate 的参数），启用后明显静音的帧
+                不再调用VAD；为None或未启用时每帧都调用VAD
         """
         # VAD配置
         self.vad = webrtcvad.Vad(vad_aggressiveness)
@@ -49,27 +73,45 @@ class WakeWordDetector:
             keywords=keywords or ["hey computer"]
         )
         
-        # 音频缓冲
-        self.audio_buffer = []
+        # 音频缓冲：固定容量的int16环形缓冲区，始终保留最近的音频作为预录
+        self.max_buffer_samples = int(sample_rate * max_buffer_ms / 1000)
+        self.pre_roll_samples = int(sample_rate * pre_roll_ms / 1000)
+        self.audio_buffer = AudioRingBuffer(self.max_buffer_samples + self.pre_roll_samples)
+        self.speech_start = 0  # 当前语音段起点（含预录）的绝对采样位置
+        self.fed_until = 0  # 已送入Porcupine的采样位置
+        self.keyword_end = 0  # 最近一次检测到唤醒词的Porcupine帧的结束位置
+        self.reframer = FrameReframer(self.porcupine.frame_length)
         self.speech_frames = 0
         self.silence_frames = 0
         
+        # 能量预筛
+        self.energy_gate = None
+        if energy_gate is not None:
+            gate_config = dict(energy_gate)
+            if gate_config.pop('enabled', True):
+                self.energy_gate = EnergyGate(self.frame_size, sample_rate, **gate_config)
+        self._unchecked_frames = 0  # 已写入缓冲区、尚未判断的帧数
+        
         # 状态控制
         self.is_speech_active = False
         self._running = False
         
-        # 音频录制器
-        self.recorder = AudioRecorder(
-            sample_rate=sample_rate,
-            chunk_size=self.frame_size
-        )
+        # 音频录制器；使用外部音频源（如文件回放）时不需要PyAudio
+        if audio_source is None:
+            from .recorder import AudioRecorder
+            audio_source = AudioRecorder(
+                sample_rate=sample_rate,
+                chunk_size=self.frame_size,
+                **(recorder_options or {})
+            )
+        self.recorder = audio_source
         
-    async def start_detection(self, on_wake_word: Callable[[], None]) -> None:
+    async def start_detection(self, on_wake_word: Callable[[WakeWordEvent], Awaitable[None]]) -> None:
         """
         启动检测
         
         Args:
-            on_wake_word: 检测到唤醒词时的回调函数
+            on_wake_word: 检测到唤醒词时的回调函数，参数为包含唤醒词之后音频的唤醒事件
         """
         logger.info("启动唤醒词检测...")
         self._running = True
@@ -79,22 +121,30 @@ class WakeWordDetector:
                 if not self._running:
                     break
                     
-                # 1. VAD检测
-                is_speech = self.vad.is_speech(audio_chunk, self.sample_rate)
-                
-                # 2. 状态更新和缓冲处理
-                await self._process_audio_state(audio_chunk, is_speech)
+                if self.energy_gate is not None:
+                    # 1-2. 能量预筛，只对可能是语音的帧做VAD并更新状态
+                    await self._process_gated(audio_chunk)
+                else:
+                    # 1. VAD检测
+                    is_speech = self.vad.is_speech(audio_chunk, self.sample_rate)
+                    
+                    # 2. 状态更新和缓冲处理
+                    await self._process_audio_state(audio_chunk, is_speech)
                 
-                # 3. 在语音结束时进行唤醒词检测
-                if await self._should_check_wake_word():
-                    if await self._check_wake_word():
-                        await on_wake_word()
+                # 3. 语音进行中逐帧检测唤醒词
+                if await self._check_wake_word():
+                    await on_wake_word(self._wake_event())
                     self._reset_state()
                     
         except Exception as e:
             logger.error(f"唤醒词检测错误: {e}", exc_info=True)
             raise
             
+    @property
+    def in_utterance(self) -> bool:
+        """是否处于一段语音中（从第一个语音帧到语音结束）"""
+        return self.is_speech_active or self.speech_frames > 0
+            
     async def _process_audio_state(self, audio_chunk: bytes, is_speech: bool) -> None:
         """
         处理音频状态
@@ -103,54 +153,98 @@ class WakeWordDetector:
             audio_chunk: 音频数据
             is_speech: 是否为语音
         """
+        self.audio_buffer.write(audio_chunk)
+        self._update_speech_state(is_speech, self.audio_buffer.total_written - len(audio_chunk) // 2)
+        
+    async def _process_gated(self, audio_chunk: bytes) -> None:
+        """
+        经能量预筛处理音频
+        
+        空闲（不在语音中且能量门关着）时只写入缓冲区，每 batch_frames 帧批量计算一次能量；
+        门开着或处于语音中时逐帧判断，不推迟唤醒词检测。门关着的帧判为静音，不调用VAD。
+        
+        Args:
+            audio_chunk: 音频数据
+        """
+        gate = self.energy_gate
+        self.audio_buffer.write(audio_chunk)
+        self._unchecked_frames += 1
+        if (self._unchecked_frames < gate.batch_frames
+                and not gate.is_open and not self.in_utterance):
+            return
+            
+        frame_size = self.frame_size
+        end = self.audio_buffer.total_written
+        start = end - self._unchecked_frames * frame_size
+        self._unchecked_frames = 0
+        levels = gate.levels(self.audio_buffer.view(start, end))
+        first = 0 if self.in_utterance else gate.skip_quiet(levels)
+        for i in range(first, len(levels)):
+            level = levels[i]
+            frame_start = start + i * frame_size
+            is_speech = False
+            if gate.check(level):
+                frame = self.audio_buffer.view(frame_start, frame_start + frame_size)
+                is_speech = self.vad.is_speech(memoryview(frame).cast("B"), self.sample_rate)
+                if not is_speech and not self.in_utterance:
+                    gate.learn(level)
+            if is_speech or self.in_utterance:
+                self._update_speech_state(is_speech, frame_start)
+                
+    def _update_speech_state(self, is_speech: bool, frame_start: int) -> None:
+        """
+        按一帧的VAD结果更新语音段状态
+        
+        Args:
+            is_speech: 是否为语音
+            frame_start: 该帧在缓冲区中的绝对采样位置
+        """
         if is_speech:
+            if not self.in_utterance:
+                # 记录语音起点，向前保留预录音频避免截掉开头
+                self.speech_start = max(self.audio_buffer.oldest,
+                                        frame_start - self.pre_roll_samples)
+                self.fed_until = self.speech_start
             self.speech_frames += 1
             self.silence_frames = 0
             if not self.is_speech_active and self.speech_frames >= self.min_speech_frames:
                 self.is_speech_active = True
-        else:
+        elif self.in_utterance:
             self.silence_frames += 1
             if self.silence_frames >= self.speech_pad_frames:
-                self.speech_frames = 0
-                
-        # 维护音频缓冲区
-        if self.is_speech_active:
-            self.audio_buffer.append(audio_chunk)
-            # 限制缓冲区大小
-            if len(self.audio_buffer) > 100:  # 约3秒音频
+                # 语音结束
                 self._reset_state()
                 
-    async def _should_check_wake_word(self) -> bool:
-        """
-        判断是否应该检查唤醒词
-        
-        Returns:
-            是否应该检查唤醒词
-        """
-        return (self.is_speech_active and 
-                self.silence_frames >= self.speech_pad_frames and 
-                len(self.audio_buffer) > 0)
+        # 超长语音只保留缓冲区容量内的部分
+        self.speech_start = max(self.speech_start, self.audio_buffer.oldest)
                 
     async def _check_wake_word(self) -> bool:
         """
-        检查唤醒词
+        将新到达的音频按Porcupine帧长送入检测
+        
+        VAD帧与Porcupine帧长度不同，不足一帧的部分留在分帧器中，
+        因此唤醒词结束后最多一个Porcupine帧即可触发。
         
         Returns:
             是否检测到唤醒词
         """
-        try:
-            # 合并音频缓冲区
-            audio_data = b''.join(self.audio_buffer)
+        if not self.in_utterance:
+            return False
             
-            # 确保音频长度符合Porcupine要求
-            frame_length = self.porcupine.frame_length
-            num_frames = len(audio_data) // frame_length
+        try:
+            # 尚未检测的新音频（语音开始时包含预录部分）的零拷贝视图
+            start = max(self.fed_until, self.audio_buffer.oldest)
+            samples = self.audio_buffer.view(start)
+            self.fed_until = self.audio_buffer.total_written
             
-            for i in range(num_frames):
-                frame = audio_data[i * frame_length:(i + 1) * frame_length]
+            # 分帧器暂存的采样位于本次输入之前
+            frame_end = start - self.reframer.pending
+            for frame in self.reframer.push(samples):
+                frame_end += self.reframer.frame_length
                 result = self.porcupine.process(frame)
                 if result >= 0:
                     logger.info("检测到唤醒词")
+                    self.keyword_end = frame_end
                     return True
                     
             return False
@@ -159,9 +253,28 @@ class WakeWordDetector:
             logger.error(f"唤醒词检查错误: {e}", exc_info=True)
             return False
             
+    def _wake_event(self) -> WakeWordEvent:
+        """
+        生成唤醒事件
+        
+        音频源是音频总线的订阅时，给出唤醒词结束处在总线中的位置，
+        STT直接从该位置订阅，零拷贝地读取之后的全部音频，不复制。
+        其他音频源无法回读，唤醒词之后的音频（同一帧中尚未检测的部分）复制一份随事件交给STT，
+        不会因重置状态而丢失。
+        """
+        keyword_end = max(self.keyword_end, self.audio_buffer.oldest)
+        cursor = getattr(self.recorder, "cursor", None)
+        if cursor is not None:
+            position = cursor - (self.audio_buffer.total_written - keyword_end)
+            return WakeWordEvent(source_position=position)
+        return WakeWordEvent(audio=self.audio_buffer.view(keyword_end).copy())
+        
     def _reset_state(self) -> None:
         """重置状态"""
-        self.audio_buffer.clear()
+        # 环形缓冲区保留历史音频作为下一段语音的预录
+        self.speech_start = self.audio_buffer.total_written
+        self.fed_until = self.speech_start
+        self.reframer.reset()
         self.speech_frames = 0
         self.silence_frames = 0
         self.is_speech_active = False
@@ -0,0 +1,186 @@
+"""
+能量预筛
+
+在 webrtcvad 之前按帧能量排除明显的静音。能量用numpy按批计算，
+与自适应的底噪比较：高出底噪一定幅度的帧才交给VAD。
+"""
+
+import math
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+# int16满幅的平方，能量换算为dBFS时的参考值
+FULL_SCALE_POWER = 32768.0 ** 2
+
+
+class EnergyGate:
+    """
+    带自适应底噪和迟滞的能量门
+
+    - 底噪跟踪安静帧的能量：低于底噪时快速下降，高于底噪时每秒最多上升 floor_rise_db
+    - 帧能量超过 底噪 + open_margin_db 时开门；开门后能量回落到 底噪 + close_margin_db
+      以下，再持续 hangover_frames 帧才关门，避免在语音的弱音节处反复开关
+    - 关门期间的帧直接判为静音，不调用VAD
+
+    帧能量为相对满幅的均方值（线性），与阈值直接比较，只在更新底噪时换算为dB。
+    """
+
+    def __init__(self,
+                 frame_size: int,
+                 sample_rate: int = 16000,
+                 batch_frames: int = 4,
+                 open_margin_db: float = 9.0,
+                 close_margin_db: float = 5.0,
+                 hangover_frames: int = 10,
+                 floor_rise_db: float = 1.0,
+                 floor_fall: float = 0.3,
+                 min_floor_db: float = -70.0):
+        """
+        初始化
+
+        Args:
+            frame_size: 每帧采样数
+            sample_rate: 采样率
+            batch_frames: 关门期间累积多少帧计算一次能量，决定语音起点最多推迟几帧被发现
+            open_margin_db: 开门阈值（高于底噪的dB数）
+            close_margin_db: 保持开门的阈值（高于底噪的dB数），应小于 open_margin_db
+            hangover_frames: 能量回落后保持开门的帧数
+            floor_rise_db: 底噪每秒最多上升的dB数
+            floor_fall: 帧能量低于底噪时底噪向其靠拢的比例
+            min_floor_db: 底噪下限(dBFS)，数字静音时以此为准
+        """
+        if close_margin_db > open_margin_db:
+            raise ValueError("close_margin_db 不能大于 open_margin_db")
+        self.frame_size = frame_size
+        self.batch_frames = max(1, batch_frames)
+        self.open_margin_db = open_margin_db
+        self.close_margin_db = close_margin_db
+        self.hangover_frames = hangover_frames
+        self.floor_rise_per_frame = floor_rise_db * frame_size / sample_rate
+        self.floor_fall = floor_fall
+        self.min_floor_db = min_floor_db
+        self.noise_floor: Optional[float] = None  # dBFS，在第一帧时初始化
+        self._floor_power = 0.0
+        self._open_ratio = 10 ** (open_margin_db / 10)
+        self._close_ratio = 10 ** (close_margin_db / 10)
+        self.is_open = False
+        self._hold = 0
+
+        # 预分配的批量计算缓冲区
+        self._frames = np.zeros((self.batch_frames, frame_size), dtype=np.float32)
+        self._power = np.zeros(self.batch_frames, dtype=np.float32)
+
+        # 统计信息
+        self.frames_checked = 0
+        self.frames_passed = 0
+
+    def levels(self, samples: np.ndarray) -> List[float]:
+        """
+        计算整数帧的能量
+
+        Args:
+            samples: int16采样，长度为帧长的整数倍且不超过 batch_frames 帧
+
+        Returns:
+            每帧相对满幅的均方能量
+        """
+        count = len(samples) // self.frame_size
+        frames = self._frames[:count]
+        np.copyto(frames, samples[:count * self.frame_size].reshape(count, self.frame_size))
+        power = self._power[:count]
+        np.einsum("ij,ij->i", frames, frames, out=power)
+        power *= 1.0 / (self.frame_size * FULL_SCALE_POWER)
+        return power.tolist()
+
+    def skip_quiet(self, levels: List[float]) -> int:
+        """
+        门关着时跳过开头的静音帧
+
+        整段静音只用所有帧的平均能量更新一次底噪，不逐帧判断。
+
+        Args:
+            levels: 一批帧的能量
+
+        Returns:
+            开头可以直接判为静音的帧数，门开着时为0
+        """
+        if self.is_open or self.noise_floor is None:
+            return 0
+        threshold = self._floor_power * self._open_ratio
+        count = 0
+        for level in levels:
+            if level > threshold:
+                break
+            count += 1
+        if count:
+            self.frames_checked += count
+            self.learn(sum(levels[:count]) / count, count)
+        return count
+
+    def check(self, level: float) -> bool:
+        """
+        判断一帧是否需要交给VAD
+
+        Args:
+            level: 帧能量
+
+        Returns:
+            门是否开着
+        """
+        self.frames_checked += 1
+        if self.noise_floor is None:
+            self.learn(level)
+        floor_power = self._floor_power
+
+        if level > floor_power * self._open_ratio:
+            self.is_open = True
+            self._hold = self.hangover_frames
+        elif self.is_open:
+            if level > floor_power * self._close_ratio:
+                self._hold = self.hangover_frames
+            elif self._hold > 0:
+                self._hold -= 1
+            else:
+                self.is_open = False
+
+        if self.is_open:
+            self.frames_passed += 1
+        else:
+            self.learn(level)
+        return self.is_open
+
+    def learn(self, level: float, frames: int = 1) -> None:
+        """
+        用非语音帧的能量更新底噪
+
+        关门的帧自动计入；开门后VAD判为非语音的帧也应调用，使底噪能跟上变大的环境噪声。
+
+        Args:
+            level: 帧能量
+            frames: 以 level 为平均能量的帧数
+        """
+        level_db = 10 * math.log10(level + 1e-12)
+        floor = self.noise_floor
+        if floor is None:
+            floor = level_db
+        elif level_db < floor:
+            floor += (level_db - floor) * (1 - (1 - self.floor_fall) ** frames)
+        else:
+            floor += min(level_db - floor, self.floor_rise_per_frame * frames)
+        self.noise_floor = max(floor, self.min_floor_db)
+        self._floor_power = 10 ** (self.noise_floor / 10)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            包含判断帧数、放行比例和当前底噪的字典
+        """
+        return {
+            "frames_checked": self.frames_checked,
+            "frames_passed": self.frames_passed,
+            "pass_rate": self.frames_passed / self.frames_checked if self.frames_checked else 0.0,
+            "noise_floor_db": None if self.noise_floor is None else round(self.noise_floor, 1),
+        }
@@ -0,0 +1,240 @@
+"""
+文件音频源
+
+按录音器的帧长回放WAV或裸PCM文件，用于在没有麦克风的环境中（如CI）
+测试和压测唤醒词检测。默认不做任何等待，以CPU允许的最快速度输出；
+帧的时间戳由虚拟时钟按已输出的采样数推算，与实时采集时一致。
+"""
+
+import time
+import wave
+import asyncio
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, Any, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .frame_queue import CapturedFrame
+
+logger = logging.getLogger(__name__)
+
+# 可回放的文件扩展名；.pcm/.raw 视为与采样率一致的16位小端单声道裸数据
+WAV_SUFFIXES = (".wav",)
+RAW_SUFFIXES = (".pcm", ".raw")
+
+
+class VirtualClock:
+    """
+    虚拟时钟
+
+    时间只随回放的音频推进：已输出 n 个采样时为 start + n / sample_rate。
+    """
+
+    def __init__(self, sample_rate: int = 16000, start: float = 0.0):
+        """
+        初始化
+
+        Args:
+            sample_rate: 采样率
+            start: 第0个采样对应的时刻(秒)
+        """
+        self.sample_rate = sample_rate
+        self.start = start
+        self.samples = 0
+
+    def advance(self, samples: int) -> float:
+        """
+        推进时钟
+
+        Args:
+            samples: 新输出的采样数
+
+        Returns:
+            推进后的时刻
+        """
+        self.samples += samples
+        return self.now()
+
+    def now(self) -> float:
+        """当前时刻(秒)"""
+        return self.start + self.samples / self.sample_rate
+
+    def __call__(self) -> float:
+        return self.now()
+
+
+@dataclass
+class FileSegment:
+    """回放流中的一个文件"""
+    path: Path
+    start: int  # 文件开头在回放流中的绝对采样位置
+    samples: int = 0  # 文件的采样数（不含补齐整帧的静音）
+
+
+def collect_audio_files(paths: Sequence[Union[str, Path]]) -> List[Path]:
+    """
+    展开文件和目录
+
+    目录按路径排序递归收集其中的WAV和裸PCM文件，保证每次回放顺序一致。
+
+    Args:
+        paths: 文件或目录
+
+    Returns:
+        音频文件列表
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob("*")
+                                if p.is_file() and p.suffix.lower() in WAV_SUFFIXES + RAW_SUFFIXES))
+        elif path.exists():
+            files.append(path)
+        else:
+            raise FileNotFoundError(f"音频文件不存在: {path}")
+    return files
+
+
+class FileFrameSource:
+    """
+    从文件回放音频帧的音频源
+
+    接口与 AudioRecorder 一致（start_recording/iter_frames/stop_recording），
+    可以直接作为 WakeWordDetector 的 audio_source 或音频总线的录音器。
+    多个文件首尾相接组成一条连续的音频流，每个文件末尾不足一帧的部分补静音；
+    cursor 为已输出的绝对采样位置，唤醒事件的 source_position 即为回放流中的位置。
+    """
+
+    def __init__(self,
+                 paths: Sequence[Union[str, Path]],
+                 sample_rate: int = 16000,
+                 chunk_size: int = 480,
+                 speed: Optional[float] = None,
+                 clock: Optional[VirtualClock] = None):
+        """
+        初始化
+
+        Args:
+            paths: WAV/裸PCM文件或包含它们的目录
+            sample_rate: 采样率，WAV文件必须与之一致
+            chunk_size: 每帧采样数
+            speed: 回放倍速，为None时不等待，以最快速度输出
+            clock: 虚拟时钟，为None时新建一个从0开始的时钟
+        """
+        self.files = collect_audio_files(paths)
+        if not self.files:
+            raise ValueError("没有可回放的音频文件")
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.speed = speed
+        self.clock = clock or VirtualClock(sample_rate)
+        self.segments: List[FileSegment] = []
+        self.cursor = 0
+        self._sequence = 0
+        self._running = False
+
+    async def start_recording(self) -> AsyncIterator[bytes]:
+        """
+        开始回放
+
+        Yields:
+            音频数据块
+        """
+        # 直接驱动检测器时不让出事件循环，测得的是检测本身的吞吐
+        async for frame in self._iter_frames(cooperative=False):
+            yield frame.data
+
+    async def iter_frames(self) -> AsyncIterator[CapturedFrame]:
+        """
+        开始回放，返回带虚拟时间戳的帧
+
+        作为音频总线的录音器时每帧让出一次事件循环，订阅者才来得及读取。
+
+        Yields:
+            音频帧
+        """
+        async for frame in self._iter_frames(cooperative=True):
+            yield frame
+
+    async def _iter_frames(self, cooperative: bool) -> AsyncIterator[CapturedFrame]:
+        logger.info(f"开始回放 {len(self.files)} 个音频文件")
+        self._running = True
+        frame_bytes = self.chunk_size * 2
+        started = time.monotonic()
+        try:
+            for path in self.files:
+                segment = FileSegment(path, self.cursor)
+                self.segments.append(segment)
+                for data in self._read_chunks(path, frame_bytes):
+                    if not self._running:
+                        return
+                    segment.samples += len(data) // 2
+                    if len(data) < frame_bytes:
+                        data += bytes(frame_bytes - len(data))
+                    self.cursor += self.chunk_size
+                    if self.speed:
+                        # 按倍速对齐到墙上时钟
+                        delay = started + self.cursor / self.sample_rate / self.speed - time.monotonic()
+                        await asyncio.sleep(max(0.0, delay))
+                    elif cooperative:
+                        await asyncio.sleep(0)
+                    frame = CapturedFrame(data=data,
+                                          timestamp=self.clock.advance(self.chunk_size),
+                                          sequence=self._sequence)
+                    self._sequence += 1
+                    yield frame
+        finally:
+            self._running = False
+
+    def _read_chunks(self, path: Path, frame_bytes: int) -> Iterator[bytes]:
+        """按帧读取文件中的PCM数据"""
+        if path.suffix.lower() in WAV_SUFFIXES:
+            with wave.open(str(path), "rb") as wav:
+                if (wav.getsampwidth() != 2 or wav.getnchannels() != 1
+                        or wav.getframerate() != self.sample_rate):
+                    raise ValueError(f"需要 {self.sample_rate}Hz 16位单声道WAV: {path}")
+                while True:
+                    data = wav.readframes(self.chunk_size)
+                    if not data:
+                        return
+                    yield data
+        else:
+            with open(path, "rb") as f:
+                while True:
+                    data = f.read(frame_bytes)
+                    if not data:
+                        return
+                    # 奇数字节的尾部不构成完整采样
+                    yield data[:len(data) & ~1]
+
+    def locate(self, position: int) -> Tuple[Optional[Path], float]:
+        """
+        把回放流中的位置换算为文件和文件内的时刻
+
+        Args:
+            position: 绝对采样位置
+
+        Returns:
+            (文件路径, 文件内的秒数)，位置不属于任何已回放的文件时路径为None
+        """
+        for segment in reversed(self.segments):
+            if position >= segment.start:
+                return segment.path, (position - segment.start) / self.sample_rate
+        return None, position / self.sample_rate
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取回放统计信息
+
+        Returns:
+            包含已回放的文件数、帧数和音频时长的字典
+        """
+        return {
+            "files": len(self.segments),
+            "frames_captured": self._sequence,
+            "audio_seconds": self.cursor / self.sample_rate,
+        }
+
+    async def stop_recording(self) -> None:
+        """停止回放"""
+        self._running = False
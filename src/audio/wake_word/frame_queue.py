@@ -0,0 +1,139 @@
+"""
+音频线程到事件循环的帧交接队列
+"""
+
+import asyncio
+import collections
+from dataclasses import dataclass
+from typing import Optional, Dict, Any
+
+# 队列满时的丢弃策略
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+
+@dataclass
+class CapturedFrame:
+    """一帧录音数据"""
+    data: bytes  # PCM数据
+    timestamp: float  # 采集时刻（time.monotonic）
+    sequence: int  # 采集序号，出现丢帧时不连续
+
+
+class FrameQueue:
+    """
+    有界的帧交接队列
+
+    由PortAudio回调线程写入、事件循环中的异步迭代器读取。写入只使用
+    deque 的原子操作，不加锁；仅当消费者正在等待时才通过
+    call_soon_threadsafe 唤醒事件循环，避免每帧都产生一次跨线程调度。
+    """
+
+    def __init__(self, maxsize: int = 50, drop_policy: str = DROP_OLDEST):
+        """
+        初始化队列
+
+        Args:
+            maxsize: 最多缓存的帧数
+            drop_policy: 队列满时的策略，drop_oldest 丢弃最旧的帧，drop_newest 丢弃新帧
+        """
+        if drop_policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"不支持的丢弃策略: {drop_policy}")
+
+        self.maxsize = maxsize
+        self.drop_policy = drop_policy
+        self._frames: collections.deque = collections.deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiter: Optional[asyncio.Future] = None
+        self._closed = False
+
+        self.frames_put = 0
+        self.drops = 0
+        self.max_depth = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """绑定消费者所在的事件循环"""
+        self._loop = loop
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def put_threadsafe(self, frame: CapturedFrame) -> None:
+        """
+        写入一帧（可在任意线程调用）
+
+        Args:
+            frame: 录音帧
+        """
+        if self._closed:
+            return
+        self.frames_put += 1
+        if len(self._frames) >= self.maxsize:
+            self.drops += 1
+            if self.drop_policy == DROP_NEWEST:
+                return
+            try:
+                self._frames.popleft()
+            except IndexError:
+                # 消费者恰好取走了最后一帧
+                pass
+        self._frames.append(frame)
+        depth = len(self._frames)
+        if depth > self.max_depth:
+            self.max_depth = depth
+        self._wakeup_threadsafe()
+
+    def close(self) -> None:
+        """关闭队列，唤醒等待中的消费者"""
+        self._closed = True
+        self._wakeup_threadsafe()
+
+    async def get(self) -> Optional[CapturedFrame]:
+        """
+        读取一帧，队列为空时等待
+
+        Returns:
+            录音帧，队列关闭且已读完时返回None
+        """
+        while True:
+            if self._frames:
+                return self._frames.popleft()
+            if self._closed:
+                return None
+            loop = asyncio.get_running_loop()
+            self._loop = loop
+            self._waiter = loop.create_future()
+            # 设置等待者之后再检查一次，避免错过写入线程的唤醒
+            if self._frames or self._closed:
+                self._waiter = None
+                continue
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取队列统计信息
+
+        Returns:
+            包含写入帧数、丢帧数和队列深度的字典
+        """
+        return {
+            "frames_put": self.frames_put,
+            "drops": self.drops,
+            "depth": len(self._frames),
+            "max_depth": self.max_depth,
+        }
+
+    def _wakeup_threadsafe(self) -> None:
+        """如有消费者在等待，则从其他线程唤醒它"""
+        waiter = self._waiter
+        loop = self._loop
+        if waiter is not None and loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wakeup, waiter)
+
+    @staticmethod
+    def _wakeup(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(None)
@@ -2,11 +2,14 @@
 音频录制模块
 """
 
+import time
 import logging
-from typing import AsyncIterator
+from typing import AsyncIterator, Dict, Any
 import pyaudio
 import asyncio
 
+from .frame_queue import FrameQueue, CapturedFrame, DROP_OLDEST
+
 logger = logging.getLogger(__name__)
 
 class AudioRecorder:
@@ -16,7 +19,10 @@ class AudioRecorder:
                  sample_rate: int = 16000,
                  chunk_size: int = 480,
                  channels: int = 1,
-                 format: int = pyaudio.paInt16):
+                 format: int = pyaudio.paInt16,
+                 callback_mode: bool = True,
+                 queue_size: int = 50,
+                 drop_policy: str = DROP_OLDEST):
         """
         初始化录音器
         
@@ -25,15 +31,24 @@ class AudioRecorder:
             chunk_size: 块大小
             channels: 通道数
             format: 音频格式
+            callback_mode: 是否使用PyAudio回调模式采集
+            queue_size: 回调模式下缓存的最大帧数
+            drop_policy: 队列满时的丢弃策略（drop_oldest 或 drop_newest）
         """
         self.sample_rate = sample_rate
         self.chunk_size = chunk_size
         self.channels = channels
         self.format = format
+        self.callback_mode = callback_mode
         self.audio = pyaudio.PyAudio()
         self.stream = None
         self._running = False
         
+        # 回调模式的帧队列
+        self.queue = FrameQueue(maxsize=queue_size, drop_policy=drop_policy)
+        self._sequence = 0
+        self.overflows = 0
+        
     async def start_recording(self) -> AsyncIterator[bytes]:
         """
         开始录音
@@ -41,29 +56,26 @@ class AudioRecorder:
         Yields:
             音频数据块
         """
+        async for frame in self.iter_frames():
+            yield frame.data
+            
+    async def iter_frames(self) -> AsyncIterator[CapturedFrame]:
+        """
+        开始录音，返回带采集时间戳的帧
+        
+        Yields:
+            录音帧
+        """
         logger.info("开始录音...")
         self._running = True
         
         try:
-            self.stream = self.audio.open(
-                format=self.format,
-                channels=self.channels,
-                rate=self.sample_rate,
-                input=True,
-                frames_per_buffer=self.chunk_size
-            )
-            
-            while self._running:
-                if self.stream.is_active():
-                    # 使用事件循环执行阻塞操作
-                    data = await asyncio.get_event_loop().run_in_executor(
-                        None, 
-                        self.stream.read,
-                        self.chunk_size
-                    )
-                    yield data
-                else:
-                    break
+            if self.callback_mode:
+                async for frame in self._iter_callback_frames():
+                    yield frame
+            else:
+                async for frame in self._iter_blocking_frames():
+                    yield frame
                     
         except Exception as e:
             logger.error(f"录音错误: {e}", exc_info=True)
@@ -71,10 +83,77 @@ class AudioRecorder:
         finally:
             await self.stop_recording()
             
+    async def _iter_callback_frames(self) -> AsyncIterator[CapturedFrame]:
+        """回调模式：PortAudio线程写入队列，这里只负责取出"""
+        self.queue.bind(asyncio.get_running_loop())
+        self.stream = self.audio.open(
+            format=self.format,
+            channels=self.channels,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.chunk_size,
+            stream_callback=self._stream_callback
+        )
+        self.stream.start_stream()
+        
+        while self._running:
+            frame = await self.queue.get()
+            if frame is None:
+                break
+            yield frame
+            
+    async def _iter_blocking_frames(self) -> AsyncIterator[CapturedFrame]:
+        """阻塞模式：每帧在线程池中执行一次 stream.read"""
+        self.stream = self.audio.open(
+            format=self.format,
+            channels=self.channels,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.chunk_size
+        )
+        
+        while self._running:
+            if self.stream.is_active():
+                # 使用事件循环执行阻塞操作
+                data = await asyncio.get_event_loop().run_in_executor(
+                    None, 
+                    self.stream.read,
+                    self.chunk_size
+                )
+                yield self._make_frame(data)
+            else:
+                break
+                
+    def _stream_callback(self, in_data, frame_count, time_info, status_flags):
+        """PyAudio录音回调（在PortAudio线程中执行）"""
+        if status_flags & pyaudio.paInputOverflow:
+            self.overflows += 1
+        self.queue.put_threadsafe(self._make_frame(in_data))
+        return (None, pyaudio.paContinue)
+        
+    def _make_frame(self, data: bytes) -> CapturedFrame:
+        """为采集到的数据打上单调时钟时间戳和序号"""
+        frame = CapturedFrame(data=data, timestamp=time.monotonic(), sequence=self._sequence)
+        self._sequence += 1
+        return frame
+        
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取采集统计信息
+        
+        Returns:
+            包含采集帧数、溢出次数、丢帧数和队列深度的字典
+        """
+        stats = self.queue.get_stats()
+        stats["frames_captured"] = self._sequence
+        stats["overflows"] = self.overflows
+        return stats
+            
     async def stop_recording(self) -> None:
         """停止录音"""
         logger.info("停止录音...")
         self._running = False
+        self.queue.close()
         
         if self.stream:
             self.stream.stop_stream()
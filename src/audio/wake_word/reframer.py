@@ -0,0 +1,79 @@
+"""
+音频重新分帧
+"""
+
+from typing import Iterator
+import numpy as np
+
+
+class FrameReframer:
+    """
+    将任意长度的int16采样块重新切分为固定长度的帧
+
+    用于把录音器的VAD帧（如30ms/480采样）转换为Porcupine要求的帧长
+    （如512采样）。不足一帧的尾部保存在预分配的暂存区中，与下一次输入拼接。
+    """
+
+    def __init__(self, frame_length: int):
+        """
+        初始化分帧器
+
+        Args:
+            frame_length: 输出帧长（采样数）
+        """
+        if frame_length <= 0:
+            raise ValueError("帧长必须大于0")
+
+        self.frame_length = frame_length
+        self._pending = np.zeros(frame_length, dtype=np.int16)
+        self._pending_size = 0
+        self.frames_emitted = 0
+
+    @property
+    def pending(self) -> int:
+        """暂存区中尚未组成完整帧的采样数"""
+        return self._pending_size
+
+    def push(self, samples: np.ndarray) -> Iterator[np.ndarray]:
+        """
+        输入采样并产出所有凑满的帧
+
+        产出的帧可能是输入数组的视图或内部暂存区，仅在下一次迭代前有效。
+
+        Args:
+            samples: int16采样
+
+        Yields:
+            长度为 frame_length 的int16帧
+        """
+        frame_length = self.frame_length
+        offset = 0
+
+        # 先补齐暂存区中的不完整帧
+        if self._pending_size:
+            needed = frame_length - self._pending_size
+            take = min(needed, len(samples))
+            self._pending[self._pending_size:self._pending_size + take] = samples[:take]
+            self._pending_size += take
+            offset = take
+            if self._pending_size < frame_length:
+                return
+            self._pending_size = 0
+            self.frames_emitted += 1
+            yield self._pending
+
+        # 输入中的完整帧直接以视图产出
+        while len(samples) - offset >= frame_length:
+            self.frames_emitted += 1
+            yield samples[offset:offset + frame_length]
+            offset += frame_length
+
+        # 保存剩余的尾部
+        tail = len(samples) - offset
+        if tail:
+            self._pending[:tail] = samples[offset:]
+            self._pending_size = tail
+
+    def reset(self) -> None:
+        """丢弃暂存区中的不完整帧"""
+        self._pending_size = 0
@@ -2,18 +2,32 @@
 AI助手核心类
 """
 
+import asyncio
 import logging
-import io
-from typing import Dict, Any
-import sounddevice as sd
+from typing import AsyncIterator, Dict, Any, Optional
 import numpy as np
-from pydub import AudioSegment
 
-from audio.wake_word.detector import WakeWordDetector
+from audio.wake_word.detector import WakeWordDetector, WakeWordEvent
+from audio.wake_word.recorder import AudioRecorder
+from audio.bus import AudioBus, archive_to_wav
+from audio.playback.sink import AudioSink
+from audio.playback.decoder import decode_stream
+from audio.playback.phrases import PhraseBank
 from llm.base import BaseLLM
+from llm.factory import LLMFactory
+from llm.conversation import ConversationSession, llm_summarizer
+from llm.cache import normalize_query
 from audio.tts.base import BaseTTSEngine
+from audio.tts.factory import TTSFactory
 from audio.stt.base import BaseSTTEngine
+from audio.stt.factory import STTFactory
 from skills.registry import ToolRegistry
+from core.pipeline import ResponsePipeline
+from core.barge_in import BargeInMonitor
+from core.connection_pool import ConnectionPool
+from core.speculation import SpeculativeRunner, wait_if_speculative
+from core import tracing
+from core.tracing import Tracer, MetricsServer
 
 logger = logging.getLogger(__name__)
 
@@ -29,29 +43,163 @@ class Assistant:
         """
         self.config = config
         self.wake_detector = None
+        self.audio_bus = None
+        self._background_tasks = []
         self.llm = None
         self.tts = None
         self.stt = None
+        self.audio_sink = None
+        self.phrases: Optional[PhraseBank] = None
+        self._phrase_task: Optional[asyncio.Task] = None
         self.tool_registry = ToolRegistry()
+        self.tool_registry.configure(**config.get('tools', {}))
+        self.connection_pool = ConnectionPool(**config.get('network', {}))
         self.is_listening = False
         self.is_speaking = False
-        self.text_buffer = ""
+        self.pipeline = None
+        self.conversation = None
+        self.speculation: Optional[SpeculativeRunner] = None
+        self._interaction_task: Optional[asyncio.Task] = None
+        self.barge_in_config = config.get('barge_in', {})
+        self.barge_in_count = 0
+        
+        # 交互追踪：各阶段耗时计入直方图，可从本地端口导出或写入JSON lines
+        tracing_config = dict(config.get('tracing', {}))
+        metrics_host = tracing_config.pop('metrics_host', '127.0.0.1')
+        metrics_port = tracing_config.pop('metrics_port', None)
+        self.tracer = Tracer(**tracing_config)
+        self.metrics_server = None
+        if self.tracer.enabled and metrics_port is not None:
+            self.metrics_server = MetricsServer(self.tracer, metrics_host, metrics_port)
         
     async def initialize(self) -> None:
         """初始化组件"""
+        audio_config = self.config.get('audio', {})
+        vad_config = self.config['wake_word']['vad']
+        
+        # 初始化音频总线：唯一的麦克风采集源，唤醒检测、STT等组件各自订阅
+        sample_rate = vad_config.get('sample_rate', 16000)
+        frame_size = int(sample_rate * vad_config.get('frame_duration_ms', 30) / 1000)
+        self.audio_bus = AudioBus(
+            self._create_recorder(sample_rate, frame_size),
+            sample_rate=sample_rate,
+            frame_size=frame_size,
+            buffer_ms=audio_config.get('bus_buffer_ms', 10000)
+        )
+        
         # 初始化唤醒检测
-        self.wake_detector = WakeWordDetector(
+        self.wake_detector = self._create_wake_detector()
+        
+        # 初始化音频输出
+        self.audio_sink = self._create_audio_sink()
+        self.audio_sink.start()
+        
+        # 初始化TTS（按配置包装缓存）
+        self.tts = TTSFactory.create_engine(self.config['tts'], pool=self.connection_pool)
+        
+        # 固定语句（唤醒应答、错误提示等）在启动后由后台任务预合成
+        phrases_config = dict(self.config.get('phrases', {}))
+        if phrases_config.pop('enabled', False):
+            self.phrases = PhraseBank(
+                phrases_config.pop('items', {}),
+                sample_rate=self.audio_sink.sample_rate,
+                channels=self.audio_sink.channels,
+                **phrases_config
+            )
+        
+        # 初始化LLM，工具调用由工具注册中心执行（按配置包装响应缓存）
+        self.llm = LLMFactory.create_engine(
+            self.config['llm'],
+            tool_executor=self._execute_tool,
+            pool=self.connection_pool,
+            tool_ttl=self.tool_registry.result_ttl
+        )
+        
+        # 初始化对话会话：按token预算保留多轮历史，较早的轮次在后台摘要
+        conversation_config = dict(self.config.get('conversation', {}))
+        summarize = conversation_config.pop('summarize', True)
+        self.conversation = ConversationSession(
+            summarizer=llm_summarizer(self.llm) if summarize else None,
+            **conversation_config
+        )
+        
+        # 初始化STT：唤醒后边说边上传，检测到语音端点即结束上传
+        self.stt = STTFactory.create_engine(
+            self.config['stt'],
+            pool=self.connection_pool,
+            sample_rate=sample_rate
+        )
+        
+        # 投机执行：用户短暂停顿时以临时识别结果提前请求LLM
+        if self.config.get('speculation', {}).get('enabled', False):
+            self.speculation = SpeculativeRunner(self._speculative_stream, normalize_query)
+        
+        # 在第一次交互之前建立好各服务的连接，空闲时保持连接
+        await self.connection_pool.warm_up()
+        self.connection_pool.start_keepalive()
+        
+    def _create_recorder(self, sample_rate: int, frame_size: int):
+        """
+        创建麦克风录音器（可覆盖，例如基准测试中使用虚拟麦克风）
+        
+        Args:
+            sample_rate: 采样率
+            frame_size: 每帧采样数
+            
+        Returns:
+            提供 iter_frames() 和 stop_recording() 的录音器
+        """
+        return AudioRecorder(
+            sample_rate=sample_rate,
+            chunk_size=frame_size,
+            **(self.config.get('audio', {}).get('capture') or {})
+        )
+        
+    def _create_wake_detector(self):
+        """
+        创建唤醒检测器，从音频总线订阅音频（可覆盖）
+        
+        Returns:
+            提供 start_detection(callback) 和 stop_detection() 的检测器
+        """
+        return WakeWordDetector(
             porcupine_access_key=self.config['wake_word']['porcupine']['access_key'],
+            audio_source=self.audio_bus.subscribe("wake_word"),
             **self.config['wake_word']['vad']
         )
         
-        # 初始化其他组件
-        # TODO: 使用工厂模式初始化LLM、TTS、STT
+    def _create_audio_sink(self):
+        """
+        创建音频输出（可覆盖）
+        
+        Returns:
+            与 AudioSink 接口一致的音频输出
+        """
+        audio_config = self.config.get('audio', {})
+        return AudioSink(
+            sample_rate=audio_config.get('output_sample_rate', 24000),
+            channels=audio_config.get('channels', 1),
+            device=audio_config.get('output_device'),
+            buffer_seconds=audio_config.get('output_buffer_seconds', 2.0),
+            prefill_ms=audio_config.get('output_prefill_ms', 60)
+        )
         
     async def start(self) -> None:
         """启动助手"""
         logger.info("正在启动助手...")
         await self.initialize()
+        if self.metrics_server:
+            await self.metrics_server.start()
+        if self.phrases is not None:
+            self._phrase_task = asyncio.create_task(self.phrases.prepare(self.tts))
+        self._background_tasks.append(asyncio.create_task(self.audio_bus.run()))
+        archive_path = self.config.get('audio', {}).get('archive_path')
+        if archive_path:
+            self._background_tasks.append(asyncio.create_task(archive_to_wav(
+                self.audio_bus.subscribe("archive"),
+                archive_path,
+                self.audio_bus.sample_rate
+            )))
         await self.wake_detector.start_detection(self.on_wake_word)
         logger.info("助手已启动")
         
@@ -60,104 +208,255 @@ class Assistant:
         logger.info("正在停止助手...")
         if self.wake_detector:
             await self.wake_detector.stop_detection()
+        if self._interaction_task and not self._interaction_task.done():
+            self._interaction_task.cancel()
+            await asyncio.gather(self._interaction_task, return_exceptions=True)
+        if self._phrase_task and not self._phrase_task.done():
+            self._phrase_task.cancel()
+            await asyncio.gather(self._phrase_task, return_exceptions=True)
+        if self.audio_bus:
+            await self.audio_bus.stop()
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+            self._background_tasks.clear()
+        if self.audio_sink:
+            self.audio_sink.close()
+        if self.conversation:
+            await self.conversation.close()
+        if self.stt and hasattr(self.stt, 'close'):
+            await self.stt.close()
+        await self.tool_registry.close()
+        await self.connection_pool.close()
+        if self.metrics_server:
+            await self.metrics_server.close()
+        self.tracer.close()
         logger.info("助手已停止")
         
-    async def on_wake_word(self) -> None:
+    async def on_wake_word(self, event: Optional[WakeWordEvent] = None) -> None:
         """
         唤醒词检测回调
+        
+        交互在独立的任务中运行，检测循环不会被阻塞。
+        播放过程中再次唤醒时，如启用了打断，则取消当前响应并开始新的交互。
+        
+        Args:
+            event: 唤醒事件，STT从唤醒词结束处开始识别
         """
         if not self.is_listening:
-            self.is_listening = True
-            try:
-                await self.process_interaction()
-            finally:
-                self.is_listening = False
-                
-    def _is_complete_sentence(self, text: str) -> bool:
+            self._start_interaction(event)
+        elif self.is_speaking and self.barge_in_config.get('enabled', False):
+            self.barge_in(event)
+            
+    def barge_in(self, event: Optional[WakeWordEvent] = None) -> None:
         """
-        判断是否是完整的句子
+        打断当前响应并立即开始新的交互
+        
+        同步执行：先清空尚未播放的音频使输出立即停止，再取消交互任务。
+        取消会沿流水线传播，关闭LLM流、TTS请求及对应的HTTP/websocket连接。
         
         Args:
-            text: 要判断的文本
-            
-        Returns:
-            是否是完整的句子
+            event: 触发打断的唤醒事件
+        """
+        self.barge_in_count += 1
+        logger.info("用户打断，取消当前响应")
+        self.audio_sink.flush()
+        previous = self._interaction_task
+        if previous is not None and not previous.done():
+            previous.cancel()
+        self._start_interaction(event, after=previous)
+        
+    def _start_interaction(self,
+                           event: Optional[WakeWordEvent] = None,
+                           after: Optional[asyncio.Task] = None) -> None:
+        """
+        在新任务中开始一次交互
+        
+        Args:
+            event: 唤醒事件
+            after: 需要先等待其结束的上一个交互任务
         """
-        return any(text.endswith(p) for p in '.。!！?？\n')
+        self.is_listening = True
+        trace = self.tracer.start_trace()
+        if trace is not None and event is not None and event.source_position is not None:
+            # 唤醒词最后一个采样所在帧的采集时刻到检测出唤醒词
+            keyword_end = self.audio_bus.frame_timestamp(max(event.source_position - 1, 0))
+            trace.record("wake", keyword_end, trace.started_at)
+        self._interaction_task = asyncio.create_task(self._run_interaction(event, after, trace))
+        
+    async def _run_interaction(self,
+                               event: Optional[WakeWordEvent] = None,
+                               after: Optional[asyncio.Task] = None,
+                               trace: Optional[tracing.Trace] = None) -> None:
+        """运行一次交互，期间的各阶段记入该交互的追踪"""
+        tracing.activate(trace)
+        try:
+            if after is not None:
+                await asyncio.gather(after, return_exceptions=True)
+            await self.process_interaction(event)
+        finally:
+            if trace is not None:
+                trace.finish()
+            if self._interaction_task is asyncio.current_task():
+                self.is_listening = False
                 
-    async def process_interaction(self) -> None:
+    async def _watch_barge_in(self) -> None:
+        """播放期间监听麦克风，检测到用户说话时打断"""
+        monitor = BargeInMonitor(
+            self.audio_bus,
+            vad_aggressiveness=self.barge_in_config.get('vad_aggressiveness', 3),
+            min_speech_ms=self.barge_in_config.get('min_speech_ms', 200)
+        )
+        try:
+            await monitor.wait_for_speech()
+        except EOFError:
+            return
+        # 新的交互从这段语音的起点开始识别
+        self.barge_in(WakeWordEvent(source_position=monitor.speech_start))
+                
+    async def process_interaction(self, event: Optional[WakeWordEvent] = None) -> None:
         """
         处理一次完整的交互
+        
+        Args:
+            event: 唤醒事件，为None时从当前位置开始识别
         """
+        barge_in_task = None
+        speculation = None
         try:
-            # 1. 语音识别
-            text = await self.stt.speech_to_text()
+            # 1. 语音识别：从唤醒词结束处订阅音频总线，紧跟唤醒词说出的命令不会丢失，
+            #    已缓存的部分直接从总线缓冲区读取，之后是实时音频
+            start = event.source_position if event is not None else None
+            if await self.play_phrase("wake"):
+                # 没有回声消除：等应答播完再从当前位置开始识别，应答声不进入识别和端点检测
+                await self.audio_sink.wait_drained()
+                start = None
+            frames = self.audio_bus.subscribe("stt", start=start)
+            try:
+                with tracing.span("stt"):
+                    text = await self.stt.transcribe_stream(
+                        frames,
+                        on_provisional=self.speculation.propose if self.speculation else None
+                    )
+            finally:
+                frames.close()
+            if self.speculation is not None:
+                speculation = self.speculation.resolve(text)
             if not text:
+                await self.play_phrase("not_understood")
                 return
                 
-            # 2. LLM处理
-            response_stream = await self.llm.chat_stream(
-                messages=[{"role": "user", "content": text}],
-                functions=self.tool_registry.get_schemas()
-            )
+            # 2. LLM处理（工具调用在流中自动执行，调用和结果记入对话历史）；
+            #    停顿时以相同内容提前发出的请求直接沿用
+            self.conversation.start_turn(text)
+            if speculation is not None:
+                llm_stream = speculation.stream(self.conversation.add_message)
+            else:
+                llm_stream = self.llm.chat_stream(
+                    messages=self.conversation.get_messages(),
+                    functions=self.tool_registry.select_schemas(text),
+                    on_message=self.conversation.add_message
+                )
+            response_stream = self.conversation.record_stream(
+                tracing.first_chunk(llm_stream, "llm_first_token"))
             
-            # 3. 处理LLM响应流
-            self.text_buffer = ""
-            async for text_chunk in response_stream:
-                self.text_buffer += text_chunk
-                
-                # 当积累到完整的句子时进行转换和播放
-                if self._is_complete_sentence(self.text_buffer):
-                    # 转换文本到语音
-                    audio_data = await self.tts.text_to_speech(self.text_buffer)
-                    
-                    # 播放音频
-                    await self._play_audio(audio_data)
-                    
-                    # 清空缓冲区
-                    self.text_buffer = ""
+            # 3. 流水线处理：分句、提前合成与播放并行进行
+            self.pipeline = ResponsePipeline(
+                tts=self.tts,
+                play_audio=self.audio_sink.write,
+                decode=self._decode_stream,
+                **self.config.get('pipeline', {})
+            )
+            self.is_speaking = True
+            if (self.barge_in_config.get('enabled', False) and
+                    self.barge_in_config.get('mode', 'wake_word') == 'vad'):
+                barge_in_task = asyncio.create_task(self._watch_barge_in())
+            await self.pipeline.run(response_stream)
             
-            # 处理剩余的文本
-            if self.text_buffer:
-                audio_data = await self.tts.text_to_speech(self.text_buffer)
-                await self._play_audio(audio_data)
+            # 等待最后一句播放完毕
+            await self.audio_sink.wait_drained()
+            tracing.mark("playback_end")
                 
         except Exception as e:
             logger.error(f"交互处理错误: {e}", exc_info=True)
-            # TODO: 播放错误提示音
+            await self.play_phrase("error")
+        finally:
+            self.is_speaking = False
+            if barge_in_task is not None:
+                barge_in_task.cancel()
+            if speculation is not None:
+                speculation.cancel()
+            if self.speculation is not None:
+                self.speculation.invalidate()
             
-    async def _play_audio(self, audio_data: bytes) -> None:
+    async def _execute_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
         """
-        播放音频数据
+        执行LLM请求的工具调用
         
         Args:
-            audio_data: MP3格式的音频数据
-        """
-        try:
-            # 设置播放状态
-            self.is_speaking = True
-            
-            # 将MP3数据转换为AudioSegment
-            audio_segment = AudioSegment.from_mp3(io.BytesIO(audio_data))
+            name: 工具名称
+            arguments: 工具参数
             
-            # 转换为numpy数组
-            samples = np.array(audio_segment.get_array_of_samples())
-            
-            # 如果是立体声，转换为单声道
-            if audio_segment.channels == 2:
-                samples = samples.reshape((-1, 2))
-                samples = samples.mean(axis=1)
+        Returns:
+            工具执行结果
+        """
+        if self.tool_registry.result_ttl(name) is None:
+            # 有副作用的工具等到投机请求被采用后才执行
+            await wait_if_speculative()
+        with tracing.span("tool", tool=name):
+            return await self.tool_registry.execute_tool(name, **arguments)
+        
+    def _speculative_stream(self, text: str, on_message) -> AsyncIterator[str]:
+        """
+        以临时识别结果发出LLM请求，不修改对话历史
+        
+        Args:
+            text: 临时识别结果
+            on_message: 工具调用消息和工具结果消息的回调
             
-            # 将样本值标准化到[-1, 1]范围
-            samples = samples.astype(np.float32)
-            samples /= np.iinfo(np.int16).max
+        Returns:
+            LLM响应文本流
+        """
+        return self.llm.chat_stream(
+            messages=self.conversation.preview_messages(text),
+            functions=self.tool_registry.select_schemas(text),
+            on_message=on_message
+        )
+        
+    def _decode_stream(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[np.ndarray]:
+        """
+        将TTS音频流增量解码为输出流格式的PCM
+        
+        Args:
+            chunks: MP3音频数据块
             
-            # 播放音频
-            sd.play(samples, audio_segment.frame_rate)
-            sd.wait()  # 等待播放完成
+        Returns:
+            PCM数据块流
+        """
+        return decode_stream(
+            chunks,
+            sample_rate=self.audio_sink.sample_rate,
+            channels=self.audio_sink.channels
+        )
+        
+    async def play_phrase(self, name: str) -> bool:
+        """
+        播放预合成的固定语句
+        
+        PCM已在内存中，直接写入音频输出，不经过合成和解码。
+        
+        Args:
+            name: 语句名称
             
+        Returns:
+            是否已播放；未启用或尚未准备好时返回False
+        """
+        samples = self.phrases.get(name) if self.phrases is not None else None
+        if samples is None:
+            return False
+        try:
+            # 语句是完整的一段，之后没有数据时播放结束不计为欠载
+            await self.audio_sink.write(samples, final=True)
         except Exception as e:
-            logger.error(f"音频播放错误: {e}", exc_info=True)
-        finally:
-            # 重置播放状态
-            self.is_speaking = False
+            logger.error(f"固定语句播放错误: {e}", exc_info=True)
+            return False
+        return True
@@ -0,0 +1,83 @@
+"""
+打断检测：播放过程中监听用户是否开始说话
+"""
+
+import logging
+from typing import TYPE_CHECKING, Dict, Any, Optional
+import webrtcvad
+
+# 入口程序以 src 为根导入 core，测试以 src.core 导入，其他包的类型只在类型检查时导入
+if TYPE_CHECKING:
+    from audio.bus import AudioBus
+
+logger = logging.getLogger(__name__)
+
+
+class BargeInMonitor:
+    """
+    播放期间的语音打断检测
+
+    从音频总线订阅实时麦克风数据，逐帧运行VAD，连续检测到足够长的语音时返回，
+    由调用方取消当前的响应流水线。每帧都会检查，因此从语音达到阈值到返回
+    最多延迟一个音频帧。
+    """
+
+    def __init__(self,
+                 bus: "AudioBus",
+                 vad_aggressiveness: int = 3,
+                 min_speech_ms: int = 200):
+        """
+        初始化打断检测
+
+        Args:
+            bus: 音频总线
+            vad_aggressiveness: VAD灵敏度(0-3)，播放时回声较大，建议使用较高的值
+            min_speech_ms: 判定为打断所需的连续语音时长(ms)
+        """
+        self.bus = bus
+        self.vad = webrtcvad.Vad(vad_aggressiveness)
+        frame_ms = bus.frame_size * 1000 / bus.sample_rate
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.speech_start: Optional[int] = None  # 最近一次打断的语音起点（总线中的绝对位置）
+        self.detections = 0
+
+    async def wait_for_speech(self) -> float:
+        """
+        等待用户开始说话
+
+        检测到打断时，这段语音的起点记录在 speech_start 中，新的交互从该位置开始识别，
+        触发打断的语音不会丢失。
+
+        Returns:
+            语音达到阈值时那一帧的采集时刻（time.monotonic）
+
+        Raises:
+            EOFError: 音频总线已停止
+        """
+        subscription = self.bus.subscribe("barge_in")
+        speech_frames = 0
+        try:
+            async for frame in subscription:
+                if self.vad.is_speech(frame, self.bus.sample_rate):
+                    if speech_frames == 0:
+                        start = subscription.cursor - self.bus.frame_size
+                    speech_frames += 1
+                    if speech_frames >= self.min_speech_frames:
+                        self.speech_start = start
+                        self.detections += 1
+                        logger.info("检测到用户打断")
+                        return subscription.timestamp
+                else:
+                    speech_frames = 0
+        finally:
+            subscription.close()
+        raise EOFError("音频总线已停止")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            包含打断次数的字典
+        """
+        return {"detections": self.detections}
@@ -0,0 +1,322 @@
+"""
+共享连接池：TTS、STT、LLM客户端共用的HTTP/websocket连接
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OPENAI_BASE = "https://api.openai.com/v1"
+
+
+@dataclass
+class _OriginStats:
+    """单个服务地址的连接统计"""
+    hits: int = 0  # 复用已有连接的请求数
+    misses: int = 0  # 需要新建连接的请求数
+    connect_time_total: float = 0.0
+    connect_time_max: float = 0.0
+    pings: int = 0
+    ping_failures: int = 0
+    last_used: float = 0.0
+
+    def record_connect(self, elapsed: float) -> None:
+        self.misses += 1
+        self.connect_time_total += elapsed
+        self.connect_time_max = max(self.connect_time_max, elapsed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "connect_time_avg": self.connect_time_total / self.misses if self.misses else 0.0,
+            "connect_time_max": self.connect_time_max,
+            "pings": self.pings,
+            "ping_failures": self.ping_failures,
+        }
+
+
+class _SharedConnector(aiohttp.TCPConnector):
+    """
+    不会被使用方会话关闭的连接器
+
+    edge_tts 等库每次请求都新建 ClientSession 并在结束时关闭连接器，
+    共享时忽略这些关闭调用，只在连接池关闭时真正释放连接。
+    """
+
+    def close(self, *, abort_ssl: bool = False) -> Awaitable[None]:
+        return asyncio.sleep(0)
+
+    def close_shared(self) -> Awaitable[None]:
+        return super().close()
+
+
+def origin_of(url: str) -> str:
+    """
+    获取URL的源（scheme://host:port），作为连接复用的单位
+
+    Args:
+        url: 任意URL
+
+    Returns:
+        源字符串
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme or "https"
+    port = parts.port or (443 if scheme in ("https", "wss") else 80)
+    return f"{scheme}://{parts.hostname}:{port}"
+
+
+class ConnectionPool:
+    """
+    进程内共享的连接池
+
+    所有aiohttp会话共用一个连接器，按服务地址保持长连接并共享DNS缓存；
+    OpenAI SDK客户端按 (base_url, api_key) 复用，底层httpx连接同样保持长连接。
+    initialize 时预先建立连接，空闲期间定期发送轻量请求保持连接不被服务端关闭。
+    """
+
+    def __init__(self,
+                 limit_per_host: int = 8,
+                 keepalive_timeout: float = 75.0,
+                 ping_interval: float = 30.0,
+                 connect_timeout: float = 10.0,
+                 dns_ttl: int = 300):
+        """
+        初始化连接池
+
+        Args:
+            limit_per_host: 每个服务地址的最大连接数
+            keepalive_timeout: 空闲连接保留时长(秒)
+            ping_interval: 服务地址空闲超过该时长(秒)时发送保活请求，0表示不保活
+            connect_timeout: 建立连接的超时时间(秒)
+            dns_ttl: DNS缓存时长(秒)
+        """
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ping_interval = ping_interval
+        self.connect_timeout = connect_timeout
+        self.dns_ttl = dns_ttl
+
+        self._connector: Optional[_SharedConnector] = None
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._openai_clients: Dict[Tuple[Optional[str], str], Any] = {}
+        self._http_clients: Dict[str, Any] = {}  # 源 -> httpx客户端，用于保活
+        self._stats: Dict[str, _OriginStats] = {}
+        self._warm_targets: Set[str] = set()
+        self._keepalive_task: Optional[asyncio.Task] = None
+
+    def connector(self) -> aiohttp.BaseConnector:
+        """
+        获取共享的连接器，可直接交给自行创建会话的库使用
+
+        Returns:
+            aiohttp连接器
+        """
+        if self._connector is None or self._connector.closed:
+            self._connector = _SharedConnector(
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_ttl
+            )
+        return self._connector
+
+    def session(self, base_url: str) -> aiohttp.ClientSession:
+        """
+        获取指定服务地址的会话，同一源的请求复用同一个会话
+
+        Args:
+            base_url: 服务地址
+
+        Returns:
+            aiohttp会话
+        """
+        origin = origin_of(base_url)
+        session = self._sessions.get(origin)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=self.connector(),
+                connector_owner=False,
+                timeout=aiohttp.ClientTimeout(connect=self.connect_timeout),
+                trace_configs=[self._trace_config(origin)]
+            )
+            self._sessions[origin] = session
+            self._warm_targets.add(origin)
+        return session
+
+    def openai_client(self, api_key: str, base_url: Optional[str] = None):
+        """
+        获取共享的OpenAI SDK客户端
+
+        Args:
+            api_key: API密钥
+            base_url: API基础URL，为None时使用官方地址
+
+        Returns:
+            AsyncOpenAI 客户端
+        """
+        key = (base_url, api_key)
+        client = self._openai_clients.get(key)
+        if client is None:
+            import httpx
+            from openai import AsyncOpenAI
+
+            origin = origin_of(base_url or DEFAULT_OPENAI_BASE)
+            http_client = self._http_clients.get(origin)
+            if http_client is None:
+                http_client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.limit_per_host,
+                        max_keepalive_connections=self.limit_per_host,
+                        keepalive_expiry=self.keepalive_timeout
+                    ),
+                    timeout=httpx.Timeout(60.0, connect=self.connect_timeout),
+                    event_hooks={"request": [self._httpx_request_hook(origin)]}
+                )
+                self._http_clients[origin] = http_client
+                self._warm_targets.add(origin)
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+            self._openai_clients[key] = client
+        return client
+
+    def add_warm_target(self, url: str) -> None:
+        """
+        登记需要预热和保活的服务地址
+
+        Args:
+            url: 服务地址
+        """
+        self._warm_targets.add(origin_of(url))
+
+    async def warm_up(self) -> None:
+        """预先建立到所有已登记服务地址的连接，失败只记录日志"""
+        targets = sorted(self._warm_targets)
+        if not targets:
+            return
+        results = await asyncio.gather(*(self._ping(origin) for origin in targets))
+        logger.info(f"连接预热完成: {sum(results)}/{len(targets)}")
+
+    def start_keepalive(self) -> None:
+        """启动空闲保活任务"""
+        if self.ping_interval and self._keepalive_task is None:
+            self._keepalive_task = asyncio.create_task(self._keepalive_loop())
+
+    async def close(self) -> None:
+        """关闭所有连接"""
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            await asyncio.gather(self._keepalive_task, return_exceptions=True)
+            self._keepalive_task = None
+        for session in self._sessions.values():
+            await session.close()
+        for http_client in self._http_clients.values():
+            await http_client.aclose()
+        if self._connector is not None:
+            await self._connector.close_shared()
+        self._sessions.clear()
+        self._http_clients.clear()
+        self._openai_clients.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取连接池统计信息
+
+        Returns:
+            每个服务地址的命中/未命中次数、建立连接耗时和保活次数
+        """
+        return {origin: stats.as_dict() for origin, stats in self._stats.items()}
+
+    def _origin_stats(self, origin: str) -> _OriginStats:
+        stats = self._stats.get(origin)
+        if stats is None:
+            stats = self._stats[origin] = _OriginStats()
+        return stats
+
+    def _trace_config(self, origin: str) -> aiohttp.TraceConfig:
+        """记录aiohttp会话的连接复用情况"""
+        stats = self._origin_stats(origin)
+        loop = asyncio.get_running_loop()
+
+        async def on_request_start(session, ctx, params):
+            stats.last_used = loop.time()
+
+        async def on_connection_create_start(session, ctx, params):
+            ctx.connect_start = loop.time()
+
+        async def on_connection_create_end(session, ctx, params):
+            stats.record_connect(loop.time() - ctx.connect_start)
+
+        async def on_connection_reuseconn(session, ctx, params):
+            stats.hits += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def _httpx_request_hook(self, origin: str):
+        """通过httpcore的trace扩展记录httpx客户端的连接复用情况"""
+        stats = self._origin_stats(origin)
+        loop = asyncio.get_running_loop()
+
+        async def on_request(request) -> None:
+            stats.last_used = loop.time()
+            state = {"connect_start": None}
+
+            async def trace(event_name: str, info: Dict[str, Any]) -> None:
+                if event_name == "connection.connect_tcp.started":
+                    state["connect_start"] = loop.time()
+                elif event_name.endswith("send_request_headers.started"):
+                    if state["connect_start"] is None:
+                        stats.hits += 1
+                    else:
+                        stats.record_connect(loop.time() - state["connect_start"])
+
+            request.extensions["trace"] = trace
+
+        return on_request
+
+    async def _ping(self, origin: str) -> bool:
+        """
+        向服务地址发送一个HEAD请求，建立或刷新连接
+
+        Returns:
+            是否成功（任何HTTP响应都算成功）
+        """
+        stats = self._origin_stats(origin)
+        stats.pings += 1
+        url = origin + "/"
+        try:
+            http_client = self._http_clients.get(origin)
+            if http_client is not None:
+                await http_client.head(url)
+            else:
+                async with self.session(origin).head(url) as response:
+                    await response.read()
+            return True
+        except Exception as e:
+            stats.ping_failures += 1
+            logger.warning(f"连接预热失败 {origin}: {e}")
+            return False
+
+    async def _keepalive_loop(self) -> None:
+        """定期检查空闲的服务地址并发送保活请求"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.ping_interval / 2)
+            now = loop.time()
+            idle = [origin for origin in sorted(self._warm_targets)
+                    if now - self._origin_stats(origin).last_used >= self.ping_interval]
+            if idle:
+                logger.debug(f"发送保活请求: {idle}")
+                await asyncio.gather(*(self._ping(origin) for origin in idle))
@@ -0,0 +1,263 @@
+"""
+响应流水线：LLM流 → 分句 → TTS合成 → 播放
+"""
+
+import asyncio
+import logging
+from contextlib import aclosing
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, Any, Optional, Set
+
+from . import tracing
+from .segmenter import SentenceSegmenter
+
+# 入口程序以 src 为根导入 core，测试以 src.core 导入，其他包的类型只在类型检查时导入
+if TYPE_CHECKING:
+    from audio.tts.base import BaseTTSEngine
+
+logger = logging.getLogger(__name__)
+
+# 各阶段之间传递的结束标记
+_END = object()
+
+
+class _SynthesisJob:
+    """单个句子的合成任务，音频块到达即放入队列"""
+
+    def __init__(self, sentence: str, index: int):
+        self.sentence = sentence
+        self.index = index
+        self.chunks: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+
+class ResponsePipeline:
+    """
+    分阶段的响应流水线
+
+    LLM读取、分句、TTS合成、播放各自运行在独立的任务中，阶段之间用有界队列连接。
+    TTS阶段最多提前合成 tts_lookahead 个句子，播放阶段按顺序取用，
+    从而在第N句播放时第N+1句已经合成完毕。
+    每个句子以流的方式合成，播放阶段收到第一个音频块即可开始播放。
+    """
+
+    def __init__(self,
+                 tts: "BaseTTSEngine",
+                 play_audio: Callable[[Any], Awaitable[None]],
+                 tts_lookahead: int = 2,
+                 text_queue_size: int = 64,
+                 sentence_queue_size: int = 8,
+                 decode: Optional[Callable[[AsyncIterator[bytes]], AsyncIterator[Any]]] = None,
+                 segmenter: Optional[Dict[str, Any]] = None):
+        """
+        初始化流水线
+
+        Args:
+            tts: TTS引擎
+            play_audio: 播放一个音频块的协程函数
+            tts_lookahead: 播放之外最多提前合成的句子数
+            text_queue_size: LLM文本块队列长度
+            sentence_queue_size: 待合成句子队列长度
+            decode: 可选的解码函数，将每句的音频流转换为可直接播放的数据块流
+            segmenter: 传给 SentenceSegmenter 的分句参数
+        """
+        if tts_lookahead < 1:
+            raise ValueError("tts_lookahead 必须大于等于1")
+
+        self.tts = tts
+        self.play_audio = play_audio
+        self.decode = decode
+        self.tts_lookahead = tts_lookahead
+        self.segmenter = SentenceSegmenter(**(segmenter or {}))
+
+        self._queues: Dict[str, asyncio.Queue] = {
+            "text": asyncio.Queue(maxsize=text_queue_size),
+            "sentence": asyncio.Queue(maxsize=sentence_queue_size),
+            "audio": asyncio.Queue(maxsize=tts_lookahead + 1),
+        }
+        # 正在播放的句子加上提前合成的句子，共占用 tts_lookahead + 1 个名额
+        self._synthesis_slots = asyncio.Semaphore(tts_lookahead + 1)
+        self._max_depths: Dict[str, int] = {name: 0 for name in self._queues}
+        self._synthesis_tasks: Set[asyncio.Task] = set()
+        self.first_chunk_latencies = []
+
+        # 播放阶段需要等待合成结果的次数（说明提前量不足）
+        self.playback_stalls = 0
+        self.sentences_played = 0
+
+    async def run(self, text_stream: AsyncIterator[str]) -> None:
+        """
+        运行流水线直到所有句子播放完毕
+
+        任一阶段出错时取消其余阶段并抛出该异常。
+
+        Args:
+            text_stream: LLM响应文本流
+        """
+        stages = [
+            asyncio.create_task(self._llm_stage(text_stream), name="pipeline-llm"),
+            asyncio.create_task(self._segment_stage(), name="pipeline-segment"),
+            asyncio.create_task(self._synthesis_stage(), name="pipeline-tts"),
+            asyncio.create_task(self._playback_stage(), name="pipeline-playback"),
+        ]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            for task in stages:
+                task.cancel()
+            self._cancel_synthesis()
+            await asyncio.gather(*stages, return_exceptions=True)
+            logger.debug(f"流水线统计: {self.get_stats()}")
+
+    def get_queue_depths(self) -> Dict[str, int]:
+        """
+        获取各阶段队列的当前深度
+
+        Returns:
+            队列名称到当前长度的映射
+        """
+        return {name: queue.qsize() for name, queue in self._queues.items()}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取流水线统计信息
+
+        Returns:
+            包含队列当前/最大深度、播放等待次数等信息的字典
+        """
+        return {
+            "queues": {
+                name: {
+                    "depth": queue.qsize(),
+                    "max_depth": self._max_depths[name],
+                    "capacity": queue.maxsize,
+                }
+                for name, queue in self._queues.items()
+            },
+            "tts_lookahead": self.tts_lookahead,
+            "sentences_played": self.sentences_played,
+            "playback_stalls": self.playback_stalls,
+            "first_chunk_latencies": list(self.first_chunk_latencies),
+            "segmenter": {
+                "sentences": self.segmenter.sentences_emitted,
+                "forced_flushes": self.segmenter.forced_flushes,
+            },
+        }
+
+    async def _put(self, name: str, item: Any) -> None:
+        """放入队列并记录最大深度"""
+        queue = self._queues[name]
+        await queue.put(item)
+        depth = queue.qsize()
+        if depth > self._max_depths[name]:
+            self._max_depths[name] = depth
+
+    async def _llm_stage(self, text_stream: AsyncIterator[str]) -> None:
+        """读取LLM文本流"""
+        try:
+            async for text_chunk in text_stream:
+                if text_chunk:
+                    await self._put("text", text_chunk)
+        finally:
+            aclose = getattr(text_stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        await self._put("text", _END)
+
+    async def _segment_stage(self) -> None:
+        """将文本块切分为句子"""
+        queue = self._queues["text"]
+        segmenter = self.segmenter
+        while True:
+            timeout = segmenter.time_until_flush()
+            try:
+                if timeout is None:
+                    text_chunk = await queue.get()
+                else:
+                    text_chunk = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                # LLM长时间没有给出句子边界，先合成已有的部分
+                sentences = segmenter.flush_due()
+            else:
+                if text_chunk is _END:
+                    break
+                sentences = segmenter.push(text_chunk)
+            for sentence in sentences:
+                await self._put("sentence", sentence)
+
+        # 处理剩余的文本
+        for sentence in segmenter.flush():
+            await self._put("sentence", sentence)
+        await self._put("sentence", _END)
+
+    async def _synthesis_stage(self) -> None:
+        """提前合成句子，按顺序交给播放阶段"""
+        queue = self._queues["sentence"]
+        index = 0
+        while True:
+            sentence = await queue.get()
+            if sentence is _END:
+                break
+            await self._synthesis_slots.acquire()
+            job = _SynthesisJob(sentence, index)
+            index += 1
+            job.task = asyncio.create_task(self._synthesize(job))
+            self._synthesis_tasks.add(job.task)
+            job.task.add_done_callback(self._on_synthesis_done)
+            await self._put("audio", job)
+        await self._put("audio", _END)
+
+    async def _synthesize(self, job: _SynthesisJob) -> None:
+        """流式合成一个句子"""
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        stream = self.tts.stream_speech(job.sentence)
+        if self.decode is not None:
+            stream = self.decode(stream)
+        try:
+            async with aclosing(stream):
+                async for chunk in stream:
+                    if start_time is not None:
+                        now = loop.time()
+                        self.first_chunk_latencies.append(now - start_time)
+                        tracing.record("tts_first_byte", start_time, now, sentence=job.index)
+                        start_time = None
+                    job.chunks.put_nowait(chunk)
+        finally:
+            job.chunks.put_nowait(_END)
+
+    async def _playback_stage(self) -> None:
+        """按顺序播放合成好的音频"""
+        queue = self._queues["audio"]
+        started = False
+        while True:
+            job = await queue.get()
+            if job is _END:
+                break
+            try:
+                if job.chunks.empty():
+                    self.playback_stalls += 1
+                while True:
+                    chunk = await job.chunks.get()
+                    if chunk is _END:
+                        break
+                    if not started:
+                        tracing.mark("playback_start")
+                        started = True
+                    await self.play_audio(chunk)
+                # 合成中的异常在这里抛出
+                await job.task
+            finally:
+                self._synthesis_slots.release()
+            self.sentences_played += 1
+
+    def _on_synthesis_done(self, task: asyncio.Task) -> None:
+        """合成任务结束回调"""
+        self._synthesis_tasks.discard(task)
+        # 标记异常已读取，由播放阶段负责真正抛出
+        if not task.cancelled():
+            task.exception()
+
+    def _cancel_synthesis(self) -> None:
+        """取消尚未完成的合成任务"""
+        for task in list(self._synthesis_tasks):
+            task.cancel()
@@ -0,0 +1,207 @@
+"""
+流式分句器
+"""
+
+import time
+from typing import Callable, List, Optional
+
+# 句末标点：中文标点和换行直接切分，英文标点需要后面跟空白才切分（避免切开小数）
+CJK_ENDINGS = '。！？；…\n'
+ASCII_ENDINGS = '.!?;'
+# 第一句为了尽快出声，可以在逗号处提前切分
+CJK_SOFT_BREAKS = '，、：'
+ASCII_SOFT_BREAKS = ',:'
+# 紧跟在句末标点之后、应归入前一句的右引号和右括号
+CLOSERS = '"\'”’」』）)】]》'
+
+_HARD = "hard"
+_SOFT = "soft"
+
+
+class SentenceSegmenter:
+    """
+    增量分句器
+
+    每次只扫描新到达的字符，一个文本块中包含多个句子边界时全部切出。
+    过短的句子（如"好！"）与后面的句子合并，减少TTS请求次数；
+    第一句可以在逗号处提前切分以缩短首个音频的等待时间；
+    未遇到句子边界时，按长度或等待时间强制输出。
+    待切分的文本长度不超过 max_chars，因此拼接开销与响应总长度无关。
+    """
+
+    def __init__(self,
+                 min_chars: int = 4,
+                 max_chars: int = 120,
+                 first_chunk_min_chars: int = 6,
+                 first_chunk_comma_split: bool = True,
+                 max_wait_ms: int = 1000,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化分句器
+
+        Args:
+            min_chars: 句子的最小字符数，更短的句子与下一句合并
+            max_chars: 未遇到句子边界时强制输出的长度
+            first_chunk_min_chars: 第一句在逗号处提前切分所需的最小字符数
+            first_chunk_comma_split: 是否允许第一句在逗号处提前切分
+            max_wait_ms: 待切分文本最长等待时间(ms)，超过后强制输出，0表示不限制
+            clock: 时钟函数，返回秒
+        """
+        if min_chars < 1 or max_chars < min_chars:
+            raise ValueError("需要满足 1 <= min_chars <= max_chars")
+
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.first_chunk_min_chars = first_chunk_min_chars
+        self.first_chunk_comma_split = first_chunk_comma_split
+        self.max_wait = max_wait_ms / 1000
+        self.clock = clock
+
+        self._pending = ""
+        self._scanned = 0  # 已扫描的字符数
+        self._awaiting: Optional[str] = None  # 英文标点后等待空白确认的边界类型
+        self._soft_cut = 0  # 最近一个逗号边界的位置
+        self._pending_since: Optional[float] = None
+
+        self.sentences_emitted = 0
+        self.forced_flushes = 0
+
+    @property
+    def pending(self) -> str:
+        """尚未输出的文本"""
+        return self._pending
+
+    def push(self, text: str) -> List[str]:
+        """
+        输入一个文本块
+
+        Args:
+            text: LLM输出的文本块
+
+        Returns:
+            本次可以输出的句子列表，可能为空
+        """
+        if not text:
+            return []
+        if self._pending_since is None and not text.isspace():
+            self._pending_since = self.clock()
+        self._pending += text
+
+        sentences: List[str] = []
+        pending = self._pending
+        i = self._scanned
+        while i < len(pending):
+            ch = pending[i]
+            i += 1
+            if self._awaiting is not None:
+                if ch in CLOSERS:
+                    continue
+                kind, self._awaiting = self._awaiting, None
+                if ch.isspace() and self._boundary(i - 1, kind, sentences):
+                    pending = self._pending
+                    i = 0
+                    continue
+            if ch in CJK_ENDINGS:
+                cut = i
+                # 连续的句末标点（如"……"、"！！"）和右引号归入本句
+                while cut < len(pending) and (pending[cut] in CLOSERS or pending[cut] in CJK_ENDINGS):
+                    cut += 1
+                if self._boundary(cut, _HARD, sentences):
+                    pending = self._pending
+                    i = 0
+                else:
+                    i = cut
+            elif ch in ASCII_ENDINGS:
+                self._awaiting = _HARD
+            elif ch in CJK_SOFT_BREAKS:
+                if self._boundary(i, _SOFT, sentences):
+                    pending = self._pending
+                    i = 0
+            elif ch in ASCII_SOFT_BREAKS:
+                self._awaiting = _SOFT
+        self._scanned = len(pending)
+
+        # 一个大文本块可能需要多次切分，直到剩余文本短于 max_chars
+        while len(self._pending) >= self.max_chars:
+            self.forced_flushes += 1
+            self._emit(self._split_point(), sentences)
+        return sentences
+
+    def time_until_flush(self) -> Optional[float]:
+        """
+        距离按时间强制输出还剩多久
+
+        Returns:
+            剩余秒数，没有待切分文本或未限制等待时间时返回None
+        """
+        if self._pending_since is None or not self.max_wait:
+            return None
+        return max(0.0, self._pending_since + self.max_wait - self.clock())
+
+    def flush_due(self) -> List[str]:
+        """
+        等待超时后强制输出，优先在逗号或空白处切分
+
+        Returns:
+            输出的句子列表
+        """
+        remaining = self.time_until_flush()
+        if remaining is None or remaining > 0:
+            return []
+        self.forced_flushes += 1
+        sentences: List[str] = []
+        self._emit(self._split_point(), sentences)
+        return sentences
+
+    def flush(self) -> List[str]:
+        """
+        输出全部剩余文本（响应结束时调用）
+
+        Returns:
+            输出的句子列表
+        """
+        sentences: List[str] = []
+        self._emit(len(self._pending), sentences)
+        return sentences
+
+    def _boundary(self, cut: int, kind: str, sentences: List[str]) -> bool:
+        """
+        处理一个候选边界
+
+        Returns:
+            是否在该位置输出了句子
+        """
+        length = len(self._pending[:cut].strip())
+        if kind == _SOFT:
+            self._soft_cut = cut
+            if (not self.first_chunk_comma_split or self.sentences_emitted or
+                    length < self.first_chunk_min_chars):
+                return False
+        elif length < self.min_chars:
+            return False
+        self._emit(cut, sentences)
+        return True
+
+    def _split_point(self) -> int:
+        """强制输出时的切分位置：最近的逗号，其次最后一个空白，都没有则全部输出"""
+        pending = self._pending
+        if self._soft_cut and len(pending[:self._soft_cut].strip()) >= self.min_chars:
+            return self._soft_cut
+        space = max(pending.rfind(' '), pending.rfind('\t'))
+        if space > 0 and len(pending[:space].strip()) >= self.min_chars:
+            return space
+        return len(pending)
+
+    def _emit(self, cut: int, sentences: List[str]) -> None:
+        """输出 cut 之前的文本，其余保留"""
+        sentence = self._pending[:cut].strip()
+        rest = self._pending[cut:]
+        self._pending = rest
+        self._scanned = len(rest)
+        self._soft_cut = 0
+        if not rest:
+            self._awaiting = None
+        self._pending_since = self.clock() if rest.strip() else None
+        if sentence:
+            sentences.append(sentence)
+            self.sentences_emitted += 1
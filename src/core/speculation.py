@@ -0,0 +1,211 @@
+"""
+投机执行：在用户确定说完之前提前开始LLM请求
+"""
+
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 启动LLM响应流：(用户输入, 消息回调) -> 文本流
+StreamStarter = Callable[[str, Callable[[Dict[str, Any]], None]], AsyncIterator[str]]
+
+_current: ContextVar[Optional["Speculation"]] = ContextVar("speculation", default=None)
+
+
+async def wait_if_speculative() -> None:
+    """
+    在投机执行中时，等待结果被采用
+
+    有副作用的操作（如控制设备的工具）在执行前调用，投机请求被取消时不会执行。
+    """
+    speculation = _current.get()
+    if speculation is not None:
+        await speculation.confirmed.wait()
+
+
+class Speculation:
+    """
+    一次以临时识别结果提前发出的LLM请求
+
+    后台任务读取响应流，把文本块和工具消息按顺序放入队列；
+    结果被采用后由 stream() 按原顺序重放，之后的内容直接透传。
+    """
+
+    def __init__(self,
+                 text: str,
+                 start_stream: StreamStarter,
+                 normalize: Callable[[str], str],
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        开始投机请求
+
+        Args:
+            text: 临时识别结果
+            start_stream: 启动LLM响应流的函数
+            normalize: 比较识别结果前的规范化函数
+            clock: 时钟函数
+        """
+        self.text = text
+        self.normalize = normalize
+        self.key = normalize(text)
+        self.clock = clock
+        self.started_at = clock()
+        self.first_chunk_at: Optional[float] = None
+        self.confirmed = asyncio.Event()
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._pump(start_stream))
+
+    def matches(self, text: str) -> bool:
+        """最终识别结果是否与临时结果一致（比较规范化后的文本）"""
+        return self.normalize(text) == self.key
+
+    async def stream(self,
+                     on_message: Optional[Callable[[Dict[str, Any]], None]] = None) -> AsyncIterator[str]:
+        """
+        采用投机结果
+
+        Args:
+            on_message: 工具调用消息和工具结果消息的回调
+
+        Yields:
+            文本块
+        """
+        self.confirmed.set()
+        try:
+            while True:
+                kind, value = await self._events.get()
+                if kind == "chunk":
+                    yield value
+                elif kind == "message":
+                    if on_message is not None:
+                        on_message(value)
+                elif kind == "error":
+                    raise value
+                else:
+                    return
+        finally:
+            self.cancel()
+
+    def cancel(self) -> None:
+        """取消投机请求"""
+        if not self._task.done():
+            self._task.cancel()
+
+    async def _pump(self, start_stream: StreamStarter) -> None:
+        _current.set(self)
+        try:
+            async for chunk in start_stream(self.text, self._on_message):
+                if self.first_chunk_at is None:
+                    self.first_chunk_at = self.clock()
+                self._events.put_nowait(("chunk", chunk))
+        except Exception as e:
+            self._events.put_nowait(("error", e))
+        else:
+            self._events.put_nowait(("end", None))
+
+    def _on_message(self, message: Dict[str, Any]) -> None:
+        self._events.put_nowait(("message", message))
+
+
+class SpeculativeRunner:
+    """
+    管理提前端点触发的投机LLM请求
+
+    STT在短暂停顿后给出临时结果时 propose() 立即发出请求；用户继续说话时取消。
+    最终结果确定后 resolve()：与临时结果一致则采用已经在进行的请求，
+    否则取消并由调用方按正常流程重新请求。
+    """
+
+    def __init__(self,
+                 start_stream: StreamStarter,
+                 normalize: Callable[[str], str],
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化
+
+        Args:
+            start_stream: 启动LLM响应流的函数
+            normalize: 比较临时结果与最终结果前的规范化函数（如忽略标点和空白）
+            clock: 时钟函数
+        """
+        self.start_stream = start_stream
+        self.normalize = normalize
+        self.clock = clock
+        self._current: Optional[Speculation] = None
+
+        # 统计信息
+        self.started = 0
+        self.used = 0
+        self.cancelled = 0  # 用户继续说话
+        self.mismatched = 0  # 最终结果与临时结果不一致
+        self.time_saved_total = 0.0
+
+    def propose(self, text: Optional[str]) -> None:
+        """
+        以临时识别结果开始投机请求，text 为None表示用户继续说话
+
+        Args:
+            text: 临时识别结果
+        """
+        if self._current is not None:
+            self._current.cancel()
+            self._current = None
+            self.cancelled += 1
+        if text:
+            logger.debug(f"投机请求: {text}")
+            self._current = Speculation(text, self.start_stream, self.normalize, self.clock)
+            self.started += 1
+
+    def resolve(self, final_text: str) -> Optional[Speculation]:
+        """
+        用最终识别结果决定是否采用投机请求
+
+        Args:
+            final_text: 最终识别结果
+
+        Returns:
+            可以采用的投机请求，没有或不一致时返回None
+        """
+        speculation, self._current = self._current, None
+        if speculation is None:
+            return None
+        if not final_text or not speculation.matches(final_text):
+            speculation.cancel()
+            self.mismatched += 1
+            return None
+
+        # 正常流程会在此刻才发出请求；首个文本块已到达时节省的是整个首字延迟
+        now = self.clock()
+        ready = min(now, speculation.first_chunk_at) if speculation.first_chunk_at is not None else now
+        saved = ready - speculation.started_at
+        self.used += 1
+        self.time_saved_total += saved
+        logger.info(f"采用投机请求，节省 {saved * 1000:.0f}ms")
+        return speculation
+
+    def invalidate(self) -> None:
+        """交互中止时取消尚未确定的投机请求"""
+        if self._current is not None:
+            self._current.cancel()
+            self._current = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            包含发出、采用、取消、不一致的次数和节省时间的字典
+        """
+        return {
+            "started": self.started,
+            "used": self.used,
+            "cancelled": self.cancelled,
+            "mismatched": self.mismatched,
+            "use_rate": self.used / self.started if self.started else 0.0,
+            "time_saved_total": self.time_saved_total,
+            "avg_time_saved": self.time_saved_total / self.used if self.used else 0.0,
+        }
@@ -0,0 +1,390 @@
+"""
+交互追踪与延迟指标
+
+每次交互对应一个 Trace，带有交互ID和各阶段的时间点/时间段（time.monotonic，
+与事件循环的 loop.time() 一致）。当前交互通过 contextvar 传递，流水线、工具调用等
+深层组件直接调用本模块的 span()/mark()/record()，无需层层传参；没有进行中的交互
+或追踪关闭时这些调用立即返回。交互结束时各阶段耗时计入固定分桶的直方图，
+可以按 Prometheus 文本格式导出，也可以逐条写入 JSON lines 文件。
+"""
+
+import json
+import time
+import uuid
+import bisect
+import logging
+import resource
+from contextlib import aclosing
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# 默认分桶（秒），与 Prometheus 客户端库的默认值一致
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 由两个时间点/时间段推导出的阶段：名称 -> (起点, 终点)，取起点的结束时刻和终点的开始时刻
+DERIVED_STAGES = {
+    "response": ("stt", "playback_start"),  # 识别结束到开始播放
+    "playback": ("playback_start", "playback_end"),
+}
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+
+
+class Histogram:
+    """固定分桶的直方图，observe 只做一次二分查找和两次加法"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        初始化
+
+        Args:
+            bounds: 递增的分桶上界，另有一个 +Inf 桶
+        """
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """记录一个值"""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """
+        获取累计分桶
+
+        Returns:
+            (上界, 不大于该上界的数量) 列表，最后一项为 "+Inf"
+        """
+        result = []
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            result.append((format(bound, "g"), total))
+        result.append(("+Inf", total + self.counts[-1]))
+        return result
+
+
+class Trace:
+    """
+    一次交互的追踪记录
+
+    事件为 (名称, 开始时刻, 结束时刻, 属性)，时间点的结束时刻为None。
+    """
+
+    __slots__ = ("tracer", "id", "started_at", "wall_time", "events")
+
+    def __init__(self, tracer: "Tracer"):
+        self.tracer = tracer
+        self.id = uuid.uuid4().hex[:12]
+        self.started_at = time.monotonic()
+        self.wall_time = time.time()
+        self.events: List[Tuple[str, float, Optional[float], Optional[Dict[str, Any]]]] = []
+
+    def mark(self, name: str, **attrs) -> None:
+        """记录一个时间点"""
+        self.events.append((name, time.monotonic(), None, attrs or None))
+
+    def record(self, name: str, start: float, end: float, **attrs) -> None:
+        """记录一个已知起止时刻的时间段"""
+        self.events.append((name, start, end, attrs or None))
+
+    def span(self, name: str, **attrs) -> "_Span":
+        """以上下文管理器记录一个时间段"""
+        return _Span(self, name, attrs or None)
+
+    def finish(self) -> None:
+        """结束交互，计入直方图并写出"""
+        self.tracer._finish(self)
+
+    def durations(self) -> Dict[str, List[float]]:
+        """
+        各阶段的耗时(秒)
+
+        Returns:
+            阶段名称到耗时列表的映射（如每句一个 tts_first_byte）
+        """
+        result: Dict[str, List[float]] = {}
+        first: Dict[str, Tuple[float, Optional[float]]] = {}
+        for name, start, end, _ in self.events:
+            first.setdefault(name, (start, end))
+            if end is not None:
+                result.setdefault(name, []).append(end - start)
+        for stage, (origin, target) in DERIVED_STAGES.items():
+            if origin in first and target in first:
+                start = first[origin][1] if first[origin][1] is not None else first[origin][0]
+                result.setdefault(stage, []).append(first[target][0] - start)
+        result["interaction"] = [time.monotonic() - self.started_at]
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为可序列化的字典，时刻为相对交互开始的毫秒数
+
+        Returns:
+            包含交互ID、开始时间和事件列表的字典
+        """
+        events = []
+        for name, start, end, attrs in self.events:
+            event: Dict[str, Any] = {"name": name, "at_ms": round((start - self.started_at) * 1000, 2)}
+            if end is not None:
+                event["duration_ms"] = round((end - start) * 1000, 2)
+            if attrs:
+                event.update(attrs)
+            events.append(event)
+        return {"id": self.id, "time": self.wall_time, "events": events}
+
+
+class _Span:
+    __slots__ = ("trace", "name", "attrs", "start")
+
+    def __init__(self, trace: Trace, name: str, attrs: Optional[Dict[str, Any]]):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self) -> "_Span":
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        attrs = self.attrs
+        if exc_type is not None:
+            attrs = dict(attrs or {}, error=exc_type.__name__)
+        self.trace.events.append((self.name, self.start, time.monotonic(), attrs))
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def current_trace() -> Optional[Trace]:
+    """当前任务所属的交互追踪，没有时返回None"""
+    return _current.get()
+
+
+def activate(trace: Optional[Trace]):
+    """
+    把追踪设为当前任务（及其之后创建的子任务）的当前交互
+
+    Args:
+        trace: 交互追踪
+
+    Returns:
+        用于 deactivate 的令牌
+    """
+    return _current.set(trace)
+
+
+def deactivate(token) -> None:
+    """恢复 activate 之前的当前交互"""
+    _current.reset(token)
+
+
+def mark(name: str, **attrs) -> None:
+    """在当前交互中记录一个时间点"""
+    trace = _current.get()
+    if trace is not None:
+        trace.mark(name, **attrs)
+
+
+def record(name: str, start: float, end: float, **attrs) -> None:
+    """在当前交互中记录一个已知起止时刻的时间段"""
+    trace = _current.get()
+    if trace is not None:
+        trace.record(name, start, end, **attrs)
+
+
+def span(name: str, **attrs):
+    """在当前交互中以上下文管理器记录一个时间段"""
+    trace = _current.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name, attrs or None)
+
+
+def first_chunk(stream: AsyncIterator[Any], name: str, **attrs) -> AsyncIterator[Any]:
+    """
+    记录从开始读取流到第一个数据块之间的时间段
+
+    Args:
+        stream: 数据流
+        name: 时间段名称
+
+    Returns:
+        透传的数据流，没有当前交互时原样返回
+    """
+    trace = _current.get()
+    if trace is None:
+        return stream
+    return _first_chunk(trace, stream, name, attrs or None)
+
+
+async def _first_chunk(trace: Trace,
+                       stream: AsyncIterator[Any],
+                       name: str,
+                       attrs: Optional[Dict[str, Any]]) -> AsyncIterator[Any]:
+    start = time.monotonic()
+    async with aclosing(stream):
+        async for chunk in stream:
+            if start is not None:
+                trace.events.append((name, start, time.monotonic(), attrs))
+                start = None
+            yield chunk
+
+
+class Tracer:
+    """
+    交互追踪器
+
+    持有各阶段的直方图；交互结束时计入耗时，并可追加一行JSON到 jsonl_path。
+    """
+
+    def __init__(self,
+                 enabled: bool = True,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 jsonl_path: Optional[str] = None):
+        """
+        初始化
+
+        Args:
+            enabled: 是否追踪，关闭时 start_trace 返回None，各记录函数不做任何事
+            buckets: 直方图分桶上界(秒)
+            jsonl_path: 每次交互追加一行JSON的文件路径，为None时不写出
+        """
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.jsonl_path = jsonl_path
+        self.histograms: Dict[str, Histogram] = {}
+        self.interactions = 0
+        self._jsonl = None
+
+    def start_trace(self) -> Optional[Trace]:
+        """
+        开始一次交互
+
+        Returns:
+            交互追踪，追踪关闭时返回None
+        """
+        if not self.enabled:
+            return None
+        return Trace(self)
+
+    def prometheus_text(self) -> str:
+        """
+        按 Prometheus 文本格式导出指标
+
+        Returns:
+            指标文本
+        """
+        lines = [
+            "# HELP home_ai_stage_duration_seconds 每次交互各阶段的耗时",
+            "# TYPE home_ai_stage_duration_seconds histogram",
+        ]
+        for stage, histogram in sorted(self.histograms.items()):
+            for bound, count in histogram.cumulative():
+                lines.append(f'home_ai_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'home_ai_stage_duration_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+            lines.append(f'home_ai_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+        lines += [
+            "# HELP home_ai_interactions_total 已完成的交互次数",
+            "# TYPE home_ai_interactions_total counter",
+            f"home_ai_interactions_total {self.interactions}",
+            "# HELP home_ai_process_max_rss_bytes 进程的峰值常驻内存",
+            "# TYPE home_ai_process_max_rss_bytes gauge",
+            f"home_ai_process_max_rss_bytes {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            包含交互次数和各阶段平均耗时的字典
+        """
+        return {
+            "interactions": self.interactions,
+            "stages": {
+                stage: {"count": histogram.count, "avg": histogram.sum / histogram.count}
+                for stage, histogram in self.histograms.items() if histogram.count
+            },
+        }
+
+    def close(self) -> None:
+        """关闭JSON lines文件"""
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
+
+    def _finish(self, trace: Trace) -> None:
+        self.interactions += 1
+        for stage, values in trace.durations().items():
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram(self.buckets)
+            for value in values:
+                histogram.observe(value)
+        if self.jsonl_path:
+            try:
+                if self._jsonl is None:
+                    self._jsonl = open(self.jsonl_path, "a", encoding="utf-8")
+                self._jsonl.write(json.dumps(trace.to_dict(), ensure_ascii=False) + "\n")
+                self._jsonl.flush()
+            except OSError as e:
+                logger.warning(f"写入追踪记录失败: {e}")
+
+
+class MetricsServer:
+    """在本地端口以 /metrics 提供 Prometheus 文本格式的指标"""
+
+    def __init__(self, tracer: Tracer, host: str = "127.0.0.1", port: int = 9464):
+        """
+        初始化
+
+        Args:
+            tracer: 追踪器
+            host: 监听地址
+            port: 监听端口，0表示由系统分配
+        """
+        self.tracer = tracer
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        """开始监听"""
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"指标服务已启动: http://{self.host}:{self.port}/metrics")
+
+    async def close(self) -> None:
+        """停止监听"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.tracer.prometheus_text().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
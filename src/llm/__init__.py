@@ -0,0 +1,10 @@
+"""
+LLM 模块
+"""
+
+from .base import BaseLLM
+from .openai_llm import OpenAICompatibleLLM
+from .cache import ResponseCache, CachedLLM
+from .factory import LLMFactory
+
+__all__ = ['BaseLLM', 'OpenAICompatibleLLM', 'ResponseCache', 'CachedLLM', 'LLMFactory']
@@ -3,7 +3,7 @@ LLM基础接口定义
 """
 
 from abc import ABC, abstractmethod
-from typing import AsyncIterator, List, Dict, Any, Optional
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional
 
 class BaseLLM(ABC):
     """LLM基础接口"""
@@ -11,13 +11,15 @@ class BaseLLM(ABC):
     @abstractmethod
     async def chat_stream(self,
                          messages: List[Dict[str, str]],
-                         functions: Optional[List[Dict[str, Any]]] = None) -> AsyncIterator[str]:
+                         functions: Optional[List[Dict[str, Any]]] = None,
+                         on_message: Optional[Callable[[Dict[str, Any]], None]] = None) -> AsyncIterator[str]:
         """
         流式对话
         
         Args:
             messages: 对话历史
             functions: 可用的函数列表
+            on_message: 引擎向对话中追加消息（工具调用及其结果）时的回调
             
         Yields:
             响应文本流
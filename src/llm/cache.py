@@ -0,0 +1,429 @@
+"""
+LLM 响应缓存
+"""
+
+import re
+import time
+import zlib
+import logging
+import unicodedata
+from collections import OrderedDict
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .base import BaseLLM
+
+logger = logging.getLogger(__name__)
+
+# 文本向量化函数：文本 -> 一维向量
+Embedder = Callable[[str], np.ndarray]
+
+# 工具结果有效期：工具名称 -> 有效期(秒)，返回None表示工具有副作用，结果不能缓存
+ToolTTL = Callable[[str], Optional[float]]
+
+# 阿拉伯数字或中文数字，近似匹配时要求两边的数字完全一致（“5分钟”与“15分钟”不是同一个请求）
+NUMBER_PATTERN = re.compile(r"[0-9]+(?:\.[0-9]+)?|[零〇一二两三四五六七八九十百千万亿半]+")
+
+# 表示承接上文的词：包含这些词的输入可能依赖之前的对话，不查也不写缓存
+FOLLOW_UP_PATTERN = re.compile(
+    r"它|他|她|这个|那个|这些|那些|这样|那样|这里|那里|刚才|上面|前面|还有|再|继续|然后|为什么|呢|"
+    r"\b(?:it|its|that|this|these|those|they|them|there|again|more|also|too|why|and|what about)\b",
+    re.IGNORECASE
+)
+
+
+def normalize_query(text: str) -> str:
+    """
+    规范化用户输入，使只有标点、空白、大小写或全半角差异的输入命中同一缓存
+
+    Args:
+        text: 识别出的文本
+
+    Returns:
+        规范化后的文本
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    return ''.join(ch for ch in text if unicodedata.category(ch)[0] not in "PZC")
+
+
+def is_follow_up(text: str) -> bool:
+    """
+    判断输入是否可能承接上文（含指代、追问等词）
+
+    Args:
+        text: 识别出的文本
+
+    Returns:
+        是否可能依赖之前的对话
+    """
+    return FOLLOW_UP_PATTERN.search(unicodedata.normalize("NFKC", text)) is not None
+
+
+class HashingEmbedder:
+    """
+    字符n-gram哈希向量
+
+    不依赖模型：单字和相邻两字按哈希映射到固定维度后归一化，
+    能匹配措辞略有差异的近似输入（如多一个"的"字），但不理解语义。
+    """
+
+    def __init__(self, dim: int = 256):
+        """
+        初始化向量化函数
+
+        Args:
+            dim: 向量维度
+        """
+        self.dim = dim
+
+    def __call__(self, text: str) -> np.ndarray:
+        text = normalize_query(text)
+        grams = list(text) + [text[i:i + 2] for i in range(len(text) - 1)]
+        indices = [zlib.crc32(gram.encode("utf-8")) % self.dim for gram in grams]
+        return np.bincount(indices, minlength=self.dim).astype(np.float32)
+
+
+@dataclass
+class _Entry:
+    """一条缓存的响应"""
+    text: str
+    expires_at: float
+    exact_only: bool = False  # 只允许精确命中（依赖工具结果的回复）
+    slot: int = -1  # 在向量矩阵中的行号，未向量化时为-1
+    hits: int = 0
+
+
+class ResponseCache:
+    """
+    按用户输入缓存LLM响应文本
+
+    先按规范化后的输入精确匹配；配置了向量化函数时，精确匹配失败后
+    在所有条目的向量中找余弦相似度最高的一条，超过阈值即视为命中。
+    近似匹配要求两边的数字完全一致，并跳过只允许精确命中的条目：
+    依赖工具结果的回复与具体参数（城市、时间等）有关，措辞相近不代表结果相同。
+    向量存放在预分配的矩阵中，一次矩阵乘法完成全部比较。
+    每个条目都有有效期，超出条目数上限时淘汰最久未使用的条目。
+    """
+
+    def __init__(self,
+                 max_entries: int = 256,
+                 ttl: float = 86400.0,
+                 embedder: Optional[Embedder] = None,
+                 similarity_threshold: float = 0.95,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最多缓存的响应数
+            ttl: 默认有效期(秒)
+            embedder: 文本向量化函数，为None时只做精确匹配
+            similarity_threshold: 近似匹配所需的最低余弦相似度
+            clock: 时钟函数
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries 必须大于0")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.clock = clock
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._vectors: Optional[np.ndarray] = None  # (max_entries, dim)，按需分配
+        self._slot_keys: List[Optional[str]] = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, query: str) -> Optional[str]:
+        """
+        查找缓存的响应
+
+        Args:
+            query: 用户输入
+
+        Returns:
+            缓存的响应文本，未命中时返回None
+        """
+        key = normalize_query(query)
+        if not key:
+            return None
+
+        entry = self._get_valid(key)
+        if entry is not None:
+            self.exact_hits += 1
+        elif self.embedder is not None and self._vectors is not None and self._entries:
+            entry = self._nearest(query)
+            if entry is not None:
+                self.similar_hits += 1
+
+        if entry is None:
+            self.misses += 1
+            return None
+        entry.hits += 1
+        return entry.text
+
+    def store(self, query: str, text: str, ttl: Optional[float] = None, exact_only: bool = False) -> None:
+        """
+        缓存一条响应
+
+        Args:
+            query: 用户输入
+            text: 完整的响应文本
+            ttl: 有效期(秒)，默认使用配置值
+            exact_only: 是否只允许精确命中
+        """
+        key = normalize_query(query)
+        if not key or not text:
+            return
+        self._remove(key)
+        while len(self._entries) >= self.max_entries:
+            self._evict_one()
+
+        entry = _Entry(text=text, expires_at=self.clock() + (self.ttl if ttl is None else ttl),
+                       exact_only=exact_only)
+        if self.embedder is not None and not exact_only:
+            vector = self._embed(query)
+            if vector is not None:
+                entry.slot = self._free_slots.pop()
+                self._vectors[entry.slot] = vector
+                self._slot_keys[entry.slot] = key
+        self._entries[key] = entry
+        self.stores += 1
+
+    def clear(self) -> None:
+        """清空缓存"""
+        for key in list(self._entries):
+            self._remove(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            包含条目数、命中/未命中次数、命中率和淘汰次数的字典
+        """
+        hits = self.exact_hits + self.similar_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _get_valid(self, key: str) -> Optional[_Entry]:
+        """读取未过期的条目并标记为最近使用"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= self.clock():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """向量化并归一化，首次调用时按向量维度分配矩阵"""
+        vector = np.asarray(self.embedder(text), dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        if not norm:
+            return None
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_entries, vector.size), dtype=np.float32)
+        return vector / norm
+
+    def _nearest(self, query: str) -> Optional[_Entry]:
+        """找到相似度超过阈值、数字一致的最近条目，空闲行全为0，不会被选中"""
+        vector = self._embed(query)
+        if vector is None:
+            return None
+        numbers = NUMBER_PATTERN.findall(normalize_query(query))
+        scores = self._vectors @ vector
+        # 从高到低检查，跳过已过期的条目
+        for slot in np.argsort(scores)[::-1]:
+            if scores[slot] < self.similarity_threshold:
+                return None
+            key = self._slot_keys[slot]
+            if key is None or NUMBER_PATTERN.findall(key) != numbers:
+                continue
+            entry = self._get_valid(key)
+            if entry is not None:
+                logger.debug(f"响应缓存近似命中: {query} -> {key} ({scores[slot]:.3f})")
+                return entry
+        return None
+
+    def _evict_one(self) -> None:
+        """优先淘汰已过期的条目，否则淘汰最久未使用的条目"""
+        now = self.clock()
+        for key, entry in self._entries.items():
+            if entry.expires_at <= now:
+                self._remove(key)
+                self.expirations += 1
+                return
+        self._remove(next(iter(self._entries)))
+        self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None or entry.slot < 0:
+            return
+        self._vectors[entry.slot] = 0.0
+        self._slot_keys[entry.slot] = None
+        self._free_slots.append(entry.slot)
+
+
+class CachedLLM(BaseLLM):
+    """
+    带响应缓存的LLM引擎
+
+    包装任意LLM引擎。命中缓存时直接返回缓存的完整回复，不发送请求；
+    回复文本经流水线合成时，若TTS也启用了缓存，音频同样直接来自缓存。
+
+    按当前这一轮的用户输入查找和缓存：会话中的第一轮总是可以缓存；之后的轮次
+    不含指代、追问等承接上文的词（见 FOLLOW_UP_PATTERN）时视为独立请求，
+    “那明天呢”之类依赖历史的请求总是交给LLM。
+    回复过程中调用了工具时，只有所有工具都没有副作用才缓存，
+    有效期取这些工具结果有效期和 tool_ttl 中的最小值，且只允许精确命中。
+    中途被取消或出错的回复不缓存。
+    """
+
+    def __init__(self,
+                 llm: BaseLLM,
+                 cache: ResponseCache,
+                 tool_ttl: Optional[ToolTTL] = None,
+                 max_tool_ttl: float = 60.0):
+        """
+        初始化缓存引擎
+
+        Args:
+            llm: 被包装的LLM引擎
+            cache: 响应缓存
+            tool_ttl: 查询工具结果有效期的函数，为None时调用过工具的回复都不缓存
+            max_tool_ttl: 依赖工具结果的回复的最长有效期(秒)
+        """
+        self.llm = llm
+        self.cache = cache
+        self.tool_ttl = tool_ttl
+        self.max_tool_ttl = max_tool_ttl
+        self.uncacheable = 0  # 因调用了有副作用的工具而未缓存的回复数
+
+    async def chat_stream(self,
+                          messages: List[Dict[str, Any]],
+                          functions: Optional[List[Dict[str, Any]]] = None,
+                          on_message: Optional[Callable[[Dict[str, Any]], None]] = None) -> AsyncIterator[str]:
+        """
+        流式对话，优先返回缓存的回复
+
+        Args:
+            messages: 对话历史
+            functions: 可用的函数列表
+            on_message: 引擎向对话中追加消息时的回调
+
+        Yields:
+            响应文本流
+        """
+        query = self._standalone_query(messages)
+        if query is not None:
+            cached = self.cache.lookup(query)
+            if cached is not None:
+                logger.info("LLM响应缓存命中")
+                yield cached
+                return
+
+        tool_names: List[str] = []
+
+        def record(message: Dict[str, Any]) -> None:
+            for call in message.get("tool_calls") or []:
+                tool_names.append(call.get("function", {}).get("name", ""))
+            if on_message is not None:
+                on_message(message)
+
+        parts: List[str] = []
+        async with aclosing(self.llm.chat_stream(messages, functions, on_message=record)) as stream:
+            async for chunk in stream:
+                parts.append(chunk)
+                yield chunk
+
+        if query is not None:
+            ttl = self._response_ttl(tool_names)
+            if ttl is None:
+                self.uncacheable += 1
+            else:
+                self.cache.store(query, ''.join(parts), ttl, exact_only=bool(tool_names))
+
+    async def chat(self,
+                   messages: List[Dict[str, Any]],
+                   functions: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        完整对话，用于摘要等内部请求，不经过缓存
+
+        Args:
+            messages: 对话历史
+            functions: 可用的函数列表
+
+        Returns:
+            完整响应文本
+        """
+        return await self.llm.chat(messages, functions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            被包装引擎的统计信息，加上缓存统计
+        """
+        stats = dict(getattr(self.llm, "get_stats", dict)())
+        stats["response_cache"] = dict(self.cache.get_stats(), uncacheable=self.uncacheable)
+        return stats
+
+    async def close(self) -> None:
+        """关闭被包装的引擎"""
+        close = getattr(self.llm, "close", None)
+        if close is not None:
+            await close()
+
+    @staticmethod
+    def _standalone_query(messages: List[Dict[str, Any]]) -> Optional[str]:
+        """当前用户输入不依赖上文时返回其内容，否则返回None"""
+        if not messages or messages[-1].get("role") != "user":
+            return None
+        content = messages[-1].get("content")
+        if not isinstance(content, str):
+            return None
+        first_turn = sum(1 for m in messages if m.get("role") == "user") == 1
+        if not first_turn and is_follow_up(content):
+            return None
+        return content
+
+    def _response_ttl(self, tool_names: List[str]) -> Optional[float]:
+        """计算回复的有效期，回复依赖有副作用的工具时返回None"""
+        if not tool_names:
+            return self.cache.ttl
+        if self.tool_ttl is None:
+            return None
+        ttl = self.max_tool_ttl
+        for name in tool_names:
+            tool_ttl = self.tool_ttl(name)
+            if tool_ttl is None:
+                return None
+            ttl = min(ttl, tool_ttl)
+        return ttl
@@ -0,0 +1,353 @@
+"""
+多轮对话历史管理
+"""
+
+import asyncio
+import logging
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 摘要函数：(需要摘要的消息) -> 摘要文本
+Summarizer = Callable[[List[Dict[str, Any]]], Awaitable[str]]
+
+_CJK_RE = re.compile(r"[　-〿一-鿿＀-￯]")
+
+# 每条消息的格式开销（角色、分隔符等）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = "请用简短的中文总结以下对话中需要记住的要点（用户的偏好、提到的事实、未完成的请求），不超过100字。"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的token数
+
+    不依赖具体模型的分词器：中日文字符按每字一个token，其余字符按每4个一个token。
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的token数
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """
+    估算一条消息的token数，包括工具调用的名称和参数
+
+    Args:
+        message: 对话消息
+
+    Returns:
+        估算的token数
+    """
+    tokens = MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.get("content") or "")
+    for call in message.get("tool_calls") or []:
+        function = call.get("function", {})
+        tokens += estimate_tokens(function.get("name", "")) + estimate_tokens(function.get("arguments", ""))
+    return tokens
+
+
+@dataclass(eq=False)
+class _Turn:
+    """一轮对话：用户消息及其后的助手、工具消息"""
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    tokens: int = 0
+
+    def add(self, message: Dict[str, Any]) -> int:
+        tokens = message_tokens(message)
+        self.messages.append(message)
+        self.tokens += tokens
+        return tokens
+
+
+class ConversationSession:
+    """
+    按token预算管理的对话会话
+
+    每条消息加入时计算一次token数并累加，不会重复统计整个历史。
+    历史超过压缩阈值时，在后台把较早的轮次压缩为摘要（或直接丢弃），
+    不占用响应路径；请求时若仍超过预算，直接丢弃最早的轮次。
+    一轮对话的消息总是整体保留或移除，工具调用和工具结果不会被拆开。
+    空闲超过 idle_timeout 的会话在下次使用时清空。
+    """
+
+    def __init__(self,
+                 system_prompt: Optional[str] = None,
+                 max_tokens: int = 3000,
+                 compact_threshold: float = 0.75,
+                 keep_recent_turns: int = 2,
+                 idle_timeout: float = 300.0,
+                 summarizer: Optional[Summarizer] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化会话
+
+        Args:
+            system_prompt: 系统提示词
+            max_tokens: 发送给LLM的历史token上限
+            compact_threshold: 历史超过 max_tokens 的该比例时开始后台压缩
+            keep_recent_turns: 压缩时保留的最近轮数
+            idle_timeout: 空闲超时时间(秒)，超时后清空历史，0表示不过期
+            summarizer: 摘要函数，为None时直接丢弃较早的轮次
+            clock: 时钟函数
+        """
+        if not 0 < compact_threshold <= 1:
+            raise ValueError("compact_threshold 必须在 (0, 1] 范围内")
+
+        self.system_prompt = system_prompt
+        self.max_tokens = max_tokens
+        self.compact_threshold = compact_threshold
+        self.keep_recent_turns = keep_recent_turns
+        self.idle_timeout = idle_timeout
+        self.summarizer = summarizer
+        self.clock = clock
+
+        self._system_tokens = message_tokens({"content": system_prompt}) if system_prompt else 0
+        self._turns: List[_Turn] = []
+        self._summary: Optional[str] = None
+        self._summary_tokens = 0
+        self._history_tokens = 0
+        self._pending_text: List[str] = []
+        self._compact_task: Optional[asyncio.Task] = None
+        self.last_active = clock()
+
+        self.evicted_turns = 0
+        self.summarized_turns = 0
+        self.expirations = 0
+
+    @property
+    def total_tokens(self) -> int:
+        """当前历史（含系统提示词和摘要）的token数"""
+        return self._system_tokens + self._summary_tokens + self._history_tokens
+
+    @property
+    def expired(self) -> bool:
+        """是否已空闲超时"""
+        return bool(self.idle_timeout) and self.clock() - self.last_active > self.idle_timeout
+
+    def start_turn(self, user_text: str) -> None:
+        """
+        开始新的一轮对话
+
+        Args:
+            user_text: 用户输入
+        """
+        if self.expired and (self._turns or self._summary):
+            logger.info("会话空闲超时，清空对话历史")
+            self.expirations += 1
+            self.clear()
+        self.last_active = self.clock()
+        self._pending_text.clear()
+        self._turns.append(_Turn())
+        self.add_message({"role": "user", "content": user_text})
+
+    def add_message(self, message: Dict[str, Any]) -> None:
+        """
+        向当前轮次加入一条消息（助手消息、工具调用结果等）
+
+        Args:
+            message: 对话消息
+        """
+        if not self._turns:
+            self._turns.append(_Turn())
+        if message.get("role") == "assistant":
+            # 工具调用消息中已经包含了此前流式输出的文本
+            self._pending_text.clear()
+        self._history_tokens += self._turns[-1].add(message)
+        self.last_active = self.clock()
+
+    async def record_stream(self, text_stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        """
+        透传LLM文本流，结束（或被打断）时把已输出的文本记为助手消息
+
+        Args:
+            text_stream: LLM响应文本流
+
+        Yields:
+            文本块
+        """
+        try:
+            async for chunk in text_stream:
+                self._pending_text.append(chunk)
+                yield chunk
+        finally:
+            aclose = getattr(text_stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            if self._pending_text:
+                self.add_message({"role": "assistant", "content": ''.join(self._pending_text)})
+                self._pending_text.clear()
+            self.schedule_compaction()
+
+    def get_messages(self) -> List[Dict[str, Any]]:
+        """
+        获取发送给LLM的消息列表
+
+        超过预算时直接丢弃最早的轮次（当前轮次总是保留），不等待后台压缩。
+
+        Returns:
+            消息列表
+        """
+        while self.total_tokens > self.max_tokens and len(self._turns) > 1:
+            self._drop_oldest()
+        return self._build_messages(self._summary, self._turns)
+
+    def preview_messages(self, user_text: str) -> List[Dict[str, Any]]:
+        """
+        获取以 user_text 开始新一轮时将发送的消息列表，不修改历史
+
+        用于在用户输入确定之前提前发出请求；超时和超出预算的处理与正式开始一轮时相同。
+
+        Args:
+            user_text: 用户输入
+
+        Returns:
+            消息列表
+        """
+        message = {"role": "user", "content": user_text}
+        if self.expired:
+            summary, turns, tokens = None, [], self._system_tokens
+        else:
+            summary, turns, tokens = self._summary, self._turns, self.total_tokens
+        tokens += message_tokens(message)
+        skip = 0
+        while tokens > self.max_tokens and skip < len(turns):
+            tokens -= turns[skip].tokens
+            skip += 1
+        messages = self._build_messages(summary, turns[skip:])
+        messages.append(message)
+        return messages
+
+    def schedule_compaction(self) -> None:
+        """历史超过压缩阈值时启动后台压缩"""
+        if self.total_tokens <= self.max_tokens * self.compact_threshold:
+            return
+        if self._compact_task is not None and not self._compact_task.done():
+            return
+        self._compact_task = asyncio.create_task(self._compact())
+
+    def clear(self) -> None:
+        """清空历史"""
+        if self._compact_task is not None:
+            self._compact_task.cancel()
+            self._compact_task = None
+        self._turns.clear()
+        self._summary = None
+        self._summary_tokens = 0
+        self._history_tokens = 0
+        self._pending_text.clear()
+
+    async def close(self) -> None:
+        """停止后台压缩"""
+        if self._compact_task is not None:
+            self._compact_task.cancel()
+            await asyncio.gather(self._compact_task, return_exceptions=True)
+            self._compact_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取会话统计信息
+
+        Returns:
+            包含轮数、token数、丢弃/摘要的轮数和过期次数的字典
+        """
+        return {
+            "turns": len(self._turns),
+            "tokens": self.total_tokens,
+            "summary_tokens": self._summary_tokens,
+            "evicted_turns": self.evicted_turns,
+            "summarized_turns": self.summarized_turns,
+            "expirations": self.expirations,
+        }
+
+    def _build_messages(self, summary: Optional[str], turns: List[_Turn]) -> List[Dict[str, Any]]:
+        messages: List[Dict[str, Any]] = []
+        if self.system_prompt:
+            messages.append({"role": "system", "content": self.system_prompt})
+        if summary:
+            messages.append({"role": "system", "content": f"之前的对话摘要：{summary}"})
+        for turn in turns:
+            messages.extend(turn.messages)
+        return messages
+
+    def _drop_oldest(self) -> None:
+        turn = self._turns.pop(0)
+        self._history_tokens -= turn.tokens
+        self.evicted_turns += 1
+
+    async def _compact(self) -> None:
+        """把较早的轮次压缩到阈值以下"""
+        target = self.max_tokens * self.compact_threshold
+        # 至少保留当前进行中的一轮
+        candidates = self._turns[:max(0, len(self._turns) - max(1, self.keep_recent_turns))]
+        selected: List[_Turn] = []
+        excess = self.total_tokens - target
+        for turn in candidates:
+            if excess <= 0:
+                break
+            selected.append(turn)
+            excess -= turn.tokens
+        if not selected:
+            return
+
+        summary = None
+        if self.summarizer is not None:
+            messages = []
+            if self._summary:
+                messages.append({"role": "system", "content": f"之前的对话摘要：{self._summary}"})
+            for turn in selected:
+                messages.extend(turn.messages)
+            try:
+                summary = await self.summarizer(messages)
+            except Exception as e:
+                logger.warning(f"对话摘要失败，直接丢弃较早的轮次: {e}")
+
+        # 等待摘要期间这些轮次可能已被丢弃，只移除仍然存在的
+        removed = 0
+        for turn in selected:
+            if turn in self._turns:
+                self._turns.remove(turn)
+                self._history_tokens -= turn.tokens
+                removed += 1
+        if summary:
+            self._summary = summary
+            self._summary_tokens = message_tokens({"content": summary}) + estimate_tokens("之前的对话摘要：")
+            self.summarized_turns += removed
+        else:
+            self.evicted_turns += removed
+        logger.debug(f"对话历史压缩: 移除 {removed} 轮, 当前 {self.total_tokens} tokens")
+
+
+def llm_summarizer(llm) -> Summarizer:
+    """
+    使用LLM生成摘要的摘要函数
+
+    Args:
+        llm: LLM引擎，需提供 chat(messages)
+
+    Returns:
+        摘要函数
+    """
+    async def summarize(messages: List[Dict[str, Any]]) -> str:
+        lines = []
+        for message in messages:
+            content = message.get("content")
+            if content:
+                lines.append(f"{message['role']}: {content}")
+        return await llm.chat([
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": "\n".join(lines)},
+        ])
+
+    return summarize
@@ -0,0 +1,128 @@
+"""
+LLM 引擎工厂
+"""
+
+import logging
+from typing import Dict, Any, Type, Optional
+from .base import BaseLLM
+from .openai_llm import OpenAICompatibleLLM, ToolExecutor
+from .cache import CachedLLM, ResponseCache, HashingEmbedder, ToolTTL
+
+logger = logging.getLogger(__name__)
+
+class LLMFactory:
+    """LLM 引擎工厂"""
+    
+    # 注册可用的引擎
+    _engines: Dict[str, Type[BaseLLM]] = {
+        "openai": OpenAICompatibleLLM
+    }
+    
+    @classmethod
+    def create_engine(cls,
+                      config: Dict[str, Any],
+                      tool_executor: Optional[ToolExecutor] = None,
+                      pool=None,
+                      tool_ttl: Optional[ToolTTL] = None) -> BaseLLM:
+        """
+        创建 LLM 引擎实例
+        
+        Args:
+            config: LLM配置字典
+            tool_executor: 工具执行函数（可选）
+            pool: 共享连接池（可选）
+            tool_ttl: 查询工具结果有效期的函数，用于响应缓存（可选）
+            
+        Returns:
+            LLM引擎实例（按配置包装响应缓存）
+            
+        Raises:
+            ValueError: 引擎类型不支持或配置无效
+        """
+        engine_type = config.get("type")
+        if not engine_type:
+            raise ValueError("未指定LLM引擎类型")
+            
+        if engine_type not in cls._engines:
+            raise ValueError(f"不支持的LLM引擎类型: {engine_type}")
+            
+        engine_class = cls._engines[engine_type]
+        
+        try:
+            if engine_type == "openai":
+                if not config.get("api_key"):
+                    raise ValueError("OpenAI LLM引擎需要提供api_key")
+                engine = engine_class(
+                    api_key=config["api_key"],
+                    model=config.get("model", "gpt-3.5-turbo"),
+                    api_base=config.get("api_base") or "https://api.openai.com/v1",
+                    temperature=config.get("temperature", 0.7),
+                    max_tokens=config.get("max_tokens"),
+                    max_tool_rounds=config.get("max_tool_rounds", 3),
+                    timeout=config.get("timeout", 60.0),
+                    tool_executor=tool_executor,
+                    pool=pool
+                )
+                if pool:
+                    pool.add_warm_target(engine.api_base)
+            else:
+                # 对于自定义引擎，使用配置字典作为参数
+                options = {k: v for k, v in config.items() if k != "type"}
+                engine = engine_class(**options)
+                
+        except Exception as e:
+            logger.error(f"创建LLM引擎失败: {e}", exc_info=True)
+            raise
+            
+        return cls._wrap_cache(engine, config.get("cache", {}), tool_ttl)
+        
+    @classmethod
+    def _wrap_cache(cls,
+                    engine: BaseLLM,
+                    cache_config: Dict[str, Any],
+                    tool_ttl: Optional[ToolTTL] = None) -> BaseLLM:
+        """
+        根据缓存配置包装引擎
+        
+        Args:
+            engine: LLM引擎实例
+            cache_config: 缓存配置字典
+            tool_ttl: 查询工具结果有效期的函数
+            
+        Returns:
+            未启用缓存时返回原引擎，否则返回带响应缓存的引擎
+        """
+        if not cache_config.get("enabled", False):
+            return engine
+            
+        embedder = None
+        if cache_config.get("similarity", False):
+            embedder = HashingEmbedder(dim=cache_config.get("embedding_dim", 256))
+        cache = ResponseCache(
+            max_entries=cache_config.get("max_entries", 256),
+            ttl=cache_config.get("ttl", 86400.0),
+            embedder=embedder,
+            similarity_threshold=cache_config.get("similarity_threshold", 0.95)
+        )
+        logger.info(f"启用LLM响应缓存: {type(engine).__name__}")
+        return CachedLLM(
+            engine,
+            cache,
+            tool_ttl=tool_ttl,
+            max_tool_ttl=cache_config.get("tool_ttl", 60.0)
+        )
+            
+    @classmethod
+    def register_engine(cls, engine_type: str, engine_class: Type[BaseLLM]) -> None:
+        """
+        注册新的引擎类型
+        
+        Args:
+            engine_type: 引擎类型名称
+            engine_class: 引擎类
+        """
+        if not issubclass(engine_class, BaseLLM):
+            raise ValueError(f"引擎类 {engine_class.__name__} 必须继承 BaseLLM")
+            
+        cls._engines[engine_type] = engine_class
+        logger.info(f"注册LLM引擎: {engine_type} -> {engine_class.__name__}")
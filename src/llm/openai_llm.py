@@ -0,0 +1,346 @@
+"""
+OpenAI兼容接口的LLM实现
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from .base import BaseLLM
+
+logger = logging.getLogger(__name__)
+
+# 工具执行函数：(工具名称, 参数) -> 结果
+ToolExecutor = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+class _ToolCall:
+    """流式响应中逐步拼接的一个工具调用"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.id = ""
+        self.name = ""
+        self.arguments = ""
+        self.task: Optional[asyncio.Future] = None
+
+    def parse_arguments(self) -> Optional[Dict[str, Any]]:
+        """
+        参数JSON完整时返回解析结果，否则返回None
+
+        JSON对象的前缀只有在末尾的 } 到达后才能解析成功，
+        因此解析成功即说明参数已经完整。
+        """
+        text = self.arguments.strip()
+        if not text:
+            return None
+        if not text.endswith("}"):
+            return None
+        try:
+            arguments = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return arguments if isinstance(arguments, dict) else None
+
+    @property
+    def call_id(self) -> str:
+        """调用ID，部分兼容接口不返回ID时按序号生成"""
+        return self.id or f"call_{self.index}"
+
+    def to_message(self) -> Dict[str, Any]:
+        return {
+            "id": self.call_id,
+            "type": "function",
+            "function": {"name": self.name, "arguments": self.arguments or "{}"},
+        }
+
+
+class OpenAICompatibleLLM(BaseLLM):
+    """
+    OpenAI兼容的流式对话引擎
+
+    通过SSE读取 /chat/completions 的流式响应，文本增量到达即返回。
+    工具调用的参数按增量拼接，某个调用的参数JSON一旦完整就立即开始执行，
+    不等待整个响应结束；多个工具调用并发执行，全部完成后把结果加入对话，
+    继续流式读取后续的回复。
+    """
+
+    def __init__(self,
+                 api_key: str,
+                 model: str = "gpt-3.5-turbo",
+                 api_base: str = "https://api.openai.com/v1",
+                 temperature: float = 0.7,
+                 max_tokens: Optional[int] = None,
+                 tool_executor: Optional[ToolExecutor] = None,
+                 max_tool_rounds: int = 3,
+                 timeout: float = 60.0,
+                 pool=None):
+        """
+        初始化LLM引擎
+
+        Args:
+            api_key: API密钥
+            model: 模型名称
+            api_base: API基础URL
+            temperature: 采样温度
+            max_tokens: 单次回复的最大token数
+            tool_executor: 工具执行函数，为None时忽略工具调用
+            max_tool_rounds: 单次对话中最多执行工具的轮数
+            timeout: 单次请求的超时时间(秒)
+            pool: 共享连接池（可选）
+        """
+        self.api_key = api_key
+        self.model = model
+        self.api_base = api_base.rstrip("/")
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.tool_executor = tool_executor
+        self.max_tool_rounds = max_tool_rounds
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.pool = pool
+        self._session: Optional[aiohttp.ClientSession] = None
+        # 工具名称 -> (schema, tools 数组中的条目)，schema对象不变时复用
+        self._tool_specs: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+
+        self.requests = 0
+        self.tool_calls = 0
+        self.tools_started_early = 0  # 响应结束之前就开始执行的工具数
+
+    async def chat_stream(self,
+                          messages: List[Dict[str, Any]],
+                          functions: Optional[List[Dict[str, Any]]] = None,
+                          on_message: Optional[Callable[[Dict[str, Any]], None]] = None) -> AsyncIterator[str]:
+        """
+        流式对话，需要调用工具时自动执行并继续生成回复
+
+        Args:
+            messages: 对话历史
+            functions: 可用的函数列表（Function Calling schema）
+            on_message: 追加工具调用消息和工具结果消息时的回调，用于记录对话历史
+
+        Yields:
+            响应文本流
+        """
+        messages = list(messages)
+        tools = self._build_tools(functions or [])
+
+        for round_index in range(self.max_tool_rounds + 1):
+            # 最后一轮不再提供工具，确保得到文本回复
+            round_tools = tools if self.tool_executor and round_index < self.max_tool_rounds else None
+            calls: Dict[int, _ToolCall] = {}
+            round_text: List[str] = []
+            try:
+                async with aclosing(self._stream_completion(messages, round_tools)) as stream:
+                    async for delta in stream:
+                        content = delta.get("content")
+                        if content:
+                            round_text.append(content)
+                            yield content
+                        for call_delta in delta.get("tool_calls") or []:
+                            self._merge_tool_call(calls, call_delta)
+
+                if not calls:
+                    return
+
+                # 响应结束，启动剩余的工具调用
+                for call in calls.values():
+                    if call.task is None:
+                        arguments = call.parse_arguments()
+                        if arguments is None and call.arguments.strip():
+                            self._reject_tool(call, "参数不是有效的JSON")
+                        else:
+                            self._start_tool(call, arguments or {})
+
+                ordered = [calls[index] for index in sorted(calls)]
+                results = await asyncio.gather(*(call.task for call in ordered),
+                                               return_exceptions=True)
+            finally:
+                for call in calls.values():
+                    if call.task is not None and not call.task.done():
+                        call.task.cancel()
+
+            new_messages = [{
+                "role": "assistant",
+                "content": ''.join(round_text) or None,
+                "tool_calls": [call.to_message() for call in ordered],
+            }]
+            for call, result in zip(ordered, results):
+                new_messages.append({
+                    "role": "tool",
+                    "tool_call_id": call.call_id,
+                    "content": self._format_result(call, result),
+                })
+            messages.extend(new_messages)
+            if on_message is not None:
+                for message in new_messages:
+                    on_message(message)
+
+    async def chat(self,
+                   messages: List[Dict[str, Any]],
+                   functions: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        完整对话
+
+        Args:
+            messages: 对话历史
+            functions: 可用的函数列表
+
+        Returns:
+            完整响应文本
+        """
+        parts = []
+        async for chunk in self.chat_stream(messages, functions):
+            parts.append(chunk)
+        return ''.join(parts)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            包含请求数、工具调用数和提前执行的工具数的字典
+        """
+        return {
+            "requests": self.requests,
+            "tool_calls": self.tool_calls,
+            "tools_started_early": self.tools_started_early,
+        }
+
+    async def close(self) -> None:
+        """关闭自有的HTTP会话（使用连接池时由连接池负责）"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self.pool is not None:
+            return self.pool.session(self.api_base)
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    def _build_tools(self, functions: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """
+        构建请求中的 tools 数组
+
+        注册中心返回的schema对象在重新注册前保持不变，因此每个工具的条目只构建一次。
+        条目不预先编码：每次请求（包括每轮工具调用）都随请求体一起用 json.dumps 编码，
+        20个工具约增加0.1ms，相比网络往返可以忽略。
+        """
+        if not functions:
+            return None
+        tools = []
+        for schema in functions:
+            cached = self._tool_specs.get(schema["name"])
+            if cached is None or cached[0] is not schema:
+                cached = (schema, {"type": "function", "function": schema})
+                self._tool_specs[schema["name"]] = cached
+            tools.append(cached[1])
+        return tools
+
+    async def _stream_completion(self,
+                                 messages: List[Dict[str, Any]],
+                                 tools: Optional[List[Dict[str, Any]]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        发送一次流式请求
+
+        Args:
+            messages: 对话历史
+            tools: tools 数组
+
+        Yields:
+            每个SSE事件中的 delta
+        """
+        payload: Dict[str, Any] = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "stream": True,
+        }
+        if self.max_tokens:
+            payload["max_tokens"] = self.max_tokens
+        if tools:
+            payload["tools"] = tools
+        body = json.dumps(payload, ensure_ascii=False)
+
+        self.requests += 1
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        # 提前结束迭代（如用户打断）时退出上下文，连接随之关闭，服务端停止生成
+        async with self._get_session().post(
+            f"{self.api_base}/chat/completions",
+            data=body.encode("utf-8"),
+            headers=headers,
+            timeout=self.timeout
+        ) as response:
+            if response.status != 200:
+                body = await response.text()
+                raise RuntimeError(f"LLM请求失败 ({response.status}): {body[:200]}")
+
+            async for line in response.content:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                event = json.loads(data)
+                for choice in event.get("choices") or []:
+                    delta = choice.get("delta")
+                    if delta:
+                        yield delta
+
+    def _merge_tool_call(self, calls: Dict[int, _ToolCall], delta: Dict[str, Any]) -> None:
+        """合并一个工具调用增量，参数完整时立即开始执行"""
+        index = delta.get("index", 0)
+        call = calls.get(index)
+        if call is None:
+            call = calls[index] = _ToolCall(index)
+        if delta.get("id"):
+            call.id = delta["id"]
+        function = delta.get("function") or {}
+        if function.get("name"):
+            call.name += function["name"]
+        if function.get("arguments"):
+            call.arguments += function["arguments"]
+
+        if call.task is None and call.name:
+            arguments = call.parse_arguments()
+            if arguments is not None:
+                self.tools_started_early += 1
+                self._start_tool(call, arguments)
+
+    def _start_tool(self, call: _ToolCall, arguments: Dict[str, Any]) -> None:
+        """在后台开始执行工具"""
+        self.tool_calls += 1
+        logger.info(f"调用工具: {call.name}")
+        if self.tool_executor is None:
+            raise RuntimeError("未配置工具执行函数")
+        call.task = asyncio.create_task(self.tool_executor(call.name, arguments))
+
+    @staticmethod
+    def _reject_tool(call: _ToolCall, reason: str) -> None:
+        """
+        不执行工具，把错误作为该调用的结果返回给模型
+
+        参数不完整时不能以缺省参数执行，否则有副作用的工具（如控制设备）可能误操作。
+        """
+        logger.warning(f"不执行工具 {call.name}: {reason}: {call.arguments[:200]}")
+        call.task = asyncio.get_running_loop().create_future()
+        call.task.set_exception(ValueError(reason))
+
+    @staticmethod
+    def _format_result(call: _ToolCall, result: Any) -> str:
+        """将工具结果转换为消息内容"""
+        if isinstance(result, BaseException):
+            logger.error(f"工具执行错误 {call.name}: {result}")
+            return f"工具执行失败: {result}"
+        if isinstance(result, str):
+            return result
+        try:
+            return json.dumps(result, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return str(result)
@@ -3,7 +3,7 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, ClassVar
+from typing import Any, Dict, ClassVar, Optional
 
 class BaseTool(ABC):
     """工具基础类"""
@@ -11,6 +11,10 @@ class BaseTool(ABC):
     name: ClassVar[str]  # 工具名称
     description: ClassVar[str]  # 工具描述
     parameters: ClassVar[Dict[str, Any]]  # 参数模式
+    timeout: ClassVar[Optional[float]] = None  # 执行超时(秒)，None时使用注册中心的默认值
+    cacheable: ClassVar[bool] = False  # 相同参数的结果是否可以缓存
+    cache_ttl: ClassVar[float] = 60.0  # 结果缓存时长(秒)
+    pinned: ClassVar[bool] = False  # 是否总是提供给LLM，不经过相关性筛选
     
     @classmethod
     def get_schema(cls) -> Dict[str, Any]:
@@ -43,3 +47,9 @@ class BaseTool(ABC):
             工具执行结果
         """
         pass
+        
+    async def close(self) -> None:
+        """
+        释放工具持有的资源（如连接池），注册中心关闭时调用
+        """
+        pass
@@ -0,0 +1,133 @@
+"""
+工具检索索引：按用户输入挑选相关的工具
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+_WORD_RE = re.compile(r"[a-z0-9]+|[一-鿿]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    切分为检索用的词项
+
+    英文按单词（同时拆开驼峰和下划线命名），中文没有分词器，使用单字和相邻两字组合。
+
+    Args:
+        text: 任意文本
+
+    Returns:
+        词项列表
+    """
+    tokens: List[str] = []
+    for word in _WORD_RE.findall(_CAMEL_RE.sub(" ", text).lower()):
+        if word[0] < "一":
+            tokens.append(word)
+        else:
+            tokens.extend(word)
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def schema_text(schema: Dict[str, Any]) -> str:
+    """提取schema中用于检索的文本：名称、描述、参数名和参数描述"""
+    parts = [schema.get("name", "").replace("_", " "), schema.get("description", "")]
+    properties = schema.get("parameters", {}).get("properties", {})
+    for name, spec in properties.items():
+        parts.append(name.replace("_", " "))
+        if isinstance(spec, dict):
+            parts.append(str(spec.get("description", "")))
+            parts.extend(str(value) for value in spec.get("enum", []))
+    return " ".join(parts)
+
+
+class ToolIndex:
+    """
+    基于BM25的工具词法索引
+
+    注册工具时增量加入文档，查询时只遍历查询词项的倒排表，
+    开销与工具总数基本无关。
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_df: float = 0.5):
+        """
+        初始化索引
+
+        Args:
+            k1: BM25词频饱和参数
+            b: BM25文档长度归一化参数
+            max_df: 出现在超过该比例工具中的词项（如"的"）区分度很低，查询时跳过
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_df = max_df
+        self._postings: Dict[str, Dict[str, int]] = {}  # 词项 -> {工具名称: 词频}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, name: str, schema: Dict[str, Any]) -> None:
+        """
+        加入或更新一个工具
+
+        Args:
+            name: 工具名称
+            schema: 工具schema
+        """
+        self.remove(name)
+        counts = Counter(tokenize(schema_text(schema)))
+        for token, count in counts.items():
+            self._postings.setdefault(token, {})[name] = count
+        length = sum(counts.values())
+        self._lengths[name] = length
+        self._total_length += length
+
+    def remove(self, name: str) -> None:
+        """
+        移除一个工具
+
+        Args:
+            name: 工具名称
+        """
+        length = self._lengths.pop(name, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for token in [t for t, docs in self._postings.items() if name in docs]:
+            docs = self._postings[token]
+            del docs[name]
+            if not docs:
+                del self._postings[token]
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """
+        检索与查询最相关的工具
+
+        Args:
+            query: 查询文本（用户输入）
+            top_k: 最多返回的工具数
+
+        Returns:
+            按得分从高到低排列的 (工具名称, 得分) 列表，只包含得分大于0的工具
+        """
+        count = len(self._lengths)
+        if not count or top_k <= 0:
+            return []
+        avg_length = self._total_length / count
+        scores: Dict[str, float] = {}
+        for token in set(tokenize(query)):
+            docs = self._postings.get(token)
+            if not docs or (count > 2 and len(docs) > count * self.max_df):
+                continue
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for name, freq in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[name] / avg_length)
+                scores[name] = scores.get(name, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+        return heapq.nsmallest(top_k, scores.items(), key=lambda item: (-item[1], item[0]))
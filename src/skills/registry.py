@@ -2,17 +2,95 @@
 工具注册中心
 """
 
+import asyncio
+import json
 import logging
-from typing import Dict, Type, List, Any
+import time
+from dataclasses import dataclass
+from typing import Dict, Type, List, Any, Optional, Set, Tuple
 from .base import BaseTool
+from .index import ToolIndex
 
 logger = logging.getLogger(__name__)
 
+
+class ToolTimeoutError(TimeoutError):
+    """工具执行超时"""
+
+
+@dataclass
+class _ToolStats:
+    """单个工具的执行统计"""
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    cache_hits: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+    def record(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "cache_hits": self.cache_hits,
+            "avg_time": self.total_time / self.calls if self.calls else 0.0,
+            "max_time": self.max_time,
+        }
+
+
 class ToolRegistry:
-    """工具注册中心"""
+    """
+    工具注册中心
+    
+    每个工具只创建一个实例并长期复用，工具可以在实例中持有自己的连接等资源。
+    每次执行都有超时限制；声明为 cacheable 的工具按参数缓存结果，在 cache_ttl 内直接返回。
+    工具schema在注册时生成一次；工具较多时按用户输入检索最相关的 top_k 个工具提供给LLM。
+    """
     
     _tools: Dict[str, Type[BaseTool]] = {}
+    _schemas: Dict[str, Dict[str, Any]] = {}
+    _index: ToolIndex = ToolIndex()
+    _instances: Dict[str, BaseTool] = {}
+    _stats: Dict[str, _ToolStats] = {}
+    _cache: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+    
+    default_timeout: float = 10.0
+    cache_enabled: bool = True
+    cache_max_entries: int = 256
+    top_k: int = 0
+    pinned_tools: Set[str] = set()
     
+    @classmethod
+    def configure(cls,
+                  default_timeout: float = 10.0,
+                  cache_enabled: bool = True,
+                  cache_max_entries: int = 256,
+                  top_k: int = 0,
+                  pinned: Optional[List[str]] = None) -> None:
+        """
+        配置执行参数
+        
+        Args:
+            default_timeout: 工具未声明超时时使用的默认超时(秒)
+            cache_enabled: 是否启用结果缓存
+            cache_max_entries: 最多缓存的结果数
+            top_k: 每次请求按相关性挑选的工具数，0表示提供全部工具
+            pinned: 总是提供的工具名称
+        """
+        cls.default_timeout = default_timeout
+        cls.cache_enabled = cache_enabled
+        cls.cache_max_entries = cache_max_entries
+        cls.top_k = top_k
+        cls.pinned_tools = set(pinned or [])
+        if not cache_enabled:
+            cls._cache.clear()
+            
     @classmethod
     def register(cls, tool_class: Type[BaseTool]):
         """
@@ -25,18 +103,95 @@ class ToolRegistry:
             工具类（用于装饰器）
         """
         cls._tools[tool_class.name] = tool_class
+        schema = tool_class.get_schema()
+        cls._schemas[tool_class.name] = schema
+        cls._index.add(tool_class.name, schema)
+        # 重新注册时丢弃旧的实例和缓存
+        cls._instances.pop(tool_class.name, None)
+        cls._invalidate_cache(tool_class.name)
         logger.info(f"注册工具: {tool_class.name}")
         return tool_class
         
     @classmethod
     def get_schemas(cls) -> List[Dict[str, Any]]:
         """
-        获取所有工具的schema
+        获取所有工具的schema（注册时生成，不会每次重建）
         
         Returns:
             工具schema列表
         """
-        return [tool.get_schema() for tool in cls._tools.values()]
+        return list(cls._schemas.values())
+        
+    @classmethod
+    def select_schemas(cls, query: str, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        按用户输入挑选相关工具的schema
+        
+        固定提供的工具总是包含在内，其余工具按词法相关性取前 top_k 个。
+        工具总数不超过挑选数量时返回全部工具。检索是纯词法的，换了说法或中英混杂时
+        可能一个都匹配不上：没有任何匹配时返回全部工具，匹配不足 top_k 个时
+        按以往调用次数补足。
+        
+        Args:
+            query: 用户输入
+            top_k: 挑选的工具数，默认使用配置值
+            
+        Returns:
+            工具schema列表
+        """
+        top_k = cls.top_k if top_k is None else top_k
+        pinned = [name for name, tool in cls._tools.items()
+                  if tool.pinned or name in cls.pinned_tools]
+        if not top_k or len(cls._schemas) <= top_k + len(pinned):
+            return cls.get_schemas()
+            
+        matched = [name for name, _ in cls._index.search(query, top_k + len(pinned))
+                   if name not in pinned][:top_k]
+        if not matched:
+            return cls.get_schemas()
+        if len(matched) < top_k:
+            # 按调用次数补足，次数相同时保持注册顺序
+            others = [name for name in cls._schemas if name not in pinned and name not in matched]
+            others.sort(key=lambda name: -cls._stats[name].calls if name in cls._stats else 0)
+            matched += others[:top_k - len(matched)]
+        return [cls._schemas[name] for name in pinned + matched]
+        
+    @classmethod
+    def get_instance(cls, tool_name: str) -> BaseTool:
+        """
+        获取工具实例，首次使用时创建
+        
+        Args:
+            tool_name: 工具名称
+            
+        Returns:
+            工具实例
+            
+        Raises:
+            ValueError: 工具不存在
+        """
+        instance = cls._instances.get(tool_name)
+        if instance is None:
+            if tool_name not in cls._tools:
+                raise ValueError(f"工具不存在: {tool_name}")
+            instance = cls._instances[tool_name] = cls._tools[tool_name]()
+        return instance
+        
+    @classmethod
+    def result_ttl(cls, tool_name: str) -> Optional[float]:
+        """
+        获取工具结果的有效期
+        
+        Args:
+            tool_name: 工具名称
+            
+        Returns:
+            声明为 cacheable 的工具返回 cache_ttl，其余工具（可能有副作用）返回None
+        """
+        tool = cls._tools.get(tool_name)
+        if tool is None or not tool.cacheable:
+            return None
+        return tool.cache_ttl
         
     @classmethod
     async def execute_tool(cls, tool_name: str, **kwargs) -> Any:
@@ -52,10 +207,94 @@ class ToolRegistry:
             
         Raises:
             ValueError: 工具不存在
+            ToolTimeoutError: 执行超时
         """
-        if tool_name not in cls._tools:
-            raise ValueError(f"工具不存在: {tool_name}")
-            
-        tool = cls._tools[tool_name]()
+        tool = cls.get_instance(tool_name)
+        stats = cls._stats.setdefault(tool_name, _ToolStats())
+        
+        cache_key = None
+        if cls.cache_enabled and tool.cacheable:
+            cache_key = (tool_name, json.dumps(kwargs, sort_keys=True, ensure_ascii=False, default=str))
+            cached = cls._cache.get(cache_key)
+            if cached is not None and cached[0] > time.monotonic():
+                stats.cache_hits += 1
+                logger.debug(f"工具结果缓存命中: {tool_name}")
+                return cached[1]
+                
+        timeout = tool.timeout if tool.timeout is not None else cls.default_timeout
         logger.info(f"执行工具: {tool_name}")
-        return await tool.execute(**kwargs)
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(tool.execute(**kwargs), timeout)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            raise ToolTimeoutError(f"工具执行超时: {tool_name} ({timeout}秒)") from None
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.record(time.monotonic() - start)
+            
+        if cache_key is not None:
+            cls._store_result(cache_key, result, tool.cache_ttl)
+        return result
+        
+    @classmethod
+    async def execute_batch(cls, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """
+        并发执行多个工具调用
+        
+        每个调用有各自的超时，一个调用失败或超时不影响其他调用；
+        批次本身被取消时，所有未完成的调用一起取消。
+        
+        Args:
+            calls: (工具名称, 参数) 列表
+            
+        Returns:
+            与 calls 顺序一致的结果列表，失败的调用对应其异常对象
+        """
+        return await asyncio.gather(
+            *(cls.execute_tool(name, **arguments) for name, arguments in calls),
+            return_exceptions=True
+        )
+        
+    @classmethod
+    def get_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """
+        获取每个工具的执行统计
+        
+        Returns:
+            工具名称到调用次数、错误/超时次数、缓存命中次数和耗时的映射
+        """
+        return {name: stats.as_dict() for name, stats in cls._stats.items()}
+        
+    @classmethod
+    async def close(cls) -> None:
+        """释放所有工具实例"""
+        instances = list(cls._instances.values())
+        cls._instances.clear()
+        cls._cache.clear()
+        for instance in instances:
+            try:
+                await instance.close()
+            except Exception as e:
+                logger.error(f"关闭工具失败 {instance.name}: {e}", exc_info=True)
+                
+    @classmethod
+    def _store_result(cls, key: Tuple[str, str], result: Any, ttl: float) -> None:
+        """缓存结果，超过容量时先清理过期项，再丢弃最早写入的项"""
+        cache = cls._cache
+        if len(cache) >= cls.cache_max_entries:
+            now = time.monotonic()
+            for expired in [k for k, (expires, _) in cache.items() if expires <= now]:
+                del cache[expired]
+            while len(cache) >= cls.cache_max_entries:
+                del cache[next(iter(cache))]
+        cache[key] = (time.monotonic() + ttl, result)
+        
+    @classmethod
+    def _invalidate_cache(cls, tool_name: str) -> None:
+        for key in [k for k in cls._cache if k[0] == tool_name]:
+            del cls._cache[key]
@@ -0,0 +1,60 @@
+"""
+音频输出测试
+"""
+
+import os
+import sys
+import asyncio
+import types
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+try:
+    from src.audio.playback.sink import AudioSink
+except (ImportError, OSError) as e:  # sounddevice 在没有 PortAudio 时抛出 OSError
+    pytest.skip(f"无法导入 AudioSink: {e}", allow_module_level=True)
+
+STATUS = types.SimpleNamespace(output_underflow=False)
+
+
+def pull(sink: AudioSink, frames: int = 240) -> np.ndarray:
+    """模拟一次音频回调"""
+    out = np.zeros((frames, sink.channels), dtype=np.float32)
+    sink._callback(out, frames, None, STATUS)
+    return out
+
+
+@pytest.mark.asyncio
+async def test_final_write_ends_without_underrun():
+    """测试完整的一段音频播放完后回到空闲，不计为欠载"""
+    sink = AudioSink(sample_rate=24000, prefill_ms=10)
+    sink._loop = asyncio.get_running_loop()
+
+    await sink.write(np.full(300, 0.5, dtype=np.float32), final=True)
+    assert sink.is_active
+    pull(sink)
+    pull(sink)
+    await asyncio.sleep(0)
+
+    assert not sink.is_active
+    assert sink.underruns == 0
+    assert sink.frames_played == 300
+
+
+@pytest.mark.asyncio
+async def test_stream_running_dry_counts_underrun():
+    """测试流式写入中途数据不足计为欠载"""
+    sink = AudioSink(sample_rate=24000, prefill_ms=10)
+    sink._loop = asyncio.get_running_loop()
+
+    await sink.write(np.full(300, 0.5, dtype=np.float32))
+    pull(sink)
+    pull(sink)
+    await asyncio.sleep(0)
+
+    assert sink.is_active
+    assert sink.underruns == 1
@@ -0,0 +1,54 @@
+"""
+流式解码测试
+
+用脚本代替ffmpeg：成功时把输入原样作为PCM输出，失败时写错误输出并以非零状态退出。
+"""
+
+import os
+import sys
+import stat
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.playback import decoder as decoder_module
+from src.audio.playback.decoder import decode_stream
+
+
+def fake_converter(tmp_path, body: str) -> str:
+    path = tmp_path / "ffmpeg"
+    path.write_text("#!/bin/sh\n" + body + "\n")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+async def chunks_of(data: bytes, size: int = 100):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+@pytest.mark.asyncio
+async def test_decodes_stream(tmp_path, monkeypatch):
+    """测试边输入边输出PCM"""
+    monkeypatch.setattr(decoder_module.AudioSegment, "converter", fake_converter(tmp_path, "cat"))
+    pcm = (np.arange(1000, dtype=np.int16) * 16).tobytes()
+
+    blocks = [block async for block in decode_stream(chunks_of(pcm), sample_rate=16000)]
+
+    samples = np.concatenate(blocks)
+    assert samples.shape == (1000, 1)
+    assert np.allclose(samples[:, 0] * np.iinfo(np.int16).max, np.arange(1000) * 16)
+
+
+@pytest.mark.asyncio
+async def test_decoder_failure_raises_with_stderr(tmp_path, monkeypatch):
+    """测试ffmpeg以非零状态退出时抛出异常，并带上错误输出"""
+    script = "cat > /dev/null\necho 'Invalid data found when processing input' >&2\nexit 1"
+    monkeypatch.setattr(decoder_module.AudioSegment, "converter", fake_converter(tmp_path, script))
+
+    with pytest.raises(RuntimeError, match="Invalid data found"):
+        async for _ in decode_stream(chunks_of(b"\xff" * 1000), sample_rate=16000):
+            pass
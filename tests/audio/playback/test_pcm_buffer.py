@@ -0,0 +1,86 @@
+"""
+PCM环形缓冲区测试
+"""
+
+import os
+import sys
+import threading
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.playback.buffer import PCMRingBuffer
+
+
+def test_write_and_read_wraps_around():
+    """测试写入和读取跨越缓冲区末尾"""
+    buffer = PCMRingBuffer(capacity=8)
+    assert buffer.write(np.arange(6, dtype=np.float32)) == 6
+
+    out = np.zeros((4, 1), dtype=np.float32)
+    assert buffer.read_into(out) == 4
+    assert out[:, 0].tolist() == [0, 1, 2, 3]
+
+    # 写入跨越末尾
+    assert buffer.write(np.arange(6, 12, dtype=np.float32)) == 6
+    assert buffer.available == 8
+    out = np.zeros((8, 1), dtype=np.float32)
+    assert buffer.read_into(out) == 8
+    assert out[:, 0].tolist() == [4, 5, 6, 7, 8, 9, 10, 11]
+
+
+def test_write_truncates_when_full():
+    """测试缓冲区满时只写入部分数据"""
+    buffer = PCMRingBuffer(capacity=4)
+    assert buffer.write(np.ones(6, dtype=np.float32)) == 4
+    assert buffer.free == 0
+    assert buffer.write(np.ones(1, dtype=np.float32)) == 0
+
+
+def test_partial_read_leaves_tail_untouched():
+    """测试数据不足时只填充可用部分"""
+    buffer = PCMRingBuffer(capacity=4)
+    buffer.write(np.full(2, 0.5, dtype=np.float32))
+    out = np.full((4, 1), -1.0, dtype=np.float32)
+    assert buffer.read_into(out) == 2
+    assert out[:, 0].tolist() == [0.5, 0.5, -1.0, -1.0]
+
+
+def test_clear():
+    """测试清空缓冲区"""
+    buffer = PCMRingBuffer(capacity=4)
+    buffer.write(np.ones(3, dtype=np.float32))
+    assert buffer.clear() == 3
+    assert buffer.available == 0
+
+
+def test_concurrent_producer_consumer():
+    """测试生产者与消费者线程并发读写时数据保持有序"""
+    buffer = PCMRingBuffer(capacity=64)
+    total = 10000
+    received = []
+
+    def consumer():
+        out = np.zeros((16, 1), dtype=np.float32)
+        while len(received) < total:
+            count = buffer.read_into(out)
+            received.extend(out[:count, 0].tolist())
+
+    thread = threading.Thread(target=consumer)
+    thread.start()
+    samples = np.arange(total, dtype=np.float32)
+    offset = 0
+    while offset < total:
+        offset += buffer.write(samples[offset:offset + 10])
+    thread.join(timeout=10)
+
+    assert received == samples.tolist()
+
+
+def test_invalid_capacity():
+    """测试无效容量"""
+    with pytest.raises(ValueError):
+        PCMRingBuffer(capacity=0)
@@ -0,0 +1,101 @@
+"""
+固定语句预合成测试
+"""
+
+import os
+import sys
+import asyncio
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.tts.base import BaseTTSEngine
+from src.audio.tts.cache import CachedTTSEngine
+from src.audio.playback.phrases import PhraseBank
+
+PHRASES = {"wake": "我在", "not_understood": "抱歉，我没听清", "error": "抱歉，出了点问题"}
+
+
+class FakeTTS(BaseTTSEngine):
+    """记录并发数的测试引擎，音频数据即文本本身"""
+
+    voice = "test"
+
+    def __init__(self, fail: str = None):
+        self.fail = fail
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def text_to_speech(self, text: str) -> bytes:
+        self.calls.append(text)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if text == self.fail:
+                raise ConnectionError("unavailable")
+            return text.encode()
+        finally:
+            self.active -= 1
+
+
+def fake_decode(audio_data: bytes, sample_rate: int, channels: int) -> np.ndarray:
+    """每个字节解码为一帧"""
+    return np.full((len(audio_data), channels), 0.5, dtype=np.float32)
+
+
+@pytest.mark.asyncio
+async def test_prepare_with_bounded_concurrency(tmp_path):
+    """测试限制并发数合成全部语句，解码结果常驻内存"""
+    tts = FakeTTS()
+    bank = PhraseBank(PHRASES, sample_rate=24000, cache_dir=str(tmp_path), concurrency=2,
+                      decode=fake_decode)
+    assert bank.get("wake") is None
+
+    await bank.prepare(tts)
+
+    assert tts.max_active == 2
+    assert sorted(tts.calls) == sorted(PHRASES.values())
+    samples = bank.get("wake")
+    assert samples.dtype == np.float32
+    assert samples.shape == (len("我在".encode()), 1)
+    assert bank.get_stats()["synthesized"] == 3
+
+
+@pytest.mark.asyncio
+async def test_next_start_loads_from_disk_without_synthesis(tmp_path):
+    """测试第二次启动从磁盘读取，不再请求TTS；文本变化的语句重新合成，旧文件被删除"""
+    await PhraseBank(PHRASES, sample_rate=24000, cache_dir=str(tmp_path),
+                     decode=fake_decode).prepare(FakeTTS())
+    assert len(os.listdir(tmp_path)) == 3
+
+    tts = FakeTTS()
+    bank = PhraseBank(PHRASES, sample_rate=24000, cache_dir=str(tmp_path), decode=fake_decode)
+    # 缓存包装不改变键
+    await bank.prepare(CachedTTSEngine(tts))
+    assert tts.calls == []
+    assert bank.get_stats()["loaded"] == 3
+    assert "error" in bank
+
+    changed = dict(PHRASES, wake="你好")
+    tts = FakeTTS()
+    await PhraseBank(changed, sample_rate=24000, cache_dir=str(tmp_path),
+                     decode=fake_decode).prepare(tts)
+    assert tts.calls == ["你好"]
+    assert len(os.listdir(tmp_path)) == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_phrase_does_not_block_others():
+    """测试单个语句合成失败时其他语句照常准备"""
+    bank = PhraseBank(PHRASES, sample_rate=24000, decode=fake_decode)
+
+    await bank.prepare(FakeTTS(fail="我在"))
+
+    assert "wake" not in bank
+    assert "error" in bank
+    assert bank.get_stats()["failed"] == 1
@@ -0,0 +1,164 @@
+"""
+STT上传音频编码测试
+"""
+
+import io
+import os
+import sys
+import wave
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.stt.flac import StreamingFlacEncoder
+from src.audio.stt.wav import StreamingWavEncoder, wav_header
+
+SAMPLE_RATE = 16000
+
+
+def speech_like(seconds: float, seed: int = 0) -> np.ndarray:
+    """生成带谐波、幅度调制和少量噪声的类语音信号"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    signal = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 12))
+    signal *= 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    signal = signal * 5000 + rng.normal(0, 30, len(t))
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+
+class BitReader:
+    """按位读取，用于校验编码结果"""
+
+    def __init__(self, data: bytes):
+        self.bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+        self.pos = 0
+
+    def read(self, width: int) -> int:
+        value = 0
+        for bit in self.bits[self.pos:self.pos + width]:
+            value = (value << 1) | int(bit)
+        self.pos += width
+        return value
+
+    def read_signed(self, width: int) -> int:
+        value = self.read(width)
+        return value - (1 << width) if value >> (width - 1) else value
+
+    def read_rice(self, parameter: int) -> int:
+        quotient = 0
+        while self.bits[self.pos] == 0:
+            quotient += 1
+            self.pos += 1
+        self.pos += 1
+        folded = (quotient << parameter) | self.read(parameter)
+        return (folded >> 1) ^ -(folded & 1)
+
+
+def crc(data: bytes, width: int, poly: int) -> int:
+    """逐位计算的CRC，与编码器的实现相互独立"""
+    value = 0
+    top = 1 << (width - 1)
+    mask = (1 << width) - 1
+    for byte in data:
+        value ^= byte << (width - 8)
+        for _ in range(8):
+            value = ((value << 1) ^ poly) & mask if value & top else (value << 1) & mask
+    return value
+
+
+def decode_flac(data: bytes) -> np.ndarray:
+    """解码本编码器产生的FLAC子集（常量、原样、定长预测子帧）"""
+    assert data[:4] == b"fLaC"
+    assert data[4] == 0x80 and int.from_bytes(data[5:8], "big") == 34
+    info = BitReader(data[8:42])
+    info.read(16), info.read(16), info.read(24), info.read(24)
+    assert info.read(20) == SAMPLE_RATE
+    assert info.read(3) == 0 and info.read(5) == 15
+
+    samples = []
+    offset = 42
+    while offset < len(data):
+        reader = BitReader(data[offset:])
+        assert reader.read(16) == 0xFFF8
+        assert reader.read(4) == 0b0111 and reader.read(4) == 0
+        assert reader.read(4) == 0 and reader.read(3) == 0b100 and reader.read(1) == 0
+        lead = reader.read(8)
+        extra = 0 if lead < 0x80 else bin(lead).index("0", 2) - 3
+        reader.pos += 8 * extra
+        block_size = reader.read(16) + 1
+        header_len = reader.pos // 8
+        assert reader.read(8) == crc(data[offset:offset + header_len], 8, 0x07)
+
+        assert reader.read(1) == 0
+        kind = reader.read(6)
+        assert reader.read(1) == 0
+        if kind == 0:
+            block = [reader.read_signed(16)] * block_size
+        elif kind == 1:
+            block = [reader.read_signed(16) for _ in range(block_size)]
+        else:
+            order = kind & 0b111
+            block = [reader.read_signed(16) for _ in range(order)]
+            assert reader.read(2) == 0 and reader.read(4) == 0
+            parameter = reader.read(4)
+            coefficients = [[], [1], [2, -1], [3, -3, 1], [4, -6, 4, -1]][order]
+            for _ in range(block_size - order):
+                prediction = sum(c * block[-1 - i] for i, c in enumerate(coefficients))
+                block.append(prediction + reader.read_rice(parameter))
+        samples.extend(block)
+
+        frame_end = offset + (reader.pos + 7) // 8
+        assert int.from_bytes(data[frame_end:frame_end + 2], "big") == crc(data[offset:frame_end], 16, 0x8005)
+        offset = frame_end + 2
+    return np.array(samples, dtype=np.int16)
+
+
+def encode_all(encoder, samples: np.ndarray, chunk: int = 480) -> bytes:
+    out = [encoder.header()]
+    for start in range(0, len(samples), chunk):
+        out.extend(encoder.encode(samples[start:start + chunk].tobytes()))
+    out.extend(encoder.finish())
+    return b''.join(bytes(part) for part in out)
+
+
+def test_flac_roundtrip_and_compression():
+    """测试FLAC编码可以无损还原，且比PCM小"""
+    samples = np.concatenate([np.zeros(1000, dtype=np.int16), speech_like(1.3)])
+    data = encode_all(StreamingFlacEncoder(SAMPLE_RATE, block_size=1024), samples)
+
+    np.testing.assert_array_equal(decode_flac(data), samples)
+    assert len(data) < 0.7 * samples.nbytes
+
+
+def test_flac_handles_extremes_and_many_frames():
+    """测试满幅度的噪声（回退为原样子帧）和多字节帧号"""
+    rng = np.random.default_rng(1)
+    noise = rng.integers(-32768, 32768, 300, dtype=np.int16)
+    samples = np.concatenate([noise, speech_like(0.2, seed=2)])
+    data = encode_all(StreamingFlacEncoder(SAMPLE_RATE, block_size=16), samples, chunk=37)
+    np.testing.assert_array_equal(decode_flac(data), samples)
+
+
+def test_flac_emits_frames_while_streaming():
+    """测试凑满一块即输出帧，结束时只剩最后一块"""
+    encoder = StreamingFlacEncoder(SAMPLE_RATE, block_size=1024)
+    samples = speech_like(0.5)
+    emitted = sum(len(encoder.encode(samples[i:i + 480])) for i in range(0, len(samples), 480))
+    assert emitted == len(samples) // 1024
+    assert len(encoder.finish()) == 1
+
+
+def test_wav_encoder_is_zero_copy():
+    """测试WAV编码器直接输出输入数据的视图"""
+    encoder = StreamingWavEncoder(SAMPLE_RATE)
+    pcm = bytearray(speech_like(0.1).tobytes())
+    view = encoder.encode(pcm)[0]
+    pcm[0] ^= 0xFF
+    assert view[0] == pcm[0]
+
+    header = wav_header(SAMPLE_RATE, len(pcm))
+    with wave.open(io.BytesIO(header + bytes(pcm))) as wav:
+        assert wav.getframerate() == SAMPLE_RATE
+        assert wav.getnframes() == len(pcm) // 2
@@ -0,0 +1,215 @@
+"""
+Whisper STT引擎测试（使用本地模拟服务）
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import numpy as np
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.stt.whisper_stt import WhisperSTTEngine
+from src.audio.stt.factory import STTFactory
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = 480
+ENDPOINTING = {"vad_aggressiveness": 1, "end_silence_ms": 150, "no_speech_timeout_ms": 300}
+
+
+def voiced_frame(index: int) -> bytes:
+    """生成类似浊音的谐波帧"""
+    t = (np.arange(FRAME_SIZE) + index * FRAME_SIZE) / SAMPLE_RATE
+    signal = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 20))
+    return (signal * 6000).astype(np.int16).tobytes()
+
+
+async def live_frames(voiced: int, silent: int, interval: float = 0.005):
+    """模拟实时音频：先说话再静音"""
+    for i in range(voiced):
+        await asyncio.sleep(interval)
+        yield memoryview(voiced_frame(i))
+    for _ in range(silent):
+        await asyncio.sleep(interval)
+        yield memoryview(bytes(FRAME_SIZE * 2))
+
+
+class FakeWhisperServer:
+    """逐块接收上传的 /audio/transcriptions 模拟服务"""
+
+    def __init__(self, text="把灯关掉", deltas=None, delay=0.0):
+        self.text = text
+        self.deltas = deltas
+        self.delay = delay
+        self.chunk_times = []
+        self.bodies = []
+        self.server = None
+
+    async def handler(self, request):
+        body = bytearray()
+        async for chunk in request.content.iter_any():
+            self.chunk_times.append(time.monotonic())
+            body.extend(chunk)
+        self.bodies.append(bytes(body))
+        await asyncio.sleep(self.delay)
+        if b'name="stream"' not in body:
+            return web.json_response({"text": self.text})
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for delta in self.deltas:
+            event = {"type": "transcript.text.delta", "delta": delta}
+            await response.write(f"data: {json.dumps(event)}\n\n".encode())
+        event = {"type": "transcript.text.done", "text": ''.join(self.deltas)}
+        await response.write(f"data: {json.dumps(event)}\n\n".encode())
+        return response
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/v1/audio/transcriptions", self.handler)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        return str(self.server.make_url("/v1"))
+
+    async def __aexit__(self, *exc):
+        await self.server.close()
+
+
+@pytest.mark.asyncio
+async def test_uploads_while_speaking():
+    """测试说话期间已经开始上传，端点之后得到结果"""
+    async with FakeWhisperServer(delay=0.02) as api_base:
+        engine = WhisperSTTEngine("key", api_base, language="zh", endpointing=ENDPOINTING)
+        text = await engine.transcribe_stream(live_frames(voiced=20, silent=10))
+        await engine.close()
+
+    assert text == "把灯关掉"
+    stats = engine.get_stats()
+    assert stats["requests"] == 1 and stats["no_speech"] == 0
+    assert 0 < stats["bytes_before_endpoint"] < stats["upload_bytes"]
+    assert stats["last_endpoint_latency"] is not None
+
+
+@pytest.mark.asyncio
+async def test_server_receives_audio_before_endpoint():
+    """测试服务端在用户说完之前就收到了音频"""
+    server = FakeWhisperServer()
+    async with server as api_base:
+        engine = WhisperSTTEngine("key", api_base, endpointing=ENDPOINTING)
+        text = await engine.transcribe_stream(live_frames(voiced=20, silent=10))
+        await engine.close()
+
+    assert text == "把灯关掉"
+    assert len(server.chunk_times) > 2
+    # 大部分音频在端点之前就已到达服务端
+    assert server.chunk_times[0] < server.chunk_times[-1] - 0.05
+    body = server.bodies[0]
+    assert b'name="model"\r\n\r\nwhisper-1' in body
+    wav = body[body.index(b"RIFF"):]
+    assert wav[8:12] == b"WAVE"
+    assert len(wav) >= 44 + 25 * FRAME_SIZE * 2
+
+
+@pytest.mark.asyncio
+async def test_flac_upload_is_smaller():
+    """测试FLAC编码上传的字节数少于WAV"""
+    sizes = {}
+    for encoding in ("wav", "flac"):
+        server = FakeWhisperServer()
+        async with server as api_base:
+            engine = WhisperSTTEngine("key", api_base, encoding=encoding, endpointing=ENDPOINTING)
+            assert await engine.transcribe_stream(live_frames(voiced=20, silent=10, interval=0)) == "把灯关掉"
+            await engine.close()
+        sizes[encoding] = engine.upload_bytes
+        body = server.bodies[0]
+        assert f'filename="speech.{encoding}"'.encode() in body
+
+    assert b"fLaC" in server.bodies[0]
+    assert sizes["flac"] < sizes["wav"] * 0.7
+
+
+@pytest.mark.asyncio
+async def test_no_speech_cancels_upload():
+    """测试没有语音时放弃请求并返回空字符串"""
+    async def silence():
+        for _ in range(20):
+            await asyncio.sleep(0)
+            yield bytes(FRAME_SIZE * 2)
+
+    async with FakeWhisperServer() as api_base:
+        engine = WhisperSTTEngine("key", api_base, endpointing=ENDPOINTING)
+        assert await engine.transcribe_stream(silence()) == ""
+        await engine.close()
+    assert engine.no_speech == 1
+
+
+@pytest.mark.asyncio
+async def test_streamed_partial_results():
+    """测试流式返回的中间结果和首个中间结果延迟"""
+    partials = []
+    async with FakeWhisperServer(deltas=["打开", "客厅", "的灯"]) as api_base:
+        engine = WhisperSTTEngine("key", api_base, stream=True, endpointing=ENDPOINTING)
+        text = await engine.transcribe_stream(live_frames(voiced=15, silent=8), on_partial=partials.append)
+        await engine.close()
+
+    assert text == "打开客厅的灯"
+    assert partials == ["打开", "打开客厅", "打开客厅的灯"]
+    assert engine.get_stats()["last_partial_latency"] is not None
+
+
+@pytest.mark.asyncio
+async def test_early_endpoint_provisional_results():
+    """测试短暂停顿时给出临时结果，继续说话时撤回"""
+    async def pause_then_continue():
+        segments = [(True, 15), (False, 10), (True, 10), (False, 16)]
+        index = 0
+        for voiced, count in segments:
+            for _ in range(count):
+                await asyncio.sleep(0.01)
+                index += 1
+                yield voiced_frame(index) if voiced else bytes(FRAME_SIZE * 2)
+
+    provisional = []
+    server = FakeWhisperServer()
+    async with server as api_base:
+        engine = WhisperSTTEngine("key", api_base,
+                                  endpointing=dict(ENDPOINTING, end_silence_ms=400, early_silence_ms=60))
+        text = await engine.transcribe_stream(pause_then_continue(), on_provisional=provisional.append)
+        await engine.close()
+
+    assert text == "把灯关掉"
+    assert provisional[:2] == ["把灯关掉", None]
+    assert engine.get_stats()["provisional_requests"] == 2
+    # 临时请求只包含停顿之前的音频
+    assert min(len(body) for body in server.bodies) < max(len(body) for body in server.bodies)
+
+
+@pytest.mark.asyncio
+async def test_speech_to_text_with_pcm():
+    """测试识别完整的PCM数据"""
+    async with FakeWhisperServer(text="你好") as api_base:
+        engine = WhisperSTTEngine("key", api_base)
+        assert await engine.speech_to_text(voiced_frame(0) * 10) == "你好"
+        await engine.close()
+
+
+def test_factory_creates_whisper_engine():
+    """测试工厂按配置创建引擎"""
+    engine = STTFactory.create_engine({
+        "type": "whisper",
+        "whisper": {"api_key": "key", "api_base": "http://localhost:9000/v1/", "language": "zh"},
+        "endpointing": {"end_silence_ms": 400},
+    })
+    assert isinstance(engine, WhisperSTTEngine)
+    assert engine.api_base == "http://localhost:9000/v1"
+    assert engine.create_endpointer().end_silence_ms == 400
+
+    with pytest.raises(ValueError):
+        STTFactory.create_engine({"type": "unknown"})
@@ -0,0 +1,124 @@
+"""
+音频总线测试
+"""
+
+import os
+import sys
+import time
+import asyncio
+import wave
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.bus import AudioBus, archive_to_wav
+from src.audio.wake_word.frame_queue import CapturedFrame
+
+FRAME_SIZE = 4
+
+
+class ListRecorder:
+    """按顺序产出预先准备好的帧"""
+
+    def __init__(self, count: int, delay: float = 0):
+        self.count = count
+        self.delay = delay
+
+    async def iter_frames(self):
+        for i in range(self.count):
+            await asyncio.sleep(self.delay)
+            data = np.full(FRAME_SIZE, i, dtype=np.int16).tobytes()
+            yield CapturedFrame(data=data, timestamp=time.monotonic(), sequence=i)
+
+    async def stop_recording(self) -> None:
+        pass
+
+
+def frame_value(frame: memoryview) -> int:
+    return int(np.frombuffer(frame, dtype=np.int16)[0])
+
+
+@pytest.mark.asyncio
+async def test_subscribers_receive_all_frames():
+    """测试多个订阅者各自收到全部帧"""
+    bus = AudioBus(ListRecorder(5), frame_size=FRAME_SIZE, buffer_ms=10)
+    first = bus.subscribe("first")
+    second = bus.subscribe("second")
+
+    async def collect(subscription):
+        return [frame_value(frame) async for frame in subscription]
+
+    results = await asyncio.gather(bus.run(), collect(first), collect(second))
+
+    assert results[1] == [0, 1, 2, 3, 4]
+    assert results[2] == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_frames_are_zero_copy_views():
+    """测试订阅者收到的是共享缓冲区的视图"""
+    bus = AudioBus(ListRecorder(0), frame_size=FRAME_SIZE)
+    subscription = bus.subscribe("view")
+    bus.publish(np.arange(FRAME_SIZE, dtype=np.int16).tobytes(), time.monotonic())
+
+    frame = await subscription.read_frame()
+    assert len(frame) == FRAME_SIZE * 2
+    assert np.shares_memory(np.frombuffer(frame, dtype=np.int16), bus.buffer._data)
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_reports_lag_and_drops():
+    """测试落后的订阅者报告延迟并跳过被覆盖的帧"""
+    # 缓冲区只能容纳 3 帧
+    bus = AudioBus(ListRecorder(0), sample_rate=1000, frame_size=FRAME_SIZE, buffer_ms=12)
+    slow = bus.subscribe("slow")
+    for i in range(5):
+        bus.publish(np.full(FRAME_SIZE, i, dtype=np.int16).tobytes(), float(i))
+
+    assert bus.get_stats()["subscribers"]["slow"]["lag_frames"] == 5
+    frame = await slow.read_frame()
+    assert frame_value(frame) == 2
+    assert slow.frames_dropped == 2
+    assert slow.timestamp == 2.0
+
+
+@pytest.mark.asyncio
+async def test_subscribe_from_past_position():
+    """测试从过去的位置订阅以读取已缓存的音频"""
+    bus = AudioBus(ListRecorder(0), frame_size=FRAME_SIZE)
+    for i in range(3):
+        bus.publish(np.full(FRAME_SIZE, i, dtype=np.int16).tobytes(), float(i))
+
+    late = bus.subscribe("late", start=FRAME_SIZE)
+    pending = late.read_available()
+    assert np.frombuffer(pending, dtype=np.int16).tolist() == [1] * FRAME_SIZE + [2] * FRAME_SIZE
+    assert late.lag == 0
+
+
+@pytest.mark.asyncio
+async def test_close_unsubscribes():
+    """测试关闭订阅"""
+    bus = AudioBus(ListRecorder(0), frame_size=FRAME_SIZE)
+    subscription = bus.subscribe("temp")
+    reader = asyncio.create_task(subscription.read_frame())
+    await asyncio.sleep(0)
+    await subscription.stop_recording()
+
+    assert await reader is None
+    assert "temp" not in bus.get_stats()["subscribers"]
+
+
+@pytest.mark.asyncio
+async def test_archive_to_wav(tmp_path):
+    """测试录音存档"""
+    bus = AudioBus(ListRecorder(6, delay=0.001), frame_size=FRAME_SIZE)
+    path = str(tmp_path / "archive.wav")
+    archive = asyncio.create_task(archive_to_wav(bus.subscribe("archive"), path))
+    await bus.run()
+    await archive
+
+    with wave.open(path, "rb") as wav:
+        assert wav.getnframes() == 6 * FRAME_SIZE
@@ -0,0 +1,79 @@
+"""
+音频环形缓冲区测试
+"""
+
+import os
+import sys
+import tracemalloc
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.ring_buffer import AudioRingBuffer
+
+
+def test_view_across_wraparound_is_contiguous():
+    """测试跨越末尾的区间返回连续视图"""
+    buffer = AudioRingBuffer(capacity=8)
+    buffer.write(np.arange(6, dtype=np.int16))
+    buffer.write(np.arange(6, 12, dtype=np.int16))
+
+    assert buffer.oldest == 4
+    view = buffer.view(4)
+    assert view.tolist() == [4, 5, 6, 7, 8, 9, 10, 11]
+    # 视图共享底层存储
+    assert np.shares_memory(view, buffer._data)
+
+
+def test_write_bytes():
+    """测试写入PCM字节"""
+    buffer = AudioRingBuffer(capacity=4)
+    buffer.write(np.array([1, -2, 3], dtype=np.int16).tobytes())
+    assert buffer.latest(2).tolist() == [-2, 3]
+
+
+def test_overwritten_range_raises():
+    """测试读取已被覆盖的区间"""
+    buffer = AudioRingBuffer(capacity=4)
+    buffer.write(np.arange(10, dtype=np.int16))
+    with pytest.raises(ValueError):
+        buffer.view(5)
+    assert buffer.view(6).tolist() == [6, 7, 8, 9]
+
+
+def test_oversized_write_keeps_tail():
+    """测试超过容量的写入只保留末尾"""
+    buffer = AudioRingBuffer(capacity=4)
+    buffer.write(np.arange(7, dtype=np.int16))
+    assert buffer.total_written == 7
+    assert buffer.latest(10).tolist() == [3, 4, 5, 6]
+
+
+def test_views_are_read_only():
+    """测试视图只读"""
+    buffer = AudioRingBuffer(capacity=4)
+    buffer.write(np.arange(4, dtype=np.int16))
+    with pytest.raises(ValueError):
+        buffer.view(0)[0] = 1
+
+
+def test_memory_is_flat():
+    """测试长时间写入不增长内存"""
+    buffer = AudioRingBuffer.from_duration(3300, 16000)
+    frame = np.zeros(480, dtype=np.int16).tobytes()
+    for _ in range(100):
+        buffer.write(frame)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(10000):
+        buffer.write(frame)
+        buffer.latest(16000)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    growth = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    assert growth < 64 * 1024
@@ -0,0 +1,175 @@
+"""
+TTS 缓存测试
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.tts.base import BaseTTSEngine
+from src.audio.tts.cache import CachedTTSEngine, DiskAudioCache, MemoryAudioCache
+from src.audio.tts.factory import TTSFactory
+
+logger = logging.getLogger(__name__)
+
+
+class CountingEngine(BaseTTSEngine):
+    """记录调用次数的测试引擎"""
+
+    def __init__(self, voice: str = "test-voice", delay: float = 0):
+        self.voice = voice
+        self.delay = delay
+        self.calls = 0
+
+    async def text_to_speech(self, text: str) -> bytes:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return f"{self.voice}:{text}".encode("utf-8")
+
+
+@pytest.mark.asyncio
+async def test_memory_hit():
+    """测试内存缓存命中"""
+    engine = CountingEngine()
+    cached = CachedTTSEngine(engine)
+
+    first = await cached.text_to_speech("你好")
+    second = await cached.text_to_speech(" 你好 ")
+
+    assert first == second
+    assert engine.calls == 1
+    stats = cached.get_stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["bytes_from_cache"] == len(first)
+
+
+@pytest.mark.asyncio
+async def test_key_depends_on_voice():
+    """测试语音参数不同时不共享缓存"""
+    a = CachedTTSEngine(CountingEngine(voice="a"))
+    b = CachedTTSEngine(CountingEngine(voice="b"))
+    assert a.cache_key("你好") != b.cache_key("你好")
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart(tmp_path):
+    """测试磁盘缓存在重建引擎后仍然命中"""
+    engine = CountingEngine()
+    cached = CachedTTSEngine(engine, cache_dir=str(tmp_path))
+    audio_data = await cached.text_to_speech("好的")
+
+    restarted_engine = CountingEngine()
+    restarted = CachedTTSEngine(restarted_engine, cache_dir=str(tmp_path))
+    assert await restarted.text_to_speech("好的") == audio_data
+    assert restarted_engine.calls == 0
+    assert restarted.get_stats()["disk_hits"] == 1
+
+    # 磁盘命中后提升到内存
+    await restarted.text_to_speech("好的")
+    assert restarted.get_stats()["memory_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_synthesize_once():
+    """测试并发的相同请求只合成一次"""
+    engine = CountingEngine(delay=0.05)
+    cached = CachedTTSEngine(engine)
+
+    results = await asyncio.gather(*[cached.text_to_speech("稍等") for _ in range(5)])
+
+    assert len(set(results)) == 1
+    assert engine.calls == 1
+
+
+def test_memory_eviction():
+    """测试内存缓存按字节数淘汰"""
+    cache = MemoryAudioCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.get("a")
+    cache.put("c", b"12345")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"12345"
+    assert cache.size_bytes == 10
+
+
+def test_disk_eviction(tmp_path):
+    """测试磁盘缓存按字节数淘汰"""
+    cache = DiskAudioCache(str(tmp_path), max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.get("a")
+    cache.put("c", b"12345")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"12345"
+    assert cache.size_bytes == 10
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_factory_wraps_cache():
+    """测试工厂根据配置启用缓存"""
+    config = {
+        "type": "edge",
+        "edge": {"voice": "zh-CN-XiaoxiaoNeural"},
+        "cache": {"enabled": True}
+    }
+    engine = TTSFactory.create_engine(config)
+    assert isinstance(engine, CachedTTSEngine)
+    logger.info(f"缓存统计: {engine.get_stats()}")
+
+
+@pytest.mark.asyncio
+async def test_stream_speech_populates_cache():
+    """测试流式合成完成后写入缓存"""
+    class StreamingEngine(CountingEngine):
+        async def stream_speech(self, text: str):
+            self.calls += 1
+            for part in ("a", "b", "c"):
+                yield part.encode("utf-8")
+
+    engine = StreamingEngine()
+    cached = CachedTTSEngine(engine)
+
+    chunks = [chunk async for chunk in cached.stream_speech("你好")]
+    assert chunks == [b"a", b"b", b"c"]
+
+    assert [chunk async for chunk in cached.stream_speech("你好")] == [b"abc"]
+    assert engine.calls == 1
+    assert cached.get_stats()["memory_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_streams_synthesize_once():
+    """测试并发的相同流式请求只请求一次，先发起的请求提前结束时其余请求自行合成"""
+    class StreamingEngine(CountingEngine):
+        async def stream_speech(self, text: str):
+            self.calls += 1
+            for part in ("a", "b", "c"):
+                await asyncio.sleep(0.01)
+                yield part.encode("utf-8")
+
+    engine = StreamingEngine()
+    cached = CachedTTSEngine(engine)
+
+    async def collect(text):
+        return b"".join([chunk async for chunk in cached.stream_speech(text)])
+
+    assert await asyncio.gather(*[collect("稍等") for _ in range(3)]) == [b"abc"] * 3
+    assert engine.calls == 1
+
+    leader = cached.stream_speech("你好")
+    await leader.__anext__()
+    follower = asyncio.create_task(collect("你好"))
+    await asyncio.sleep(0)
+    await leader.aclose()
+    assert await follower == b"abc"
+    assert engine.calls == 3
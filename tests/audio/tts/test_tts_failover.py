@@ -0,0 +1,232 @@
+"""
+多后端TTS故障转移测试
+"""
+
+import os
+import sys
+import asyncio
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.tts.base import BaseTTSEngine
+from src.audio.tts.cache import CachedTTSEngine
+from src.audio.tts.factory import TTSFactory
+from src.audio.tts.failover import CircuitBreaker, FailoverTTSEngine, LatencyStats, OPEN, HALF_OPEN, CLOSED
+
+
+class FakeEngine(BaseTTSEngine):
+    """首字节延迟和失败可控的测试引擎"""
+
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    async def stream_speech(self, text: str):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise ConnectionError(f"{self.name} unavailable")
+            yield f"{self.name}:".encode()
+            yield text.encode()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+class PacedEngine(BaseTTSEngine):
+    """分多块、块间有等待地返回音频的测试引擎"""
+
+    def __init__(self, chunks: int, gap: float):
+        self.chunks = chunks
+        self.gap = gap
+
+    async def stream_speech(self, text: str):
+        for i in range(self.chunks):
+            if i:
+                await asyncio.sleep(self.gap)
+            yield f"x{i}".encode()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_and_cancels_slow_primary():
+    """测试主后端超过对冲时间未返回时请求次后端，先返回者胜出，另一方被取消"""
+    primary = FakeEngine("edge", delay=1.0)
+    secondary = FakeEngine("openai", delay=0.02)
+    engine = FailoverTTSEngine([("edge", primary), ("openai", secondary)], default_hedge_delay=0.05)
+
+    audio = await engine.text_to_speech("你好")
+
+    assert audio == "openai:你好".encode()
+    await asyncio.sleep(0)
+    assert primary.cancelled == 1
+    stats = engine.get_stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+    assert stats["backends"]["openai"]["wins"] == 1
+    # 落败的主后端用时超过对冲时间，计入统计
+    assert stats["backends"]["edge"]["samples"] == 1
+
+
+@pytest.mark.asyncio
+async def test_loser_cancelled_before_winner_stream_ends():
+    """测试胜出后立即取消落败的请求，不等胜出者的音频流结束"""
+    primary = FakeEngine("edge", delay=1.0)
+    secondary = FakeEngine("openai", delay=0.02)
+    engine = FailoverTTSEngine([("edge", primary), ("openai", secondary)], default_hedge_delay=0.05)
+
+    stream = engine.stream_speech("你好")
+    assert await stream.__anext__() == b"openai:"
+    await asyncio.sleep(0)
+    assert primary.cancelled == 1
+    assert [chunk async for chunk in stream] == ["你好".encode()]
+
+
+@pytest.mark.asyncio
+async def test_winner_stream_not_cancelled():
+    """测试取消落败请求时不取消胜出者，块间有等待的音频流完整输出"""
+    engine = FailoverTTSEngine([("edge", PacedEngine(chunks=5, gap=0.01))])
+
+    async def collect():
+        return [chunk async for chunk in engine.stream_speech("你好")]
+
+    chunks = await asyncio.wait_for(collect(), timeout=2.0)
+
+    assert chunks == [f"x{i}".encode() for i in range(5)]
+    assert engine.backends[0].breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_half_open_loser_can_be_retried():
+    """测试半开状态的后端在对冲中落败后释放试探名额，之后仍可再次试探"""
+    primary = FakeEngine("edge", fail=True)
+    secondary = FakeEngine("openai", delay=0.02)
+    engine = FailoverTTSEngine([("edge", primary), ("openai", secondary)],
+                               failure_threshold=1, reset_timeout=0.05, default_hedge_delay=0.05)
+    edge = engine.backends[0]
+
+    await engine.text_to_speech("你好")
+    assert edge.breaker.state == OPEN
+    await asyncio.sleep(0.06)
+
+    # 试探请求偏慢，被次后端对冲胜出
+    primary.fail = False
+    primary.delay = 1.0
+    assert await engine.text_to_speech("你好") == "openai:你好".encode()
+    assert edge.breaker.state == HALF_OPEN
+    assert edge.breaker.available()
+
+    primary.delay = 0.0
+    assert await engine.text_to_speech("你好") == "edge:你好".encode()
+    assert edge.breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_failover_and_circuit_breaker():
+    """测试主后端失败时立即换后端，连续失败后熔断、到期后放行一次试探"""
+    primary = FakeEngine("edge", fail=True)
+    secondary = FakeEngine("openai")
+    engine = FailoverTTSEngine([("edge", primary), ("openai", secondary)],
+                               failure_threshold=2, reset_timeout=0.05)
+
+    for _ in range(3):
+        assert await engine.text_to_speech("你好") == "openai:你好".encode()
+
+    # 第三次请求时主后端已熔断，不再请求
+    assert primary.calls == 2
+    assert engine.get_stats()["failovers"] == 2
+    assert engine.get_stats()["backends"]["edge"]["state"] == OPEN
+
+    await asyncio.sleep(0.06)
+    primary.fail = False
+    assert await engine.text_to_speech("你好") == "edge:你好".encode()
+    assert engine.get_stats()["backends"]["edge"]["state"] == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_all_backends_failing_raises_last_error():
+    """测试所有后端都失败时抛出错误"""
+    engine = FailoverTTSEngine([("a", FakeEngine("a", fail=True)), ("b", FakeEngine("b", fail=True))])
+    with pytest.raises(ConnectionError, match="b unavailable"):
+        await engine.text_to_speech("你好")
+
+
+def test_order_and_hedge_delay_follow_rolling_stats():
+    """测试有足够样本时按首字节延迟中位数排序，对冲时间取p95并限制在上下限之间"""
+    clock = FakeClock()
+    engine = FailoverTTSEngine([("edge", FakeEngine("edge")), ("openai", FakeEngine("openai"))],
+                               min_samples=3, min_hedge_delay=0.2, max_hedge_delay=2.0,
+                               default_hedge_delay=1.5, stats_max_age=60, clock=clock)
+    edge, openai = engine.backends
+
+    assert [b.name for b in engine.ordered_backends()] == ["edge", "openai"]
+    assert engine.hedge_delay(edge) == 1.5
+
+    for value in (0.8, 0.9, 1.0, 3.0):
+        edge.stats.add(value)
+    for value in (0.3, 0.35, 0.4):
+        openai.stats.add(value)
+    assert [b.name for b in engine.ordered_backends()] == ["openai", "edge"]
+    assert engine.hedge_delay(openai) == 0.4
+    assert engine.hedge_delay(edge) == 2.0
+
+    # 样本过期后回到配置顺序
+    clock.now = 61
+    assert [b.name for b in engine.ordered_backends()] == ["edge", "openai"]
+
+
+def test_circuit_breaker_half_open_allows_one_trial():
+    """测试半开状态只放行一次试探，试探失败重新打开"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert not breaker.available()
+
+    clock.now = 10
+    assert breaker.available()
+    breaker.acquire()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.available()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    stats = LatencyStats(clock=clock)
+    for value in range(1, 21):
+        stats.add(value / 10)
+    assert stats.percentile(50) == 1.0
+    assert stats.percentile(95) == 1.9
+
+
+def test_factory_builds_failover_from_ordered_list():
+    """测试工厂按列表顺序创建后端，组合引擎外层包装缓存"""
+    config = {
+        "type": "failover",
+        "failover": {"backends": ["edge", "openai"], "min_hedge_delay": 0.5},
+        "edge": {"voice": "zh-CN-XiaoxiaoNeural"},
+        "openai": {"api_key": "test", "api_base": "http://localhost:5050/v1"},
+        "cache": {"enabled": True},
+    }
+    engine = TTSFactory.create_engine(config)
+
+    assert isinstance(engine, CachedTTSEngine)
+    failover = engine.engine
+    assert isinstance(failover, FailoverTTSEngine)
+    assert [b.name for b in failover.backends] == ["edge", "openai"]
+    assert failover.min_hedge_delay == 0.5
+
+    with pytest.raises(ValueError, match="backends"):
+        TTSFactory.create_engine({"type": "failover", "failover": {}})
@@ -0,0 +1,93 @@
+"""
+能量预筛测试
+"""
+
+import os
+import sys
+import math
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.wake_word.energy_gate import EnergyGate
+
+FRAME_SIZE = 480
+
+
+def noise(frames: int, level_db: float, seed: int = 0) -> np.ndarray:
+    """生成指定能量(dBFS)的白噪声"""
+    rms = 32768 * 10 ** (level_db / 20)
+    rng = np.random.default_rng(seed)
+    return np.clip(rng.normal(0, rms, frames * FRAME_SIZE), -32768, 32767).astype(np.int16)
+
+
+def run(gate: EnergyGate, samples: np.ndarray):
+    """按批计算能量，跳过开头的静音帧后逐帧判断，返回每帧门是否开着"""
+    result = []
+    batch = gate.batch_frames * FRAME_SIZE
+    for offset in range(0, len(samples), batch):
+        levels = gate.levels(samples[offset:offset + batch])
+        skipped = gate.skip_quiet(levels)
+        result += [False] * skipped
+        result += [gate.check(level) for level in levels[skipped:]]
+    return result
+
+
+def dbfs(level: float) -> float:
+    return 10 * math.log10(level + 1e-12)
+
+
+def test_levels_in_dbfs():
+    """测试按批计算的帧能量"""
+    gate = EnergyGate(FRAME_SIZE)
+    samples = np.concatenate([np.zeros(FRAME_SIZE, dtype=np.int16),
+                              np.full(FRAME_SIZE, 32767, dtype=np.int16),
+                              noise(1, -40)])
+
+    levels = [dbfs(level) for level in gate.levels(samples)]
+
+    assert len(levels) == 3
+    assert levels[0] < -100
+    assert levels[1] == pytest.approx(0, abs=0.1)
+    assert levels[2] == pytest.approx(-40, abs=0.5)
+
+
+def test_silence_stays_closed_and_speech_opens_with_hangover():
+    """测试底噪附近的帧不放行，语音立即开门，能量回落后保持 hangover_frames 帧"""
+    gate = EnergyGate(FRAME_SIZE, hangover_frames=5)
+
+    opened = run(gate, noise(40, -55))
+    assert not any(opened)
+    assert gate.noise_floor == pytest.approx(-55, abs=1.5)
+
+    opened = run(gate, np.concatenate([noise(4, -30, seed=1), noise(8, -55, seed=2)]))
+    assert opened[:4] == [True] * 4
+    # 回落后保持5帧，第6帧关门
+    assert opened[4:9] == [True] * 5
+    assert opened[9:] == [False] * 3
+    stats = gate.get_stats()
+    assert stats["frames_passed"] == 9
+    assert stats["frames_checked"] == 52
+
+
+def test_noise_floor_follows_louder_room():
+    """测试环境噪声变大后，VAD判为非语音的帧使底噪逐渐上升，门重新关上"""
+    gate = EnergyGate(FRAME_SIZE, floor_rise_db=10.0)
+    run(gate, noise(20, -60))
+
+    louder = noise(200, -40, seed=3)
+    opened = []
+    for offset in range(0, len(louder), FRAME_SIZE):
+        level = gate.levels(louder[offset:offset + FRAME_SIZE])[0]
+        if gate.check(level):
+            opened.append(True)
+            gate.learn(level)  # 检测器中VAD判为非语音时调用
+        else:
+            opened.append(False)
+
+    assert opened[0]
+    assert not any(opened[-20:])
+    assert gate.noise_floor == pytest.approx(-40, abs=1.5)
@@ -0,0 +1,125 @@
+"""
+文件音频源测试
+"""
+
+import os
+import sys
+import wave
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.wake_word import detector as detector_module
+from src.audio.wake_word.detector import WakeWordDetector
+from src.audio.wake_word.file_source import FileFrameSource
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = 480
+
+
+def tone(duration: float, amplitude: int = 8000) -> np.ndarray:
+    """生成带谐波的类语音信号"""
+    t = np.arange(int(SAMPLE_RATE * duration)) / SAMPLE_RATE
+    signal = sum(np.sin(2 * np.pi * 150 * (i + 1) * t) / (i + 1) for i in range(6))
+    return (signal / np.abs(signal).max() * amplitude).astype(np.int16)
+
+
+def silence(duration: float) -> np.ndarray:
+    return np.zeros(int(SAMPLE_RATE * duration), dtype=np.int16)
+
+
+def write_wav(path, samples: np.ndarray) -> None:
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+
+
+class LoudPorcupine:
+    """把持续的大音量视为唤醒词的Porcupine替身，在唤醒词结束后触发"""
+
+    frame_length = 512
+
+    def __init__(self, access_key=None, keywords=None):
+        self.loud_frames = 0
+
+    def process(self, pcm) -> int:
+        loud = np.abs(np.asarray(pcm, dtype=np.int32)).max() > 4000
+        if loud:
+            self.loud_frames += 1
+            return -1
+        detected = self.loud_frames >= 10
+        self.loud_frames = 0
+        return 0 if detected else -1
+
+    def delete(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_replays_directory_with_virtual_timestamps(tmp_path):
+    """测试目录中的WAV和裸PCM按顺序首尾相接，时间戳按已回放的音频推算"""
+    write_wav(tmp_path / "a.wav", tone(0.1))
+    (tmp_path / "b.pcm").write_bytes(silence(0.05).tobytes())
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    source = FileFrameSource([tmp_path], SAMPLE_RATE, FRAME_SIZE)
+    frames = [frame async for frame in source.iter_frames()]
+
+    # 每个文件末尾不足一帧的部分补静音
+    assert len(frames) == 4 + 2
+    assert all(len(frame.data) == FRAME_SIZE * 2 for frame in frames)
+    assert [frame.sequence for frame in frames] == list(range(6))
+    assert frames[0].timestamp == pytest.approx(FRAME_SIZE / SAMPLE_RATE)
+    assert frames[-1].timestamp == pytest.approx(6 * FRAME_SIZE / SAMPLE_RATE)
+
+    assert [segment.start for segment in source.segments] == [0, 4 * FRAME_SIZE]
+    assert source.segments[0].samples == len(tone(0.1))
+    path, offset = source.locate(4 * FRAME_SIZE + 160)
+    assert path.name == "b.pcm"
+    assert offset == pytest.approx(0.01)
+
+
+def test_rejects_mismatched_wav(tmp_path):
+    """测试采样率不一致的WAV在回放时报错"""
+    path = tmp_path / "8k.wav"
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(8000)
+        wav.writeframes(bytes(1600))
+
+    source = FileFrameSource([path], SAMPLE_RATE, FRAME_SIZE)
+    with pytest.raises(ValueError):
+        list(source._read_chunks(path, FRAME_SIZE * 2))
+    with pytest.raises(FileNotFoundError):
+        FileFrameSource([tmp_path / "missing.wav"])
+
+
+@pytest.mark.asyncio
+async def test_detector_replays_files_faster_than_real_time(tmp_path, monkeypatch):
+    """测试检测器以文件为音频源运行，唤醒位置换算回文件内的时刻"""
+    monkeypatch.setattr(detector_module, "Porcupine", LoudPorcupine)
+    write_wav(tmp_path / "1_negative.wav", np.concatenate([silence(1.0), tone(0.5, 2000), silence(0.6)]))
+    write_wav(tmp_path / "2_keyword.wav", np.concatenate([silence(0.5), tone(0.6), tone(0.5, 2000), silence(0.6)]))
+
+    source = FileFrameSource([tmp_path], SAMPLE_RATE, FRAME_SIZE)
+    detector = WakeWordDetector(porcupine_access_key="test", audio_source=source)
+    detections = []
+
+    async def on_wake_word(event):
+        detections.append((source.locate(event.source_position), source.clock.now()))
+
+    await detector.start_detection(on_wake_word)
+
+    assert len(detections) == 1
+    (path, offset), fired_at = detections[0]
+    assert path.name == "2_keyword.wav"
+    # 唤醒词在文件中的1.1s处结束，检测粒度为一个Porcupine帧
+    assert 1.1 <= offset <= 1.1 + 2 * 512 / SAMPLE_RATE
+    assert fired_at >= source.segments[1].start / SAMPLE_RATE + offset
+    assert source.get_stats()["audio_seconds"] > 3.5
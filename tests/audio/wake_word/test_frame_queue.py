@@ -0,0 +1,89 @@
+"""
+帧交接队列测试
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.wake_word.frame_queue import FrameQueue, CapturedFrame, DROP_NEWEST
+
+
+def make_frame(sequence: int) -> CapturedFrame:
+    return CapturedFrame(data=bytes(4), timestamp=time.monotonic(), sequence=sequence)
+
+
+@pytest.mark.asyncio
+async def test_frames_from_producer_thread_arrive_in_order():
+    """测试其他线程写入的帧按顺序到达"""
+    queue = FrameQueue(maxsize=1000)
+    queue.bind(asyncio.get_running_loop())
+    total = 500
+
+    def producer():
+        for i in range(total):
+            queue.put_threadsafe(make_frame(i))
+            if i % 50 == 0:
+                time.sleep(0.001)
+        queue.close()
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    received = []
+    while True:
+        frame = await queue.get()
+        if frame is None:
+            break
+        received.append(frame.sequence)
+    thread.join()
+
+    assert received == list(range(total))
+    assert queue.get_stats()["drops"] == 0
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_when_consumer_is_slow():
+    """测试消费者阻塞时丢弃最旧的帧"""
+    queue = FrameQueue(maxsize=3)
+    queue.bind(asyncio.get_running_loop())
+    for i in range(5):
+        queue.put_threadsafe(make_frame(i))
+
+    assert [(await queue.get()).sequence for _ in range(3)] == [2, 3, 4]
+    assert queue.get_stats()["drops"] == 2
+
+
+@pytest.mark.asyncio
+async def test_drop_newest_keeps_oldest():
+    """测试丢弃新帧策略"""
+    queue = FrameQueue(maxsize=3, drop_policy=DROP_NEWEST)
+    queue.bind(asyncio.get_running_loop())
+    for i in range(5):
+        queue.put_threadsafe(make_frame(i))
+
+    assert [(await queue.get()).sequence for _ in range(3)] == [0, 1, 2]
+    assert queue.drops == 2
+
+
+@pytest.mark.asyncio
+async def test_close_wakes_waiting_consumer():
+    """测试关闭队列会唤醒等待的消费者"""
+    queue = FrameQueue()
+    queue.bind(asyncio.get_running_loop())
+    waiter = asyncio.create_task(queue.get())
+    await asyncio.sleep(0.01)
+    threading.Thread(target=queue.close).start()
+    assert await asyncio.wait_for(waiter, 1) is None
+
+
+def test_invalid_drop_policy():
+    """测试无效的丢弃策略"""
+    with pytest.raises(ValueError):
+        FrameQueue(drop_policy="invalid")
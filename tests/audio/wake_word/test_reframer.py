@@ -0,0 +1,55 @@
+"""
+重新分帧测试
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.wake_word.reframer import FrameReframer
+
+
+def test_reframe_vad_frames_to_porcupine_frames():
+    """测试将480采样的帧转换为512采样的帧且不丢失数据"""
+    reframer = FrameReframer(512)
+    samples = np.arange(480 * 16, dtype=np.int16)
+
+    output = []
+    for i in range(16):
+        for frame in reframer.push(samples[i * 480:(i + 1) * 480]):
+            assert len(frame) == 512
+            output.append(frame.copy())
+
+    assert len(output) == 480 * 16 // 512
+    assert np.concatenate(output).tolist() == samples[:len(output) * 512].tolist()
+    assert reframer.pending == 480 * 16 % 512
+
+
+def test_large_input_yields_views():
+    """测试大块输入中的完整帧以视图形式产出"""
+    reframer = FrameReframer(4)
+    samples = np.arange(10, dtype=np.int16)
+    frames = list(reframer.push(samples))
+    assert len(frames) == 2
+    assert np.shares_memory(frames[0], samples)
+    assert reframer.pending == 2
+
+
+def test_reset_discards_partial_frame():
+    """测试重置后丢弃不完整的帧"""
+    reframer = FrameReframer(4)
+    list(reframer.push(np.arange(3, dtype=np.int16)))
+    reframer.reset()
+    frames = [frame.copy() for frame in reframer.push(np.arange(10, 14, dtype=np.int16))]
+    assert [f.tolist() for f in frames] == [[10, 11, 12, 13]]
+
+
+def test_invalid_frame_length():
+    """测试无效帧长"""
+    with pytest.raises(ValueError):
+        FrameReframer(0)
@@ -0,0 +1,240 @@
+"""
+唤醒词检测延迟与准确性测试
+
+将WAV测试音频按录音器的帧长回放给检测器，使用按频率识别"唤醒词"的
+Porcupine替身，验证唤醒事件在唤醒词结束后一个Porcupine帧左右触发。
+检测器本身不依赖 pyaudio，测试不需要音频设备，也不会因缺少 pyaudio 跳过。
+"""
+
+import os
+import sys
+import time
+import wave
+import asyncio
+import logging
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.bus import AudioBus
+from src.audio.wake_word import detector as detector_module
+from src.audio.wake_word.detector import WakeWordDetector
+from src.audio.wake_word.frame_queue import CapturedFrame
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+KEYWORD_F0 = 150  # 测试音频中"唤醒词"的基频
+OTHER_F0 = 230  # 其他语音的基频
+
+
+def voiced(duration: float, f0: float) -> np.ndarray:
+    """生成带谐波和幅度调制的类语音信号"""
+    t = np.arange(int(SAMPLE_RATE * duration)) / SAMPLE_RATE
+    signal = sum(np.sin(2 * np.pi * f0 * (i + 1) * t) / (i + 1) for i in range(6))
+    signal *= 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return (signal / np.abs(signal).max() * 12000).astype(np.int16)
+
+
+def silence(duration: float) -> np.ndarray:
+    """生成静音"""
+    return np.zeros(int(SAMPLE_RATE * duration), dtype=np.int16)
+
+
+def write_fixture(path, segments) -> None:
+    """写入16kHz单声道WAV测试音频"""
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(np.concatenate(segments).tobytes())
+
+
+class FakePorcupine:
+    """按主频识别唤醒词的Porcupine替身，唤醒词结束时触发"""
+
+    frame_length = 512
+    min_keyword_frames = 10
+
+    def __init__(self, access_key=None, keywords=None):
+        self.keyword_frames = 0
+        self.samples_processed = 0
+
+    def process(self, pcm) -> int:
+        frame = np.asarray(pcm, dtype=np.float32)
+        assert len(frame) == self.frame_length
+        self.samples_processed += len(frame)
+
+        spectrum = np.abs(np.fft.rfft(frame))
+        peak = np.argmax(spectrum[1:]) + 1
+        frequency = peak * SAMPLE_RATE / self.frame_length
+        is_keyword = spectrum[peak] > 1e5 and abs(frequency - KEYWORD_F0) < 30
+
+        if is_keyword:
+            self.keyword_frames += 1
+            return -1
+        detected = self.keyword_frames >= self.min_keyword_frames
+        self.keyword_frames = 0
+        return 0 if detected else -1
+
+    def delete(self) -> None:
+        pass
+
+
+class WavRecorder:
+    """按录音器帧长回放WAV文件"""
+
+    def __init__(self, path, chunk_size: int):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    async def start_recording(self):
+        with wave.open(str(self.path), "rb") as wav:
+            while True:
+                data = wav.readframes(self.chunk_size)
+                if len(data) < self.chunk_size * 2:
+                    break
+                yield data
+
+    async def stop_recording(self) -> None:
+        pass
+
+
+class WavBusRecorder:
+    """按录音器帧长把WAV文件送入音频总线"""
+
+    def __init__(self, path, chunk_size: int):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    async def iter_frames(self):
+        with wave.open(str(self.path), "rb") as wav:
+            sequence = 0
+            while True:
+                data = wav.readframes(self.chunk_size)
+                if len(data) < self.chunk_size * 2:
+                    break
+                await asyncio.sleep(0)
+                yield CapturedFrame(data=data, timestamp=time.monotonic(), sequence=sequence)
+                sequence += 1
+
+    async def stop_recording(self) -> None:
+        pass
+
+
+@pytest.fixture(params=[None, {}], ids=["vad", "energy_gate"])
+def make_detector(monkeypatch, request):
+    """创建使用Porcupine替身和WAV回放的检测器，分别测试每帧VAD和启用能量预筛两种方式"""
+    monkeypatch.setattr(detector_module, "Porcupine", FakePorcupine)
+
+    def factory(path):
+        detector = WakeWordDetector(porcupine_access_key="test",
+                                    audio_source=WavRecorder(path, chunk_size=480),
+                                    energy_gate=request.param)
+        return detector
+
+    return factory
+
+
+async def replay(detector, events=None):
+    """回放并记录每次唤醒时已输入的采样位置"""
+    detections = []
+    events = events if events is not None else []
+
+    async def on_wake_word(event):
+        detections.append(detector.audio_buffer.total_written)
+        events.append(event)
+
+    await detector.start_detection(on_wake_word)
+    return detections
+
+
+@pytest.mark.asyncio
+async def test_wake_fires_within_one_porcupine_frame(tmp_path, make_detector):
+    """测试唤醒词结束后立即触发，不等待整段语音结束"""
+    path = tmp_path / "keyword_then_command.wav"
+    lead, keyword = 0.5, 0.6
+    # 唤醒词后紧跟命令，中间没有停顿
+    write_fixture(path, [silence(lead), voiced(keyword, KEYWORD_F0),
+                         voiced(1.0, OTHER_F0), silence(0.6)])
+
+    detector = make_detector(path)
+    events = []
+    detections = await replay(detector, events)
+
+    assert len(detections) == 1
+    keyword_end = int(SAMPLE_RATE * (lead + keyword))
+    latency = detections[0] - keyword_end
+    # 唤醒词结束所在的Porcupine帧加上下一帧，再加一个录音帧的粒度
+    max_latency = 2 * FakePorcupine.frame_length + detector.frame_size
+    logger.info(f"唤醒延迟: {latency / SAMPLE_RATE * 1000:.1f}ms")
+    assert 0 <= latency <= max_latency
+
+    # 唤醒词之后、触发之前采集的音频随唤醒事件交给STT
+    post_keyword = events[0].audio
+    assert len(post_keyword) <= latency
+    assert detector.keyword_end + len(post_keyword) == detections[0]
+    assert events[0].source_position is None
+
+
+@pytest.mark.asyncio
+async def test_keyword_at_speech_onset_is_not_clipped(tmp_path, make_detector):
+    """测试预录音频保证语音开头的唤醒词完整送入检测"""
+    path = tmp_path / "keyword_only.wav"
+    write_fixture(path, [silence(0.3), voiced(0.4, KEYWORD_F0), silence(0.6)])
+
+    detections = await replay(make_detector(path))
+
+    assert len(detections) == 1
+
+
+@pytest.mark.asyncio
+async def test_no_false_accept_without_keyword(tmp_path, make_detector):
+    """测试没有唤醒词的语音不会触发"""
+    path = tmp_path / "speech_only.wav"
+    write_fixture(path, [silence(0.3), voiced(1.5, OTHER_F0), silence(0.6),
+                         voiced(0.8, OTHER_F0), silence(0.6)])
+
+    detector = make_detector(path)
+    detections = await replay(detector)
+
+    assert detections == []
+    # 静音期间不调用Porcupine
+    total = detector.audio_buffer.total_written
+    assert detector.porcupine.samples_processed < total
+
+
+@pytest.mark.asyncio
+async def test_wake_event_points_into_audio_bus(tmp_path, make_detector):
+    """测试唤醒事件给出唤醒词结束处在音频总线中的位置，STT可以从该位置订阅"""
+    path = tmp_path / "keyword_then_command.wav"
+    write_fixture(path, [silence(0.5), voiced(0.6, KEYWORD_F0), voiced(1.0, OTHER_F0), silence(0.6)])
+
+    detector = make_detector(path)
+    bus = AudioBus(WavBusRecorder(path, detector.frame_size), SAMPLE_RATE, detector.frame_size)
+    detector.recorder = bus.subscribe("wake_word")
+    events = []
+    subscriptions = []
+
+    async def on_wake_word(event):
+        events.append(event)
+        subscriptions.append(bus.subscribe("stt", start=event.source_position))
+
+    detection = asyncio.create_task(detector.start_detection(on_wake_word))
+    await bus.run()
+    await detection
+
+    assert len(events) == 1
+    event = events[0]
+    assert event.source_position == detector.keyword_end
+    # 订阅起点对齐到帧边界，读到的音频包含事件中的全部唤醒词之后的音频
+    audio = np.frombuffer(subscriptions[0].read_available(), dtype=np.int16)
+    offset = event.source_position - subscriptions[0].bus.position + len(audio)
+    assert 0 <= offset < detector.frame_size
+    # 可以从总线回读，事件不再复制音频
+    assert event.audio is None
+    expected = detector.audio_buffer.view(detector.keyword_end)
+    np.testing.assert_array_equal(audio[offset:offset + len(expected)], expected)
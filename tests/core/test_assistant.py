@@ -0,0 +1,177 @@
+"""
+助手打断流程测试
+"""
+
+import os
+import sys
+import asyncio
+import numpy as np
+import pytest
+
+# Assistant 与 main.py 一样以 src 为根导入其他模块，这里同样把 src 加入路径，
+# 其余类型都通过 assistant 模块取得，避免同一模块以两个名字加载
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+try:
+    from core import assistant as assistant_module
+except (ImportError, OSError) as e:  # sounddevice 在没有 PortAudio 时抛出 OSError
+    pytest.skip(f"无法导入 Assistant: {e}", allow_module_level=True)
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = 480
+
+
+def voiced_frame(index: int) -> bytes:
+    """生成类似浊音的谐波帧"""
+    t = (np.arange(FRAME_SIZE) + index * FRAME_SIZE) / SAMPLE_RATE
+    signal = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 20))
+    return (signal * 6000).astype(np.int16).tobytes()
+
+
+class IdleRecorder:
+    """不产出音频的录音器，测试中直接向总线写入帧"""
+
+    async def iter_frames(self):
+        return
+        yield
+
+    async def stop_recording(self) -> None:
+        pass
+
+
+class FakeSTT:
+    """记录每次识别从总线的哪个位置开始"""
+
+    def __init__(self):
+        self.starts = []
+
+    async def transcribe_stream(self, frames, on_provisional=None) -> str:
+        self.starts.append(frames.cursor)
+        return "讲个故事"
+
+
+class FakeLLM:
+    """第一次请求输出一句后一直挂起（模拟长回复），之后的请求正常结束"""
+
+    def __init__(self):
+        self.requests = 0
+        self.cancelled = 0
+
+    async def chat_stream(self, messages, functions=None, on_message=None):
+        self.requests += 1
+        yield "从前有座山。"
+        if self.requests == 1:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+
+
+class FakeTTS:
+    async def stream_speech(self, text: str):
+        yield np.zeros(240, dtype=np.int16).tobytes()
+
+
+class FakeSink:
+    """记录写入和清空的音频输出"""
+
+    sample_rate = 24000
+    channels = 1
+
+    def __init__(self):
+        self.writes = 0
+        self.flushes = 0
+
+    async def write(self, samples, final=False) -> None:
+        self.writes += 1
+
+    async def wait_drained(self) -> None:
+        pass
+
+    def flush(self) -> int:
+        self.flushes += 1
+        return 0
+
+
+class StubAssistant(assistant_module.Assistant):
+    """用测试替身代替麦克风、网络服务和音频输出"""
+
+    def __init__(self, barge_in):
+        super().__init__({"barge_in": barge_in})
+        self.audio_bus = assistant_module.AudioBus(IdleRecorder(), SAMPLE_RATE, FRAME_SIZE)
+        self.audio_sink = FakeSink()
+        self.stt = FakeSTT()
+        self.llm = FakeLLM()
+        self.tts = FakeTTS()
+        self.conversation = assistant_module.ConversationSession(summarizer=None)
+
+    async def _decode_stream(self, chunks):
+        async for chunk in chunks:
+            yield np.frombuffer(chunk, dtype=np.int16).astype(np.float32).reshape(-1, 1)
+
+
+async def wait_until(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "等待超时"
+        await asyncio.sleep(0.005)
+
+
+def publish(bus, frames) -> None:
+    for data in frames:
+        bus.publish(data, 0.0)
+
+
+@pytest.mark.asyncio
+async def test_wake_word_during_playback_restarts_interaction():
+    """测试播放中再次唤醒：清空输出、取消当前交互，从新唤醒词结束处开始新的交互"""
+    assistant = StubAssistant({"enabled": True})
+    WakeWordEvent = assistant_module.WakeWordEvent
+
+    await assistant.on_wake_word(WakeWordEvent(source_position=0))
+    await wait_until(lambda: assistant.audio_sink.writes > 0)
+    first = assistant._interaction_task
+
+    publish(assistant.audio_bus, [bytes(FRAME_SIZE * 2)] * 10)
+    await assistant.on_wake_word(WakeWordEvent(source_position=6 * FRAME_SIZE))
+
+    assert assistant.audio_sink.flushes == 1
+    second = assistant._interaction_task
+    assert second is not first
+    await asyncio.wait_for(second, timeout=2.0)
+    assert first.cancelled()
+    assert assistant.llm.cancelled == 1
+    assert assistant.stt.starts == [0, 6 * FRAME_SIZE]
+    assert assistant.barge_in_count == 1
+    assert not assistant.is_listening
+
+
+@pytest.mark.asyncio
+async def test_speech_during_playback_keeps_triggering_audio():
+    """测试 vad 模式下说话打断，新的交互从这段语音的起点开始识别"""
+    assistant = StubAssistant({"enabled": True, "mode": "vad",
+                               "vad_aggressiveness": 1, "min_speech_ms": 150})
+    bus = assistant.audio_bus
+
+    await assistant.on_wake_word(assistant_module.WakeWordEvent(source_position=0))
+    await wait_until(lambda: assistant.audio_sink.writes > 0)
+    first = assistant._interaction_task
+    await asyncio.sleep(0)
+
+    publish(bus, [bytes(FRAME_SIZE * 2)] * 10)
+    speech_start = bus.position
+    for i in range(20):
+        publish(bus, [voiced_frame(i)])
+        await asyncio.sleep(0)
+        if assistant._interaction_task is not first:
+            break
+
+    assert assistant.audio_sink.flushes == 1
+    second = assistant._interaction_task
+    assert second is not first
+    await asyncio.wait_for(second, timeout=2.0)
+    assert first.cancelled()
+    # 触发打断的语音（至少 min_speech_ms）交给新的识别，不会丢失
+    assert assistant.stt.starts == [0, speech_start]
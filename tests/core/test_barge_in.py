@@ -0,0 +1,80 @@
+"""
+打断检测测试
+"""
+
+import os
+import sys
+import time
+import asyncio
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.audio.bus import AudioBus
+from src.audio.wake_word.frame_queue import CapturedFrame
+from src.core.barge_in import BargeInMonitor
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = 480
+
+
+def voiced_frame(index: int) -> bytes:
+    """生成类似浊音的谐波帧"""
+    t = (np.arange(FRAME_SIZE) + index * FRAME_SIZE) / SAMPLE_RATE
+    signal = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 20))
+    return (signal * 6000).astype(np.int16).tobytes()
+
+
+def silent_frame(index: int) -> bytes:
+    return np.zeros(FRAME_SIZE, dtype=np.int16).tobytes()
+
+
+class SyntheticRecorder:
+    """先产出静音帧，再产出语音帧"""
+
+    def __init__(self, silent: int, voiced: int):
+        self.frames = [silent_frame(i) for i in range(silent)]
+        self.frames += [voiced_frame(i) for i in range(voiced)]
+
+    async def iter_frames(self):
+        for i, data in enumerate(self.frames):
+            await asyncio.sleep(0)
+            yield CapturedFrame(data=data, timestamp=time.monotonic(), sequence=i)
+
+    async def stop_recording(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_detects_speech_after_silence():
+    """测试静音之后的连续语音被判定为打断"""
+    bus = AudioBus(SyntheticRecorder(silent=20, voiced=20), SAMPLE_RATE, FRAME_SIZE)
+    monitor = BargeInMonitor(bus, vad_aggressiveness=1, min_speech_ms=150)
+
+    wait_task = asyncio.create_task(monitor.wait_for_speech())
+    await asyncio.sleep(0)
+    await bus.run()
+    timestamp = await wait_task
+
+    assert timestamp > 0
+    assert monitor.get_stats()["detections"] == 1
+    # 语音起点是第一个语音帧，而不是达到阈值的那一帧
+    assert monitor.speech_start == 20 * FRAME_SIZE
+
+
+@pytest.mark.asyncio
+async def test_silence_does_not_trigger():
+    """测试静音不会触发打断"""
+    bus = AudioBus(SyntheticRecorder(silent=40, voiced=0), SAMPLE_RATE, FRAME_SIZE)
+    monitor = BargeInMonitor(bus, vad_aggressiveness=1, min_speech_ms=150)
+
+    wait_task = asyncio.create_task(monitor.wait_for_speech())
+    await asyncio.sleep(0)
+    await bus.run()
+
+    with pytest.raises(EOFError):
+        await wait_task
+    assert monitor.get_stats()["detections"] == 0
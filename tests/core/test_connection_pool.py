@@ -0,0 +1,112 @@
+"""
+共享连接池测试
+"""
+
+import os
+import sys
+import asyncio
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.core.connection_pool import ConnectionPool, origin_of
+
+
+async def start_server():
+    """启动一个本地HTTP服务，记录收到的请求方法"""
+    methods = []
+
+    async def handler(request):
+        methods.append(request.method)
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server, methods
+
+
+def test_origin_of():
+    """测试URL归一化为源"""
+    assert origin_of("https://api.openai.com/v1") == "https://api.openai.com:443"
+    assert origin_of("http://127.0.0.1:8080/v1/chat") == "http://127.0.0.1:8080"
+
+
+@pytest.mark.asyncio
+async def test_session_reuses_connections():
+    """测试同一服务地址的请求复用连接并记录统计"""
+    server, _ = await start_server()
+    pool = ConnectionPool()
+    try:
+        base_url = str(server.make_url("/v1"))
+        session = pool.session(base_url)
+        assert pool.session(base_url + "/other") is session
+
+        for _ in range(3):
+            async with session.get(base_url) as response:
+                assert await response.text() == "ok"
+
+        stats = pool.get_stats()[origin_of(base_url)]
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+        assert stats["connect_time_max"] > 0
+    finally:
+        await pool.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_connection_before_first_request():
+    """测试预热后第一次请求即可复用连接"""
+    server, methods = await start_server()
+    pool = ConnectionPool()
+    try:
+        base_url = str(server.make_url("/"))
+        pool.add_warm_target(base_url)
+        await pool.warm_up()
+        assert methods == ["HEAD"]
+
+        async with pool.session(base_url).post(base_url) as response:
+            await response.read()
+
+        stats = pool.get_stats()[origin_of(base_url)]
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+        assert stats["pings"] == 1
+    finally:
+        await pool.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_keepalive_pings_idle_targets():
+    """测试空闲时定期发送保活请求"""
+    server, methods = await start_server()
+    pool = ConnectionPool(ping_interval=0.05)
+    try:
+        pool.add_warm_target(str(server.make_url("/")))
+        pool.start_keepalive()
+        await asyncio.sleep(0.2)
+        assert methods.count("HEAD") >= 2
+    finally:
+        await pool.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_connector_survives_foreign_session():
+    """测试其他库的会话关闭时不会关闭共享连接器"""
+    pool = ConnectionPool()
+    connector = pool.connector()
+    async with aiohttp.ClientSession(connector=connector):
+        pass
+    assert not connector.closed
+    assert pool.connector() is connector
+    await pool.close()
+    assert connector.closed
@@ -0,0 +1,222 @@
+"""
+响应流水线测试
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.core.pipeline import ResponsePipeline
+from src.audio.tts.base import BaseTTSEngine
+
+logger = logging.getLogger(__name__)
+
+
+class SlowTTSEngine(BaseTTSEngine):
+    """固定延迟的测试TTS引擎"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.requests = []
+
+    async def text_to_speech(self, text: str) -> bytes:
+        self.requests.append(text)
+        await asyncio.sleep(self.delay)
+        return text.encode("utf-8")
+
+
+async def text_stream(chunks):
+    """模拟LLM文本流"""
+    for chunk in chunks:
+        await asyncio.sleep(0)
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_pipeline_plays_sentences_in_order():
+    """测试句子按顺序播放"""
+    tts = SlowTTSEngine(delay=0.01)
+    played = []
+
+    async def play(audio_data: bytes) -> None:
+        played.append(audio_data.decode("utf-8"))
+
+    pipeline = ResponsePipeline(tts, play, tts_lookahead=2)
+    await pipeline.run(text_stream(["你好啊", "。", "今天", "天气不错！", "再见"]))
+
+    assert played == ["你好啊。", "今天天气不错！", "再见"]
+    assert pipeline.sentences_played == 3
+
+
+@pytest.mark.asyncio
+async def test_pipeline_overlaps_synthesis_and_playback():
+    """测试播放时提前合成下一句"""
+    tts = SlowTTSEngine(delay=0.03)
+
+    async def play(audio_data: bytes) -> None:
+        await asyncio.sleep(0.05)
+
+    pipeline = ResponsePipeline(tts, play, tts_lookahead=1)
+    start = time.monotonic()
+    await pipeline.run(text_stream(["第一句。", "第二句。", "第三句。", "第四句。"]))
+    elapsed = time.monotonic() - start
+
+    # 串行处理需要 4 * (0.03 + 0.05) = 0.32 秒，流水线约 0.23 秒
+    assert elapsed < 0.3
+    stats = pipeline.get_stats()
+    assert stats["sentences_played"] == 4
+    # 只有第一句需要等待合成
+    assert stats["playback_stalls"] == 1
+    logger.info(f"流水线统计: {stats}")
+
+
+@pytest.mark.asyncio
+async def test_pipeline_respects_lookahead():
+    """测试提前合成的句子数不超过配置"""
+    tts = SlowTTSEngine(delay=0)
+    release = asyncio.Event()
+
+    async def play(audio_data: bytes) -> None:
+        await release.wait()
+
+    pipeline = ResponsePipeline(tts, play, tts_lookahead=2)
+    task = asyncio.create_task(pipeline.run(text_stream([f"第{i}句。" for i in range(6)])))
+    await asyncio.sleep(0.05)
+
+    # 正在播放1句，另外最多提前合成2句
+    assert len(tts.requests) == 3
+    assert pipeline.get_queue_depths()["audio"] == 2
+
+    release.set()
+    await task
+    assert len(tts.requests) == 6
+
+
+@pytest.mark.asyncio
+async def test_pipeline_propagates_tts_error():
+    """测试合成错误会终止流水线"""
+    class FailingTTSEngine(BaseTTSEngine):
+        async def text_to_speech(self, text: str) -> bytes:
+            raise RuntimeError("合成失败")
+
+    async def play(audio_data: bytes) -> None:
+        pass
+
+    pipeline = ResponsePipeline(FailingTTSEngine(), play)
+    with pytest.raises(RuntimeError, match="合成失败"):
+        await pipeline.run(text_stream(["你好。", "世界。"]))
+
+
+def test_invalid_lookahead():
+    """测试无效的提前量"""
+    with pytest.raises(ValueError):
+        ResponsePipeline(SlowTTSEngine(0), None, tts_lookahead=0)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_plays_first_chunk_before_synthesis_ends():
+    """测试收到第一个音频块即开始播放"""
+    synthesis_done = asyncio.Event()
+
+    class StreamingTTSEngine(BaseTTSEngine):
+        async def stream_speech(self, text: str):
+            yield b"first"
+            await asyncio.sleep(0.05)
+            yield b"second"
+            synthesis_done.set()
+
+    played = []
+
+    async def play(chunk: bytes) -> None:
+        played.append((chunk, synthesis_done.is_set()))
+
+    pipeline = ResponsePipeline(StreamingTTSEngine(), play)
+    await pipeline.run(text_stream(["你好。"]))
+
+    assert played == [(b"first", False), (b"second", True)]
+    assert len(pipeline.get_stats()["first_chunk_latencies"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_pipeline_applies_decoder():
+    """测试解码函数作用于每句的音频流"""
+    async def decode(chunks):
+        async for chunk in chunks:
+            yield chunk.upper()
+
+    played = []
+
+    async def play(chunk: bytes) -> None:
+        played.append(chunk)
+
+    pipeline = ResponsePipeline(SlowTTSEngine(0), play, decode=decode)
+    await pipeline.run(text_stream(["abc. ", "def."]))
+
+    assert played == [b"ABC.", b"DEF."]
+
+
+@pytest.mark.asyncio
+async def test_cancel_closes_llm_and_tts_streams():
+    """测试取消流水线（打断）时关闭LLM流和进行中的合成流"""
+    closed = []
+    synthesis_started = asyncio.Event()
+
+    async def endless_llm():
+        try:
+            yield "第一句。"
+            while True:
+                await asyncio.sleep(0.01)
+                yield "更多"
+        finally:
+            closed.append("llm")
+
+    class HangingTTSEngine(BaseTTSEngine):
+        async def stream_speech(self, text: str):
+            try:
+                yield b"chunk"
+                synthesis_started.set()
+                await asyncio.Event().wait()
+            finally:
+                closed.append("tts")
+
+    async def play(chunk: bytes) -> None:
+        pass
+
+    pipeline = ResponsePipeline(HangingTTSEngine(), play)
+    task = asyncio.create_task(pipeline.run(endless_llm()))
+    await asyncio.wait_for(synthesis_started.wait(), 1)
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert sorted(closed) == ["llm", "tts"]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_flushes_stalled_text():
+    """测试LLM长时间没有句子边界时按等待时间输出"""
+    async def stalled_stream():
+        yield "正在查询天气"
+        await asyncio.sleep(0.2)
+        yield "，请稍等"
+
+    played = []
+
+    async def play(audio_data: bytes) -> None:
+        played.append((audio_data.decode("utf-8"), time.monotonic()))
+
+    pipeline = ResponsePipeline(SlowTTSEngine(0), play, segmenter={"max_wait_ms": 50})
+    start = time.monotonic()
+    await pipeline.run(stalled_stream())
+
+    assert [text for text, _ in played] == ["正在查询天气", "，请稍等"]
+    assert played[0][1] - start < 0.15
+    assert pipeline.get_stats()["segmenter"]["forced_flushes"] == 1
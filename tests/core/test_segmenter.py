@@ -0,0 +1,117 @@
+"""
+流式分句器测试
+"""
+
+import os
+import sys
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.core.segmenter import SentenceSegmenter
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def segment(chunks, **options):
+    """依次输入文本块，返回所有句子"""
+    segmenter = SentenceSegmenter(**options)
+    sentences = []
+    for chunk in chunks:
+        sentences.extend(segmenter.push(chunk))
+    sentences.extend(segmenter.flush())
+    return sentences
+
+
+def test_splits_every_boundary_inside_chunk():
+    """测试一个文本块中的多个句子边界都会切分"""
+    segmenter = SentenceSegmenter(first_chunk_comma_split=False)
+    assert segmenter.push("今天天气不错。明天会下雨吗？后天") == ["今天天气不错。", "明天会下雨吗？"]
+    assert segmenter.pending == "后天"
+
+
+def test_chinese_punctuation():
+    """测试中文标点、连续标点和右引号"""
+    sentences = segment(["他说：“好的！”然后", "就走了……我们", "也走吧。"],
+                        first_chunk_comma_split=False)
+    assert sentences == ["他说：“好的！”", "然后就走了……", "我们也走吧。"]
+
+
+def test_english_punctuation():
+    """测试英文句末标点需要后跟空白，不切开小数"""
+    sentences = segment(["The price is 3.5 dollars. Is", " that ok? Yes", "."])
+    assert sentences == ["The price is 3.5 dollars.", "Is that ok?", "Yes."]
+
+
+def test_english_boundary_across_chunks():
+    """测试句号和空白分属两个文本块时仍能切分"""
+    segmenter = SentenceSegmenter()
+    assert segmenter.push("Hello there.") == []
+    assert segmenter.push(" How are you") == ["Hello there."]
+
+
+def test_merges_short_sentences():
+    """测试过短的句子与下一句合并"""
+    sentences = segment(["好！", "我来", "帮你查一下。"], first_chunk_comma_split=False)
+    assert sentences == ["好！我来帮你查一下。"]
+
+
+def test_first_chunk_comma_split():
+    """测试只有第一句在逗号处提前切分"""
+    sentences = segment(["好的，", "北京今天晴，最高气温二十度。", "明天，多云。"])
+    assert sentences == ["好的，北京今天晴，", "最高气温二十度。", "明天，多云。"]
+
+
+def test_english_first_chunk_comma_split():
+    """测试英文逗号提前切分，数字中的逗号不切分"""
+    sentences = segment(["It costs 1,000 dollars, which", " is a lot."])
+    assert sentences == ["It costs 1,000 dollars,", "which is a lot."]
+
+
+def test_forced_split_by_length():
+    """测试超长文本按长度强制输出，优先在空白处切分"""
+    segmenter = SentenceSegmenter(max_chars=20, first_chunk_comma_split=False)
+    assert segmenter.push("one two three four five six") == ["one two three four five"]
+    assert segmenter.pending == " six"
+    assert segmenter.forced_flushes == 1
+
+
+def test_forced_split_keeps_pending_below_max_chars():
+    """测试一个大文本块强制输出后，剩余文本仍短于 max_chars"""
+    segmenter = SentenceSegmenter(max_chars=20, first_chunk_comma_split=False)
+    long_word = "x" * 30
+    assert segmenter.push("one two " + long_word) == ["one two", long_word]
+    assert segmenter.pending == ""
+    assert segmenter.forced_flushes == 2
+
+
+def test_forced_split_by_time():
+    """测试等待超时后强制输出"""
+    clock = FakeClock()
+    segmenter = SentenceSegmenter(max_wait_ms=500, clock=clock)
+    assert segmenter.time_until_flush() is None
+
+    segmenter.push("正在查询")
+    clock.now = 0.2
+    assert segmenter.time_until_flush() == pytest.approx(0.3)
+    assert segmenter.flush_due() == []
+
+    clock.now = 0.6
+    assert segmenter.flush_due() == ["正在查询"]
+    assert segmenter.time_until_flush() is None
+
+
+def test_invalid_thresholds():
+    """测试无效的阈值"""
+    with pytest.raises(ValueError):
+        SentenceSegmenter(min_chars=10, max_chars=5)
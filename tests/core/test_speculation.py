@@ -0,0 +1,91 @@
+"""
+投机执行测试
+"""
+
+import os
+import sys
+import asyncio
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.core.speculation import SpeculativeRunner, wait_if_speculative
+from src.llm.cache import normalize_query
+
+
+class FakeLLM:
+    """记录请求、可选调用有副作用工具的模拟LLM"""
+
+    def __init__(self, delay=0.01, tool=False):
+        self.delay = delay
+        self.tool = tool
+        self.requests = []
+        self.tool_runs = 0
+
+    async def stream(self, text, on_message):
+        self.requests.append(text)
+        await asyncio.sleep(self.delay)
+        if self.tool:
+            await wait_if_speculative()
+            self.tool_runs += 1
+            on_message({"role": "tool", "content": "ok"})
+        yield "好的，"
+        yield text
+
+
+@pytest.mark.asyncio
+async def test_matching_speculation_is_used():
+    """测试最终结果一致时沿用投机请求，并统计节省的时间"""
+    llm = FakeLLM()
+    runner = SpeculativeRunner(llm.stream, normalize_query)
+    runner.propose("把灯关掉")
+    await asyncio.sleep(0.03)
+
+    speculation = runner.resolve("把灯关掉。")
+    assert speculation is not None
+    messages = []
+    assert [chunk async for chunk in speculation.stream(messages.append)] == ["好的，", "把灯关掉"]
+    assert llm.requests == ["把灯关掉"]
+
+    stats = runner.get_stats()
+    assert stats["started"] == 1 and stats["used"] == 1 and stats["use_rate"] == 1.0
+    assert 0.005 < stats["avg_time_saved"] < 0.03
+
+
+@pytest.mark.asyncio
+async def test_mismatch_and_continued_speech_cancel():
+    """测试继续说话或结果不一致时取消投机请求"""
+    llm = FakeLLM(delay=1)
+    runner = SpeculativeRunner(llm.stream, normalize_query)
+    runner.propose("把灯")
+    runner.propose(None)
+    assert runner.resolve("把灯关掉") is None
+
+    runner.propose("把灯关")
+    await asyncio.sleep(0)
+    assert runner.resolve("把灯关掉") is None
+    stats = runner.get_stats()
+    assert stats["cancelled"] == 1 and stats["mismatched"] == 1 and stats["used"] == 0
+
+
+@pytest.mark.asyncio
+async def test_side_effects_wait_for_confirmation():
+    """测试有副作用的工具在投机请求被采用之前不会执行"""
+    llm = FakeLLM(tool=True)
+    runner = SpeculativeRunner(llm.stream, normalize_query)
+    runner.propose("关灯")
+    await asyncio.sleep(0.05)
+    assert llm.tool_runs == 0
+
+    messages = []
+    speculation = runner.resolve("关灯")
+    assert [chunk async for chunk in speculation.stream(messages.append)] == ["好的，", "关灯"]
+    assert llm.tool_runs == 1 and messages == [{"role": "tool", "content": "ok"}]
+
+    runner.propose("开灯")
+    await asyncio.sleep(0.05)
+    runner.invalidate()
+    await asyncio.sleep(0.01)
+    assert llm.tool_runs == 1
@@ -0,0 +1,107 @@
+"""
+交互追踪测试
+"""
+
+import os
+import sys
+import json
+import asyncio
+import aiohttp
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.core import tracing
+from src.core.tracing import Histogram, MetricsServer, Tracer
+
+
+def test_histogram_buckets():
+    """测试分桶边界（上界包含在内）和累计计数"""
+    histogram = Histogram((0.1, 0.5, 1.0))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [("0.1", 2), ("0.5", 3), ("1", 3), ("+Inf", 4)]
+    assert histogram.count == 4 and histogram.sum == pytest.approx(2.45)
+
+
+def test_recording_without_trace_is_noop():
+    """测试没有进行中的交互时各记录函数不做任何事"""
+    assert tracing.current_trace() is None
+    with tracing.span("stt"):
+        tracing.mark("playback_start")
+    stream = object()
+    assert tracing.first_chunk(stream, "llm_first_token") is stream
+    assert Tracer(enabled=False).start_trace() is None
+
+
+@pytest.mark.asyncio
+async def test_trace_follows_interaction_tasks(tmp_path):
+    """测试子任务中的记录归入所属交互，结束时计入直方图并写出JSON lines"""
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(jsonl_path=str(path))
+
+    async def text():
+        await asyncio.sleep(0.01)
+        yield "你好"
+
+    async def interaction():
+        tracing.activate(tracer.start_trace())
+        with tracing.span("stt"):
+            await asyncio.sleep(0.01)
+        assert [chunk async for chunk in tracing.first_chunk(text(), "llm_first_token")] == ["你好"]
+
+        async def synthesize(index):
+            tracing.record("tts_first_byte", 1.0, 1.02, sentence=index)
+
+        await asyncio.gather(*(asyncio.create_task(synthesize(i)) for i in range(2)))
+        tracing.mark("playback_start")
+        tracing.mark("playback_end")
+        trace = tracing.current_trace()
+        trace.finish()
+        return trace
+
+    trace = await asyncio.create_task(interaction())
+    assert tracing.current_trace() is None
+
+    assert tracer.interactions == 1
+    assert tracer.histograms["tts_first_byte"].count == 2
+    for stage in ("stt", "llm_first_token", "response", "playback", "interaction"):
+        assert tracer.histograms[stage].count == 1
+    assert tracer.histograms["stt"].sum >= 0.01
+
+    tracer.close()
+    record = json.loads(path.read_text(encoding="utf-8"))
+    assert record["id"] == trace.id
+    names = [event["name"] for event in record["events"]]
+    assert names == ["stt", "llm_first_token", "tts_first_byte", "tts_first_byte",
+                     "playback_start", "playback_end"]
+    assert record["events"][2]["sentence"] == 0 and record["events"][2]["duration_ms"] == 20.0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    """测试本地端口导出 Prometheus 文本格式"""
+    tracer = Tracer(buckets=(0.1, 1.0))
+    trace = tracer.start_trace()
+    trace.record("wake", 0.0, 0.2)
+    trace.finish()
+
+    server = MetricsServer(tracer, port=0)
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{server.port}/metrics") as response:
+                assert response.status == 200
+                assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+                body = await response.text()
+    finally:
+        await server.close()
+
+    assert "# TYPE home_ai_stage_duration_seconds histogram" in body
+    assert 'home_ai_stage_duration_seconds_bucket{stage="wake",le="0.1"} 0' in body
+    assert 'home_ai_stage_duration_seconds_bucket{stage="wake",le="1"} 1' in body
+    assert 'home_ai_stage_duration_seconds_count{stage="wake"} 1' in body
+    assert "home_ai_interactions_total 1" in body
+    assert "home_ai_process_max_rss_bytes" in body
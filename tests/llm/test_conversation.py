@@ -0,0 +1,149 @@
+"""
+对话会话测试
+"""
+
+import os
+import sys
+import asyncio
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.llm.conversation import ConversationSession, estimate_tokens, message_tokens
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def text_stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def run_turn(session, user_text, reply):
+    session.start_turn(user_text)
+    return [chunk async for chunk in session.record_stream(text_stream([reply]))]
+
+
+def test_estimate_tokens():
+    """测试token估算"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("你好") == 2
+    assert estimate_tokens("hello world!") == 3
+
+
+@pytest.mark.asyncio
+async def test_records_turns_and_tool_messages():
+    """测试记录多轮对话，包括工具调用和结果"""
+    session = ConversationSession(system_prompt="你是助手")
+    session.start_turn("北京天气")
+    session.add_message({"role": "assistant", "content": None, "tool_calls": [
+        {"id": "call_a", "type": "function", "function": {"name": "weather", "arguments": "{}"}}]})
+    session.add_message({"role": "tool", "tool_call_id": "call_a", "content": "晴"})
+    assert [c async for c in session.record_stream(text_stream(["北京", "晴。"]))] == ["北京", "晴。"]
+
+    messages = session.get_messages()
+    assert [m["role"] for m in messages] == ["system", "user", "assistant", "tool", "assistant"]
+    assert messages[-1]["content"] == "北京晴。"
+    assert session.total_tokens == sum(message_tokens(m) for m in messages)
+
+
+@pytest.mark.asyncio
+async def test_interrupted_stream_records_partial_reply():
+    """测试被打断时记录已输出的部分"""
+    session = ConversationSession()
+    session.start_turn("讲个故事")
+    stream = session.record_stream(text_stream(["从前", "有座山", "山里有座庙"]))
+    assert await stream.__anext__() == "从前"
+    await stream.aclose()
+    assert session.get_messages()[-1] == {"role": "assistant", "content": "从前"}
+
+
+@pytest.mark.asyncio
+async def test_hard_budget_drops_oldest_turns():
+    """测试超过预算时丢弃最早的轮次，当前轮次保留"""
+    session = ConversationSession(max_tokens=60, compact_threshold=1.0)
+    for i in range(5):
+        await run_turn(session, f"问题{i}" * 3, f"回答{i}" * 3)
+
+    messages = session.get_messages()
+    assert session.total_tokens <= 60
+    assert messages[-1]["content"] == "回答4" * 3
+    assert session.get_stats()["evicted_turns"] > 0
+
+
+@pytest.mark.asyncio
+async def test_background_summary():
+    """测试后台把较早的轮次压缩为摘要"""
+    summarized = []
+    release = asyncio.Event()
+
+    async def summarizer(messages):
+        summarized.append(messages)
+        await release.wait()
+        return "用户喜欢听爵士乐"
+
+    session = ConversationSession(max_tokens=100, compact_threshold=0.5,
+                                  keep_recent_turns=1, summarizer=summarizer)
+    for i in range(3):
+        await run_turn(session, "我喜欢爵士乐" * 2, "好的，记住了" * 2)
+
+    # 压缩在后台进行，不阻塞获取消息
+    await asyncio.sleep(0)
+    assert summarized
+    assert len(session.get_messages()) == 6
+
+    release.set()
+    await asyncio.sleep(0.01)
+    messages = session.get_messages()
+    assert messages[0] == {"role": "system", "content": "之前的对话摘要：用户喜欢听爵士乐"}
+    assert session.total_tokens <= 50 + message_tokens({"content": "之前的对话摘要：用户喜欢听爵士乐"})
+    assert session.get_stats()["summarized_turns"] >= 1
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_session_expires():
+    """测试空闲超时后清空历史"""
+    clock = FakeClock()
+    session = ConversationSession(idle_timeout=300, clock=clock)
+    await run_turn(session, "我叫小明", "你好小明")
+
+    clock.now = 100
+    session.start_turn("我叫什么")
+    assert len(session.get_messages()) == 3
+
+    clock.now = 1000
+    session.start_turn("我叫什么")
+    assert session.get_messages() == [{"role": "user", "content": "我叫什么"}]
+    assert session.get_stats()["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_preview_messages_does_not_modify_history():
+    """测试预览新一轮的消息列表不改变历史，超时和预算与正式开始一轮一致"""
+    clock = FakeClock()
+    session = ConversationSession(system_prompt="助手", max_tokens=40, idle_timeout=60, clock=clock)
+    await run_turn(session, "第一个问题问的是什么", "第一个回答")
+    await run_turn(session, "第二个问题", "第二个回答")
+
+    preview = session.preview_messages("第三个问题")
+    assert session.get_stats()["turns"] == 2
+    session.start_turn("第三个问题")
+    assert preview == session.get_messages()
+    assert session.evicted_turns > 0
+
+    session = ConversationSession(idle_timeout=60, clock=clock)
+    await run_turn(session, "你好", "你好")
+    clock.now += 61
+    assert session.preview_messages("在吗") == [{"role": "user", "content": "在吗"}]
+    assert session.get_stats()["turns"] == 1 and session.expirations == 0
@@ -0,0 +1,190 @@
+"""
+OpenAI兼容LLM引擎测试（使用本地模拟服务）
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.llm.openai_llm import OpenAICompatibleLLM
+from src.llm.factory import LLMFactory
+
+
+def text_delta(content):
+    return {"choices": [{"index": 0, "delta": {"content": content}}]}
+
+
+def tool_delta(index, arguments, call_id=None, name=None):
+    call = {"index": index, "function": {"arguments": arguments}}
+    if call_id:
+        call["id"] = call_id
+        call["function"]["name"] = name
+    return {"choices": [{"index": 0, "delta": {"tool_calls": [call]}}]}
+
+
+class FakeCompletionServer:
+    """按顺序返回预设SSE事件的 /chat/completions 模拟服务"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.server = None
+
+    async def handler(self, request):
+        self.requests.append(await request.json())
+        events = self.responses.pop(0)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for event in events:
+            if isinstance(event, float):
+                await asyncio.sleep(event)
+                continue
+            await response.write(f"data: {json.dumps(event)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.handler)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        return str(self.server.make_url("/v1"))
+
+    async def __aexit__(self, *exc):
+        await self.server.close()
+
+
+@pytest.mark.asyncio
+async def test_streams_text_deltas():
+    """测试文本增量逐个返回"""
+    async with FakeCompletionServer([[text_delta("你好"), text_delta("，世界。")]]) as base:
+        llm = OpenAICompatibleLLM(api_key="test", api_base=base)
+        chunks = [chunk async for chunk in llm.chat_stream([{"role": "user", "content": "hi"}])]
+        await llm.close()
+
+    assert chunks == ["你好", "，世界。"]
+
+
+@pytest.mark.asyncio
+async def test_tools_start_before_stream_ends_and_run_concurrently():
+    """测试参数完整即开始执行工具，多个工具并发执行，之后继续流式回复"""
+    started = {}
+
+    async def executor(name, arguments):
+        started[name] = time.monotonic()
+        await asyncio.sleep(0.1)
+        return {"tool": name, "city": arguments["city"]}
+
+    first_round = [
+        tool_delta(0, '{"ci', call_id="call_a", name="weather"),
+        tool_delta(0, 'ty": "北京"}'),
+        0.15,  # 第一个工具的参数已经完整，响应仍在继续
+        tool_delta(1, '{"city": "上海"}', call_id="call_b", name="time"),
+    ]
+    second_round = [text_delta("北京晴。"), text_delta("上海多云。")]
+
+    async with FakeCompletionServer([first_round, second_round]) as server_base:
+        llm = OpenAICompatibleLLM(api_key="test", api_base=server_base, tool_executor=executor)
+        schemas = [{"name": "weather", "description": "", "parameters": {}}]
+        start = time.monotonic()
+        chunks = [chunk async for chunk in llm.chat_stream(
+            [{"role": "user", "content": "天气"}], schemas)]
+        elapsed = time.monotonic() - start
+        await llm.close()
+
+    assert chunks == ["北京晴。", "上海多云。"]
+    # 第一个工具在响应结束前开始
+    assert started["weather"] - start < 0.12
+    # 0.15秒的响应 + 并发执行的剩余时间，串行则需要 0.15 + 0.1 + 0.1
+    assert elapsed < 0.33
+    assert llm.get_stats() == {"requests": 2, "tool_calls": 2, "tools_started_early": 2}
+
+
+@pytest.mark.asyncio
+async def test_follow_up_request_contains_tool_results():
+    """测试后续请求包含工具调用和结果"""
+    async def executor(name, arguments):
+        if name == "broken":
+            raise RuntimeError("设备离线")
+        return "22度"
+
+    first_round = [
+        tool_delta(0, '{}', call_id="call_a", name="temperature"),
+        tool_delta(1, '{}', call_id="call_b", name="broken"),
+    ]
+    server = FakeCompletionServer([first_round, [text_delta("好的")]])
+    async with server as base:
+        llm = LLMFactory.create_engine({"type": "openai", "api_key": "test", "api_base": base},
+                                       tool_executor=executor)
+        recorded = []
+        chunks = [chunk async for chunk in llm.chat_stream(
+            [{"role": "user", "content": "温度"}],
+            [{"name": "temperature", "description": "", "parameters": {}}],
+            on_message=recorded.append)]
+        assert chunks == ["好的"]
+        await llm.close()
+
+    first, second = server.requests
+    assert first["tools"][0]["type"] == "function"
+    assert first["stream"] is True
+    messages = second["messages"]
+    assert [call["id"] for call in messages[1]["tool_calls"]] == ["call_a", "call_b"]
+    assert messages[2] == {"role": "tool", "tool_call_id": "call_a", "content": "22度"}
+    assert messages[3]["content"] == "工具执行失败: 设备离线"
+    # 工具调用和结果通过回调交给对话历史
+    assert recorded == messages[1:]
+
+
+@pytest.mark.asyncio
+async def test_invalid_arguments_not_executed():
+    """测试响应结束时参数仍不是有效JSON的工具不执行，错误作为结果返回给模型"""
+    executed = []
+
+    async def executor(name, arguments):
+        executed.append((name, arguments))
+        return "已打开"
+
+    first_round = [tool_delta(0, '{"room": "客厅"', call_id="call_a", name="turn_on_light")]
+    server = FakeCompletionServer([first_round, [text_delta("抱歉")]])
+    async with server as base:
+        llm = OpenAICompatibleLLM(api_key="test", api_base=base, tool_executor=executor)
+        chunks = [chunk async for chunk in llm.chat_stream(
+            [{"role": "user", "content": "开灯"}],
+            [{"name": "turn_on_light", "description": "", "parameters": {}}])]
+        await llm.close()
+
+    assert chunks == ["抱歉"]
+    assert executed == []
+    assert llm.get_stats()["tool_calls"] == 0
+    result = server.requests[1]["messages"][2]
+    assert result["tool_call_id"] == "call_a"
+    assert result["content"] == "工具执行失败: 参数不是有效的JSON"
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_request():
+    """测试提前关闭流（打断）时停止读取响应"""
+    events = [text_delta("第一句。")] + [0.05, text_delta("更多")] * 20
+    async with FakeCompletionServer([events]) as base:
+        llm = OpenAICompatibleLLM(api_key="test", api_base=base)
+        stream = llm.chat_stream([{"role": "user", "content": "hi"}])
+        assert await stream.__anext__() == "第一句。"
+        start = time.monotonic()
+        await stream.aclose()
+        assert time.monotonic() - start < 0.1
+        await llm.close()
+
+
+def test_factory_requires_api_key():
+    """测试缺少api_key时报错"""
+    with pytest.raises(ValueError):
+        LLMFactory.create_engine({"type": "openai"})
@@ -0,0 +1,179 @@
+"""
+LLM响应缓存测试
+"""
+
+import os
+import sys
+import asyncio
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.llm.base import BaseLLM
+from src.llm.cache import CachedLLM, HashingEmbedder, ResponseCache, normalize_query
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeLLM(BaseLLM):
+    """按预设回复流式输出，可模拟工具调用"""
+
+    def __init__(self, chunks, tools=()):
+        self.chunks = chunks
+        self.tools = tools
+        self.requests = 0
+
+    async def chat_stream(self, messages, functions=None, on_message=None):
+        self.requests += 1
+        if self.tools and on_message is not None:
+            on_message({"role": "assistant", "content": None, "tool_calls": [
+                {"id": f"call_{i}", "type": "function", "function": {"name": name, "arguments": "{}"}}
+                for i, name in enumerate(self.tools)]})
+        for chunk in self.chunks:
+            await asyncio.sleep(0)
+            yield chunk
+
+    async def chat(self, messages, functions=None):
+        return ''.join(self.chunks)
+
+
+def user(text):
+    return [{"role": "system", "content": "你是助手"}, {"role": "user", "content": text}]
+
+
+async def collect(llm, messages):
+    return [chunk async for chunk in llm.chat_stream(messages)]
+
+
+def test_normalize_query():
+    """测试标点、空白、大小写和全角差异被忽略"""
+    assert normalize_query("现在几点了？") == normalize_query(" 现在 几点了")
+    assert normalize_query("ＨＥＬＬＯ, World!") == "helloworld"
+    assert normalize_query("1+1") != normalize_query("11")
+
+
+def test_exact_hit_ttl_and_lru_eviction():
+    """测试精确命中、过期和按最久未使用淘汰"""
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=2, ttl=100, clock=clock)
+    cache.store("讲个笑话", "从前有座山。")
+    cache.store("现在几点", "十点。", ttl=10)
+    assert cache.lookup("讲个笑话！") == "从前有座山。"
+
+    clock.now = 11
+    assert cache.lookup("现在几点") is None
+    assert cache.expirations == 1
+
+    cache.store("天气", "晴。")
+    cache.lookup("讲个笑话")
+    cache.store("新闻", "没有新闻。")
+    assert cache.lookup("天气") is None
+    assert cache.lookup("讲个笑话") == "从前有座山。"
+    stats = cache.get_stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+    assert stats["hit_rate"] == pytest.approx(3 / 5)
+
+
+def test_similar_hit_uses_embeddings():
+    """测试近似输入按向量相似度命中，差异大的输入不命中"""
+    cache = ResponseCache(max_entries=4, embedder=HashingEmbedder(), similarity_threshold=0.9)
+    cache.store("what's the weather", "Sunny.")
+    assert cache.lookup("what is the weather") == "Sunny."
+    assert cache.lookup("turn off the light") is None
+    assert cache.similar_hits == 1
+
+    # 淘汰后向量所在的行被清空，不会再被匹配
+    for text in ("a b c", "d e f", "g h i", "j k l"):
+        cache.store(text, text)
+    assert cache.lookup("what is the weather") is None
+
+
+def test_similar_match_rejects_number_and_tool_differences():
+    """测试数字不同的输入不近似命中，依赖工具结果的回复只允许精确命中"""
+    cache = ResponseCache(max_entries=4, embedder=HashingEmbedder())
+    cache.store("set a timer for 5 minutes", "Timer set for 5 minutes.")
+    assert cache.lookup("set a timer for 15 minutes") is None
+    cache.store("定一个五分钟的闹钟", "好的，五分钟。")
+    assert cache.lookup("定一个十五分钟的闹钟") is None
+
+    cache.store("what is the weather in Boston today", "Boston: sunny.", ttl=60, exact_only=True)
+    assert cache.lookup("what is the weather in Austin today") is None
+    assert cache.lookup("What is the weather in Boston today?") == "Boston: sunny."
+    assert cache.similar_hits == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_llm_hits_standalone_turns_within_session():
+    """测试会话中后续的独立请求按当前输入命中，承接上文的请求不查缓存"""
+    inner = FakeLLM(["十点。"])
+    llm = CachedLLM(inner, ResponseCache())
+    await collect(llm, user("讲个笑话"))
+    history = user("讲个笑话") + [{"role": "assistant", "content": "从前有座山。"}]
+
+    await collect(llm, history + [{"role": "user", "content": "现在几点"}])
+    assert await collect(llm, history + [{"role": "user", "content": "现在几点？"}]) == ["十点。"]
+    assert inner.requests == 2
+
+    await collect(llm, history + [{"role": "user", "content": "那明天呢"}])
+    await collect(llm, history + [{"role": "user", "content": "那明天呢"}])
+    assert inner.requests == 4
+
+
+@pytest.mark.asyncio
+async def test_cached_llm_replays_answer_without_request():
+    """测试重复请求直接返回缓存的回复"""
+    inner = FakeLLM(["今天", "晴。"])
+    llm = CachedLLM(inner, ResponseCache())
+    assert await collect(llm, user("今天天气")) == ["今天", "晴。"]
+    assert await collect(llm, user("今天天气？")) == ["今天晴。"]
+    assert inner.requests == 1
+    assert llm.get_stats()["response_cache"]["exact_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_llm_skips_follow_ups_and_interrupted_streams():
+    """测试依赖上文的请求和被打断的回复不缓存"""
+    inner = FakeLLM(["好的。"])
+    llm = CachedLLM(inner, ResponseCache())
+    history = user("你好") + [{"role": "assistant", "content": "你好。"}, {"role": "user", "content": "再说一遍"}]
+    await collect(llm, history)
+    await collect(llm, history)
+    assert inner.requests == 2
+
+    stream = llm.chat_stream(user("讲个故事"))
+    await stream.__anext__()
+    await stream.aclose()
+    assert len(llm.cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_llm_tool_ttl():
+    """测试依赖工具结果的回复按工具有效期过期，有副作用的工具不缓存"""
+    clock = FakeClock()
+    ttls = {"weather": 30.0, "light": None}
+    cache = ResponseCache(clock=clock)
+
+    messages = []
+    llm = CachedLLM(FakeLLM(["晴。"], tools=["weather"]), cache, tool_ttl=ttls.get, max_tool_ttl=60)
+    await collect(llm, user("天气"))
+    clock.now = 29
+    assert cache.lookup("天气") == "晴。"
+    clock.now = 31
+    assert cache.lookup("天气") is None
+
+    llm = CachedLLM(FakeLLM(["已关灯。"], tools=["light"]), cache, tool_ttl=ttls.get)
+    result = [c async for c in llm.chat_stream(user("关灯"), on_message=messages.append)]
+    assert result == ["已关灯。"]
+    assert messages and messages[0]["tool_calls"][0]["function"]["name"] == "light"
+    assert cache.lookup("关灯") is None
+    assert llm.uncacheable == 1
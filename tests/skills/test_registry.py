@@ -0,0 +1,210 @@
+"""
+工具注册中心测试
+"""
+
+import os
+import sys
+import time
+import asyncio
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.skills.base import BaseTool
+from src.skills.registry import ToolRegistry, ToolTimeoutError
+from src.skills.index import ToolIndex
+
+
+@pytest.fixture
+def registry():
+    """每个测试使用独立的注册表"""
+    class TestRegistry(ToolRegistry):
+        _tools = {}
+        _schemas = {}
+        _index = ToolIndex()
+        _instances = {}
+        _stats = {}
+        _cache = {}
+
+    TestRegistry.configure(default_timeout=1.0)
+    return TestRegistry
+
+
+class SleepTool(BaseTool):
+    name = "sleep"
+    description = "等待一段时间"
+    parameters = {"seconds": {"type": "number", "required": True}}
+    timeout = 0.2
+    instances = 0
+
+    def __init__(self):
+        SleepTool.instances += 1
+
+    async def execute(self, seconds: float):
+        await asyncio.sleep(seconds)
+        return seconds
+
+
+class CounterTool(BaseTool):
+    name = "counter"
+    description = "计数"
+    parameters = {}
+    cacheable = True
+    cache_ttl = 0.1
+
+    def __init__(self):
+        self.count = 0
+
+    async def execute(self, key: str = ""):
+        self.count += 1
+        return self.count
+
+
+@pytest.mark.asyncio
+async def test_instances_are_reused(registry):
+    """测试工具实例只创建一次"""
+    registry.register(SleepTool)
+    SleepTool.instances = 0
+    await registry.execute_tool("sleep", seconds=0)
+    await registry.execute_tool("sleep", seconds=0)
+    assert SleepTool.instances == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_concurrently_with_timeouts(registry):
+    """测试批量调用并发执行，超时的调用不影响其他调用"""
+    registry.register(SleepTool)
+    start = time.monotonic()
+    results = await registry.execute_batch([
+        ("sleep", {"seconds": 0.1}),
+        ("sleep", {"seconds": 0.1}),
+        ("sleep", {"seconds": 5}),
+        ("missing", {}),
+    ])
+    elapsed = time.monotonic() - start
+
+    assert results[:2] == [0.1, 0.1]
+    assert isinstance(results[2], ToolTimeoutError)
+    assert isinstance(results[3], ValueError)
+    # 并发执行，总耗时取决于超时时间
+    assert elapsed < 0.4
+    stats = registry.get_stats()["sleep"]
+    assert stats["calls"] == 3
+    assert stats["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_cancellation_cancels_calls(registry):
+    """测试取消批次时取消所有进行中的调用"""
+    cancelled = []
+
+    class HangingTool(BaseTool):
+        name = "hang"
+        description = ""
+        parameters = {}
+
+        async def execute(self):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+    registry.register(HangingTool)
+    task = asyncio.create_task(registry.execute_batch([("hang", {}), ("hang", {})]))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert cancelled == [True, True]
+
+
+@pytest.mark.asyncio
+async def test_cacheable_results_expire(registry):
+    """测试可缓存工具的结果在TTL内复用"""
+    registry.register(CounterTool)
+    assert await registry.execute_tool("counter", key="a") == 1
+    assert await registry.execute_tool("counter", key="a") == 1
+    assert await registry.execute_tool("counter", key="b") == 2
+
+    await asyncio.sleep(0.15)
+    assert await registry.execute_tool("counter", key="a") == 3
+    assert registry.get_stats()["counter"]["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_can_be_disabled(registry):
+    """测试关闭缓存"""
+    registry.configure(cache_enabled=False)
+    registry.register(CounterTool)
+    await registry.execute_tool("counter")
+    assert await registry.execute_tool("counter") == 2
+
+
+def make_tool(name: str, description: str, pinned: bool = False):
+    """生成一个测试工具类"""
+    async def execute(self, **kwargs):
+        return name
+
+    return type(name, (BaseTool,), {
+        "name": name,
+        "description": description,
+        "parameters": {"room": {"type": "string", "description": "房间"}},
+        "pinned": pinned,
+        "execute": execute,
+    })
+
+
+def test_schemas_built_once(registry):
+    """测试schema只在注册时生成"""
+    registry.register(SleepTool)
+    first = registry.get_schemas()
+    assert registry.get_schemas()[0] is first[0]
+
+    registry.register(SleepTool)
+    assert registry.get_schemas()[0] is not first[0]
+
+
+def test_select_relevant_schemas(registry):
+    """测试按用户输入挑选相关工具，固定工具总是包含"""
+    registry.configure(top_k=2)
+    registry.register(make_tool("get_time", "查询当前时间", pinned=True))
+    registry.register(make_tool("light_control", "打开或关闭房间的灯"))
+    registry.register(make_tool("air_conditioner", "设置空调温度"))
+    registry.register(make_tool("weather", "查询城市天气预报"))
+    registry.register(make_tool("music_player", "播放音乐"))
+
+    names = [schema["name"] for schema in registry.select_schemas("把客厅的灯关掉")]
+    assert names[0] == "get_time"
+    assert names[1] == "light_control"
+    assert len(names) <= 3
+
+    names = [schema["name"] for schema in registry.select_schemas("明天北京天气怎么样")]
+    assert names[:2] == ["get_time", "weather"]
+
+
+@pytest.mark.asyncio
+async def test_select_falls_back_without_lexical_match(registry):
+    """测试没有词法匹配时返回全部工具，匹配不足时按调用次数补足"""
+    registry.configure(top_k=2)
+    registry.register(make_tool("light_control", "打开或关闭房间的灯"))
+    registry.register(make_tool("air_conditioner", "设置空调温度"))
+    registry.register(make_tool("weather", "查询城市天气预报"))
+    registry.register(make_tool("music_player", "播放音乐"))
+
+    assert len(registry.select_schemas("make it cozy in here")) == 4
+
+    await registry.execute_tool("music_player")
+    names = [schema["name"] for schema in registry.select_schemas("把客厅的灯关掉")]
+    assert names == ["light_control", "music_player"]
+
+
+def test_select_returns_all_when_few_tools(registry):
+    """测试工具较少或未配置 top_k 时返回全部工具"""
+    registry.register(make_tool("a_tool", "甲"))
+    registry.register(make_tool("b_tool", "乙"))
+    assert len(registry.select_schemas("任意")) == 2
+    registry.configure(top_k=5)
+    assert len(registry.select_schemas("任意")) == 2
@@ -0,0 +1,51 @@
+"""
+工具检索索引测试
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from src.skills.index import ToolIndex, tokenize
+
+
+def schema(name, description, **properties):
+    return {
+        "name": name,
+        "description": description,
+        "parameters": {"type": "object", "properties": properties},
+    }
+
+
+def test_tokenize_mixed_text():
+    """测试中英文混合文本切分"""
+    assert tokenize("setLight on") == ["set", "light", "on"]
+    assert tokenize("开灯") == ["开", "灯", "开灯"]
+
+
+def test_search_ranks_by_relevance():
+    """测试按相关性排序，参数描述也参与检索"""
+    index = ToolIndex()
+    index.add("light", schema("light", "Turn lights on or off"))
+    index.add("thermostat", schema("thermostat", "Set heating",
+                                   temperature={"type": "number", "description": "target temperature"}))
+    index.add("weather", schema("weather", "Weather forecast for a city"))
+
+    assert index.search("turn on the kitchen lights", 1)[0][0] == "light"
+    assert index.search("make it warmer, temperature 22", 1)[0][0] == "thermostat"
+    assert index.search("unrelated", 3) == []
+
+
+def test_remove_and_update():
+    """测试更新和移除工具"""
+    index = ToolIndex()
+    index.add("tool", schema("tool", "play music"))
+    index.add("tool", schema("tool", "open door"))
+    assert index.search("music", 1) == []
+    assert index.search("door", 1)[0][0] == "tool"
+    index.remove("tool")
+    assert len(index) == 0
+    assert index.search("door", 1) == []